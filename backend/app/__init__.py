@@ -1,43 +1,125 @@
+import importlib
+import sqlite3
+import time
+from contextlib import contextmanager
 from flask import Flask
 from flask_restx import Api
 from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
 from flask_cors import CORS
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.persistence.replicas import PIN_HEADER, RoutingSession, init_replica_routing
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+
+# (module, url prefix) of every API namespace, registered in this order
+NAMESPACES = [
+    ('app.api.v1.users', '/api/v1/users'),
+    ('app.api.v1.skills', '/api/v1/skills'),
+    ('app.api.v1.skill_sessions', '/api/v1/skill-sessions'),
+    ('app.api.v1.bookings', '/api/v1/bookings'),
+    ('app.api.v1.reviews', '/api/v1/reviews'),
+    ('app.api.v1.auth', '/api/v1/auth'),
+    ('app.api.v1.batch', '/api/v1/batch'),
+    ('app.api.v1.occurrences', '/api/v1/occurrences'),
+    ('app.api.v1.waitlist', '/api/v1/waitlist'),
+    ('app.api.v1.instructors', '/api/v1/instructors'),
+    ('app.api.v1.admin', '/api/v1/admin'),
+]
+
+
+@event.listens_for(Engine, 'connect')
+def _enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+    """SQLite only enforces foreign keys, and so their ON DELETE rules, when each connection asks."""
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        dbapi_connection.execute('PRAGMA foreign_keys=ON')
+
+
+@contextmanager
+def _timed(timings, label):
+    """Record how long a startup step takes, in milliseconds."""
+    start = time.perf_counter()
+    yield
+    timings[label] = round((time.perf_counter() - start) * 1000, 2)
 
 def create_app(config_class="config.DevelopmentConfig"):
     """ method used to create an app instance """
     app = Flask(__name__)
 
-    CORS(app, resources={r"/api/v1/*": {"origins": "http://localhost:3000"}}, supports_credentials=True)
     # Load configuration from the specified config class
     app.config.from_object(config_class)
 
+    CORS(app, resources={r"/api/v1/*": {"origins": app.config['CORS_ORIGINS']}}, supports_credentials=True,
+         expose_headers=[PIN_HEADER])
+
     api = Api(app, version='1.0', title='Skill Sessions API', description='Skill Sessions Booking Platform API')
     
     # Initialize the database with the app
     db.init_app(app)
 
-    # Initialize Flask-Migrate for handling database migrations
-    # migrate = Migrate(app, db)
-
-    from app.api.v1.users import api as users_ns
-    from app.api.v1.skills import api as skills_ns
-    from app.api.v1.skill_sessions import api as skill_sessions_ns
-    from app.api.v1.bookings import api as bookings_ns
-    from app.api.v1.reviews import api as reviews_ns
-    from app.api.v1.auth import api as auth_ns
-    # Register the namespaces
-    api.add_namespace(users_ns, path='/api/v1/users')
-    api.add_namespace(skills_ns, path='/api/v1/skills')
-    api.add_namespace(skill_sessions_ns, path='/api/v1/skill-sessions')
-    api.add_namespace(bookings_ns, path='/api/v1/bookings')
-    api.add_namespace(reviews_ns, path='/api/v1/reviews')
-    api.add_namespace(auth_ns, path='/api/v1/auth')
-
-    # Ensure database tables are created before the first request
+    # Send reads to replica binds (SQLALCHEMY_BINDS 'replica_<n>') when configured
+    with app.app_context():
+        init_replica_routing(app, db)
+
+    # Time every statement on every engine when SLOW_QUERY_LOG_ENABLED is on
+    from app.persistence.slow_queries import init_slow_query_log
     with app.app_context():
-        db.create_all()
-        
+        init_slow_query_log(app, db)
+
+    # Initialize Flask-Migrate for handling database migrations.
+    # Imported lazily: alembic is only needed by the `flask db` commands.
+    if app.config.get('DB_MIGRATIONS'):
+        from flask_migrate import Migrate
+        Migrate(app, db)
+
+    # Import and register the namespaces. The Swagger spec itself is only
+    # built by Flask-RESTX when /swagger.json is first requested.
+    timings = {}
+    for module_name, path in NAMESPACES:
+        with _timed(timings, f"import {module_name}"):
+            namespace = importlib.import_module(module_name).api
+        api.add_namespace(namespace, path=path)
+
+    # Repository backend: SQLAlchemy by default, or dict-backed repositories
+    # (optionally restored from a snapshot) for tests and read-mostly replicas
+    from app.services import facade
+    store = None
+    if app.config.get('REPOSITORY_BACKEND') == 'memory':
+        from app.persistence.memory_repository import InMemoryStore
+        snapshot_path = app.config.get('MEMORY_SNAPSHOT_PATH')
+        store = InMemoryStore.from_snapshot(snapshot_path) if snapshot_path else InMemoryStore()
+    facade.use_store(store)
+
+    # Cross-request cache under SQLAlchemyRepository.get for users, skills and sessions
+    from app.persistence.entity_cache import init_entity_cache
+    init_entity_cache(app)
+
+    # Token buckets checked by @rate_limited endpoints
+    from app.utils.rate_limit import init_rate_limiting
+    init_rate_limiting(app)
+
+    # Opt-in sampling profiler (PROFILING_ENABLED); registers no hooks when off
+    from app.utils.profiler import init_profiling
+    init_profiling(app)
+
+    # Batch jobs run by the scheduler (`flask complete-bookings`, ...)
+    from app.jobs import register_commands
+    register_commands(app)
+
+    # Ensure database tables are created before the first request.
+    # DB_CREATE_ALL=0 skips it once the schema is known to exist.
+    if app.config.get('DB_CREATE_ALL', True):
+        with _timed(timings, 'db.create_all'):
+            with app.app_context():
+                db.create_all()
+
+    # In-process change event bus, fed from the outbox when OUTBOX_BUS_INTERVAL is set
+    from app.services.outbox import init_outbox
+    init_outbox(app)
+
+    app.extensions['startup_timings'] = timings
+    if app.config.get('STARTUP_TIMINGS'):
+        for label, elapsed in timings.items():
+            app.logger.warning("startup: %s took %.2f ms", label, elapsed)
+
     return app
@@ -0,0 +1,243 @@
+from datetime import datetime, time, timedelta
+from flask import Response, current_app, request
+from flask_restx import Namespace, Resource
+from app.persistence.slow_queries import SORTS as SLOW_QUERY_SORTS, get_slow_query_log
+from app.utils.jwt_auth import jwt_required, admin_required
+from app.utils.profiler import get_profiler
+from app.utils.request_args import parse_day
+from app.services import facade
+
+api = Namespace('admin', description='Admin-only operations')
+
+MAX_COHORT_MONTHS = 24
+MAX_CONFLICTS = 1000
+MAX_SLOW_QUERIES = 500
+WINDOW_PARAMS = {'from': 'First day (YYYY-MM-DD), inclusive', 'to': 'Last day (YYYY-MM-DD), inclusive'}
+
+
+def _window():
+    """(start, end) datetimes for ?from=&to=, end exclusive; None for an open bound"""
+    first, last = parse_day(request.args.get('from')), parse_day(request.args.get('to'))
+    start = datetime.combine(first, time.min) if first else None
+    end = datetime.combine(last + timedelta(days=1), time.min) if last else None
+    return start, end
+
+
+def _report(name, **options):
+    # NumPy is only imported once an admin asks for a report, not at app startup
+    from app.services.reporting import get_report
+    try:
+        start, end = _window()
+    except ValueError:
+        return {'error': 'Invalid date format. Use YYYY-MM-DD'}, 400
+    report = get_report(name, start, end, **options)
+    return dict(report, **{'from': request.args.get('from'), 'to': request.args.get('to')}), 200
+
+
+@api.route('/reports/gmv-by-category')
+class GmvByCategoryReport(Resource):
+    @api.doc(params=WINDOW_PARAMS)
+    @api.response(200, 'Report generated successfully')
+    @api.response(400, 'Invalid query parameters')
+    @api.response(401, 'Authentication required')
+    @api.response(403, 'Admin privileges required')
+    @jwt_required
+    @admin_required
+    def get(self, current_user):
+        """Gross booking value per skill category, for bookings made in the window"""
+        return _report('gmv-by-category')
+
+
+@api.route('/reports/utilization')
+class UtilizationReport(Resource):
+    @api.doc(params=WINDOW_PARAMS)
+    @api.response(200, 'Report generated successfully')
+    @api.response(400, 'Invalid query parameters')
+    @api.response(401, 'Authentication required')
+    @api.response(403, 'Admin privileges required')
+    @jwt_required
+    @admin_required
+    def get(self, current_user):
+        """Booked participants / capacity by session type and difficulty level, for sessions held in the window"""
+        return _report('utilization')
+
+
+@api.route('/reports/cohort-retention')
+class CohortRetentionReport(Resource):
+    @api.doc(params=dict(WINDOW_PARAMS, months=f'Months tracked after signup (default 6, max {MAX_COHORT_MONTHS})'))
+    @api.response(200, 'Report generated successfully')
+    @api.response(400, 'Invalid query parameters')
+    @api.response(401, 'Authentication required')
+    @api.response(403, 'Admin privileges required')
+    @jwt_required
+    @admin_required
+    def get(self, current_user):
+        """Monthly cohorts of users who signed up in the window, and how many book again each month"""
+        months = request.args.get('months', '6')
+        if not months.isdigit() or not 1 <= int(months) <= MAX_COHORT_MONTHS:
+            return {'error': f'months must be an integer between 1 and {MAX_COHORT_MONTHS}'}, 400
+        return _report('cohort-retention', months=int(months))
+
+
+@api.route('/schedule-conflicts')
+class ScheduleConflicts(Resource):
+    @api.doc(params={'limit': f'Maximum conflicts returned (default 100, max {MAX_CONFLICTS})'})
+    @api.response(200, 'Conflicts listed successfully')
+    @api.response(400, 'Invalid query parameters')
+    @api.response(401, 'Authentication required')
+    @api.response(403, 'Admin privileges required')
+    @jwt_required
+    @admin_required
+    def get(self, current_user):
+        """Overlapping bookings of one user and overlapping occurrences of one instructor"""
+        limit = request.args.get('limit', '100')
+        if not limit.isdigit() or not 1 <= int(limit) <= MAX_CONFLICTS:
+            return {'error': f'limit must be an integer between 1 and {MAX_CONFLICTS}'}, 400
+
+        conflicts = facade.find_schedule_conflicts()
+        return {
+            'total': len(conflicts),
+            'conflicts': [
+                dict(conflict._asdict(), overlap_start=conflict.overlap_start.isoformat(),
+                     overlap_end=conflict.overlap_end.isoformat())
+                for conflict in conflicts[:int(limit)]
+            ]
+        }, 200
+
+
+def serialize_purge_job(job):
+    return {
+        'id': job.id,
+        'target': job.target,
+        'target_id': job.target_id,
+        'status': job.status,
+        'deleted': job.deleted,
+        'batches': job.batches,
+        'error': job.error,
+        'created_at': job.created_at.isoformat(),
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None
+    }
+
+
+@api.route('/purge-jobs/<job_id>')
+class PurgeJobResource(Resource):
+    @api.response(200, 'Job progress retrieved successfully')
+    @api.response(401, 'Authentication required')
+    @api.response(403, 'Admin privileges required')
+    @api.response(404, 'Job not found')
+    @jwt_required
+    @admin_required
+    def get(self, current_user, job_id):
+        """Progress of a background deletion (DELETE ...?background=true)"""
+        job = facade.get_purge_job(job_id)
+        if not job:
+            return {'error': 'Purge job not found'}, 404
+        return serialize_purge_job(job), 200
+
+
+@api.route('/profiles')
+class Profiles(Resource):
+    @api.response(200, 'Profiled routes listed successfully')
+    @api.response(401, 'Authentication required')
+    @api.response(403, 'Admin privileges required')
+    @api.response(404, 'Profiling is not enabled')
+    @jwt_required
+    @admin_required
+    def get(self, current_user):
+        """Routes profiled by this process, with their profiled request and stack sample counts"""
+        profiler = get_profiler()
+        if profiler is None:
+            return {'error': 'Profiling is not enabled'}, 404
+        return {'routes': profiler.summary()}, 200
+
+    @api.response(200, 'Profiles cleared')
+    @api.response(401, 'Authentication required')
+    @api.response(403, 'Admin privileges required')
+    @api.response(404, 'Profiling is not enabled')
+    @jwt_required
+    @admin_required
+    def delete(self, current_user):
+        """Drop the samples collected so far"""
+        profiler = get_profiler()
+        if profiler is None:
+            return {'error': 'Profiling is not enabled'}, 404
+        profiler.reset()
+        return {'message': 'Profiles cleared successfully'}, 200
+
+
+@api.route('/profiles/stacks')
+class ProfileStacks(Resource):
+    @api.doc(params={'route': "Route as listed by /admin/profiles, e.g. 'GET /api/v1/users/<user_id>' (default: all)",
+                     'format': "'collapsed' (text, for flamegraph.pl or speedscope; default) or 'tree' (JSON)"})
+    @api.response(200, 'Stacks retrieved successfully')
+    @api.response(400, 'Invalid query parameters')
+    @api.response(401, 'Authentication required')
+    @api.response(403, 'Admin privileges required')
+    @api.response(404, 'Profiling is not enabled')
+    @jwt_required
+    @admin_required
+    def get(self, current_user):
+        """Sampled stacks of one route or all of them, as collapsed stacks or a flame graph tree"""
+        profiler = get_profiler()
+        if profiler is None:
+            return {'error': 'Profiling is not enabled'}, 404
+        route, output = request.args.get('route'), request.args.get('format', 'collapsed')
+        if output == 'tree':
+            return profiler.flamegraph(route), 200
+        if output != 'collapsed':
+            return {'error': "format must be 'collapsed' or 'tree'"}, 400
+        return Response(profiler.collapsed(route), mimetype='text/plain')
+
+
+@api.route('/slow-queries')
+class SlowQueries(Resource):
+    @api.doc(params={'limit': f'Maximum statements returned (default 20, max {MAX_SLOW_QUERIES})',
+                     'sort': f"One of {', '.join(SLOW_QUERY_SORTS)} (default total)"})
+    @api.response(200, 'Slow queries listed successfully')
+    @api.response(400, 'Invalid query parameters')
+    @api.response(401, 'Authentication required')
+    @api.response(403, 'Admin privileges required')
+    @api.response(404, 'The slow-query log is not enabled')
+    @jwt_required
+    @admin_required
+    def get(self, current_user):
+        """Slowest statements of this process by fingerprint, with their callers and plan"""
+        log = get_slow_query_log()
+        if log is None:
+            return {'error': 'The slow-query log is not enabled'}, 404
+        limit, sort = request.args.get('limit', '20'), request.args.get('sort', 'total')
+        if not limit.isdigit() or not 1 <= int(limit) <= MAX_SLOW_QUERIES:
+            return {'error': f'limit must be an integer between 1 and {MAX_SLOW_QUERIES}'}, 400
+        if sort not in SLOW_QUERY_SORTS:
+            return {'error': f"sort must be one of {', '.join(SLOW_QUERY_SORTS)}"}, 400
+        return {'threshold': log.threshold, 'queries': log.top(int(limit), sort)}, 200
+
+    @api.response(200, 'Slow-query log cleared')
+    @api.response(401, 'Authentication required')
+    @api.response(403, 'Admin privileges required')
+    @api.response(404, 'The slow-query log is not enabled')
+    @jwt_required
+    @admin_required
+    def delete(self, current_user):
+        """Drop the statements recorded so far"""
+        log = get_slow_query_log()
+        if log is None:
+            return {'error': 'The slow-query log is not enabled'}, 404
+        log.reset()
+        return {'message': 'Slow-query log cleared successfully'}, 200
+
+
+@api.route('/slow-queries/dump')
+class SlowQueriesDump(Resource):
+    @api.response(200, 'Slow-query log written')
+    @api.response(401, 'Authentication required')
+    @api.response(403, 'Admin privileges required')
+    @api.response(404, 'The slow-query log is not enabled')
+    @jwt_required
+    @admin_required
+    def post(self, current_user):
+        """Write this process's whole slow-query log to SLOW_QUERY_DUMP_PATH as JSON"""
+        log = get_slow_query_log()
+        if log is None:
+            return {'error': 'The slow-query log is not enabled'}, 404
+        return {'path': log.dump(current_app.config['SLOW_QUERY_DUMP_PATH'])}, 200
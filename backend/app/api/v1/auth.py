@@ -1,7 +1,8 @@
 from flask_restx import Namespace, Resource, fields
 from flask import request
 from app.services import facade
-from app.utils.jwt_auth import get_current_user_from_token
+from app.utils.jwt_auth import get_current_user_from_token, jwt_required
+from app.utils.rate_limit import rate_limited
 
 api = Namespace('auth', description='Authentication operations')
 
@@ -23,9 +24,30 @@ register_model = api.model('Register', {
     'is_instructor': fields.Boolean(required=False, description='Is user an instructor')
 })
 
+refresh_model = api.model('Refresh', {
+    'refresh_token': fields.String(required=True, description='Refresh token from the last login or refresh')
+})
+
+def serialize_login(user, token, refresh_token=None):
+    """Response body for a successful login, registration or refresh"""
+    return {
+        'access_token': token,
+        'refresh_token': refresh_token,
+        'user': {
+            'id': user.id,
+            'first_name': user.first_name,
+            'last_name': user.last_name,
+            'email': user.email,
+            'is_instructor': user.is_instructor,
+            'is_admin': user.is_admin
+        }
+    }
+
 @api.route('/login')
 class Login(Resource):
     @api.expect(login_model)
+    @api.response(429, 'Too many attempts, see Retry-After')
+    @rate_limited('login', account_field='email')
     def post(self):
         """Authenticate user and return a JWT token"""
         credentials = api.payload
@@ -35,21 +57,13 @@ class Login(Resource):
             return {'error': 'Invalid credentials'}, 401
 
         token = user.generate_token()
-        return {
-            'access_token': token,
-            'user': {
-                'id': user.id,
-                'first_name': user.first_name,
-                'last_name': user.last_name,
-                'email': user.email,
-                'is_instructor': user.is_instructor,
-                'is_admin': user.is_admin
-            }
-        }, 200
+        return serialize_login(user, token, facade.issue_refresh_token(user.id)), 200
 
 @api.route('/register')
 class Register(Resource):
     @api.expect(register_model)
+    @api.response(429, 'Too many attempts, see Retry-After')
+    @rate_limited('register')
     def post(self):
         """Register a new user and return a JWT token"""
         user_data = api.payload
@@ -64,20 +78,48 @@ class Register(Resource):
             new_user = facade.create_user(user_data)
             token = new_user.generate_token()
 
-            return {
-                'access_token': token,
-                'user': {
-                    'id': new_user.id,
-                    'first_name': new_user.first_name,
-                    'last_name': new_user.last_name,
-                    'email': new_user.email,
-                    'is_instructor': new_user.is_instructor,
-                    'is_admin': new_user.is_admin
-                }
-            }, 201
+            return serialize_login(new_user, token, facade.issue_refresh_token(new_user.id)), 201
         except ValueError as e:
             return {'error': str(e)}, 400
 
+@api.route('/refresh')
+class Refresh(Resource):
+    @api.expect(refresh_model)
+    @api.response(200, 'New access and refresh tokens')
+    @api.response(401, 'Refresh token invalid, expired, revoked or reused')
+    def post(self):
+        """Exchange a refresh token for a new access token, without the password
+
+        The refresh token is rotated: the response carries the next one, and
+        presenting a used token again logs out every device of that login.
+        """
+        try:
+            user, token, refresh_token = facade.refresh_session((api.payload or {}).get('refresh_token'))
+        except ValueError as error:
+            return {'error': str(error)}, 401
+        return serialize_login(user, token, refresh_token), 200
+
+@api.route('/logout')
+class Logout(Resource):
+    @api.expect(refresh_model)
+    @api.response(200, 'Refresh token revoked')
+    def post(self):
+        """Revoke a refresh token and the tokens it was rotated into"""
+        facade.revoke_refresh_token((api.payload or {}).get('refresh_token'))
+        return {'message': 'Logged out'}, 200
+
+@api.route('/logout-all')
+class LogoutAll(Resource):
+    @api.response(200, 'Every refresh token of the user revoked')
+    @api.response(401, 'Authentication required')
+    @jwt_required
+    def post(self, current_user):
+        """Log out everywhere: revoke every refresh token of the current user
+
+        Access tokens already issued stay valid until they expire.
+        """
+        return {'message': 'Logged out everywhere', 'revoked': facade.revoke_refresh_tokens(current_user.id)}, 200
+
 @api.route('/me')
 class CurrentUser(Resource):
     def get(self):
@@ -0,0 +1,100 @@
+from flask import request, current_app, g
+from flask_restx import Namespace, Resource, fields
+from app.persistence.transaction import unit_of_work
+
+api = Namespace('batch', description='Run several API calls in one round trip')
+
+MAX_SUB_REQUESTS = 20
+ALLOWED_METHODS = ['GET', 'POST', 'PUT', 'DELETE']
+
+sub_request_model = api.model('SubRequest', {
+    'method': fields.String(required=True, description='HTTP method: GET, POST, PUT or DELETE'),
+    'path': fields.String(required=True, description='API path, e.g. /api/v1/users/<user_id>'),
+    'body': fields.Raw(description='JSON body for POST/PUT')
+})
+
+batch_model = api.model('Batch', {
+    'requests': fields.List(fields.Nested(sub_request_model), required=True,
+                            description='Sub-requests, executed in order')
+})
+
+
+class _SubRequestFailed(Exception):
+    """Raised to roll back the batch transaction when a sub-request fails."""
+
+
+def _dispatch(sub_request):
+    """Run one sub-request through the app and return (status_code, body).
+
+    The request context reuses the current app context, so every sub-request
+    shares the same database session (and transaction). That context's `g`
+    would be shared too, so each sub-request runs with an empty one (no
+    DataLoaders or auth state from the batch or earlier sub-requests) and the
+    batch's own is put back afterwards.
+    """
+    headers = {}
+    if request.headers.get('Authorization'):
+        headers['Authorization'] = request.headers['Authorization']
+
+    request_globals = vars(g._get_current_object())
+    outer = request_globals.copy()
+    request_globals.clear()
+    try:
+        with current_app.test_request_context(
+                sub_request['path'], method=sub_request['method'].upper(),
+                json=sub_request.get('body'), headers=headers):
+            try:
+                response = current_app.full_dispatch_request()
+            except Exception:
+                # the details go to the log, not to the client
+                current_app.logger.exception("batch sub-request %s %s failed",
+                                             sub_request['method'], sub_request['path'])
+                return 500, {'error': 'Internal server error'}
+            return response.status_code, response.get_json(silent=True)
+    finally:
+        request_globals.clear()
+        request_globals.update(outer)
+
+
+@api.route('/')
+class Batch(Resource):
+    @api.expect(batch_model)
+    @api.response(200, 'Batch executed; see per-request status codes')
+    @api.response(400, 'Invalid batch')
+    def post(self):
+        """Execute several API requests in one HTTP call and one DB transaction
+
+        Sub-requests run in order. If any of them fails (status >= 400) the
+        whole batch is rolled back and the remaining ones are skipped (424).
+        """
+        sub_requests = (api.payload or {}).get('requests')
+        if not isinstance(sub_requests, list) or not sub_requests:
+            return {'error': 'requests must be a non-empty list'}, 400
+        if len(sub_requests) > MAX_SUB_REQUESTS:
+            return {'error': f'At most {MAX_SUB_REQUESTS} requests per batch'}, 400
+
+        for sub_request in sub_requests:
+            if not isinstance(sub_request, dict) or not isinstance(sub_request.get('path'), str):
+                return {'error': 'Each request needs a method and a path'}, 400
+            if str(sub_request.get('method', '')).upper() not in ALLOWED_METHODS:
+                return {'error': f"Method must be one of: {', '.join(ALLOWED_METHODS)}"}, 400
+            if not sub_request['path'].startswith('/api/v1/') or sub_request['path'].startswith('/api/v1/batch'):
+                return {'error': 'Paths must target /api/v1/ and cannot be nested batches'}, 400
+
+        responses = []
+        try:
+            with unit_of_work():
+                for sub_request in sub_requests:
+                    status_code, body = _dispatch(sub_request)
+                    responses.append({'status': status_code, 'body': body})
+                    if status_code >= 400:
+                        raise _SubRequestFailed()
+        except _SubRequestFailed:
+            pass
+
+        committed = all(response['status'] < 400 for response in responses)
+        skipped = len(sub_requests) - len(responses)
+        responses.extend({'status': 424, 'body': {'error': 'Skipped: an earlier request failed'}}
+                         for _ in range(skipped))
+
+        return {'committed': committed, 'responses': responses}, 200
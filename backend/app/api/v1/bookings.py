@@ -1,7 +1,10 @@
+from flask import request
 from flask_restx import Namespace, Resource, fields
 from app.services import facade
 from datetime import datetime
 from app.utils.jwt_auth import jwt_required
+from app.utils.idempotency import idempotent
+from app.utils.dataloader import get_loader
 
 api = Namespace('bookings', description='Booking operations')
 
@@ -9,7 +12,8 @@ api = Namespace('bookings', description='Booking operations')
 booking_model = api.model('Booking', {
     'user_id': fields.String(required=True, description='ID of the user making the booking'),
     'session_id': fields.String(required=True, description='ID of the skill session to book'),
-    'booking_date': fields.DateTime(required=True, description='Date and time of the session'),
+    'booking_date': fields.DateTime(description='Date and time of the session (not needed with occurrence_id)'),
+    'occurrence_id': fields.String(description='Scheduled session occurrence to book; sets booking_date'),
     'participants': fields.Integer(description='Number of participants (default: 1)'),
     'special_requests': fields.String(description='Special requests or notes')
 })
@@ -27,7 +31,11 @@ class BookingList(Resource):
     @api.response(400, 'Invalid input data or booking validation failed')
     @api.response(401, 'Authentication required')
     @api.response(404, 'Session not found')
+    @api.response(409, 'A request with the same Idempotency-Key is in progress')
+    @api.response(422, 'Idempotency-Key reused with a different payload')
+    @api.header('Idempotency-Key', 'Optional client key making retries safe')
     @jwt_required
+    @idempotent
     def post(self, current_user):
         """Create a new booking"""
         booking_data = api.payload
@@ -35,13 +43,12 @@ class BookingList(Resource):
         # Set user_id from authenticated user
         booking_data['user_id'] = current_user.id
 
-        # Validate required fields
-        required_fields = ['session_id', 'booking_date']
-        if not all(field in booking_data for field in required_fields):
+        # Validate required fields: a scheduled occurrence or a free-form date
+        if 'session_id' not in booking_data or not (booking_data.get('booking_date') or booking_data.get('occurrence_id')):
             return {'error': 'Missing required fields'}, 400
 
         # Convert string date to datetime if needed
-        if isinstance(booking_data['booking_date'], str):
+        if isinstance(booking_data.get('booking_date'), str):
             try:
                 booking_data['booking_date'] = datetime.fromisoformat(booking_data['booking_date'])
             except ValueError:
@@ -56,6 +63,8 @@ class BookingList(Resource):
             'id': str(new_booking.id),
             'user_id': new_booking.user_id,
             'session_id': new_booking.session_id,
+            'occurrence_id': new_booking.occurrence_id,
+            'booking_date': new_booking.booking_date.isoformat(),
             'status': new_booking.status,
             'total_price': new_booking.total_price,
             'message': 'Booking created successfully'
@@ -67,6 +76,12 @@ class BookingList(Resource):
         bookings = facade.get_all_bookings()
         output = []
 
+        # Batch the session and user lookups: one IN query each for the whole page
+        sessions = get_loader('skill_sessions')
+        users = get_loader('users')
+        sessions.prime_many(booking.session_id for booking in bookings)
+        users.prime_many(booking.user_id for booking in bookings)
+
         for booking in bookings:
             booking_data = {
                 'id': str(booking.id),
@@ -81,19 +96,21 @@ class BookingList(Resource):
             }
 
             # Add session details
-            if hasattr(booking, 'session_r') and booking.session_r:
+            session = sessions.load(booking.session_id)
+            if session:
                 booking_data['session'] = {
-                    'title': booking.session_r.title,
-                    'duration': booking.session_r.duration,
-                    'session_type': booking.session_r.session_type
+                    'title': session.title,
+                    'duration': session.duration,
+                    'session_type': session.session_type
                 }
 
             # Add user details
-            if hasattr(booking, 'user_r') and booking.user_r:
+            user = users.load(booking.user_id)
+            if user:
                 booking_data['user'] = {
-                    'first_name': booking.user_r.first_name,
-                    'last_name': booking.user_r.last_name,
-                    'email': booking.user_r.email
+                    'first_name': user.first_name,
+                    'last_name': user.last_name,
+                    'email': user.email
                 }
 
             output.append(booking_data)
@@ -102,11 +119,12 @@ class BookingList(Resource):
 
 @api.route('/<booking_id>')
 class BookingResource(Resource):
+    @api.doc(params={'history': 'true: include bookings moved to the archive'})
     @api.response(200, 'Booking details retrieved successfully')
     @api.response(404, 'Booking not found')
     def get(self, booking_id):
         """Get booking details by ID"""
-        booking = facade.get_booking(booking_id)
+        booking = facade.get_booking(booking_id, include_archived=request.args.get('history') == 'true')
         if not booking:
             return {'error': 'Booking not found'}, 404
 
@@ -126,26 +144,28 @@ class BookingResource(Resource):
         }
 
         # Add session details
-        if hasattr(booking, 'session_r') and booking.session_r:
+        session = get_loader('skill_sessions').load(booking.session_id)
+        if session:
             output['session'] = {
-                'id': str(booking.session_r.id),
-                'title': booking.session_r.title,
-                'description': booking.session_r.description,
-                'price': booking.session_r.price,
-                'duration': booking.session_r.duration,
-                'session_type': booking.session_r.session_type,
-                'difficulty_level': booking.session_r.difficulty_level,
-                'location': booking.session_r.location,
-                'instructor_id': booking.session_r.instructor_id
+                'id': str(session.id),
+                'title': session.title,
+                'description': session.description,
+                'price': session.price,
+                'duration': session.duration,
+                'session_type': session.session_type,
+                'difficulty_level': session.difficulty_level,
+                'location': session.location,
+                'instructor_id': session.instructor_id
             }
 
         # Add user details
-        if hasattr(booking, 'user_r') and booking.user_r:
+        user = get_loader('users').load(booking.user_id)
+        if user:
             output['user'] = {
-                'id': str(booking.user_r.id),
-                'first_name': booking.user_r.first_name,
-                'last_name': booking.user_r.last_name,
-                'email': booking.user_r.email
+                'id': str(user.id),
+                'first_name': user.first_name,
+                'last_name': user.last_name,
+                'email': user.email
             }
 
         return output, 200
@@ -214,12 +234,16 @@ class BookingComplete(Resource):
 
 @api.route('/user/<user_id>')
 class UserBookings(Resource):
+    @api.doc(params={'history': 'true: include bookings moved to the archive'})
     @api.response(200, 'User bookings retrieved successfully')
     def get(self, user_id):
         """Get all bookings for a specific user"""
-        bookings = facade.get_bookings_by_user(user_id)
+        bookings = facade.get_bookings_by_user(user_id, include_archived=request.args.get('history') == 'true')
         output = []
 
+        sessions = get_loader('skill_sessions')
+        sessions.prime_many(booking.session_id for booking in bookings)
+
         for booking in bookings:
             booking_data = {
                 'id': str(booking.id),
@@ -232,13 +256,14 @@ class UserBookings(Resource):
             }
 
             # Add session details
-            if hasattr(booking, 'session_r') and booking.session_r:
+            session = sessions.load(booking.session_id)
+            if session:
                 booking_data['session'] = {
-                    'id': str(booking.session_r.id),
-                    'title': booking.session_r.title,
-                    'duration': booking.session_r.duration,
-                    'session_type': booking.session_r.session_type,
-                    'instructor_id': booking.session_r.instructor_id
+                    'id': str(session.id),
+                    'title': session.title,
+                    'duration': session.duration,
+                    'session_type': session.session_type,
+                    'instructor_id': session.instructor_id
                 }
 
             output.append(booking_data)
@@ -247,12 +272,16 @@ class UserBookings(Resource):
 
 @api.route('/session/<session_id>')
 class SessionBookings(Resource):
+    @api.doc(params={'history': 'true: include bookings moved to the archive'})
     @api.response(200, 'Session bookings retrieved successfully')
     def get(self, session_id):
         """Get all bookings for a specific session"""
-        bookings = facade.get_bookings_by_session(session_id)
+        bookings = facade.get_bookings_by_session(session_id, include_archived=request.args.get('history') == 'true')
         output = []
 
+        users = get_loader('users')
+        users.prime_many(booking.user_id for booking in bookings)
+
         for booking in bookings:
             booking_data = {
                 'id': str(booking.id),
@@ -265,11 +294,12 @@ class SessionBookings(Resource):
             }
 
             # Add user details
-            if hasattr(booking, 'user_r') and booking.user_r:
+            user = users.load(booking.user_id)
+            if user:
                 booking_data['user'] = {
-                    'first_name': booking.user_r.first_name,
-                    'last_name': booking.user_r.last_name,
-                    'email': booking.user_r.email
+                    'first_name': user.first_name,
+                    'last_name': user.last_name,
+                    'email': user.email
                 }
 
             output.append(booking_data)
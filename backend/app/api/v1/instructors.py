@@ -0,0 +1,85 @@
+from datetime import timedelta
+from flask import request
+from flask_restx import Namespace, Resource
+from app.services import facade
+from app.models.session_daily_stats import SessionDailyStats
+from app.utils.jwt_auth import jwt_required
+from app.utils.request_args import parse_day
+
+api = Namespace('instructors', description='Instructor analytics')
+
+STATUSES = ['pending', 'confirmed', 'cancelled', 'completed']
+PERIOD_START = {
+    'day': lambda day: day,
+    'week': lambda day: day - timedelta(days=day.weekday()),
+    'month': lambda day: day.replace(day=1),
+}
+
+
+def summarize(row):
+    """Response body for one rollup row (a day, a period, or the totals)"""
+    return {
+        'bookings': dict({status: row[status] for status in STATUSES},
+                         total=sum(row[status] for status in STATUSES)),
+        'participants': row['participants'],
+        'booked_value': round(row['booked_value'], 2),
+        'revenue': round(row['revenue'], 2),
+        'fill_rate': round(row['participants'] / row['capacity'], 4) if row['capacity'] else None,
+        'reviews': row['review_count'],
+        'average_rating': round(row['rating_sum'] / row['review_count'], 2) if row['review_count'] else None,
+    }
+
+
+def group_rows(daily_rows, granularity):
+    """Add up daily rows per period, keyed by the period's first day"""
+    totals = dict.fromkeys(SessionDailyStats.COUNTERS + ('capacity',), 0)
+    periods = {}
+    for row in daily_rows:
+        start = PERIOD_START[granularity](row['day'])
+        period = periods.setdefault(start, dict.fromkeys(totals, 0))
+        for name in totals:
+            period[name] += row[name]
+            totals[name] += row[name]
+    return totals, periods
+
+
+@api.route('/<instructor_id>/stats')
+class InstructorStats(Resource):
+    @api.doc(params={'from': 'First day (YYYY-MM-DD), inclusive', 'to': 'Last day (YYYY-MM-DD), inclusive',
+                     'granularity': 'day (default), week or month'})
+    @api.response(200, 'Instructor stats retrieved successfully')
+    @api.response(400, 'Invalid query parameters')
+    @api.response(401, 'Authentication required')
+    @api.response(403, 'Only the instructor or an admin can see these stats')
+    @api.response(404, 'Instructor not found')
+    @jwt_required
+    def get(self, current_user, instructor_id):
+        """Revenue, bookings per status, fill rate and ratings, per day of session
+
+        Served from daily rollups maintained on every booking and review change.
+        """
+        if current_user.id != instructor_id and not current_user.is_admin:
+            return {'error': 'Only the instructor or an admin can see these stats'}, 403
+
+        instructor = facade.get_user(instructor_id)
+        if not instructor or not instructor.is_instructor:
+            return {'error': 'Instructor not found'}, 404
+
+        granularity = request.args.get('granularity', 'day')
+        if granularity not in PERIOD_START:
+            return {'error': 'granularity must be one of: day, week, month'}, 400
+        try:
+            start = parse_day(request.args.get('from'))
+            end = parse_day(request.args.get('to'))
+        except ValueError:
+            return {'error': 'Invalid date format. Use YYYY-MM-DD'}, 400
+
+        totals, periods = group_rows(facade.get_instructor_daily_stats(instructor_id, start, end), granularity)
+        return {
+            'instructor_id': instructor_id,
+            'from': start.isoformat() if start else None,
+            'to': end.isoformat() if end else None,
+            'granularity': granularity,
+            'totals': summarize(totals),
+            'periods': [dict(summarize(period), start=day.isoformat()) for day, period in sorted(periods.items())]
+        }, 200
@@ -0,0 +1,137 @@
+from datetime import datetime, timedelta
+from flask import request
+from flask_restx import Namespace, Resource, fields
+from app.persistence.occurrence_repository import SEARCH_FILTERS
+from app.services import facade
+from app.utils.jwt_auth import jwt_required
+
+api = Namespace('occurrences', description='Scheduled session time slots and availability search')
+
+MAX_SEARCH_RANGE = timedelta(days=92)
+MAX_RESULTS = 500
+SESSION_FILTERS = list(SEARCH_FILTERS)
+
+occurrence_model = api.model('SessionOccurrence', {
+    'session_id': fields.String(required=True, description='ID of the skill session'),
+    'starts_at': fields.DateTime(required=True, description='Start time (ISO format); ends after the session duration'),
+    'capacity': fields.Integer(description="Spots in this occurrence (default: the session's max_participants)")
+})
+
+
+def serialize_occurrence(occurrence):
+    """Response body for an occurrence, with what a calendar view needs of its session"""
+    session = occurrence.session_r
+    return {
+        'id': occurrence.id,
+        'session_id': occurrence.session_id,
+        'starts_at': occurrence.starts_at.isoformat(),
+        'ends_at': occurrence.ends_at.isoformat(),
+        'capacity': occurrence.capacity,
+        'booked': occurrence.booked,
+        'available_spots': occurrence.get_available_spots(),
+        'status': occurrence.status,
+        'session': {
+            'title': session.title,
+            'price': session.price,
+            'session_type': session.session_type,
+            'difficulty_level': session.difficulty_level,
+            'instructor_id': session.instructor_id
+        }
+    }
+
+
+def _parse_range():
+    """[from, to) datetimes from the query string; raises ValueError"""
+    start, end = request.args.get('from'), request.args.get('to')
+    if not start or not end:
+        raise ValueError("from and to are required")
+    start, end = datetime.fromisoformat(start), datetime.fromisoformat(end)
+    if not start < end <= start + MAX_SEARCH_RANGE:
+        raise ValueError(f"to must be after from, and at most {MAX_SEARCH_RANGE.days} days later")
+    return start, end
+
+
+@api.route('/')
+class OccurrenceList(Resource):
+    @api.expect(occurrence_model)
+    @api.response(201, 'Occurrence successfully scheduled')
+    @api.response(400, 'Invalid input data')
+    @api.response(401, 'Authentication required')
+    @api.response(403, 'Only the session instructor can schedule it')
+    @api.response(404, 'Session not found')
+    @jwt_required
+    def post(self, current_user):
+        """Schedule an occurrence of a skill session"""
+        occurrence_data = api.payload
+
+        if not occurrence_data.get('session_id') or not occurrence_data.get('starts_at'):
+            return {'error': 'Missing required fields'}, 400
+        session = facade.get_skill_session(occurrence_data['session_id'])
+        if not session:
+            return {'error': 'Skill session not found'}, 404
+        if session.instructor_id != current_user.id and not current_user.is_admin:
+            return {'error': 'Only the session instructor can schedule it'}, 403
+
+        try:
+            occurrence_data['starts_at'] = datetime.fromisoformat(occurrence_data['starts_at'])
+        except (TypeError, ValueError):
+            return {'error': 'Invalid date format. Use ISO format (YYYY-MM-DDTHH:MM:SS)'}, 400
+
+        try:
+            occurrence = facade.create_session_occurrence(occurrence_data)
+        except ValueError as error:
+            return {'error': str(error)}, 400
+
+        return serialize_occurrence(occurrence), 201
+
+    @api.doc(params={
+        'from': 'Range start (ISO datetime), inclusive', 'to': 'Range end (ISO datetime), exclusive',
+        'min_spots': 'Only occurrences with at least this many free spots (default 1)',
+        'limit': f'Maximum results (default 100, max {MAX_RESULTS})',
+        **{name: f'Filter on the session {name}' for name in SESSION_FILTERS}
+    })
+    @api.response(200, 'Available occurrences retrieved successfully')
+    @api.response(400, 'Invalid query parameters')
+    def get(self):
+        """Search bookable occurrences overlapping a date range, earliest first"""
+        try:
+            start, end = _parse_range()
+            min_spots = int(request.args.get('min_spots', 1))
+            limit = min(int(request.args.get('limit', 100)), MAX_RESULTS)
+            if min_spots < 1 or limit < 1:
+                raise ValueError("min_spots and limit must be at least 1")
+        except ValueError as error:
+            return {'error': str(error)}, 400
+
+        filters = {name: request.args[name] for name in SESSION_FILTERS if request.args.get(name)}
+        occurrences = facade.search_availability(start, end, min_spots=min_spots, limit=limit, **filters)
+        return [serialize_occurrence(occurrence) for occurrence in occurrences], 200
+
+
+@api.route('/<occurrence_id>')
+class OccurrenceResource(Resource):
+    @api.response(200, 'Occurrence details retrieved successfully')
+    @api.response(404, 'Occurrence not found')
+    def get(self, occurrence_id):
+        """Get occurrence details by ID"""
+        occurrence = facade.get_session_occurrence(occurrence_id)
+        if not occurrence:
+            return {'error': 'Occurrence not found'}, 404
+        return serialize_occurrence(occurrence), 200
+
+
+@api.route('/session/<session_id>')
+class SessionOccurrences(Resource):
+    @api.doc(params={'from': 'Range start (ISO datetime), optional with to', 'to': 'Range end (ISO datetime)'})
+    @api.response(200, 'Session occurrences retrieved successfully')
+    @api.response(400, 'Invalid query parameters')
+    def get(self, session_id):
+        """Get a session's calendar, optionally within a date range"""
+        start = end = None
+        if request.args.get('from') or request.args.get('to'):
+            try:
+                start, end = _parse_range()
+            except ValueError as error:
+                return {'error': str(error)}, 400
+        occurrences = facade.get_session_occurrences(session_id, start, end)
+        return [serialize_occurrence(occurrence) for occurrence in occurrences], 200
@@ -1,6 +1,9 @@
+from flask import request
 from flask_restx import Namespace, Resource, fields
 from app.services import facade
 from app.utils.jwt_auth import jwt_required
+from app.utils.idempotency import idempotent
+from app.utils.dataloader import get_loader
 
 api = Namespace('reviews', description='Review operations')
 
@@ -21,7 +24,11 @@ class ReviewList(Resource):
     @api.response(400, 'Invalid input data or validation failed')
     @api.response(401, 'Authentication required')
     @api.response(404, 'User, session, instructor, or booking not found')
+    @api.response(409, 'A request with the same Idempotency-Key is in progress')
+    @api.response(422, 'Idempotency-Key reused with a different payload')
+    @api.header('Idempotency-Key', 'Optional client key making retries safe')
     @jwt_required
+    @idempotent
     def post(self, current_user):
         """Create a new review for a completed session"""
         review_data = api.payload
@@ -84,6 +91,13 @@ class ReviewList(Resource):
         reviews = facade.get_all_reviews()
         output = []
 
+        # Reviewers and instructors share one users batch; sessions get their own
+        users = get_loader('users')
+        sessions = get_loader('skill_sessions')
+        users.prime_many(review.user_id for review in reviews)
+        users.prime_many(review.instructor_id for review in reviews)
+        sessions.prime_many(review.session_id for review in reviews)
+
         for review in reviews:
             review_data = {
                 'id': str(review.id),
@@ -98,26 +112,29 @@ class ReviewList(Resource):
             }
 
             # Add user details
-            if hasattr(review, 'user_r') and review.user_r:
+            reviewer = users.load(review.user_id)
+            if reviewer:
                 review_data['user'] = {
-                    'first_name': review.user_r.first_name,
-                    'last_name': review.user_r.last_name
+                    'first_name': reviewer.first_name,
+                    'last_name': reviewer.last_name
                 }
 
             # Add session details
-            if hasattr(review, 'session_r') and review.session_r:
+            session = sessions.load(review.session_id)
+            if session:
                 review_data['session'] = {
-                    'title': review.session_r.title,
-                    'session_type': review.session_r.session_type,
-                    'difficulty_level': review.session_r.difficulty_level
+                    'title': session.title,
+                    'session_type': session.session_type,
+                    'difficulty_level': session.difficulty_level
                 }
 
             # Add instructor details
-            if hasattr(review, 'instructor_r') and review.instructor_r:
+            instructor = users.load(review.instructor_id)
+            if instructor:
                 review_data['instructor'] = {
-                    'first_name': review.instructor_r.first_name,
-                    'last_name': review.instructor_r.last_name,
-                    'experience_level': review.instructor_r.experience_level
+                    'first_name': instructor.first_name,
+                    'last_name': instructor.last_name,
+                    'experience_level': instructor.experience_level
                 }
 
             output.append(review_data)
@@ -147,31 +164,37 @@ class ReviewResource(Resource):
         }
 
         # Add detailed information
-        if hasattr(review, 'user_r') and review.user_r:
+        users = get_loader('users')
+        users.prime_many([review.user_id, review.instructor_id])
+
+        reviewer = users.load(review.user_id)
+        if reviewer:
             output['user'] = {
-                'id': str(review.user_r.id),
-                'first_name': review.user_r.first_name,
-                'last_name': review.user_r.last_name,
-                'email': review.user_r.email
+                'id': str(reviewer.id),
+                'first_name': reviewer.first_name,
+                'last_name': reviewer.last_name,
+                'email': reviewer.email
             }
 
-        if hasattr(review, 'session_r') and review.session_r:
+        session = get_loader('skill_sessions').load(review.session_id)
+        if session:
             output['session'] = {
-                'id': str(review.session_r.id),
-                'title': review.session_r.title,
-                'description': review.session_r.description,
-                'session_type': review.session_r.session_type,
-                'difficulty_level': review.session_r.difficulty_level,
-                'duration': review.session_r.duration
+                'id': str(session.id),
+                'title': session.title,
+                'description': session.description,
+                'session_type': session.session_type,
+                'difficulty_level': session.difficulty_level,
+                'duration': session.duration
             }
 
-        if hasattr(review, 'instructor_r') and review.instructor_r:
+        instructor = users.load(review.instructor_id)
+        if instructor:
             output['instructor'] = {
-                'id': str(review.instructor_r.id),
-                'first_name': review.instructor_r.first_name,
-                'last_name': review.instructor_r.last_name,
-                'bio': review.instructor_r.bio,
-                'experience_level': review.instructor_r.experience_level
+                'id': str(instructor.id),
+                'first_name': instructor.first_name,
+                'last_name': instructor.last_name,
+                'bio': instructor.bio,
+                'experience_level': instructor.experience_level
             }
 
         return output, 200
@@ -208,12 +231,16 @@ class ReviewResource(Resource):
 
 @api.route('/session/<session_id>')
 class SessionReviews(Resource):
+    @api.doc(params={'history': 'true: include reviews moved to the archive with their booking'})
     @api.response(200, 'Session reviews retrieved successfully')
     def get(self, session_id):
         """Get all reviews for a specific session"""
-        reviews = facade.get_reviews_by_session(session_id)
+        reviews = facade.get_reviews_by_session(session_id, include_archived=request.args.get('history') == 'true')
         output = []
 
+        users = get_loader('users')
+        users.prime_many(review.user_id for review in reviews)
+
         for review in reviews:
             review_data = {
                 'id': str(review.id),
@@ -224,10 +251,11 @@ class SessionReviews(Resource):
             }
 
             # Add user details
-            if hasattr(review, 'user_r') and review.user_r:
+            reviewer = users.load(review.user_id)
+            if reviewer:
                 review_data['user'] = {
-                    'first_name': review.user_r.first_name,
-                    'last_name': review.user_r.last_name
+                    'first_name': reviewer.first_name,
+                    'last_name': reviewer.last_name
                 }
 
             output.append(review_data)
@@ -236,12 +264,18 @@ class SessionReviews(Resource):
 
 @api.route('/instructor/<instructor_id>')
 class InstructorReviews(Resource):
+    @api.doc(params={'history': 'true: include reviews moved to the archive with their booking'})
     @api.response(200, 'Instructor reviews retrieved successfully')
     def get(self, instructor_id):
         """Get all reviews for a specific instructor"""
-        reviews = facade.get_reviews_by_instructor(instructor_id)
+        reviews = facade.get_reviews_by_instructor(instructor_id, include_archived=request.args.get('history') == 'true')
         output = []
 
+        users = get_loader('users')
+        sessions = get_loader('skill_sessions')
+        users.prime_many(review.user_id for review in reviews)
+        sessions.prime_many(review.session_id for review in reviews)
+
         for review in reviews:
             review_data = {
                 'id': str(review.id),
@@ -253,17 +287,19 @@ class InstructorReviews(Resource):
             }
 
             # Add user details
-            if hasattr(review, 'user_r') and review.user_r:
+            reviewer = users.load(review.user_id)
+            if reviewer:
                 review_data['user'] = {
-                    'first_name': review.user_r.first_name,
-                    'last_name': review.user_r.last_name
+                    'first_name': reviewer.first_name,
+                    'last_name': reviewer.last_name
                 }
 
             # Add session details
-            if hasattr(review, 'session_r') and review.session_r:
+            session = sessions.load(review.session_id)
+            if session:
                 review_data['session'] = {
-                    'title': review.session_r.title,
-                    'session_type': review.session_r.session_type
+                    'title': session.title,
+                    'session_type': session.session_type
                 }
 
             output.append(review_data)
@@ -272,12 +308,18 @@ class InstructorReviews(Resource):
 
 @api.route('/user/<user_id>')
 class UserReviews(Resource):
+    @api.doc(params={'history': 'true: include reviews moved to the archive with their booking'})
     @api.response(200, 'User reviews retrieved successfully')
     def get(self, user_id):
         """Get all reviews written by a specific user"""
-        reviews = facade.get_reviews_by_user(user_id)
+        reviews = facade.get_reviews_by_user(user_id, include_archived=request.args.get('history') == 'true')
         output = []
 
+        users = get_loader('users')
+        sessions = get_loader('skill_sessions')
+        users.prime_many(review.instructor_id for review in reviews)
+        sessions.prime_many(review.session_id for review in reviews)
+
         for review in reviews:
             review_data = {
                 'id': str(review.id),
@@ -289,17 +331,19 @@ class UserReviews(Resource):
             }
 
             # Add session details
-            if hasattr(review, 'session_r') and review.session_r:
+            session = sessions.load(review.session_id)
+            if session:
                 review_data['session'] = {
-                    'title': review.session_r.title,
-                    'session_type': review.session_r.session_type
+                    'title': session.title,
+                    'session_type': session.session_type
                 }
 
             # Add instructor details
-            if hasattr(review, 'instructor_r') and review.instructor_r:
+            instructor = users.load(review.instructor_id)
+            if instructor:
                 review_data['instructor'] = {
-                    'first_name': review.instructor_r.first_name,
-                    'last_name': review.instructor_r.last_name
+                    'first_name': instructor.first_name,
+                    'last_name': instructor.last_name
                 }
 
             output.append(review_data)
@@ -1,9 +1,14 @@
+from flask import request
 from flask_restx import Namespace, Resource, fields
 from app.services import facade
+from app.models.skill_session import SORTS
 from app.utils.jwt_auth import jwt_required, instructor_required
+from app.utils.request_args import parse_id_list
 
 api = Namespace('skill-sessions', description='Skill Session operations')
 
+MAX_PAGE_SIZE = 100
+
 # Define related models
 instructor_model = api.model('Instructor', {
     'id': fields.String(description='Instructor ID'),
@@ -46,6 +51,87 @@ skill_session_model = api.model('SkillSession', {
     'reviews': fields.List(fields.Nested(review_model), description='Session reviews')
 })
 
+def serialize_session_card(card):
+    """Catalog representation of a session, from its SessionCard"""
+    return {
+        'id': card.session_id,
+        'title': card.title,
+        'description': card.description,
+        'price': card.price,
+        'duration': card.duration,
+        'max_participants': card.max_participants,
+        'session_type': card.session_type,
+        'difficulty_level': card.difficulty_level,
+        'location': card.location,
+        'instructor_id': card.instructor_id,
+        'is_active': card.is_active,
+        'available_spots': card.get_available_spots(),
+        'average_rating': card.get_average_rating(),
+        'created_at': card.created_at.isoformat(),
+        'instructor': {
+            'id': card.instructor_id,
+            'first_name': card.instructor_first_name,
+            'last_name': card.instructor_last_name,
+            'experience_level': card.instructor_experience_level
+        },
+        'skills': card.get_skills()
+    }
+
+def serialize_session_detail(session):
+    """Full representation of a session with instructor, skills and reviews"""
+    output = {
+        'id': str(session.id),
+        'title': session.title,
+        'description': session.description,
+        'price': session.price,
+        'duration': session.duration,
+        'max_participants': session.max_participants,
+        'session_type': session.session_type,
+        'difficulty_level': session.difficulty_level,
+        'location': session.location,
+        'latitude': session.latitude,
+        'longitude': session.longitude,
+        'instructor_id': session.instructor_id,
+        'is_active': session.is_active,
+        'available_spots': session.get_available_spots(),
+        'average_rating': session.get_average_rating(),
+        'created_at': session.created_at.isoformat(),
+        'updated_at': session.updated_at.isoformat()
+    }
+
+    # Add instructor details
+    if hasattr(session, 'instructor_r') and session.instructor_r:
+        output['instructor'] = {
+            'id': str(session.instructor_r.id),
+            'first_name': session.instructor_r.first_name,
+            'last_name': session.instructor_r.last_name,
+            'bio': session.instructor_r.bio,
+            'experience_level': session.instructor_r.experience_level,
+            'hourly_rate': session.instructor_r.hourly_rate,
+            'average_rating': session.instructor_r.get_average_rating()
+        }
+
+    # Add skills
+    if hasattr(session, 'skills_r'):
+        output['skills'] = [{
+            'id': str(skill.id),
+            'name': skill.name,
+            'category': skill.category,
+            'description': skill.description
+        } for skill in session.skills_r]
+
+    # Add reviews
+    if hasattr(session, 'reviews_r'):
+        output['reviews'] = [{
+            'id': str(review.id),
+            'text': review.text,
+            'rating': review.rating,
+            'user_id': review.user_id,
+            'created_at': review.created_at.isoformat()
+        } for review in session.reviews_r]
+
+    return output
+
 @api.route('/')
 class SkillSessionList(Resource):
     @api.expect(skill_session_model)
@@ -81,49 +167,18 @@ class SkillSessionList(Resource):
         }, 201
 
     @api.response(200, 'List of skill sessions retrieved successfully')
+    @api.response(400, 'Invalid ids parameter')
+    @api.param('ids', 'Comma-separated session IDs to fetch in one call (optional)')
     def get(self):
-        """Retrieve all skill sessions"""
-        sessions = facade.get_all_skill_sessions()
-        output = []
-
-        for session in sessions:
-            session_data = {
-                'id': str(session.id),
-                'title': session.title,
-                'description': session.description,
-                'price': session.price,
-                'duration': session.duration,
-                'max_participants': session.max_participants,
-                'session_type': session.session_type,
-                'difficulty_level': session.difficulty_level,
-                'location': session.location,
-                'instructor_id': session.instructor_id,
-                'is_active': session.is_active,
-                'available_spots': session.get_available_spots(),
-                'average_rating': session.get_average_rating(),
-                'created_at': session.created_at.isoformat()
-            }
-
-            # Add instructor details
-            if hasattr(session, 'instructor_r') and session.instructor_r:
-                session_data['instructor'] = {
-                    'id': str(session.instructor_r.id),
-                    'first_name': session.instructor_r.first_name,
-                    'last_name': session.instructor_r.last_name,
-                    'experience_level': session.instructor_r.experience_level
-                }
-
-            # Add skills
-            if hasattr(session, 'skills_r'):
-                session_data['skills'] = [{
-                    'id': str(skill.id),
-                    'name': skill.name,
-                    'category': skill.category
-                } for skill in session.skills_r]
-
-            output.append(session_data)
+        """Retrieve all skill sessions, or only those listed in ?ids="""
+        try:
+            session_ids = parse_id_list(request.args.get('ids'))
+        except ValueError as error:
+            return {'error': str(error)}, 400
 
-        return output, 200
+        # one row per session from the card projection, no joins or per-session counting
+        cards = facade.get_session_cards(session_ids)
+        return [serialize_session_card(card) for card in cards], 200
 
 @api.route('/<session_id>')
 class SkillSessionResource(Resource):
@@ -135,56 +190,7 @@ class SkillSessionResource(Resource):
         if not session:
             return {'error': 'Skill session not found'}, 404
 
-        output = {
-            'id': str(session.id),
-            'title': session.title,
-            'description': session.description,
-            'price': session.price,
-            'duration': session.duration,
-            'max_participants': session.max_participants,
-            'session_type': session.session_type,
-            'difficulty_level': session.difficulty_level,
-            'location': session.location,
-            'latitude': session.latitude,
-            'longitude': session.longitude,
-            'instructor_id': session.instructor_id,
-            'is_active': session.is_active,
-            'available_spots': session.get_available_spots(),
-            'average_rating': session.get_average_rating(),
-            'created_at': session.created_at.isoformat(),
-            'updated_at': session.updated_at.isoformat()
-        }
-
-        # Add instructor details
-        if hasattr(session, 'instructor_r') and session.instructor_r:
-            output['instructor'] = {
-                'id': str(session.instructor_r.id),
-                'first_name': session.instructor_r.first_name,
-                'last_name': session.instructor_r.last_name,
-                'bio': session.instructor_r.bio,
-                'experience_level': session.instructor_r.experience_level,
-                'hourly_rate': session.instructor_r.hourly_rate,
-                'average_rating': session.instructor_r.get_average_rating()
-            }
-
-        # Add skills
-        if hasattr(session, 'skills_r'):
-            output['skills'] = [{
-                'id': str(skill.id),
-                'name': skill.name,
-                'category': skill.category,
-                'description': skill.description
-            } for skill in session.skills_r]
-
-        # Add reviews
-        if hasattr(session, 'reviews_r'):
-            output['reviews'] = [{
-                'id': str(review.id),
-                'text': review.text,
-                'rating': review.rating,
-                'user_id': review.user_id,
-                'created_at': review.created_at.isoformat()
-            } for review in session.reviews_r]
+        output = serialize_session_detail(session)
 
         return output, 200
 
@@ -203,7 +209,9 @@ class SkillSessionResource(Resource):
 
         return {'message': 'Skill session updated successfully'}, 200
 
+    @api.doc(params={'background': 'true: deactivate the session now and delete its data in batches (202)'})
     @api.response(200, 'Skill session deleted successfully')
+    @api.response(202, 'Deletion scheduled; follow /admin/purge-jobs/<job_id>')
     @api.response(404, 'Skill session not found')
     def delete(self, session_id):
         """Delete a skill session"""
@@ -211,6 +219,9 @@ class SkillSessionResource(Resource):
         if not session:
             return {'error': 'Skill session not found'}, 404
 
+        if request.args.get('background') == 'true':
+            job = facade.schedule_purge('skill_session', session_id)
+            return {'message': 'Skill session deletion scheduled', 'job_id': job.id, 'status': job.status}, 202
         facade.delete_skill_session(session_id)
         return {'message': 'Skill session deleted successfully'}, 200
 
@@ -232,33 +243,55 @@ class InstructorSessions(Resource):
     @api.response(200, 'Sessions retrieved successfully')
     def get(self, instructor_id):
         """Get all sessions by instructor"""
-        sessions = facade.get_sessions_by_instructor(instructor_id)
+        cards = facade.get_instructor_session_cards(instructor_id)
         output = []
 
-        for session in sessions:
+        for card in cards:
             output.append({
-                'id': str(session.id),
-                'title': session.title,
-                'price': session.price,
-                'duration': session.duration,
-                'session_type': session.session_type,
-                'difficulty_level': session.difficulty_level,
-                'is_active': session.is_active,
-                'available_spots': session.get_available_spots(),
-                'created_at': session.created_at.isoformat()
+                'id': card.session_id,
+                'title': card.title,
+                'price': card.price,
+                'duration': card.duration,
+                'session_type': card.session_type,
+                'difficulty_level': card.difficulty_level,
+                'is_active': card.is_active,
+                'available_spots': card.get_available_spots(),
+                'created_at': card.created_at.isoformat()
             })
 
         return output, 200
 
 @api.route('/active')
 class ActiveSessions(Resource):
+    @api.doc(params={'sort': f"Ranking: {', '.join(SORTS)} (default: all active sessions, unranked)",
+                     'limit': f'Page size with sort (default 20, max {MAX_PAGE_SIZE})',
+                     'offset': 'Sessions skipped with sort (default 0)'})
     @api.response(200, 'Active sessions retrieved successfully')
+    @api.response(400, 'Invalid sort or paging parameters')
     def get(self):
-        """Get all active sessions"""
-        sessions = facade.get_active_sessions()
+        """Get active sessions, optionally ranked
+
+        trending decays each booking by half every 72 hours; top_rated is a
+        Bayesian average that pulls sessions with few reviews towards 3 stars.
+        """
+        sort = request.args.get('sort')
+        if sort is None:
+            sessions = facade.get_active_sessions()
+        else:
+            if sort not in SORTS:
+                return {'error': f"sort must be one of: {', '.join(SORTS)}"}, 400
+            limit, offset = request.args.get('limit', '20'), request.args.get('offset', '0')
+            if not limit.isdigit() or not 1 <= int(limit) <= MAX_PAGE_SIZE:
+                return {'error': f'limit must be an integer between 1 and {MAX_PAGE_SIZE}'}, 400
+            if not offset.isdigit():
+                return {'error': 'offset must be a non-negative integer'}, 400
+            sessions = facade.get_active_sessions(sort, int(limit), int(offset))
+        # confirmed booking counts from the card projection, not each session's bookings
+        cards = {card.session_id: card for card in facade.get_session_cards([session.id for session in sessions])}
         output = []
 
         for session in sessions:
+            card = cards.get(session.id)
             output.append({
                 'id': str(session.id),
                 'title': session.title,
@@ -267,8 +300,11 @@ class ActiveSessions(Resource):
                 'duration': session.duration,
                 'session_type': session.session_type,
                 'difficulty_level': session.difficulty_level,
-                'available_spots': session.get_available_spots(),
-                'instructor_id': session.instructor_id
+                'available_spots': (card or session).get_available_spots(),
+                'instructor_id': session.instructor_id,
+                'trending_score': session.get_trending_score(),
+                'bayesian_rating': session.bayesian_rating,
+                'rating_count': session.rating_count
             })
 
         return output, 200
\ No newline at end of file
@@ -1,11 +1,17 @@
+from flask import request
 from flask_restx import Namespace, Resource, fields
 # from app.services.facade import HBnBFacade
 from app.services import facade
 from werkzeug.security import check_password_hash
+from app.utils.request_args import parse_id_list
+from app.utils.jwt_auth import jwt_required
+from app.utils.rate_limit import rate_limited
 
 
 api = Namespace('users', description='User operations')
 
+MAX_RECOMMENDATIONS = 50
+
 # Define the user model for input validation and documentation
 user_model = api.model('User', {
     'first_name': fields.String(required=True, description='First name of the user'),
@@ -22,6 +28,8 @@ class UserList(Resource):
     @api.response(400, 'Email already registered')
     @api.response(400, 'Invalid input data')
     @api.response(400, 'Setter validation failure')
+    @api.response(429, 'Too many attempts, see Retry-After')
+    @rate_limited('register')
     def post(self):
         # curl -X POST "http://127.0.0.1:5000/api/v1/users/" -H "Content-Type: application/json" -d '{"first_name": "John","last_name": "Doe","email": "john.doe@example.com"}'
 
@@ -48,9 +56,19 @@ class UserList(Resource):
         return {'id': str(new_user.id), 'message': 'User created successfully'}, 201
 
     @api.response(200, 'Users list successfully retrieved')
+    @api.response(400, 'Invalid ids parameter')
+    @api.param('ids', 'Comma-separated user IDs to fetch in one call (optional)')
     def get(self):
-        """ Get list of all users """
-        all_users = facade.get_all_users()
+        """ Get list of all users, or only those listed in ?ids= """
+        try:
+            user_ids = parse_id_list(request.args.get('ids'))
+        except ValueError as error:
+            return {'error': str(error)}, 400
+
+        if user_ids is None:
+            all_users = facade.get_all_users()
+        else:
+            all_users = facade.get_users(user_ids)
         output = []
         for user in all_users:
             # print(user)
@@ -105,7 +123,9 @@ class UserResource(Resource):
 
         return {'error': 'User not found'}, 404
 
+    @api.doc(params={'background': 'true: hide the user now and delete its data in batches (202)'})
     @api.response(200, 'User deleted successfully')
+    @api.response(202, 'Deletion scheduled; follow /admin/purge-jobs/<job_id>')
     @api.response(404, 'User not found')
     def delete(self, user_id):
         """Delete user by ID (and related reviews)"""
@@ -113,9 +133,39 @@ class UserResource(Resource):
         if not user:
             return {'error': 'User not found'}, 404
 
+        if request.args.get('background') == 'true':
+            job = facade.schedule_purge('user', user_id)
+            return {'message': 'User deletion scheduled', 'job_id': job.id, 'status': job.status}, 202
         facade.delete_user(user_id)
         return {'message': 'User deleted successfully'}, 200
     
+@api.route('/<user_id>/recommendations')
+class UserRecommendations(Resource):
+    @api.doc(params={'limit': f'Maximum sessions returned (default 10, max {MAX_RECOMMENDATIONS})'})
+    @api.response(200, 'Recommendations retrieved successfully')
+    @api.response(400, 'Invalid query parameters')
+    @api.response(401, 'Authentication required')
+    @api.response(403, 'Only the user or an admin can see their recommendations')
+    @jwt_required
+    def get(self, current_user, user_id):
+        """Sessions the user may like, from what similar learners booked and the sessions' skills"""
+        if current_user.id != user_id and not current_user.is_admin:
+            return {'error': 'Only the user or an admin can see their recommendations'}, 403
+        limit = request.args.get('limit', '10')
+        if not limit.isdigit() or not 1 <= int(limit) <= MAX_RECOMMENDATIONS:
+            return {'error': f'limit must be an integer between 1 and {MAX_RECOMMENDATIONS}'}, 400
+
+        return [{
+            'id': session.id,
+            'title': session.title,
+            'price': session.price,
+            'session_type': session.session_type,
+            'difficulty_level': session.difficulty_level,
+            'instructor_id': session.instructor_id,
+            'score': round(score, 4)
+        } for session, score in facade.get_recommendations(user_id, int(limit))], 200
+
+
 @api.route('/login')
 class LoginResource(Resource):
     @api.expect(api.model('Login', {
@@ -124,6 +174,8 @@ class LoginResource(Resource):
     }))
     @api.response(200, 'Logged in successfully')
     @api.response(401, 'Invalid credentials')
+    @api.response(429, 'Too many attempts, see Retry-After')
+    @rate_limited('login', account_field='email')
     def post(self):
         """Login a user by email and password"""
         data = api.payload
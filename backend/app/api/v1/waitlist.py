@@ -0,0 +1,96 @@
+from datetime import datetime
+from flask_restx import Namespace, Resource, fields
+from app.services import facade
+from app.utils.jwt_auth import jwt_required
+
+api = Namespace('waitlist', description='Queues for fully booked sessions')
+
+waitlist_model = api.model('WaitlistEntry', {
+    'session_id': fields.String(required=True, description='ID of the fully booked skill session'),
+    'occurrence_id': fields.String(description='Scheduled occurrence to wait for; sets booking_date'),
+    'booking_date': fields.DateTime(description='Date and time wanted (not needed with occurrence_id)'),
+    'participants': fields.Integer(description='Number of participants (default: 1)'),
+    'special_requests': fields.String(description='Special requests or notes')
+})
+
+
+def serialize_entry(entry):
+    return {
+        'id': entry.id,
+        'session_id': entry.session_id,
+        'occurrence_id': entry.occurrence_id,
+        'user_id': entry.user_id,
+        'booking_date': entry.booking_date.isoformat(),
+        'participants': entry.participants,
+        'status': entry.status,
+        'position': facade.get_waitlist_position(entry),
+        'booking_id': entry.booking_id,
+        'created_at': entry.created_at.isoformat()
+    }
+
+
+@api.route('/')
+class WaitlistList(Resource):
+    @api.expect(waitlist_model)
+    @api.response(201, 'Added to the waitlist')
+    @api.response(400, 'Invalid input data, or spots are available')
+    @api.response(401, 'Authentication required')
+    @jwt_required
+    def post(self, current_user):
+        """Join the waitlist of a fully booked session or occurrence
+
+        The entry is turned into a booking automatically, in queue order, when
+        a cancellation frees enough spots.
+        """
+        entry_data = dict(api.payload, user_id=current_user.id)
+
+        if not entry_data.get('session_id') or not (entry_data.get('booking_date') or entry_data.get('occurrence_id')):
+            return {'error': 'Missing required fields'}, 400
+        if isinstance(entry_data.get('booking_date'), str):
+            try:
+                entry_data['booking_date'] = datetime.fromisoformat(entry_data['booking_date'])
+            except ValueError:
+                return {'error': 'Invalid date format. Use ISO format (YYYY-MM-DDTHH:MM:SS)'}, 400
+
+        try:
+            entry = facade.join_waitlist(entry_data)
+        except ValueError as error:
+            return {'error': str(error)}, 400
+
+        return serialize_entry(entry), 201
+
+
+@api.route('/<entry_id>')
+class WaitlistResource(Resource):
+    @api.response(200, 'Entry and queue position retrieved successfully')
+    @api.response(401, 'Authentication required')
+    @api.response(403, 'Not your waitlist entry')
+    @api.response(404, 'Entry not found')
+    @jwt_required
+    def get(self, current_user, entry_id):
+        """Get a waitlist entry with its current position"""
+        entry = facade.get_waitlist_entry(entry_id)
+        if not entry:
+            return {'error': 'Waitlist entry not found'}, 404
+        if entry.user_id != current_user.id and not current_user.is_admin:
+            return {'error': 'Not your waitlist entry'}, 403
+        return serialize_entry(entry), 200
+
+    @api.response(200, 'Left the waitlist')
+    @api.response(400, 'Entry is no longer waiting')
+    @api.response(401, 'Authentication required')
+    @api.response(403, 'Not your waitlist entry')
+    @api.response(404, 'Entry not found')
+    @jwt_required
+    def delete(self, current_user, entry_id):
+        """Leave the waitlist"""
+        entry = facade.get_waitlist_entry(entry_id)
+        if not entry:
+            return {'error': 'Waitlist entry not found'}, 404
+        if entry.user_id != current_user.id and not current_user.is_admin:
+            return {'error': 'Not your waitlist entry'}, 403
+        try:
+            facade.leave_waitlist(entry_id)
+        except ValueError as error:
+            return {'error': str(error)}, 400
+        return {'message': 'Left the waitlist'}, 200
@@ -0,0 +1,135 @@
+"""ASGI serving mode.
+
+Hot read endpoints and login are served natively on the event loop, with
+async SQLAlchemy sessions and bcrypt/JWT in a thread pool, so a single
+process can keep many slow clients in flight. Every other route falls back
+to the Flask app through asgiref's WsgiToAsgi, which reads request bodies and
+writes responses asynchronously and only uses a worker thread while the
+handler itself runs.
+
+The native handlers read the primary SQL database directly, without the
+entity cache or replica routing. With the memory backend every route goes to
+Flask, and with read replicas the native reads do, so they are balanced and
+pinned like any other read.
+"""
+
+import json
+import re
+from concurrent.futures import ThreadPoolExecutor
+from asgiref.wsgi import WsgiToAsgi
+from app import create_app
+from app.api.v1.auth import serialize_login
+from app.api.v1.skill_sessions import serialize_session_card, serialize_session_detail
+from app.utils.rate_limit import check_rate_limits, client_ip, too_many_requests
+from app.persistence.async_repository import create_async_session_factory
+from app.services.async_facade import AsyncSkillSessionsFacade
+
+
+class AsgiApp:
+    """Minimal ASGI router in front of the Flask app."""
+
+    def __init__(self, flask_app, facade):
+        self.flask_app = flask_app
+        self.facade = facade
+        self.fallback = WsgiToAsgi(flask_app)
+        self.cors_origins = flask_app.config.get('CORS_ORIGINS', [])
+        self.routes = []
+        if flask_app.config.get('REPOSITORY_BACKEND', 'sqlalchemy') != 'sqlalchemy':
+            return
+        if 'replica_router' not in flask_app.extensions:
+            self.routes += [
+                ('GET', re.compile(r'^/api/v1/skill-sessions/$'), self.list_sessions),
+                # /active is a Flask route of its own, not a session id
+                ('GET', re.compile(r'^/api/v1/skill-sessions/(?!active$)(?P<session_id>[^/]+)$'), self.get_session),
+            ]
+        self.routes.append(('POST', re.compile(r'^/api/v1/auth/login$'), self.login))
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self.lifespan(receive, send)
+        if scope['type'] == 'http':
+            for method, pattern, handler in self.routes:
+                match = pattern.match(scope['path'])
+                if match and scope['method'] == method:
+                    response = await handler(scope, receive, **match.groupdict())
+                    if response is not None:
+                        return await self.send_json(scope, send, *response)
+                    break
+        return await self.fallback(scope, receive, send)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.facade.close()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def send_json(self, scope, send, body, status_code, extra_headers=None):
+        payload = json.dumps(body).encode('utf-8')
+        headers = [(b'content-type', b'application/json'), (b'content-length', str(len(payload)).encode())]
+        headers += [(name.lower().encode('latin-1'), value.encode('latin-1'))
+                    for name, value in (extra_headers or {}).items()]
+        origin = dict(scope['headers']).get(b'origin', b'').decode('latin-1')
+        if origin in self.cors_origins:
+            headers += [(b'access-control-allow-origin', origin.encode('latin-1')),
+                        (b'access-control-allow-credentials', b'true'), (b'vary', b'Origin')]
+        await send({'type': 'http.response.start', 'status': status_code, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': payload})
+
+    # --- Native handlers: return (body, status) or None to fall back to Flask ---
+    async def list_sessions(self, scope, receive):
+        if scope.get('query_string'):
+            return None  # ?ids= and friends are handled by the Flask namespace
+        cards = await self.facade.get_session_cards()
+        return [serialize_session_card(card) for card in cards], 200
+
+    async def get_session(self, scope, receive, session_id):
+        session = await self.facade.get_skill_session(session_id)
+        if not session:
+            return None  # let Flask answer with its own 404
+        return serialize_session_detail(session), 200
+
+    async def login(self, scope, receive):
+        try:
+            credentials = json.loads(await read_body(receive) or b'{}')
+        except ValueError:
+            return {'error': 'Invalid JSON body'}, 400
+        if not isinstance(credentials, dict) or not credentials.get('email') or not credentials.get('password'):
+            return {'error': 'Invalid credentials'}, 401
+
+        headers = dict(scope['headers'])
+        ip = client_ip((scope.get('client') or ('',))[0],
+                       headers.get(b'x-forwarded-for', b'').decode('latin-1') or None,
+                       self.flask_app.config.get('RATE_LIMIT_PROXY_HOPS', 0))
+        # the bucket store may wait on a lock (SQLiteBucketStore), so keep it off the event loop
+        wait = await self.facade.run_cpu_bound(check_rate_limits, self.flask_app, 'login', scope['path'], ip,
+                                               str(credentials['email']))
+        if wait:
+            return too_many_requests(wait)
+
+        user, token, refresh_token = await self.facade.authenticate(credentials['email'], credentials['password'])
+        if not user:
+            return {'error': 'Invalid credentials'}, 401
+        return serialize_login(user, token, refresh_token), 200
+
+
+async def read_body(receive):
+    body = b''
+    while True:
+        message = await receive()
+        body += message.get('body', b'')
+        if not message.get('more_body'):
+            return body
+
+
+def create_asgi_app(config_class="config.DevelopmentConfig"):
+    """ method used to create an ASGI app instance """
+    flask_app = create_app(config_class)
+    uri = flask_app.config.get('ASYNC_DATABASE_URI') or flask_app.config['SQLALCHEMY_DATABASE_URI']
+    engine_options = {} if uri.startswith('sqlite') else {'pool_size': flask_app.config['ASGI_DB_POOL_SIZE']}
+    session_factory = create_async_session_factory(uri, **engine_options)
+    executor = ThreadPoolExecutor(max_workers=flask_app.config['ASGI_CPU_WORKERS'], thread_name_prefix='cpu')
+    return AsgiApp(flask_app, AsyncSkillSessionsFacade(flask_app, session_factory, executor))
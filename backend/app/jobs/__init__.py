@@ -0,0 +1,193 @@
+""" Batch jobs, exposed as `flask <command>` for the scheduler (cron, k8s CronJob, ...) """
+
+from datetime import datetime
+import click
+
+
+def _parse_cursor(value):
+    """Parse a '<iso booking_date>,<booking id>' cursor string."""
+    if not value:
+        return None
+    booking_date, booking_id = value.split(',', 1)
+    return datetime.fromisoformat(booking_date), booking_id
+
+
+def register_commands(app):
+    """Attach the batch job commands to the app's CLI."""
+
+    @app.cli.command('complete-bookings')
+    @click.option('--batch-size', default=1000, show_default=True, help='Bookings per UPDATE')
+    @click.option('--dry-run', is_flag=True, help='Only count the bookings that would be completed')
+    @click.option('--after', default=None, help="Resume cursor '<booking_date>,<booking_id>'")
+    def complete_bookings_command(batch_size, dry_run, after):
+        """Mark confirmed bookings whose session has ended as completed."""
+        from app.jobs.complete_bookings import complete_past_bookings
+
+        def report(stats):
+            cursor_date, cursor_id = stats['cursor']
+            click.echo(f"batch {stats['batches']}: scanned={stats['scanned']} "
+                       f"completed={stats['completed']} cursor={cursor_date.isoformat()},{cursor_id}")
+
+        stats = complete_past_bookings(batch_size=batch_size, dry_run=dry_run,
+                                       cursor=_parse_cursor(after), progress=report)
+        verb = 'would complete' if dry_run else 'completed'
+        click.echo(f"{verb} {stats['completed']} of {stats['scanned']} scanned bookings")
+
+    @app.cli.command('archive-history')
+    @click.option('--batch-size', default=1000, show_default=True, help='Bookings moved per transaction')
+    @click.option('--with-reviews/--without-reviews', default=None,
+                  help='Move reviews with their booking (default: ARCHIVE_REVIEWS)')
+    def archive_history_command(batch_size, with_reviews):
+        """Move completed and cancelled bookings older than ARCHIVE_AFTER to the archive tables."""
+        from app.jobs.archive import archive_history
+        from app.services import facade
+
+        if facade.store is not None:
+            raise click.UsageError("the memory backend keeps all booking history hot, there is nothing to archive")
+
+        def report(stats):
+            click.echo(f"batch {stats['batches']}: scanned={stats['scanned']} "
+                       f"bookings={stats['bookings']} reviews={stats['reviews']}")
+
+        if with_reviews is None:
+            with_reviews = app.config['ARCHIVE_REVIEWS']
+        stats = archive_history(app.config['ARCHIVE_AFTER'], batch_size=batch_size, with_reviews=with_reviews,
+                                progress=report)
+        click.echo(f"archived {stats['bookings']} bookings and {stats['reviews']} reviews")
+
+    @app.cli.command('purge-idempotency-keys')
+    @click.option('--batch-size', default=1000, show_default=True, help='Keys per DELETE')
+    def purge_idempotency_keys_command(batch_size):
+        """Delete expired Idempotency-Key records in batches."""
+        from app.persistence.idempotency_repository import IdempotencyRepository
+
+        repo = IdempotencyRepository()
+        now = datetime.now()
+        total = 0
+        while True:
+            deleted = repo.purge_expired(now, batch_size)
+            total += deleted
+            if deleted < batch_size:
+                break
+        click.echo(f"purged {total} expired idempotency keys")
+
+    @app.cli.command('purge-refresh-tokens')
+    @click.option('--batch-size', default=1000, show_default=True, help='Tokens per DELETE')
+    def purge_refresh_tokens_command(batch_size):
+        """Delete expired refresh tokens in batches."""
+        from app.services import facade
+
+        now = datetime.now()
+        total = 0
+        while True:
+            deleted = facade.refresh_token_repo.purge_expired(now, batch_size)
+            total += deleted
+            if deleted < batch_size:
+                break
+        click.echo(f"purged {total} expired refresh tokens")
+
+    @app.cli.command('run-purge-jobs')
+    @click.option('--batch-size', default=None, type=int, help='Rows per DELETE (default: PURGE_BATCH_SIZE)')
+    def run_purge_jobs_command(batch_size):
+        """Run pending background deletions, and resume interrupted ones."""
+        from app.jobs.purge import run_unfinished_purges
+
+        def report(job):
+            click.echo(f"purge {job.id} ({job.target} {job.target_id}): {job.deleted} rows in {job.batches} batches")
+
+        count = run_unfinished_purges(batch_size or app.config['PURGE_BATCH_SIZE'], progress=report)
+        click.echo(f"ran {count} purge jobs")
+
+    @app.cli.command('relay-outbox')
+    @click.option('--once', is_flag=True, help='Exit once every sink has caught up')
+    @click.option('--interval', default=1.0, show_default=True, help='Seconds to sleep when caught up')
+    def relay_outbox_command(once, interval):
+        """Publish outbox change events to the OUTBOX_SINKS, each from its checkpoint."""
+        from app.services.outbox import create_sinks, relay_outbox
+
+        sinks = create_sinks(app.config['OUTBOX_SINKS'])
+        if not sinks:
+            raise click.UsageError("no OUTBOX_SINKS configured")
+
+        def report(published):
+            click.echo(' '.join(f"{name}={count}" for name, count in published.items()))
+
+        total = relay_outbox(sinks, app.config['OUTBOX_BATCH_SIZE'], app.config['OUTBOX_SETTLE_SECONDS'],
+                             once=once, interval=interval, progress=report,
+                             gap_timeout=app.config['OUTBOX_GAP_TIMEOUT'])
+        click.echo(f"published {total} events")
+
+    @app.cli.command('prune-outbox')
+    @click.option('--batch-size', default=1000, show_default=True, help='Events per DELETE')
+    def prune_outbox_command(batch_size):
+        """Delete outbox events older than OUTBOX_RETENTION that every sink has received."""
+        from app.services.outbox import prune_outbox
+
+        click.echo(f"pruned {prune_outbox(app.config['OUTBOX_RETENTION'], batch_size)} outbox events")
+
+    @app.cli.command('backfill-instructor-stats')
+    @click.option('--batch-size', default=1000, show_default=True, help='Rows read / inserted per round trip')
+    def backfill_instructor_stats_command(batch_size):
+        """Rebuild the daily instructor stats rollups from booking and review history."""
+        from app.persistence.stats_repository import SessionStatsRepository
+
+        rows = SessionStatsRepository().rebuild(batch_size=batch_size)
+        click.echo(f"rebuilt {rows} daily rollup rows")
+
+    @app.cli.command('refresh-recommendations')
+    @click.option('--full', is_flag=True, help='Recompute every session, not only those with new activity')
+    @click.option('--block-size', default=512, show_default=True, help='Sessions per sparse matrix product')
+    def refresh_recommendations_command(full, block_size):
+        """Recompute the precomputed similar-session lists behind user recommendations."""
+        from app.services.recommendations import refresh_recommendations
+
+        def report(done, total):
+            click.echo(f"computed {done}/{total} sessions")
+
+        stats = refresh_recommendations(full=full, block_size=block_size, progress=report)
+        click.echo(f"{'full' if stats['full'] else 'incremental'} refresh wrote {stats['sessions']} sessions")
+
+    @app.cli.command('rebuild-session-rankings')
+    def rebuild_session_rankings_command():
+        """Recompute the trending and top-rated keys of every session from bookings and reviews."""
+        from app.services import facade
+
+        click.echo(f"rebuilt rankings of {facade.rebuild_session_rankings()} sessions")
+
+    @app.cli.command('rebuild-session-cards')
+    def rebuild_session_cards_command():
+        """Recompute the catalog card of every session from sessions, skills, bookings and reviews."""
+        from app.services import facade
+
+        click.echo(f"rebuilt {facade.rebuild_session_cards()} session cards")
+
+    @app.cli.command('find-schedule-conflicts')
+    def find_schedule_conflicts_command():
+        """List users with overlapping bookings and instructors with overlapping occurrences."""
+        from app.services import facade
+
+        conflicts = facade.find_schedule_conflicts()
+        for conflict in conflicts:
+            click.echo(f"{conflict.kind} {conflict.owner_id}: {conflict.first_id} overlaps {conflict.second_id} "
+                       f"from {conflict.overlap_start.isoformat()} to {conflict.overlap_end.isoformat()}")
+        click.echo(f"{len(conflicts)} conflicts found")
+
+    @app.cli.command('convert-uuid-keys')
+    @click.option('--batch-size', default=1000, show_default=True, help='Rows per UPDATE')
+    def convert_uuid_keys_command(batch_size):
+        """Convert the VARCHAR(36) ids and foreign keys of an older database to BINARY(16)."""
+        from app.jobs.uuid_keys import convert_uuid_keys
+
+        def report(table, converted):
+            click.echo(f"{table}: converted {converted}")
+
+        click.echo(f"converted {convert_uuid_keys(batch_size, progress=report)} keys")
+
+    @app.cli.command('export-memory-snapshot')
+    @click.argument('path')
+    def export_memory_snapshot_command(path):
+        """Dump the SQL database to a snapshot the memory backend can serve from."""
+        from app.persistence.memory_repository import InMemoryStore
+
+        InMemoryStore.from_database().snapshot(path)
+        click.echo(f"snapshot written to {path}")
@@ -0,0 +1,42 @@
+""" Scheduled job: move old completed and cancelled bookings to the archive tables """
+
+from datetime import datetime, timedelta
+from app.models.archive import TERMINAL_STATUSES
+from app.persistence.transaction import unit_of_work
+from app.services.facade import facade
+
+
+def archive_history(older_than, now=None, batch_size=1000, with_reviews=False, progress=None):
+    """Archive terminal bookings scheduled more than `older_than` seconds ago.
+
+    Candidates are scanned per status in keyset order over (booking_date, id)
+    with the (status, booking_date, id) index, and each page is moved in its
+    own transaction. With `with_reviews`, reviews move with their booking;
+    without it, reviewed bookings stay hot. Totals stay unchanged: rankings,
+    stats and cards already counted these rows, and their rebuilds read the
+    archive too.
+
+    `progress`, when given, is called after every batch with the running totals.
+    Returns a dict with the scanned / archived booking and review counts.
+    """
+    before = (now or datetime.now()) - timedelta(seconds=older_than)
+    stats = {'scanned': 0, 'bookings': 0, 'reviews': 0, 'batches': 0}
+    for status in TERMINAL_STATUSES:
+        cursor = None
+        while True:
+            rows = facade.archive_repo.get_archivable(status, before, with_reviews, after=cursor, limit=batch_size)
+            if not rows:
+                break
+            with unit_of_work():
+                moved, reviews = facade.archive_repo.move_bookings([booking_id for _, booking_id in rows],
+                                                                   TERMINAL_STATUSES, before, with_reviews)
+            cursor = tuple(rows[-1])
+            stats['scanned'] += len(rows)
+            stats['bookings'] += moved
+            stats['reviews'] += reviews
+            stats['batches'] += 1
+            if progress:
+                progress(stats)
+            if len(rows) < batch_size:
+                break
+    return stats
@@ -0,0 +1,67 @@
+""" Scheduled job: mark confirmed bookings as completed once the session is over """
+
+from datetime import datetime, timedelta
+from app.models.outbox_event import OutboxEvent
+from app.persistence.booking_repository import BookingRepository
+from app.persistence.outbox_repository import OutboxRepository
+from app.persistence.session_card_repository import SessionCardRepository
+from app.persistence.stats_repository import SessionStatsRepository
+from app.persistence.transaction import unit_of_work
+
+
+def complete_past_bookings(now=None, batch_size=1000, dry_run=False, cursor=None, progress=None):
+    """Transition every confirmed booking whose booking_date + duration has passed.
+
+    Candidates are scanned in keyset order over (booking_date, id), one page of
+    `batch_size` rows at a time, and each page is completed with one UPDATE.
+    Only ids and timestamps are held in memory, never full Booking objects.
+    The instructor stats rollups, the session cards and a `completed` outbox
+    event per booking are written in the same transaction as each page.
+
+    `cursor` is a (booking_date, id) tuple to resume from; `progress`, when
+    given, is called after every batch with the running totals.
+    Returns a dict with the scanned/completed counts and the final cursor.
+    """
+    now = now or datetime.now()
+    booking_repo = BookingRepository()
+    stats_repo = SessionStatsRepository()
+    outbox_repo = OutboxRepository()
+    card_repo = SessionCardRepository()
+    stats = {'scanned': 0, 'completed': 0, 'batches': 0, 'cursor': cursor, 'dry_run': dry_run}
+
+    while True:
+        rows = booking_repo.get_completion_candidates(now, after=stats['cursor'], limit=batch_size)
+        if not rows:
+            break
+
+        finished = [
+            (booking_id, user_id, session_id) for booking_id, booking_date, duration, user_id, session_id in rows
+            if booking_date + timedelta(minutes=duration) <= now
+        ]
+        finished_ids = [booking_id for booking_id, _, _ in finished]
+
+        if dry_run:
+            stats['completed'] += len(finished_ids)
+        else:
+            with unit_of_work():
+                changes = stats_repo.status_changes(finished_ids, 'confirmed', 'completed')
+                stats['completed'] += booking_repo.bulk_set_status(finished_ids, 'confirmed', 'completed', now)
+                stats_repo.apply(changes)
+                outbox_repo.append_many([
+                    OutboxEvent('booking', booking_id, 'completed', {'user_id': user_id, 'session_id': session_id})
+                    for booking_id, user_id, session_id in finished
+                ])
+                card_repo.refresh({session_id for _, _, session_id in finished})
+
+        stats['scanned'] += len(rows)
+        stats['batches'] += 1
+        last_id, last_date = rows[-1][0], rows[-1][1]
+        stats['cursor'] = (last_date, last_id)
+
+        if progress:
+            progress(stats)
+
+        if len(rows) < batch_size:
+            break
+
+    return stats
@@ -0,0 +1,148 @@
+""" Background job: delete a user's or a skill session's whole graph in bounded batches
+
+ON DELETE CASCADE removes a graph in one statement, but for an instructor
+with years of bookings that is one long transaction holding locks on every
+child row. A purge deletes the same rows children first, `batch_size` rows
+per transaction, so each step is short and the job can resume after a crash
+(deleting is idempotent).
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from sqlalchemy import or_, select
+from app.models.archive import ArchivedBooking, ArchivedReview
+from app.models.associations import session_skill
+from app.models.booking import Booking
+from app.models.outbox_event import OutboxEvent
+from app.models.refresh_token import RefreshToken
+from app.models.review import Review
+from app.models.session_daily_stats import SessionDailyStats
+from app.models.session_occurrence import SessionOccurrence
+from app.models.skill_session import SkillSession
+from app.models.user import User
+from app.models.waitlist_entry import WaitlistEntry
+from app.persistence.purge_repository import PurgeJobRepository
+from app.persistence.transaction import unit_of_work
+from app.services.facade import facade
+
+# what a deleted booking held, for SkillSessionsFacade._release_bookings
+BOOKING_COLUMNS = (Booking.user_id, Booking.session_id, Booking.occurrence_id, Booking.booking_date, Booking.status,
+                   Booking.participants, Booking.total_price, Booking.created_at)
+
+logger = logging.getLogger(__name__)
+
+# One worker thread per process: purges are background work and should not compete with requests
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='purge')
+
+
+def purge_steps(target, target_id):
+    """(table, condition) pairs in deletion order, children before their parents."""
+    if target == 'skill_session':
+        in_sessions = lambda column: column == target_id  # noqa: E731
+        return [
+            (Review.__table__, in_sessions(Review.session_id)),
+            (ArchivedReview.__table__, in_sessions(ArchivedReview.session_id)),
+            (WaitlistEntry.__table__, in_sessions(WaitlistEntry.session_id)),
+            (Booking.__table__, in_sessions(Booking.session_id)),
+            (ArchivedBooking.__table__, in_sessions(ArchivedBooking.session_id)),
+            (SessionDailyStats.__table__, in_sessions(SessionDailyStats.session_id)),
+            (SessionOccurrence.__table__, in_sessions(SessionOccurrence.session_id)),
+            (session_skill, in_sessions(session_skill.c.session_id)),
+            (SkillSession.__table__, SkillSession.id == target_id),
+        ]
+    sessions = select(SkillSession.id).where(SkillSession.instructor_id == target_id).scalar_subquery()
+    in_sessions = lambda column: column.in_(sessions)  # noqa: E731
+    return [
+        (Review.__table__, or_(Review.user_id == target_id, Review.instructor_id == target_id,
+                               in_sessions(Review.session_id))),
+        (ArchivedReview.__table__, or_(ArchivedReview.user_id == target_id, ArchivedReview.instructor_id == target_id,
+                                       in_sessions(ArchivedReview.session_id))),
+        (WaitlistEntry.__table__, or_(WaitlistEntry.user_id == target_id, in_sessions(WaitlistEntry.session_id))),
+        (Booking.__table__, or_(Booking.user_id == target_id, in_sessions(Booking.session_id))),
+        (ArchivedBooking.__table__, or_(ArchivedBooking.user_id == target_id, in_sessions(ArchivedBooking.session_id))),
+        (SessionDailyStats.__table__, SessionDailyStats.instructor_id == target_id),
+        (SessionOccurrence.__table__, in_sessions(SessionOccurrence.session_id)),
+        (session_skill, in_sessions(session_skill.c.session_id)),
+        (RefreshToken.__table__, RefreshToken.user_id == target_id),
+        (SkillSession.__table__, SkillSession.instructor_id == target_id),
+        (User.__table__, User.id == target_id),
+    ]
+
+
+def run_purge_job(job_id, batch_size=1000, progress=None):
+    """Run (or resume) one purge job to completion; returns the job.
+
+    Bookers of deleted bookings get their schedule version bumped in the same
+    transaction as each batch, and the spots, trending weight and stats their
+    bookings held in other instructors' sessions are given back there too,
+    promoting those sessions' waitlists. `progress`, when given, is called
+    with the job after every batch.
+    """
+    repo = PurgeJobRepository()
+    job = repo.get(job_id)
+    if job is None or job.status == 'done':
+        return job
+    repo.update(job.id, {'status': 'running'})
+    try:
+        if facade.store is not None:
+            # the memory backend deletes a graph in one pass over its dicts
+            if job.target == 'user' and facade.get_user(job.target_id):
+                facade.delete_user(job.target_id)
+            elif job.target == 'skill_session':
+                facade.delete_skill_session(job.target_id)
+        else:
+            instructor_id = job.target_id
+            if job.target == 'skill_session':
+                session = facade.get_skill_session(job.target_id)
+                instructor_id = session.instructor_id if session else None
+            # cards and ratings of other instructors' sessions the user booked lose those bookings and reviews
+            booked = facade.card_repo.session_ids_booked_by(job.target_id) if job.target == 'user' else []
+            # bookings in sessions being purged hold nothing that outlives the purge
+            purged = ({job.target_id} if job.target == 'skill_session'
+                      else set(facade.card_repo.session_ids_by_instructor(job.target_id)))
+            for table, condition in purge_steps(job.target, job.target_id):
+                while True:
+                    with unit_of_work():
+                        collect = BOOKING_COLUMNS if table is Booking.__table__ else ()
+                        deleted, rows = repo.delete_batch(table, condition, batch_size, collect)
+                        if collect:
+                            facade.user_repo.bump_schedule_versions({row.user_id for row in rows})
+                            queues = facade._release_bookings([row for row in rows if row.session_id not in purged])
+                            facade._promote_waitlists(queues)
+                        job.deleted += deleted
+                        job.batches += 1 if deleted else 0
+                    if progress and deleted:
+                        progress(job)
+                    if deleted < batch_size:
+                        break
+            with unit_of_work():
+                if instructor_id:
+                    facade.user_repo.bump_schedule_versions([instructor_id])
+                facade.card_repo.refresh(booked)
+                facade.skill_session_repo.recount_ratings(booked)
+                facade.outbox_repo.append(OutboxEvent(job.target, job.target_id, 'deleted'))
+        repo.update(job.id, {'status': 'done', 'finished_at': datetime.now()})
+    except Exception as error:
+        repo.update(job.id, {'status': 'failed', 'error': str(error)[:500]})
+        raise
+    return job
+
+
+def run_unfinished_purges(batch_size=1000, progress=None):
+    """Run every pending job, and resume interrupted ones; returns how many ran."""
+    jobs = PurgeJobRepository().get_unfinished()
+    for job in jobs:
+        run_purge_job(job.id, batch_size, progress)
+    return len(jobs)
+
+
+def start_purge(app, job_id):
+    """Run a purge job on this process's background worker thread."""
+    def run():
+        with app.app_context():
+            try:
+                run_purge_job(job_id, app.config['PURGE_BATCH_SIZE'])
+            except Exception:
+                logger.exception("purge job %s failed", job_id)
+    return _executor.submit(run)
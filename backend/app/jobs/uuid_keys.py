@@ -0,0 +1,103 @@
+""" One-off migration: convert VARCHAR(36) uuid keys to BINARY(16) (see app/models/keys.py)
+
+Databases created before UUIDKey hold every id and foreign key as a 36
+character string. convert_uuid_keys() rewrites them in place, `batch_size`
+rows per transaction, and can be re-run after an interruption: only values
+that are still 36 characters long are converted.
+
+Existing ids keep their uuid4 values, only their storage changes; rows
+created from now on get time-ordered UUIDv7 ids. Run it with the application
+stopped: until a table is converted, lookups of its ids find nothing.
+"""
+
+import uuid
+from sqlalchemy import text
+from app import db
+from app.models.keys import UUIDKey
+
+
+def uuid_key_columns():
+    """[(table, [UUIDKey columns])] of every table that has some."""
+    return [(table, columns) for table in db.metadata.sorted_tables
+            if (columns := [column for column in table.columns if isinstance(column.type, UUIDKey)])]
+
+
+def convert_uuid_keys(batch_size=1000, progress=None):
+    """Convert every UUIDKey column, table by table.
+
+    `progress`, when given, is called with (table name, count) after each table.
+    Returns the number of rows (MySQL) or distinct ids (SQLite) converted.
+    """
+    converters = {'mysql': _convert_mysql_table, 'sqlite': _convert_sqlite_table}
+    convert = converters.get(db.engine.dialect.name)
+    if convert is None:
+        raise ValueError(f"No uuid key conversion for {db.engine.dialect.name} databases")
+
+    total = 0
+    with db.engine.connect() as connection:
+        # Parents and children are converted one after the other, so their
+        # foreign keys disagree until both are done.
+        _set_foreign_key_checks(connection, False)
+        try:
+            for table, columns in uuid_key_columns():
+                converted = convert(connection, table.name, columns, batch_size)
+                total += converted
+                if progress:
+                    progress(table.name, converted)
+        finally:
+            _set_foreign_key_checks(connection, True)
+    return total
+
+
+def _set_foreign_key_checks(connection, enabled):
+    if connection.dialect.name == 'mysql':
+        connection.execute(text(f"SET FOREIGN_KEY_CHECKS = {int(enabled)}"))
+    else:
+        connection.execute(text(f"PRAGMA foreign_keys = {'ON' if enabled else 'OFF'}"))
+    connection.commit()
+
+
+def _convert_mysql_table(connection, table, columns, batch_size):
+    """VARCHAR(36) -> VARBINARY(36) (same bytes), UNHEX in batches, then -> BINARY(16)."""
+    quote = connection.dialect.identifier_preparer.quote
+
+    def modify(column_type):
+        return ', '.join(f"MODIFY {quote(column.name)} {column_type} {'NULL' if column.nullable else 'NOT NULL'}"
+                         for column in columns)
+
+    names = [quote(column.name) for column in columns]
+    connection.execute(text(f"ALTER TABLE {quote(table)} {modify('VARBINARY(36)')}"))
+    update = text(
+        f"UPDATE {quote(table)} SET "
+        + ', '.join(f"{name} = IF(LENGTH({name}) = 36, UNHEX(REPLACE({name}, '-', '')), {name})" for name in names)
+        + " WHERE " + ' OR '.join(f"LENGTH({name}) = 36" for name in names)
+        + " LIMIT :limit")
+    converted = 0
+    while True:
+        rows = connection.execute(update, {'limit': batch_size}).rowcount
+        connection.commit()
+        converted += rows
+        if rows < batch_size:
+            break
+    connection.execute(text(f"ALTER TABLE {quote(table)} {modify('BINARY(16)')}"))
+    connection.commit()
+    return converted
+
+
+def _convert_sqlite_table(connection, table, columns, batch_size):
+    """SQLite columns take any type, so only the values change (text -> 16 byte blob)."""
+    quote = connection.dialect.identifier_preparer.quote
+    converted = 0
+    for column in columns:
+        name = quote(column.name)
+        select_text = text(f"SELECT DISTINCT {name} FROM {quote(table)} "
+                           f"WHERE typeof({name}) = 'text' AND length({name}) = 36 LIMIT :limit")
+        update = text(f"UPDATE {quote(table)} SET {name} = :key WHERE {name} = :value")
+        while True:
+            values = connection.execute(select_text, {'limit': batch_size}).scalars().all()
+            if not values:
+                break
+            connection.execute(update, [{'key': uuid.UUID(value).bytes, 'value': value} for value in values])
+            connection.commit()
+            converted += len(values)
+    return converted
@@ -4,5 +4,17 @@ from .skill import Skill
 from .review import Review
 from .booking import Booking
 from .associations import session_skill
+from .idempotency_key import IdempotencyKey
+from .session_daily_stats import SessionDailyStats
+from .session_occurrence import SessionOccurrence
+from .waitlist_entry import WaitlistEntry
+from .session_neighbors import SessionNeighbors
+from .refresh_token import RefreshToken
+from .purge_job import PurgeJob
+from .outbox_event import OutboxEvent, OutboxCheckpoint
+from .session_card import SessionCard
+from .archive import ArchivedBooking, ArchivedReview
 
-__all__ = ['User', 'SkillSession', 'Skill', 'Review', 'Booking', 'session_skill']
\ No newline at end of file
+__all__ = ['User', 'SkillSession', 'Skill', 'Review', 'Booking', 'session_skill', 'IdempotencyKey', 'SessionDailyStats', 'SessionOccurrence',
+           'WaitlistEntry', 'SessionNeighbors', 'RefreshToken', 'PurgeJob',
+           'OutboxEvent', 'OutboxCheckpoint', 'SessionCard', 'ArchivedBooking', 'ArchivedReview']
\ No newline at end of file
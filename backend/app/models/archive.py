@@ -0,0 +1,72 @@
+""" Cold storage for booking history: archived bookings and reviews
+
+Completed and cancelled bookings older than ARCHIVE_AFTER are moved here by
+`flask archive-history` (app/persistence/archive_repository.py), with their
+reviews when asked to. The tables repeat the columns of `bookings` and
+`reviews` so rows move with INSERT ... SELECT, and keep the ON DELETE CASCADE
+foreign keys to users and sessions. A review always lives in the same tier as
+its booking.
+"""
+
+from datetime import datetime
+from app import db
+from app.models.booking import Booking
+from app.models.keys import UUIDKey
+from app.models.review import Review
+
+# Booking statuses that never change again
+TERMINAL_STATUSES = ('completed', 'cancelled')
+
+
+class ArchivedBooking(db.Model):
+    """ A booking moved out of the hot `bookings` table; read-only """
+    __tablename__ = 'bookings_archive'
+    __table_args__ = (
+        db.Index('ix_bookings_archive_user_id_booking_date', 'user_id', 'booking_date'),
+    )
+
+    id = db.Column(UUIDKey, primary_key=True)
+    user_id = db.Column(UUIDKey, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    session_id = db.Column(UUIDKey, db.ForeignKey('skill_sessions.id', ondelete='CASCADE'), nullable=False,
+                           index=True)
+    occurrence_id = db.Column(UUIDKey, db.ForeignKey('session_occurrences.id', ondelete='SET NULL'), nullable=True)
+    booking_date = db.Column(db.DateTime, nullable=False)
+    status = db.Column(db.String(20), nullable=False)
+    participants = db.Column(db.Integer, nullable=False)
+    total_price = db.Column(db.Float, nullable=False)
+    special_requests = db.Column(db.String(300), nullable=True)
+    created_at = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime)
+    archived_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
+
+    def is_editable(self):
+        return False
+
+    def is_cancellable(self):
+        return False
+
+
+class ArchivedReview(db.Model):
+    """ The review of an archived booking; read-only """
+    __tablename__ = 'reviews_archive'
+
+    id = db.Column(UUIDKey, primary_key=True)
+    created_at = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime)
+    text = db.Column(db.String(500), nullable=False)
+    rating = db.Column(db.Integer, nullable=False)
+    user_id = db.Column(UUIDKey, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False, index=True)
+    session_id = db.Column(UUIDKey, db.ForeignKey('skill_sessions.id', ondelete='CASCADE'), nullable=False, index=True)
+    instructor_id = db.Column(UUIDKey, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False, index=True)
+    booking_id = db.Column(UUIDKey, db.ForeignKey('bookings_archive.id', ondelete='CASCADE'), nullable=False,
+                           index=True)
+    archived_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
+
+
+# hot model -> its archive; aggregates recomputed from history read both
+ARCHIVES = {Booking: ArchivedBooking, Review: ArchivedReview}
+
+
+def history_columns(model):
+    """Names of the columns a hot row and its archived copy share."""
+    return [column.key for column in model.__table__.columns]
@@ -1,9 +1,10 @@
 from sqlalchemy import Table, Column, ForeignKey
 from sqlalchemy.orm import relationship
 from app import db
+from app.models.keys import UUIDKey
 
 # Association table: many-to-many relationship between SkillSession and Skill
 session_skill = db.Table('session_skill',
-  Column('session_id', db.String(36), ForeignKey('skill_sessions.id'), primary_key=True),
-  Column('skill_id', db.String(36), ForeignKey('skills.id'), primary_key=True)
+  Column('session_id', UUIDKey, ForeignKey('skill_sessions.id', ondelete='CASCADE'), primary_key=True),
+  Column('skill_id', UUIDKey, ForeignKey('skills.id', ondelete='CASCADE'), primary_key=True, index=True)
 )
\ No newline at end of file
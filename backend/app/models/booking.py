@@ -1,18 +1,28 @@
 """ Booking Model """
 
-import uuid
 from datetime import datetime
 from app import db
+from app.models.keys import UUIDKey, new_id
 from sqlalchemy.orm import validates
 
 
 class Booking(db.Model):
     """ Booking class for skill session reservations """
     __tablename__ = 'bookings'
-
-    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    user_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
-    session_id = db.Column(db.String(36), db.ForeignKey('skill_sessions.id'), nullable=False)
+    __table_args__ = (
+        # Supports the auto-completion scan: status equality + booking_date range, id as tie-breaker
+        db.Index('ix_bookings_status_booking_date', 'status', 'booking_date', 'id'),
+        # A user's schedule, in time order (conflict checks and the conflicts report)
+        db.Index('ix_bookings_user_id_booking_date', 'user_id', 'booking_date'),
+    )
+
+    id = db.Column(UUIDKey, primary_key=True, default=new_id)
+    user_id = db.Column(UUIDKey, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    session_id = db.Column(UUIDKey, db.ForeignKey('skill_sessions.id', ondelete='CASCADE'), nullable=False,
+                           index=True)
+    # scheduled slot this booking holds spots in; None for free-form booking_date bookings
+    occurrence_id = db.Column(UUIDKey, db.ForeignKey('session_occurrences.id', ondelete='SET NULL'),
+                              nullable=True, index=True)
     booking_date = db.Column(db.DateTime, nullable=False)  # when the session is scheduled
     status = db.Column(db.String(20), nullable=False, default='pending')  # pending, confirmed, cancelled, completed
     participants = db.Column(db.Integer, nullable=False, default=1)  # number of spots booked
@@ -24,17 +34,19 @@ class Booking(db.Model):
     # Relationships
     user_r = db.relationship('User', back_populates="bookings_r")
     session_r = db.relationship('SkillSession', back_populates="bookings_r")
-    review_r = db.relationship('Review', back_populates="booking_r", uselist=False)
+    occurrence_r = db.relationship('SessionOccurrence', back_populates="bookings_r")
+    review_r = db.relationship('Review', back_populates="booking_r", uselist=False, passive_deletes=True)
 
-    def __init__(self, user_id, session_id, booking_date, participants=1, special_requests=None):
+    def __init__(self, user_id, session_id, booking_date, participants=1, special_requests=None, occurrence_id=None):
         if user_id is None or session_id is None or booking_date is None:
             raise ValueError("Required attributes not specified!")
 
-        self.id = str(uuid.uuid4())
+        self.id = new_id()
         self.created_at = datetime.now()
         self.updated_at = datetime.now()
         self.user_id = user_id
         self.session_id = session_id
+        self.occurrence_id = occurrence_id
         self.booking_date = booking_date
         self.participants = participants
         self.status = 'pending'
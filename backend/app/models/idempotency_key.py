@@ -0,0 +1,37 @@
+""" Idempotency key model """
+
+import secrets
+from datetime import datetime
+from app import db
+
+
+class IdempotencyKey(db.Model):
+    """ Stored outcome of a request sent with an Idempotency-Key header """
+    __tablename__ = 'idempotency_keys'
+
+    # sha256 of (user id, route, client key) - fixed width whatever the client sends
+    key_hash = db.Column(db.String(64), primary_key=True)
+    request_hash = db.Column(db.String(64), nullable=False)  # sha256 of the request body
+    # random per claim: only the request holding it may complete or release the key
+    claim_token = db.Column(db.String(32), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='in_progress')  # in_progress, completed
+    response_code = db.Column(db.Integer, nullable=True)
+    response_body = db.Column(db.Text, nullable=True)  # JSON encoded
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+    def __init__(self, key_hash, request_hash, expires_at):
+        self.key_hash = key_hash
+        self.request_hash = request_hash
+        self.claim_token = secrets.token_hex(16)
+        self.status = 'in_progress'
+        self.created_at = datetime.now()
+        self.expires_at = expires_at
+
+    def is_completed(self):
+        """Check if the original request has finished and its response is stored"""
+        return self.status == 'completed'
+
+    def is_expired(self, now=None):
+        """Check if the key is past its TTL"""
+        return self.expires_at <= (now or datetime.now())
@@ -0,0 +1,72 @@
+""" Transactional outbox: change events and the relay's consumer checkpoints """
+
+import json
+from datetime import date, datetime
+from app import db
+from app.models.keys import UUIDKey
+
+AGGREGATES = ('user', 'skill', 'skill_session', 'occurrence', 'booking', 'waitlist_entry', 'review')
+# Fields never written to the outbox; an update only says that they changed
+PRIVATE_FIELDS = ('password',)
+
+
+def _encode(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+def encode_payload(data):
+    """Compact JSON of an event's fields, or None when it has none."""
+    if not data:
+        return None
+    changed = [name for name in PRIVATE_FIELDS if name in data]
+    if changed:
+        data = dict({name: value for name, value in data.items() if name not in PRIVATE_FIELDS},
+                    private_changed=changed)
+    return json.dumps(data, separators=(',', ':'), default=_encode, sort_keys=True)
+
+
+class OutboxEvent(db.Model):
+    """ One change to an aggregate, written in the transaction that made it
+
+    Events are numbered by an autoincrement id; the relay (app/services/outbox.py)
+    publishes them in that order. The payload holds only the ids consumers need
+    to route the event and the fields that changed, not the whole row.
+    """
+    __tablename__ = 'outbox_events'
+
+    id = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'), primary_key=True, autoincrement=True)
+    aggregate = db.Column(db.String(20), nullable=False)  # one of AGGREGATES
+    aggregate_id = db.Column(UUIDKey, nullable=False)
+    kind = db.Column(db.String(20), nullable=False)  # created, updated, deleted, confirmed, cancelled, ...
+    payload = db.Column(db.Text, nullable=True)  # JSON encoded
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.now, index=True)
+
+    def __init__(self, aggregate, aggregate_id, kind, data=None):
+        if aggregate not in AGGREGATES:
+            raise ValueError(f"Outbox aggregate must be one of: {', '.join(AGGREGATES)}")
+        self.aggregate = aggregate
+        self.aggregate_id = aggregate_id
+        self.kind = kind
+        self.payload = encode_payload(data)
+        self.created_at = datetime.now()
+
+
+def encode_gaps(gaps):
+    return json.dumps({str(event_id): seen.isoformat() for event_id, seen in gaps.items()}) if gaps else None
+
+
+def decode_gaps(text):
+    return {int(event_id): datetime.fromisoformat(seen) for event_id, seen in json.loads(text).items()} if text else {}
+
+
+class OutboxCheckpoint(db.Model):
+    """ The last event id a durable consumer (sink) of the relay has received, and the ids it skipped """
+    __tablename__ = 'outbox_checkpoints'
+
+    consumer = db.Column(db.String(64), primary_key=True)
+    position = db.Column(db.BigInteger, nullable=False, default=0)
+    # JSON {event id: when the relay first saw it missing} of ids below `position` not yet received
+    gaps = db.Column(db.Text, nullable=True)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.now, onupdate=datetime.now)
@@ -0,0 +1,43 @@
+""" Background purge job model """
+
+from datetime import datetime
+from app import db
+from app.models.keys import UUIDKey, new_id
+
+
+class PurgeJob(db.Model):
+    """ Deletion of a large user or skill session graph, done in bounded batches by a worker
+
+    The request that asks for the deletion only hides the target and records
+    the job; `deleted` and `batches` report progress while it runs.
+    """
+    __tablename__ = 'purge_jobs'
+    __table_args__ = (
+        db.Index('ix_purge_jobs_status_created_at', 'status', 'created_at'),
+    )
+
+    TARGETS = ('user', 'skill_session')
+
+    id = db.Column(UUIDKey, primary_key=True, default=new_id)
+    target = db.Column(db.String(20), nullable=False)  # user, skill_session
+    target_id = db.Column(UUIDKey, nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='pending')  # pending, running, done, failed
+    deleted = db.Column(db.Integer, nullable=False, default=0)  # rows deleted so far, all tables
+    batches = db.Column(db.Integer, nullable=False, default=0)
+    error = db.Column(db.String(500), nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.now, onupdate=datetime.now)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    def __init__(self, target, target_id):
+        if target not in self.TARGETS:
+            raise ValueError(f"Purge target must be one of: {', '.join(self.TARGETS)}")
+        self.id = new_id()
+        self.target = target
+        self.target_id = target_id
+        self.status = 'pending'
+        self.deleted = 0
+        self.batches = 0
+        self.created_at = datetime.now()
+        self.updated_at = datetime.now()
+
@@ -0,0 +1,35 @@
+""" Refresh token model """
+
+import hashlib
+from datetime import datetime
+from app import db
+from app.models.keys import UUIDKey
+
+
+def hash_refresh_token(token):
+    """Refresh tokens are random, so a plain sha256 is enough: only digests are stored."""
+    return hashlib.sha256(token.encode('utf-8')).digest()
+
+
+class RefreshToken(db.Model):
+    """ One issued refresh token, by digest.
+
+    Tokens descending from the same login share a family_id; each refresh
+    rotates the presented token (rotated_at) and issues the next one in the
+    family. Presenting a rotated or revoked token again means it leaked, and
+    revokes the whole family.
+    """
+    __tablename__ = 'refresh_tokens'
+
+    token_hash = db.Column(db.BINARY(32), primary_key=True)  # sha256 digest of the token
+    family_id = db.Column(UUIDKey, nullable=False, index=True)
+    user_id = db.Column(UUIDKey, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False, index=True)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)  # slides forward with every refresh
+    session_expires_at = db.Column(db.DateTime, nullable=False)  # absolute limit of the family
+    rotated_at = db.Column(db.DateTime, nullable=True)
+    revoked_at = db.Column(db.DateTime, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
+
+    def is_usable(self, now=None):
+        """Neither rotated, revoked nor expired"""
+        return self.rotated_at is None and self.revoked_at is None and self.expires_at > (now or datetime.now())
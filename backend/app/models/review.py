@@ -1,5 +1,5 @@
-import uuid
 from app import db
+from app.models.keys import UUIDKey, new_id
 from datetime import datetime
 from sqlalchemy.orm import validates
 
@@ -8,15 +8,15 @@ class Review(db.Model):
     """Review Class for skill sessions"""
     __tablename__ = 'reviews'
 
-    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = db.Column(UUIDKey, primary_key=True, default=new_id)
     created_at = db.Column(db.DateTime, default=datetime.now())
     updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now())
     text = db.Column(db.String(500), nullable=False)
     rating = db.Column(db.Integer, nullable=False)
-    user_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)  # reviewer
-    session_id = db.Column(db.String(36), db.ForeignKey('skill_sessions.id'), nullable=False)
-    instructor_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)  # instructor being reviewed
-    booking_id = db.Column(db.String(36), db.ForeignKey('bookings.id'), nullable=False)  # ensures only booked users can review
+    user_id = db.Column(UUIDKey, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False, index=True)  # reviewer
+    session_id = db.Column(UUIDKey, db.ForeignKey('skill_sessions.id', ondelete='CASCADE'), nullable=False, index=True)
+    instructor_id = db.Column(UUIDKey, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False, index=True)  # instructor being reviewed
+    booking_id = db.Column(UUIDKey, db.ForeignKey('bookings.id', ondelete='CASCADE'), nullable=False, index=True)  # ensures only booked users can review
 
     # Relationships
     user_r = db.relationship('User', foreign_keys=[user_id], back_populates="reviews_written_r")
@@ -28,7 +28,7 @@ class Review(db.Model):
         if text is None or rating is None or session_id is None or user_id is None or instructor_id is None or booking_id is None:
             raise ValueError("Required attributes not specified!")
 
-        self.id = str(uuid.uuid4())
+        self.id = new_id()
         self.created_at = datetime.now()
         self.updated_at = datetime.now()
         self.text = text
@@ -0,0 +1,64 @@
+""" Catalog card read model: one pre-joined, pre-aggregated row per skill session """
+
+import json
+from datetime import datetime
+from app import db
+from app.models.keys import UUIDKey
+
+# Session columns copied onto the card as they are
+SESSION_FIELDS = ('title', 'description', 'price', 'duration', 'max_participants', 'session_type',
+                  'difficulty_level', 'location', 'instructor_id', 'is_active', 'created_at')
+# Instructor columns, stored as instructor_<name>
+INSTRUCTOR_FIELDS = ('first_name', 'last_name', 'experience_level')
+
+
+class SessionCard(db.Model):
+    """ Everything a catalog listing shows for a session, in a single row
+
+    Written only by the projector (SessionCardRepository.refresh), in the same
+    transaction as every facade change to the session, its instructor, its
+    skills, its bookings or its reviews; `flask rebuild-session-cards`
+    recomputes all of them. Listings read these rows with one indexed scan
+    instead of joining four tables and counting in Python.
+    """
+    __tablename__ = 'session_cards'
+    __table_args__ = (
+        db.Index('ix_session_cards_created_at', 'created_at', 'session_id'),
+        db.Index('ix_session_cards_instructor_created_at', 'instructor_id', 'created_at'),
+    )
+
+    session_id = db.Column(UUIDKey, db.ForeignKey('skill_sessions.id', ondelete='CASCADE'), primary_key=True)
+    title = db.Column(db.String(100), nullable=False)
+    description = db.Column(db.String(500), nullable=False)
+    price = db.Column(db.Float, nullable=False)
+    duration = db.Column(db.Integer, nullable=False)
+    max_participants = db.Column(db.Integer, nullable=False)
+    session_type = db.Column(db.String(20), nullable=False)
+    difficulty_level = db.Column(db.String(20), nullable=False)
+    location = db.Column(db.String(200), nullable=True)
+    instructor_id = db.Column(UUIDKey, nullable=False)
+    is_active = db.Column(db.Boolean, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False)
+    instructor_first_name = db.Column(db.String(50), nullable=False)
+    instructor_last_name = db.Column(db.String(50), nullable=False)
+    instructor_experience_level = db.Column(db.String(20), nullable=False)
+    skills = db.Column(db.Text, nullable=False, default='[]')  # JSON [{id, name, category}], by name
+    confirmed_bookings = db.Column(db.Integer, nullable=False, default=0)
+    rating_sum = db.Column(db.Integer, nullable=False, default=0)
+    rating_count = db.Column(db.Integer, nullable=False, default=0)
+    refreshed_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
+
+    def get_available_spots(self):
+        return self.max_participants - self.confirmed_bookings
+
+    def get_average_rating(self):
+        return self.rating_sum / self.rating_count if self.rating_count else None
+
+    def get_skills(self):
+        return json.loads(self.skills)
+
+
+def encode_skills(skills):
+    """[(id, name, category)] -> the card's JSON skill list, sorted by name."""
+    return json.dumps([{'id': skill_id, 'name': name, 'category': category}
+                       for skill_id, name, category in sorted(skills, key=lambda skill: (skill[1], skill[0]))])
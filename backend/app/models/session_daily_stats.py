@@ -0,0 +1,34 @@
+""" Daily booking and review rollups per skill session """
+
+from app import db
+from app.models.keys import UUIDKey
+
+
+class SessionDailyStats(db.Model):
+    """ Counters for one skill session on one day, kept current by the facade
+
+    Bookings and their reviews are bucketed by the day the booked session takes
+    place (booking_date), so a row describes one occurrence of the session.
+    """
+    __tablename__ = 'session_daily_stats'
+    __table_args__ = (
+        # Instructor stats: all rows of an instructor in a day range
+        db.Index('ix_session_daily_stats_instructor_day', 'instructor_id', 'day'),
+    )
+
+    session_id = db.Column(UUIDKey, db.ForeignKey('skill_sessions.id', ondelete='CASCADE'), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    instructor_id = db.Column(UUIDKey, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    # bookings per status
+    pending = db.Column(db.Integer, nullable=False, default=0)
+    confirmed = db.Column(db.Integer, nullable=False, default=0)
+    cancelled = db.Column(db.Integer, nullable=False, default=0)
+    completed = db.Column(db.Integer, nullable=False, default=0)
+    participants = db.Column(db.Integer, nullable=False, default=0)  # spots taken by non-cancelled bookings
+    booked_value = db.Column(db.Float, nullable=False, default=0.0)  # total_price of non-cancelled bookings
+    revenue = db.Column(db.Float, nullable=False, default=0.0)  # total_price of completed bookings
+    review_count = db.Column(db.Integer, nullable=False, default=0)
+    rating_sum = db.Column(db.Integer, nullable=False, default=0)
+
+    COUNTERS = ('pending', 'confirmed', 'cancelled', 'completed', 'participants',
+                'booked_value', 'revenue', 'review_count', 'rating_sum')
@@ -0,0 +1,42 @@
+""" Precomputed similar-session lists for recommendations """
+
+import struct
+import uuid
+from datetime import datetime
+from app import db
+
+# One packed neighbor: the session UUID's 16 bytes and a float32 score
+NEIGHBOR = struct.Struct('<16sf')
+# Row holding the most booked sessions, recommended to users without history
+POPULAR = '*'
+# A review moves a booking's weight from 1 to 1 + (rating - 3) / 2, i.e. 0..2
+NEUTRAL_RATING = 3
+RATING_SCALE = 2
+
+
+def interaction_weight(rating=None):
+    """How much a booked (and possibly reviewed) session says about a user's taste."""
+    return 1.0 if rating is None else 1.0 + (rating - NEUTRAL_RATING) / RATING_SCALE
+
+
+def pack_neighbors(neighbors):
+    """[(session id, score), ...] -> bytes, 20 per neighbor."""
+    return b''.join(NEIGHBOR.pack(uuid.UUID(session_id).bytes, score) for session_id, score in neighbors)
+
+
+def unpack_neighbors(blob):
+    """bytes -> [(session id, score), ...], best first."""
+    return [(str(uuid.UUID(bytes=raw)), score) for raw, score in NEIGHBOR.iter_unpack(blob)]
+
+
+class SessionNeighbors(db.Model):
+    """ The top-K most similar sessions to one session, packed into a single row.
+
+    Written by the `refresh-recommendations` job; GET /users/<id>/recommendations
+    only reads these rows and merges them.
+    """
+    __tablename__ = 'session_neighbors'
+
+    session_id = db.Column(db.String(36), primary_key=True)  # a session id, or POPULAR
+    neighbors = db.Column(db.LargeBinary, nullable=False)
+    computed_at = db.Column(db.DateTime, nullable=False, default=datetime.now, index=True)
@@ -0,0 +1,79 @@
+""" Session occurrence model """
+
+from datetime import datetime, timedelta
+from app import db
+from app.models.keys import UUIDKey, new_id
+from sqlalchemy.orm import validates
+
+# Upper bound on ends_at - starts_at. Overlap searches scan the starts_at index
+# from (range start - this) instead of from the beginning of time.
+MAX_OCCURRENCE_LENGTH = timedelta(hours=24)
+
+
+class SessionOccurrence(db.Model):
+    """ One scheduled time slot of a skill session, with its own capacity """
+    __tablename__ = 'session_occurrences'
+    __table_args__ = (
+        # Interval lookups: starts_at range scan, ends_at checked from the index
+        db.Index('ix_session_occurrences_starts_at_ends_at', 'starts_at', 'ends_at'),
+        # A session's calendar
+        db.Index('ix_session_occurrences_session_id_starts_at', 'session_id', 'starts_at'),
+    )
+
+    id = db.Column(UUIDKey, primary_key=True, default=new_id)
+    session_id = db.Column(UUIDKey, db.ForeignKey('skill_sessions.id', ondelete='CASCADE'), nullable=False)
+    starts_at = db.Column(db.DateTime, nullable=False)
+    ends_at = db.Column(db.DateTime, nullable=False)
+    capacity = db.Column(db.Integer, nullable=False)
+    booked = db.Column(db.Integer, nullable=False, default=0)  # participants of non-cancelled bookings
+    status = db.Column(db.String(20), nullable=False, default='scheduled')  # scheduled, cancelled
+    created_at = db.Column(db.DateTime, default=datetime.now)
+
+    # Relationships
+    session_r = db.relationship('SkillSession', back_populates='occurrences_r')
+    bookings_r = db.relationship('Booking', back_populates='occurrence_r', passive_deletes=True)
+    waitlist_r = db.relationship('WaitlistEntry', back_populates='occurrence_r', passive_deletes=True)
+
+    def __init__(self, session_id, starts_at, ends_at, capacity):
+        if session_id is None or starts_at is None or ends_at is None or capacity is None:
+            raise ValueError("Required attributes not specified!")
+
+        self.id = new_id()
+        self.created_at = datetime.now()
+        self.session_id = session_id
+        self.starts_at = starts_at
+        self.ends_at = ends_at
+        self.capacity = capacity
+        self.booked = 0
+        self.status = 'scheduled'
+
+    # --- Validators ---
+    @validates('ends_at')
+    def validate_ends_at(self, key, value):
+        """Validate the occurrence has a positive length within MAX_OCCURRENCE_LENGTH"""
+        if not self.starts_at < value <= self.starts_at + MAX_OCCURRENCE_LENGTH:
+            raise ValueError("An occurrence must end after it starts and last at most 24 hours")
+        return value
+
+    @validates('capacity')
+    def validate_capacity(self, key, value):
+        """Validate capacity"""
+        if not isinstance(value, int) or value <= 0:
+            raise ValueError("Capacity must be a positive integer")
+        return value
+
+    @validates('status')
+    def validate_status(self, key, value):
+        """Validate occurrence status"""
+        if value not in ['scheduled', 'cancelled']:
+            raise ValueError("Status must be one of: scheduled, cancelled")
+        return value
+
+    # --- Methods ---
+    def get_available_spots(self):
+        """Get number of spots left in this occurrence."""
+        return self.capacity - self.booked
+
+    def overlaps(self, start, end):
+        """Check if the occurrence overlaps the half-open range [start, end)."""
+        return self.starts_at < end and self.ends_at > start
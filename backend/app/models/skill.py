@@ -1,8 +1,8 @@
 """ Skill Model """
 
-import uuid
 from datetime import datetime
 from app import db
+from app.models.keys import UUIDKey, new_id
 from sqlalchemy.orm import validates
 from app.models.associations import session_skill
 
@@ -10,7 +10,7 @@ class Skill(db.Model):
     """ Skill class for categorizing sessions """
     __tablename__ = 'skills'
     
-    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = db.Column(UUIDKey, primary_key=True, default=new_id)
     name = db.Column(db.String(50), nullable=False, unique=True)
     description = db.Column(db.String(200), nullable=True)
     category = db.Column(db.String(50), nullable=False)  # e.g., 'Technology', 'Arts', 'Language', 'Cooking', etc.
@@ -18,7 +18,7 @@ class Skill(db.Model):
     updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now())
 
     # Relationships
-    sessions_r = db.relationship("SkillSession", secondary=session_skill, back_populates="skills_r")
+    sessions_r = db.relationship("SkillSession", secondary=session_skill, back_populates="skills_r", passive_deletes=True)
 
     @validates("name")
     def validates_name(self, key, value):
@@ -42,7 +42,7 @@ class Skill(db.Model):
         if name is None or category is None:
             raise ValueError("Required attributes not specified!")
 
-        self.id = str(uuid.uuid4())
+        self.id = new_id()
         self.created_at = datetime.now()
         self.updated_at = datetime.now()
         self.name = name.strip()
@@ -1,13 +1,62 @@
-import uuid
-from datetime import datetime
+import math
+from datetime import datetime, timedelta
 from app import db
+from app.models.keys import UUIDKey, new_id
 from sqlalchemy.orm import validates
 from app.models.associations import session_skill
 
+# Catalog orderings for GET /skill-sessions/active?sort=
+SORTS = ('trending', 'top_rated', 'newest', 'price')
+
+# trending_key is log2 of the sum over bookings of 2 ** ((created_at - TRENDING_EPOCH) / TRENDING_HALF_LIFE).
+# Subtracting the same exponent for "now" gives log2 of the time-decayed booking count, so the
+# ordering never needs re-decaying. Kept in log space (log-sum-exp) it grows by one per half-life
+# instead of doubling, so it never overflows.
+TRENDING_EPOCH = datetime(2025, 1, 1)
+TRENDING_HALF_LIFE = timedelta(hours=72)
+TRENDING_NONE = -1e9  # trending_key without bookings: 2 ** TRENDING_NONE is 0.0
+# Taking back bookings that leave less than this share of the sum counts as taking back all of it,
+# rather than keeping float rounding noise
+TRENDING_MIN_SHARE = 1e-9
+TRENDING_MIN_GAP = -math.log2(1 - TRENDING_MIN_SHARE)  # the same threshold as a gap between log2 keys
+# top_rated: Bayesian average, as if every session started with RATING_PRIOR_COUNT ratings of RATING_PRIOR_MEAN
+RATING_PRIOR_MEAN = 3.0
+RATING_PRIOR_COUNT = 5
+
+
+def trending_weight(at):
+    """log2 of a booking made at `at`'s share of the sum behind trending_key."""
+    return (at - TRENDING_EPOCH) / TRENDING_HALF_LIFE
+
+
+def log2_add(key, weight):
+    """log2(2 ** key + 2 ** weight) without computing either power."""
+    high, low = max(key, weight), min(key, weight)
+    return high + math.log2(1 + 2.0 ** (low - high))
+
+
+def log2_sub(key, weight):
+    """log2(2 ** key - 2 ** weight), or TRENDING_NONE once (next to) nothing is left."""
+    if key - weight <= TRENDING_MIN_GAP:
+        return TRENDING_NONE
+    return key + math.log2(1 - 2.0 ** (weight - key))
+
+
+def bayesian_rating(rating_sum, rating_count):
+    return (RATING_PRIOR_MEAN * RATING_PRIOR_COUNT + rating_sum) / (RATING_PRIOR_COUNT + rating_count)
+
+
 class SkillSession(db.Model):
     __tablename__ = "skill_sessions"
-
-    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    __table_args__ = (
+        # One index per catalog ordering: sorted top-N reads walk the index and stop after N rows
+        db.Index('ix_skill_sessions_active_trending', 'is_active', 'trending_key', 'id'),
+        db.Index('ix_skill_sessions_active_rating', 'is_active', 'bayesian_rating', 'id'),
+        db.Index('ix_skill_sessions_active_created', 'is_active', 'created_at', 'id'),
+        db.Index('ix_skill_sessions_active_price', 'is_active', 'price', 'id'),
+    )
+
+    id = db.Column(UUIDKey, primary_key=True, default=new_id)
     title = db.Column(db.String(100), nullable=False)
     description = db.Column(db.String(500), nullable=False)
     price = db.Column(db.Float, nullable=False)  # price per session
@@ -18,16 +67,30 @@ class SkillSession(db.Model):
     location = db.Column(db.String(200), nullable=True)  # for in-person sessions
     latitude = db.Column(db.Float, nullable=True)  # for in-person sessions
     longitude = db.Column(db.Float, nullable=True)  # for in-person sessions
-    instructor_id = db.Column(db.String(36), db.ForeignKey("users.id"), nullable=False)
+    instructor_id = db.Column(UUIDKey, db.ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
     is_active = db.Column(db.Boolean, default=True)
+    # Ranking keys, kept current by the facade on every booking and review
+    trending_key = db.Column(db.Float, nullable=False, default=TRENDING_NONE)
+    rating_count = db.Column(db.Integer, nullable=False, default=0)
+    rating_sum = db.Column(db.Integer, nullable=False, default=0)
+    bayesian_rating = db.Column(db.Float, nullable=False, default=RATING_PRIOR_MEAN)
     created_at = db.Column(db.DateTime, default=datetime.now())
     updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now())
 
     # Relationships
     instructor_r = db.relationship("User", back_populates="skill_sessions_r")
-    reviews_r = db.relationship("Review", back_populates="session_r", lazy=True, cascade="all, delete-orphan")
-    skills_r = db.relationship("Skill", secondary=session_skill, lazy='subquery', back_populates="sessions_r")
-    bookings_r = db.relationship("Booking", back_populates="session_r", cascade="all, delete-orphan")
+    # Children are deleted by the foreign keys' ON DELETE CASCADE: passive_deletes keeps the ORM
+    # from loading them just to delete them one by one
+    reviews_r = db.relationship("Review", back_populates="session_r", lazy=True, cascade="all, delete-orphan",
+                                passive_deletes=True)
+    skills_r = db.relationship("Skill", secondary=session_skill, lazy='subquery', back_populates="sessions_r",
+                               passive_deletes=True)
+    bookings_r = db.relationship("Booking", back_populates="session_r", cascade="all, delete-orphan",
+                                 passive_deletes=True)
+    occurrences_r = db.relationship("SessionOccurrence", back_populates="session_r", cascade="all, delete-orphan",
+                                    passive_deletes=True)
+    waitlist_r = db.relationship("WaitlistEntry", back_populates="session_r", cascade="all, delete-orphan",
+                                 passive_deletes=True)
 
     def __init__(self, title, description, price, duration, instructor_id, max_participants=1, session_type='online', difficulty_level='beginner', location=None, latitude=None, longitude=None):
         if title is None or description is None or price is None or duration is None or instructor_id is None:
@@ -45,6 +108,12 @@ class SkillSession(db.Model):
         self.longitude = longitude
         self.instructor_id = instructor_id
         self.is_active = True
+        self.created_at = datetime.now()
+        self.updated_at = datetime.now()
+        self.trending_key = TRENDING_NONE
+        self.rating_count = 0
+        self.rating_sum = 0
+        self.bayesian_rating = RATING_PRIOR_MEAN
 
     # --- Validators ---
     @validates("title")
@@ -109,7 +178,8 @@ class SkillSession(db.Model):
         """Add a skill to the session."""
         if skill not in self.skills_r:
             self.skills_r.append(skill)
-            db.session.commit()
+            from app.persistence.transaction import commit
+            commit()
 
     def get_available_spots(self):
         """Get number of available spots for the session."""
@@ -120,12 +190,17 @@ class SkillSession(db.Model):
         """Check if the session is fully booked."""
         return self.get_available_spots() <= 0
 
+    def get_trending_score(self, now=None):
+        """Bookings made, each decayed by half every TRENDING_HALF_LIFE."""
+        if self.trending_key is None:
+            return 0.0
+        return 2.0 ** (self.trending_key - trending_weight(now or datetime.now()))
+
     def get_average_rating(self):
-        """Calculate average rating from reviews."""
-        if not self.reviews_r:
+        """Average rating, from the totals the facade keeps (archived reviews included)."""
+        if not self.rating_count:
             return None
-        total_rating = sum(review.rating for review in self.reviews_r)
-        return total_rating / len(self.reviews_r)
+        return self.rating_sum / self.rating_count
 
     @staticmethod
     def session_exists(session_id):
@@ -1,11 +1,10 @@
 """ User model """
 
-import uuid
 import re
 from datetime import datetime, timedelta
 from flask_bcrypt import Bcrypt
-import jwt
 from app import db
+from app.models.keys import UUIDKey, new_id
 from sqlalchemy.orm import validates
 
 
@@ -16,7 +15,7 @@ class User(db.Model):
     """ User class for skill session platform """
     __tablename__ = 'users'
 
-    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = db.Column(UUIDKey, primary_key=True, default=new_id)
     first_name = db.Column(db.String(50), nullable=False)
     last_name = db.Column(db.String(50), nullable=False)
     email = db.Column(db.String(120), nullable=False, unique=True)
@@ -29,21 +28,25 @@ class User(db.Model):
     hourly_rate = db.Column(db.Float, nullable=True)  # for instructors
     is_instructor = db.Column(db.Boolean, default=False)
     is_admin = db.Column(db.Boolean, default=False)
+    # incremented by every change to the user's bookings or teaching slots; see app/services/schedule.py
+    schedule_version = db.Column(db.Integer, nullable=False, default=0)
     created_at = db.Column(db.DateTime, default=datetime.now())
     updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now())
 
     # Relationships
-    skill_sessions_r = db.relationship('SkillSession', back_populates='instructor_r', cascade="all, delete")
-    reviews_written_r = db.relationship('Review', foreign_keys='Review.user_id', back_populates="user_r", cascade="all, delete")
-    reviews_received_r = db.relationship('Review', foreign_keys='Review.instructor_id', back_populates="instructor_r", cascade="all, delete")
-    bookings_r = db.relationship('Booking', back_populates="user_r", cascade="all, delete")
+    # Deleting a user leaves its sessions, reviews, bookings and waitlist entries to ON DELETE CASCADE
+    skill_sessions_r = db.relationship('SkillSession', back_populates='instructor_r', cascade="all, delete", passive_deletes=True)
+    reviews_written_r = db.relationship('Review', foreign_keys='Review.user_id', back_populates="user_r", cascade="all, delete", passive_deletes=True)
+    reviews_received_r = db.relationship('Review', foreign_keys='Review.instructor_id', back_populates="instructor_r", cascade="all, delete", passive_deletes=True)
+    bookings_r = db.relationship('Booking', back_populates="user_r", cascade="all, delete", passive_deletes=True)
+    waitlist_r = db.relationship('WaitlistEntry', back_populates="user_r", cascade="all, delete", passive_deletes=True)
 
 
     def __init__(self, first_name, last_name, email, password, bio=None, phone=None, location=None, experience_level='beginner', hourly_rate=None, is_instructor=False, is_admin=False):
         if first_name is None or last_name is None or email is None:
             raise ValueError("Required attributes not specified!")
 
-        self.id = str(uuid.uuid4())
+        self.id = new_id()
         self.created_at = datetime.now()
         self.updated_at = datetime.now()
         self.first_name = first_name.strip()
@@ -56,6 +59,7 @@ class User(db.Model):
         self.hourly_rate = hourly_rate
         self.is_instructor = is_instructor
         self.is_admin = is_admin
+        self.schedule_version = 0
         self.hash_password(password) 
 
     @validates("email")
@@ -109,11 +113,11 @@ class User(db.Model):
         self.bookings_r.append(booking)
 
     def get_average_rating(self):
-        """Calculate average rating for instructor from reviews."""
-        if not self.is_instructor or not self.reviews_received_r:
+        """Average rating across the instructor's sessions (archived reviews included)."""
+        count = sum(session.rating_count or 0 for session in self.skill_sessions_r) if self.is_instructor else 0
+        if not count:
             return None
-        total_rating = sum(review.rating for review in self.reviews_received_r)
-        return total_rating / len(self.reviews_received_r)
+        return sum(session.rating_sum or 0 for session in self.skill_sessions_r) / count
 
     # def delete(self, user_id):
     #     user = self.get(user_id)
@@ -129,6 +133,7 @@ class User(db.Model):
     def generate_token(self):
         """Generate JWT token for the user."""
         from flask import current_app
+        import jwt  # imported on first use: PyJWT pulls in cryptography, slow to import at boot
         payload = {
             'user_id': self.id,
             'email': self.email,
@@ -143,6 +148,7 @@ class User(db.Model):
     def verify_token(token):
         """Verify JWT token and return user data."""
         from flask import current_app
+        import jwt
         try:
             payload = jwt.decode(token, current_app.config['JWT_SECRET_KEY'], algorithms=['HS256'])
             return payload
@@ -0,0 +1,70 @@
+""" Waitlist entry model """
+
+from datetime import datetime
+from app import db
+from app.models.keys import UUIDKey, new_id
+from sqlalchemy.orm import validates
+
+
+class WaitlistEntry(db.Model):
+    """ A user's place in the queue for a fully booked session or occurrence """
+    __tablename__ = 'waitlist_entries'
+    __table_args__ = (
+        # Tickets are handed out in order within a queue, which makes them the FIFO order
+        db.UniqueConstraint('queue_key', 'ticket', name='uq_waitlist_entries_queue_key_ticket'),
+        # Queue head and "how many are ahead of me" are range scans of this index
+        db.Index('ix_waitlist_entries_queue_key_status_ticket', 'queue_key', 'status', 'ticket'),
+    )
+
+    id = db.Column(UUIDKey, primary_key=True, default=new_id)
+    # the occurrence id, or the session id for free-form booking_date bookings
+    queue_key = db.Column(UUIDKey, nullable=False)
+    ticket = db.Column(db.Integer, nullable=False)
+    session_id = db.Column(UUIDKey, db.ForeignKey('skill_sessions.id', ondelete='CASCADE'), nullable=False,
+                           index=True)
+    occurrence_id = db.Column(UUIDKey, db.ForeignKey('session_occurrences.id', ondelete='CASCADE'),
+                              nullable=True, index=True)
+    user_id = db.Column(UUIDKey, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False, index=True)
+    booking_date = db.Column(db.DateTime, nullable=False)
+    participants = db.Column(db.Integer, nullable=False, default=1)
+    special_requests = db.Column(db.String(300), nullable=True)
+    status = db.Column(db.String(20), nullable=False, default='waiting')  # waiting, promoted, cancelled
+    booking_id = db.Column(UUIDKey, nullable=True)  # the booking made on promotion
+    created_at = db.Column(db.DateTime, default=datetime.now)
+    updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now)
+
+    # Relationships
+    session_r = db.relationship('SkillSession', back_populates='waitlist_r')
+    occurrence_r = db.relationship('SessionOccurrence', back_populates='waitlist_r')
+    user_r = db.relationship('User', back_populates='waitlist_r')
+
+    def __init__(self, user_id, session_id, booking_date, participants=1, special_requests=None, occurrence_id=None):
+        if user_id is None or session_id is None or booking_date is None:
+            raise ValueError("Required attributes not specified!")
+
+        self.id = new_id()
+        self.created_at = datetime.now()
+        self.updated_at = datetime.now()
+        self.user_id = user_id
+        self.session_id = session_id
+        self.occurrence_id = occurrence_id
+        self.queue_key = occurrence_id or session_id
+        self.booking_date = booking_date
+        self.participants = participants
+        self.special_requests = special_requests.strip() if special_requests else None
+        self.status = 'waiting'
+
+    # --- Validators ---
+    @validates('participants')
+    def validate_participants(self, key, value):
+        """Validate number of participants"""
+        if not isinstance(value, int) or value <= 0:
+            raise ValueError("Participants must be a positive integer")
+        return value
+
+    @validates('status')
+    def validate_status(self, key, value):
+        """Validate entry status"""
+        if value not in ['waiting', 'promoted', 'cancelled']:
+            raise ValueError("Status must be one of: waiting, promoted, cancelled")
+        return value
@@ -0,0 +1,76 @@
+""" Moves old bookings (and their reviews) to the archive tables, and reads them back
+
+See app/models/archive.py. Each move is one INSERT ... SELECT and one DELETE
+per table for a batch of ids, so hot rows and their archived copies are never
+both visible, or both missing, to another transaction.
+"""
+
+from datetime import datetime
+from sqlalchemy import DateTime, and_, delete, exists, insert, literal, or_, select
+from app import db
+from app.models.archive import ArchivedBooking, ArchivedReview, history_columns
+from app.models.booking import Booking
+from app.models.review import Review
+from app.persistence.transaction import commit
+
+
+class ArchiveRepository:
+    def get_archivable(self, status, before, with_reviews=False, after=None, limit=1000):
+        """(booking_date, id) of `status` bookings scheduled before `before`, in keyset order.
+
+        Without `with_reviews`, reviewed bookings are left out: their review
+        would lose its booking. `after` is the last (booking_date, id) seen.
+        """
+        query = select(Booking.booking_date, Booking.id).where(Booking.status == status,
+                                                               Booking.booking_date < before)
+        if not with_reviews:
+            query = query.where(~exists().where(Review.booking_id == Booking.id))
+        if after is not None:
+            after_date, after_id = after
+            query = query.where(or_(Booking.booking_date > after_date,
+                                    and_(Booking.booking_date == after_date, Booking.id > after_id)))
+        return db.session.execute(query.order_by(Booking.booking_date, Booking.id).limit(limit)).all()
+
+    def move_bookings(self, booking_ids, statuses, before, with_reviews=False, now=None):
+        """Move these bookings, and with `with_reviews` their reviews, to the archive.
+
+        The rows are locked and checked again first, so a booking that got a
+        review since it was selected stays where it is. Returns
+        (bookings moved, reviews moved).
+        """
+        now = now or datetime.now()
+        query = select(Booking.id).where(Booking.id.in_(booking_ids), Booking.status.in_(statuses),
+                                         Booking.booking_date < before)
+        if not with_reviews:
+            query = query.where(~exists().where(Review.booking_id == Booking.id))
+        booking_ids = db.session.execute(query.with_for_update()).scalars().all()
+        if not booking_ids:
+            return 0, 0
+
+        reviews = 0
+        self._copy(Booking, ArchivedBooking, Booking.id.in_(booking_ids), now)
+        if with_reviews:
+            reviews = self._copy(Review, ArchivedReview, Review.booking_id.in_(booking_ids), now)
+            db.session.execute(delete(Review).where(Review.booking_id.in_(booking_ids)))
+        moved = db.session.execute(delete(Booking).where(Booking.id.in_(booking_ids))).rowcount
+        commit()
+        return moved, reviews
+
+    @staticmethod
+    def _copy(model, archive, condition, now):
+        names = history_columns(model)
+        columns = [model.__table__.c[name] for name in names]
+        return db.session.execute(insert(archive).from_select(
+            names + ['archived_at'], select(*columns, literal(now, DateTime)).where(condition))).rowcount
+
+    # --- Reads ---
+    def get_booking(self, booking_id):
+        return db.session.get(ArchivedBooking, booking_id)
+
+    def get_bookings(self, attr_name, attr_value):
+        return (ArchivedBooking.query.filter(getattr(ArchivedBooking, attr_name) == attr_value)
+                .order_by(ArchivedBooking.booking_date).all())
+
+    def get_reviews(self, attr_name, attr_value):
+        return (ArchivedReview.query.filter(getattr(ArchivedReview, attr_name) == attr_value)
+                .order_by(ArchivedReview.created_at).all())
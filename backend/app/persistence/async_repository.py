@@ -0,0 +1,67 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+# Synchronous driver -> asyncio driver for the same database
+ASYNC_DRIVERS = {
+    'mysql+pymysql': 'mysql+aiomysql',
+    'mysql': 'mysql+aiomysql',
+    'sqlite': 'sqlite+aiosqlite',
+}
+
+
+def to_async_uri(uri):
+    """Translate a SQLALCHEMY_DATABASE_URI to the matching asyncio driver."""
+    scheme, rest = uri.split('://', 1)
+    return f"{ASYNC_DRIVERS.get(scheme, scheme)}://{rest}"
+
+
+def create_async_session_factory(uri, **engine_options):
+    """Build an AsyncSession factory. Objects stay usable after commit, since
+    they are serialized after the session is closed."""
+    engine = create_async_engine(to_async_uri(uri), **engine_options)
+    return async_sessionmaker(engine, expire_on_commit=False)
+
+
+class AsyncSQLAlchemyRepository:
+    """Read side of SQLAlchemyRepository on an AsyncSession.
+
+    Lazy loading is not available on async sessions, so callers pass the
+    relationships they will serialize as loader `options` (selectinload, ...).
+    Writes still go through the synchronous repositories, whose model
+    validators call back into the facade.
+    """
+
+    def __init__(self, model, session_factory):
+        self.model = model
+        self.session_factory = session_factory
+
+    async def get(self, obj_id, options=()):
+        async with self.session_factory() as session:
+            return await session.get(self.model, obj_id, options=list(options))
+
+    async def get_many(self, obj_ids, options=()):
+        unique_ids = list(dict.fromkeys(obj_ids))
+        if not unique_ids:
+            return []
+        async with self.session_factory() as session:
+            result = await session.execute(
+                select(self.model).where(self.model.id.in_(unique_ids)).options(*options))
+            found = {obj.id: obj for obj in result.scalars()}
+        return [found[obj_id] for obj_id in unique_ids if obj_id in found]
+
+    async def get_all(self, options=(), order_by=()):
+        async with self.session_factory() as session:
+            result = await session.execute(select(self.model).options(*options).order_by(*order_by))
+            return list(result.scalars())
+
+    async def get_by_attribute(self, attr_name, attr_value, options=()):
+        async with self.session_factory() as session:
+            result = await session.execute(
+                select(self.model).where(getattr(self.model, attr_name) == attr_value).options(*options).limit(1))
+            return result.scalars().first()
+
+    async def get_all_by_attribute(self, attr_name, attr_value, options=()):
+        async with self.session_factory() as session:
+            result = await session.execute(
+                select(self.model).where(getattr(self.model, attr_name) == attr_value).options(*options))
+            return list(result.scalars())
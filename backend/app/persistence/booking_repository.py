@@ -1,6 +1,10 @@
+from datetime import timedelta
+from sqlalchemy import select, update, and_, or_
 from app.persistence.repository import SQLAlchemyRepository
 from app.models.booking import Booking
+from app.models.skill_session import SkillSession
 from app import db
+from app.persistence.transaction import commit
 
 class BookingRepository(SQLAlchemyRepository):
     def __init__(self):
@@ -32,4 +36,79 @@ class BookingRepository(SQLAlchemyRepository):
 
     def get_completed_bookings_by_user(self, user_id):
         """Get all completed bookings for a user (for review eligibility)."""
-        return self.model.query.filter_by(user_id=user_id, status='completed').all()
\ No newline at end of file
+        return self.model.query.filter_by(user_id=user_id, status='completed').all()
+
+    def get_booker_ids(self, instructor_id, session_id=None):
+        """Distinct ids of the users with bookings in one session, or in all of an instructor's sessions."""
+        sessions = ([session_id] if session_id is not None
+                    else select(SkillSession.id).where(SkillSession.instructor_id == instructor_id))
+        return set(db.session.scalars(select(Booking.user_id).distinct().where(Booking.session_id.in_(sessions))))
+
+    def get_held_by(self, user_id):
+        """What a user's bookings in other instructors' sessions hold, as rows without the booking ids.
+
+        (session_id, occurrence_id, booking_date, status, participants,
+        total_price, created_at): enough to give the spots, trending weight and
+        stats back before the bookings go with a cascade.
+        """
+        return db.session.execute(
+            select(Booking.session_id, Booking.occurrence_id, Booking.booking_date, Booking.status,
+                   Booking.participants, Booking.total_price, Booking.created_at)
+            .join(SkillSession, SkillSession.id == Booking.session_id)
+            .where(Booking.user_id == user_id, SkillSession.instructor_id != user_id)
+        ).all()
+
+    def get_busy_intervals(self, user_id=None):
+        """(user_id, start, end, booking_id) of non-cancelled bookings, by user then start.
+
+        Pass user_id for one user's schedule; without it every booking is
+        streamed for the conflicts report.
+        """
+        query = (
+            select(Booking.user_id, Booking.booking_date, SkillSession.duration, Booking.id)
+            .join(SkillSession, SkillSession.id == Booking.session_id)
+            .where(Booking.status != 'cancelled')
+        )
+        if user_id is not None:
+            query = query.where(Booking.user_id == user_id)
+        query = query.order_by(Booking.user_id, Booking.booking_date, Booking.id)
+        for owner_id, start, duration, booking_id in db.session.execute(query.execution_options(yield_per=1000)):
+            yield owner_id, start, start + timedelta(minutes=duration), booking_id
+
+    def get_completion_candidates(self, now, after=None, limit=1000):
+        """Get (id, booking_date, duration, user_id, session_id) rows for confirmed bookings that started before `now`.
+
+        Rows are ordered by (booking_date, id) so the caller can page with a keyset
+        cursor (`after`); only the columns needed to compute the end time and
+        address the change events are loaded.
+        """
+        query = (
+            select(Booking.id, Booking.booking_date, SkillSession.duration, Booking.user_id, Booking.session_id)
+            .join(SkillSession, SkillSession.id == Booking.session_id)
+            .where(Booking.status == 'confirmed', Booking.booking_date < now)
+        )
+        if after is not None:
+            after_date, after_id = after
+            query = query.where(or_(
+                Booking.booking_date > after_date,
+                and_(Booking.booking_date == after_date, Booking.id > after_id)
+            ))
+        query = query.order_by(Booking.booking_date, Booking.id).limit(limit)
+        return db.session.execute(query).all()
+
+    def bulk_set_status(self, booking_ids, from_status, to_status, now):
+        """Move the given bookings from one status to another with a single UPDATE.
+
+        Rows whose status changed since they were read are left untouched.
+        Returns the number of rows updated.
+        """
+        if not booking_ids:
+            return 0
+        result = db.session.execute(
+            update(Booking)
+            .where(Booking.id.in_(booking_ids), Booking.status == from_status)
+            .values(status=to_status, updated_at=now)
+            .execution_options(synchronize_session=False)
+        )
+        commit()
+        return result.rowcount
@@ -0,0 +1,240 @@
+"""Second-level cache of users, skills and skill sessions read by id.
+
+facade.get_user, get_skill and get_skill_session run several times per
+request (handlers, @jwt_required, model validators), and each call is a
+primary key SELECT unless the object is already in the session.
+SQLAlchemyRepository.get() asks this per-process cache first. On a hit, the
+object is rebuilt from a detached snapshot of its column values and merged
+into the session without SQL. Its relationships still load lazily.
+
+What keeps reads fresh:
+- Snapshots are only taken from the primary, by a session with no write in
+  its transaction, so they never hold replica-lagged or uncommitted rows.
+- Every write invalidates what it changes twice: when it is flushed or
+  executed (ORM flush, or an UPDATE / DELETE through the session), and again
+  when its transaction ends.
+- Each snapshot is stamped with the cache clock at the start of the
+  transaction that read it. A snapshot of a key invalidated since then is not
+  stored, so a read racing a local commit cannot cache the old row.
+- UPDATE / DELETE statements name the ids they change with the `invalidates`
+  execution option; without it the whole model is invalidated. A delete also
+  invalidates the cached models whose foreign keys cascade from it: deleting
+  a user deletes their sessions.
+
+Writes by other processes (cron jobs, other workers) are seen once the entry
+expires, ENTITY_CACHE_TTL seconds after it was stored.
+"""
+
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import make_transient_to_detached
+from sqlalchemy.orm.attributes import instance_state, set_committed_value
+from sqlalchemy.orm.util import identity_key
+from app.models.skill import Skill
+from app.models.skill_session import SkillSession
+from app.models.user import User
+from app.persistence.replicas import RoutingSession
+
+CACHED_MODELS = (User, Skill, SkillSession)
+_TABLES = {model.__table__.name for model in CACHED_MODELS}
+
+# session.info keys
+TX_CLOCK = 'entity_cache_clock'      # cache clock when the transaction began
+WRITTEN = 'entity_cache_written'     # {table: set of ids, or None for all} changed in the transaction
+
+
+class EntityCache:
+    """LRU map of (table, id) -> column snapshot, checked against invalidation stamps.
+
+    `clock` counts invalidations. A snapshot read by a transaction that began
+    at clock value v is stored only if neither its key nor its table was
+    invalidated after v. Stamps are kept for the max_entries most recently
+    invalidated keys; older ones are folded into `_floor`, which stands in for
+    the stamp of every key not listed.
+    """
+
+    def __init__(self, max_entries=10000, ttl=30.0, now=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = 0
+        self.hits = self.misses = self.evictions = 0
+        self._now = now
+        self._entries = OrderedDict()  # (table, id) -> (snapshot, version, expires at)
+        self._stamps = OrderedDict()   # (table, id) -> clock of its last invalidation, oldest first
+        self._table_stamps = {}        # table -> clock of its last invalidation as a whole
+        self._floor = 0
+        self._lock = threading.Lock()
+
+    def get(self, table, obj_id):
+        """The snapshot of a row, or None."""
+        key = (table, obj_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] <= self._now():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, table, obj_id, snapshot, version):
+        """Store a snapshot read at clock `version`; False if the row changed since."""
+        key = (table, obj_id)
+        with self._lock:
+            if max(self._stamps.get(key, self._floor), self._table_stamps.get(table, 0)) > version:
+                return False
+            self._entries[key] = (snapshot, version, self._now() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return True
+
+    def invalidate(self, table, obj_ids=None):
+        """Drop these ids of a table, or the whole table, and refuse snapshots read before now."""
+        with self._lock:
+            self.clock += 1
+            if obj_ids is None:
+                self._table_stamps[table] = self.clock
+                for key in [key for key in self._entries if key[0] == table]:
+                    del self._entries[key]
+                return
+            for obj_id in obj_ids:
+                key = (table, obj_id)
+                self._entries.pop(key, None)
+                self._stamps[key] = self.clock
+                self._stamps.move_to_end(key)
+            while len(self._stamps) > self.max_entries:
+                self._floor = self._stamps.popitem(last=False)[1]
+
+    def clear(self):
+        for table in _TABLES:
+            self.invalidate(table)
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses,
+                    'evictions': self.evictions}
+
+
+def init_entity_cache(app):
+    """Create the app's entity cache; none for the memory backend or when ENTITY_CACHE_ENABLED is off."""
+    enabled = app.config.get('ENTITY_CACHE_ENABLED', True) and app.config.get('REPOSITORY_BACKEND') != 'memory'
+    app.extensions['entity_cache'] = (
+        EntityCache(app.config['ENTITY_CACHE_SIZE'], app.config['ENTITY_CACHE_TTL']) if enabled else None)
+
+
+def _cache():
+    return current_app.extensions.get('entity_cache') if has_app_context() else None
+
+
+def cached_get(session, model, obj_id):
+    """session.get(model, obj_id), from the entity cache when the object is not in the session yet."""
+    cache = _cache()
+    if (cache is None or model not in CACHED_MODELS or obj_id is None or session.info.get(WRITTEN)
+            or identity_key(model, obj_id) in session.identity_map):
+        return session.get(model, obj_id)
+
+    table = model.__table__.name
+    snapshot = cache.get(table, obj_id)
+    if snapshot is not None:
+        return session.merge(_from_snapshot(model, snapshot), load=False)
+
+    version = session.info.get(TX_CLOCK, cache.clock)
+    obj = session.get(model, obj_id)
+    if obj is not None and session.reads_from_primary() and not session.info.get(WRITTEN):
+        snapshot = _snapshot(obj)
+        if snapshot is not None:
+            cache.put(table, obj_id, snapshot, version)
+    return obj
+
+
+def _snapshot(obj):
+    """Committed column values of a loaded, unmodified object, or None."""
+    state = instance_state(obj)
+    if state.modified:
+        return None
+    keys = [attr.key for attr in state.mapper.column_attrs]
+    if any(key not in state.dict for key in keys):
+        return None  # expired or deferred
+    return {key: state.dict[key] for key in keys}
+
+
+def _from_snapshot(model, snapshot):
+    obj = model.__mapper__.class_manager.new_instance()
+    for key, value in snapshot.items():
+        set_committed_value(obj, key, value)
+    make_transient_to_detached(obj)
+    return obj
+
+
+def _cascades_from(table):
+    """Cached tables whose rows a DELETE from `table` changes through ON DELETE rules."""
+    return {fk.parent.table.name for model in CACHED_MODELS for fk in model.__table__.foreign_keys
+            if fk.column.table is table and fk.ondelete in ('CASCADE', 'SET NULL')}
+
+
+def _invalidate(session, table, obj_ids=None):
+    cache = _cache()
+    if cache is None:
+        return
+    cache.invalidate(table, obj_ids)
+    written = session.info.setdefault(WRITTEN, {})
+    if obj_ids is None or written.get(table, set()) is None:
+        written[table] = None
+    else:
+        written.setdefault(table, set()).update(obj_ids)
+
+
+@event.listens_for(RoutingSession, 'after_begin')
+def _stamp_transaction(session, transaction, connection):
+    cache = _cache()
+    if cache is not None:
+        session.info.setdefault(TX_CLOCK, cache.clock)
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _invalidate_flushed(session, flush_context):
+    changed = defaultdict(set)
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, CACHED_MODELS):
+            changed[obj.__table__.name].add(obj.id)
+    for obj in session.deleted:
+        if isinstance(obj, CACHED_MODELS):
+            for table in _cascades_from(obj.__table__):
+                changed[table] = None
+    for table, obj_ids in changed.items():
+        _invalidate(session, table, obj_ids)
+
+
+@event.listens_for(RoutingSession, 'do_orm_execute')
+def _invalidate_executed(orm_execute_state):
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    session = orm_execute_state.session
+    table = orm_execute_state.statement.table
+    if table.name in _TABLES:
+        obj_ids = orm_execute_state.execution_options.get('invalidates')
+        _invalidate(session, table.name, None if obj_ids is None else set(obj_ids))
+    if orm_execute_state.is_delete:
+        for dependent in _cascades_from(table):
+            _invalidate(session, dependent)
+
+
+@event.listens_for(RoutingSession, 'after_transaction_end')
+def _invalidate_ended(session, transaction):
+    if transaction.parent is not None:
+        return
+    session.info.pop(TX_CLOCK, None)
+    written = session.info.pop(WRITTEN, None)
+    cache = _cache()
+    if written and cache is not None:
+        # again: a snapshot may have been stored between the write and the commit
+        for table, obj_ids in written.items():
+            cache.invalidate(table, obj_ids)
@@ -0,0 +1,87 @@
+import secrets
+from sqlalchemy import select, delete, update
+from sqlalchemy.exc import IntegrityError
+from app.persistence.repository import SQLAlchemyRepository
+from app.models.idempotency_key import IdempotencyKey
+from app import db
+
+class IdempotencyRepository(SQLAlchemyRepository):
+    def __init__(self):
+        super().__init__(IdempotencyKey)
+
+    def claim(self, key_hash, request_hash, expires_at):
+        """Insert an in-progress record for the key.
+
+        The primary key makes the insert the serialization point: only one
+        request can create the row. Returns (record, True) when this caller
+        owns the key, or (existing_record, False) when another request did.
+        """
+        record = IdempotencyKey(key_hash, request_hash, expires_at)
+        db.session.add(record)
+        try:
+            db.session.commit()
+            return record, True
+        except IntegrityError:
+            db.session.rollback()
+            return self.refresh(key_hash), False
+
+    def refresh(self, key_hash):
+        """Re-read a key, bypassing the identity map (another worker may have updated it)."""
+        return db.session.execute(
+            select(IdempotencyKey).where(IdempotencyKey.key_hash == key_hash)
+            .execution_options(populate_existing=True)
+        ).scalar_one_or_none()
+
+    def take_over(self, record, request_hash, now, expires_at):
+        """Claim a stale key (expired, or abandoned in progress) exactly as it was read.
+
+        One conditional UPDATE on the claim token seen in `record`: of several
+        requests taking over the same stale key, only the first matches it.
+        Returns (record, owned) like claim().
+        """
+        result = db.session.execute(
+            update(IdempotencyKey)
+            .where(IdempotencyKey.key_hash == record.key_hash, IdempotencyKey.claim_token == record.claim_token)
+            .values(claim_token=secrets.token_hex(16), request_hash=request_hash, status='in_progress',
+                    response_code=None, response_body=None, created_at=now, expires_at=expires_at)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        return self.refresh(record.key_hash), result.rowcount == 1
+
+    def complete(self, key_hash, claim_token, response_code, response_body):
+        """Store the response of the request that owns the key; False if its claim was taken over."""
+        result = db.session.execute(
+            update(IdempotencyKey)
+            .where(IdempotencyKey.key_hash == key_hash, IdempotencyKey.claim_token == claim_token,
+                   IdempotencyKey.status == 'in_progress')
+            .values(status='completed', response_code=response_code, response_body=response_body)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        return result.rowcount == 1
+
+    def release(self, key_hash, claim_token):
+        """Drop a key so the client can retry (used when the original request failed).
+
+        Only the claim holding `claim_token` is dropped, never one that took it over.
+        """
+        db.session.execute(delete(IdempotencyKey).where(IdempotencyKey.key_hash == key_hash,
+                                                        IdempotencyKey.claim_token == claim_token))
+        db.session.commit()
+
+    def purge_expired(self, now, batch_size=1000):
+        """Delete one batch of expired keys. Returns the number of rows deleted."""
+        key_hashes = db.session.execute(
+            select(IdempotencyKey.key_hash)
+            .where(IdempotencyKey.expires_at <= now)
+            .limit(batch_size)
+        ).scalars().all()
+        if not key_hashes:
+            return 0
+        result = db.session.execute(
+            delete(IdempotencyKey).where(IdempotencyKey.key_hash.in_(key_hashes))
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        return result.rowcount
@@ -0,0 +1,872 @@
+import bisect
+import json
+import threading
+import weakref
+from collections import defaultdict
+from datetime import datetime, timedelta
+from functools import wraps
+from sqlalchemy import event, inspect, DateTime
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.orm.interfaces import MANYTOONE, ONETOMANY
+from app.persistence.repository import Repository
+from app.persistence.occurrence_repository import SEARCH_FILTERS
+from app.persistence.stats_repository import booking_changes, review_changes, merge_changes
+from app.models.keys import new_id
+from app.models.session_daily_stats import SessionDailyStats
+from app.models.user import User
+from app.models.skill import Skill
+from app.models.skill_session import (SkillSession, SORTS, TRENDING_NONE, trending_weight, bayesian_rating, log2_add,
+                                      log2_sub)
+from app.models.review import Review
+from app.models.booking import Booking
+from app.models.session_occurrence import SessionOccurrence, MAX_OCCURRENCE_LENGTH
+from app.models.waitlist_entry import WaitlistEntry
+from app.models.session_neighbors import SessionNeighbors
+from app.models.refresh_token import RefreshToken
+from app.models.session_card import SessionCard, SESSION_FIELDS, INSTRUCTOR_FIELDS, encode_skills
+
+# (model class, attribute) -> repositories that index that attribute
+_index_watchers = defaultdict(weakref.WeakSet)
+
+
+def _on_indexed_attribute_set(target, value, oldvalue, initiator):
+    """Keep secondary indexes current when an indexed attribute is assigned directly,
+    e.g. booking.confirm_booking() setting `status`."""
+    for repo in list(_index_watchers[(type(target), initiator.key)]):
+        repo._reindex(target, initiator.key, oldvalue, value)
+
+
+def _watch(repo, model, attr_name):
+    key = (model, attr_name)
+    if key not in _index_watchers:
+        event.listen(getattr(model, attr_name), 'set', _on_indexed_attribute_set)
+    _index_watchers[key].add(repo)
+
+
+def locked(method):
+    """Run a repository method holding its store's lock."""
+    @wraps(method)
+    def locked_method(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+    return locked_method
+
+
+class InMemoryRepository(Repository):
+    """Dict-backed implementation of the Repository ABC.
+
+    Objects are kept in a primary index by id; every attribute named in
+    `indexes` also gets a secondary index (value -> {id: obj}), so
+    get_by_attribute on those attributes is a dict lookup instead of a scan.
+
+    Writes, index maintenance and reads that iterate the dicts hold the
+    store's RLock, shared by all its repositories since deletes cascade
+    across them, so threaded servers can share a store. A facade operation
+    spanning several calls is not atomic as a whole.
+    """
+
+    def __init__(self, model, indexes=(), store=None):
+        self.model = model
+        self.store = store
+        self._lock = store.lock if store else threading.RLock()
+        self._objects = {}
+        self._indexes = {attr_name: defaultdict(dict) for attr_name in indexes}
+        for attr_name in indexes:
+            _watch(self, model, attr_name)
+
+    # --- Index maintenance ---
+    def _index(self, obj):
+        for attr_name, index in self._indexes.items():
+            index[getattr(obj, attr_name)][obj.id] = obj
+
+    def _unindex(self, obj):
+        for attr_name, index in self._indexes.items():
+            bucket = index.get(getattr(obj, attr_name))
+            if bucket is not None:
+                bucket.pop(obj.id, None)
+
+    @locked
+    def _reindex(self, obj, attr_name, old_value, new_value):
+        if self._objects.get(getattr(obj, 'id', None)) is not obj:
+            return
+        index = self._indexes[attr_name]
+        if old_value in index:
+            index[old_value].pop(obj.id, None)
+        index[new_value][obj.id] = obj
+
+    def _apply_defaults(self, obj):
+        """Fill in the column defaults the database would apply on INSERT."""
+        for column in inspect(self.model).columns:
+            if column.default is None or getattr(obj, column.key) is not None:
+                continue
+            value = column.default.arg(None) if column.default.is_callable else column.default.arg
+            set_committed_value(obj, column.key, value)
+
+    # --- Repository interface ---
+    @locked
+    def add(self, obj):
+        if getattr(obj, 'id', None) is None:
+            obj.id = new_id()
+        self._apply_defaults(obj)
+        self._objects[obj.id] = obj
+        self._index(obj)
+        if self.store:
+            self.store.link(obj)
+
+    def get(self, obj_id):
+        return self._objects.get(obj_id)
+
+    @locked
+    def get_many(self, obj_ids):
+        unique_ids = list(dict.fromkeys(obj_ids))
+        return [self._objects[obj_id] for obj_id in unique_ids if obj_id in self._objects]
+
+    @locked
+    def get_all(self):
+        return list(self._objects.values())
+
+    @locked
+    def update(self, obj_id, data):
+        obj = self.get(obj_id)
+        if obj:
+            for key, value in data.items():
+                setattr(obj, key, value)  # indexed attributes are re-indexed by the set event
+
+    @locked
+    def delete(self, obj_id):
+        obj = self._objects.get(obj_id)
+        if obj:
+            if self.store:
+                self.store.unlink(obj)
+            self._unindex(obj)
+            del self._objects[obj_id]
+
+    def get_by_attribute(self, attr_name, attr_value):
+        matches = self.get_all_by_attribute(attr_name, attr_value)
+        return matches[0] if matches else None
+
+    @locked
+    def get_all_by_attribute(self, attr_name, attr_value):
+        """Get all objects matching a specific attribute value"""
+        if attr_name in self._indexes:
+            return list(self._indexes[attr_name].get(attr_value, {}).values())
+        return [obj for obj in self._objects.values() if getattr(obj, attr_name) == attr_value]
+
+    def count(self):
+        return len(self._objects)
+
+
+class InMemoryUserRepository(InMemoryRepository):
+    def __init__(self, store=None):
+        super().__init__(User, indexes=('email',), store=store)
+
+    def get_user_by_email(self, email):
+        """Get a user by their email address."""
+        return self.get_by_attribute('email', email)
+
+    def email_exists(self, email):
+        """Check if an email already exists."""
+        return self.get_by_attribute('email', email) is not None
+
+    @locked
+    def bump_schedule_version(self, user_id):
+        user = self.get(user_id)
+        if user is None:
+            return None
+        user.schedule_version = (user.schedule_version or 0) + 1
+        return user.schedule_version
+
+    @locked
+    def bump_schedule_versions(self, user_ids):
+        for user_id in set(user_ids):
+            if user_id in self._objects:
+                self.bump_schedule_version(user_id)
+
+
+class InMemorySkillRepository(InMemoryRepository):
+    def __init__(self, store=None):
+        super().__init__(Skill, indexes=('name', 'category'), store=store)
+
+    def get_by_category(self, category):
+        """Get all skills by category"""
+        return self.get_all_by_attribute('category', category)
+
+
+# sort -> (ranking key of a session, whether the best come last)
+RANKING_KEYS = {
+    'trending': (lambda session: (TRENDING_NONE if session.trending_key is None else session.trending_key,
+                                  session.id), True),
+    'top_rated': (lambda session: (session.bayesian_rating, session.id), True),
+    'newest': (lambda session: (session.created_at, session.id), True),
+    'price': (lambda session: (session.price, session.id), False),
+}
+
+
+class InMemorySkillSessionRepository(InMemoryRepository):
+    """Skill sessions, with the active ones kept sorted by every catalog ranking."""
+
+    def __init__(self, store=None):
+        self._rankings = {sort: [] for sort in SORTS}
+        self._ranked = {}  # session id -> {sort: its key in self._rankings}
+        super().__init__(SkillSession, indexes=('instructor_id', 'is_active'), store=store)
+
+    def _index(self, obj):
+        super()._index(obj)
+        self._rerank(obj)
+
+    def _unindex(self, obj):
+        super()._unindex(obj)
+        self._drop_ranks(obj.id)
+
+    @locked
+    def update(self, obj_id, data):
+        super().update(obj_id, data)
+        obj = self.get(obj_id)
+        if obj:
+            self._rerank(obj)
+
+    def _drop_ranks(self, obj_id):
+        for sort, key in self._ranked.pop(obj_id, {}).items():
+            ranking = self._rankings[sort]
+            position = bisect.bisect_left(ranking, key)
+            if position < len(ranking) and ranking[position] == key:
+                del ranking[position]
+
+    def _rerank(self, obj):
+        self._drop_ranks(obj.id)
+        if self._objects.get(obj.id) is not obj or not obj.is_active:
+            return
+        keys = self._ranked[obj.id] = {}
+        for sort, (key, _) in RANKING_KEYS.items():
+            keys[sort] = key(obj)
+            bisect.insort(self._rankings[sort], keys[sort])
+
+    @locked
+    def deactivate_by_instructor(self, instructor_id):
+        for session in self.get_by_instructor(instructor_id):
+            self.update(session.id, {'is_active': False})
+
+    @locked
+    def get_ranked(self, sort, limit=20, offset=0):
+        ranking = self._rankings[sort]
+        if RANKING_KEYS[sort][1]:
+            page = ranking[max(len(ranking) - offset - limit, 0):max(len(ranking) - offset, 0)][::-1]
+        else:
+            page = ranking[offset:offset + limit]
+        return [self._objects[key[-1]] for key in page]
+
+    @locked
+    def record_booking(self, session_id, at, count=1):
+        session = self.get(session_id)
+        if session:
+            session.trending_key = (log2_add if count > 0 else log2_sub)(session.trending_key, trending_weight(at))
+            self._rerank(session)
+
+    @locked
+    def take_back_bookings(self, weights):
+        for session in self.get_many(weights):
+            session.trending_key = log2_sub(session.trending_key, weights[session.id])
+            self._rerank(session)
+
+    @locked
+    def record_ratings(self, session_id, rating_sum, count):
+        session = self.get(session_id)
+        if session:
+            session.rating_sum += rating_sum
+            session.rating_count += count
+            session.bayesian_rating = bayesian_rating(session.rating_sum, session.rating_count)
+            self._rerank(session)
+
+    @locked
+    def recount_ratings(self, session_ids):
+        for session in self.get_many(session_ids):
+            ratings = [review.rating for review in session.reviews_r]
+            session.rating_sum, session.rating_count = sum(ratings), len(ratings)
+            session.bayesian_rating = bayesian_rating(session.rating_sum, session.rating_count)
+            self._rerank(session)
+
+    @locked
+    def rebuild_rankings(self, batch_size=None):
+        for session in self._objects.values():
+            ratings = [review.rating for review in session.reviews_r]
+            session.trending_key = TRENDING_NONE
+            for booking in session.bookings_r:
+                if booking.status != 'cancelled':
+                    session.trending_key = log2_add(session.trending_key, trending_weight(booking.created_at))
+            session.rating_sum, session.rating_count = sum(ratings), len(ratings)
+            session.bayesian_rating = bayesian_rating(session.rating_sum, session.rating_count)
+            self._rerank(session)
+        return len(self._objects)
+
+    def session_exists(self, session_id):
+        """Check if a skill session exists by its ID."""
+        return session_id in self._objects
+
+    def get_by_instructor(self, instructor_id):
+        """Get all sessions by instructor ID."""
+        return self.get_all_by_attribute('instructor_id', instructor_id)
+
+    def get_active_sessions(self):
+        """Get all active sessions."""
+        return self.get_all_by_attribute('is_active', True)
+
+    def get_sessions_by_skill(self, skill_id):
+        """Get all sessions associated with a specific skill."""
+        skill = self.store.repository(Skill).get(skill_id) if self.store else None
+        return list(skill.sessions_r) if skill else []
+
+
+class InMemoryBookingRepository(InMemoryRepository):
+    def __init__(self, store=None):
+        super().__init__(Booking, indexes=('user_id', 'session_id', 'status'), store=store)
+
+    def get_by_user(self, user_id):
+        """Get all bookings by user ID."""
+        return self.get_all_by_attribute('user_id', user_id)
+
+    def get_by_session(self, session_id):
+        """Get all bookings for a specific session."""
+        return self.get_all_by_attribute('session_id', session_id)
+
+    def get_by_status(self, status):
+        """Get bookings by status."""
+        return self.get_all_by_attribute('status', status)
+
+    def get_confirmed_bookings_for_session(self, session_id):
+        """Get all confirmed bookings for a session."""
+        return [booking for booking in self.get_by_session(session_id) if booking.status == 'confirmed']
+
+    def booking_exists(self, booking_id):
+        """Check if a booking exists by its ID."""
+        return booking_id in self._objects
+
+    def get_booker_ids(self, instructor_id, session_id=None):
+        sessions = ([session_id] if session_id is not None
+                    else [session.id for session in self.store.repository(SkillSession).get_by_instructor(instructor_id)])
+        return {booking.user_id for session_id in sessions for booking in self.get_by_session(session_id)}
+
+    def get_held_by(self, user_id):
+        return [booking for booking in self.get_by_user(user_id) if booking.session_r.instructor_id != user_id]
+
+    def get_busy_intervals(self, user_id=None):
+        bookings = self.get_by_user(user_id) if user_id is not None else self.get_all()
+        return sorted(
+            (booking.user_id, booking.booking_date,
+             booking.booking_date + timedelta(minutes=booking.session_r.duration), booking.id)
+            for booking in bookings if booking.status != 'cancelled'
+        )
+
+
+class InMemoryReviewRepository(InMemoryRepository):
+    def __init__(self, store=None):
+        super().__init__(Review, indexes=('session_id', 'instructor_id', 'user_id', 'booking_id'), store=store)
+
+    def get_reviews_by_rating(self, rating):
+        return self.get_all_by_attribute('rating', rating)
+
+
+class InMemorySessionOccurrenceRepository(InMemoryRepository):
+    """Occurrences, with a (starts_at, id) list kept sorted for range scans."""
+
+    def __init__(self, store=None):
+        self._by_start = []
+        super().__init__(SessionOccurrence, indexes=('session_id',), store=store)
+
+    def _index(self, obj):
+        super()._index(obj)
+        bisect.insort(self._by_start, (obj.starts_at, obj.id))
+
+    def _unindex(self, obj):
+        super()._unindex(obj)
+        position = bisect.bisect_left(self._by_start, (obj.starts_at, obj.id))
+        if position < len(self._by_start) and self._by_start[position] == (obj.starts_at, obj.id):
+            del self._by_start[position]
+
+    @locked
+    def _overlapping(self, start, end):
+        low = bisect.bisect_left(self._by_start, (start - MAX_OCCURRENCE_LENGTH,))
+        high = bisect.bisect_left(self._by_start, (end,))
+        occurrences = (self._objects[obj_id] for _, obj_id in self._by_start[low:high])
+        return [occurrence for occurrence in occurrences if occurrence.ends_at > start]
+
+    def get_by_session(self, session_id, start=None, end=None):
+        if start is not None and end is not None:
+            return [occurrence for occurrence in self._overlapping(start, end) if occurrence.session_id == session_id]
+        return sorted(self.get_all_by_attribute('session_id', session_id), key=lambda occurrence: occurrence.starts_at)
+
+    def search(self, start, end, min_spots=1, limit=100, **session_filters):
+        return [
+            occurrence for occurrence in self._overlapping(start, end)
+            if occurrence.status == 'scheduled' and occurrence.get_available_spots() >= min_spots
+            and occurrence.session_r.is_active
+            and all(getattr(occurrence.session_r, SEARCH_FILTERS[name].key) == value
+                    for name, value in session_filters.items())
+        ][:limit]
+
+    @locked
+    def get_busy_intervals(self, instructor_id=None):
+        return sorted(
+            (occurrence.session_r.instructor_id, occurrence.starts_at, occurrence.ends_at, occurrence.id)
+            for occurrence in self._objects.values()
+            if occurrence.status == 'scheduled'
+            and (instructor_id is None or occurrence.session_r.instructor_id == instructor_id)
+        )
+
+    @locked
+    def reserve(self, occurrence_id, participants):
+        occurrence = self.get(occurrence_id)
+        if occurrence is None or occurrence.status != 'scheduled' or occurrence.get_available_spots() < participants:
+            return False
+        occurrence.booked += participants
+        return True
+
+    @locked
+    def release(self, occurrence_id, participants):
+        occurrence = self.get(occurrence_id)
+        if occurrence is not None:
+            occurrence.booked -= participants
+
+    @locked
+    def release_many(self, spots):
+        for occurrence_id, participants in spots.items():
+            self.release(occurrence_id, participants)
+
+
+class InMemoryWaitlistRepository(InMemoryRepository):
+    """Waitlist entries, with each queue's waiting (ticket, id) pairs kept sorted."""
+
+    def __init__(self, store=None):
+        self._queues = defaultdict(list)
+        self._last_ticket = defaultdict(int)
+        super().__init__(WaitlistEntry, indexes=('user_id', 'status'), store=store)
+
+    def _index(self, obj):
+        super()._index(obj)
+        self._last_ticket[obj.queue_key] = max(self._last_ticket[obj.queue_key], obj.ticket)
+        if obj.status == 'waiting':
+            bisect.insort(self._queues[obj.queue_key], (obj.ticket, obj.id))
+
+    def _unindex(self, obj):
+        super()._unindex(obj)
+        self._dequeue(obj)
+
+    @locked
+    def _reindex(self, obj, attr_name, old_value, new_value):
+        super()._reindex(obj, attr_name, old_value, new_value)
+        if attr_name == 'status' and self._objects.get(obj.id) is obj and old_value != new_value:
+            if new_value == 'waiting':
+                bisect.insort(self._queues[obj.queue_key], (obj.ticket, obj.id))
+            elif old_value == 'waiting':
+                self._dequeue(obj)
+
+    def _dequeue(self, obj):
+        queue = self._queues.get(obj.queue_key, [])
+        position = bisect.bisect_left(queue, (obj.ticket, obj.id))
+        if position < len(queue) and queue[position] == (obj.ticket, obj.id):
+            del queue[position]
+
+    @locked
+    def enqueue(self, entry):
+        entry.ticket = self._last_ticket[entry.queue_key] + 1
+        self.add(entry)
+
+    @locked
+    def get_head(self, queue_key, limit=1):
+        return [self._objects[entry_id] for _, entry_id in self._queues.get(queue_key, [])[:limit]]
+
+    def count_waiting(self, queue_key):
+        return len(self._queues.get(queue_key, []))
+
+    def position(self, entry):
+        return bisect.bisect_right(self._queues.get(entry.queue_key, []), (entry.ticket, entry.id))
+
+
+class InMemorySessionStatsRepository:
+    """Instructor stats for the memory backend.
+
+    Everything is already in memory, so rollups are aggregated on read from
+    the store's bookings and reviews instead of being maintained.
+    """
+
+    def __init__(self, store):
+        self.store = store
+
+    def apply(self, changes):
+        """Nothing to maintain: get_instructor_daily aggregates the current bookings and reviews."""
+
+    def get_instructor_daily(self, instructor_id, start=None, end=None):
+        changes, capacities = {}, {}
+        for session in self.store.repository(SkillSession).get_all_by_attribute('instructor_id', instructor_id):
+            capacities[session.id] = session.max_participants
+            for booking in session.bookings_r:
+                for key, counters in booking_changes(booking).items():
+                    merge_changes(changes, key, counters)
+                if booking.review_r is not None:
+                    for key, counters in review_changes(booking, booking.review_r.rating).items():
+                        merge_changes(changes, key, counters)
+
+        days = {}
+        for (session_id, day), counters in changes.items():
+            if (start is not None and day < start) or (end is not None and day > end):
+                continue
+            row = days.setdefault(day, dict({name: 0 for name in SessionDailyStats.COUNTERS}, day=day, capacity=0))
+            merge_changes(days, day, counters)
+            if counters.get('participants', 0) > 0:
+                row['capacity'] += capacities[session_id]
+        return [days[day] for day in sorted(days)]
+
+
+class InMemorySessionNeighborsRepository:
+    """Precomputed recommendation rows for the memory backend.
+
+    They are derived data, rebuilt by the refresh job, so they are kept out
+    of the store's snapshots.
+    """
+
+    def __init__(self):
+        self._rows = {}
+
+    def get(self, session_id):
+        return self._rows.get(session_id)
+
+    def get_many(self, session_ids):
+        return [self._rows[session_id] for session_id in dict.fromkeys(session_ids) if session_id in self._rows]
+
+    def last_computed_at(self):
+        return max((row.computed_at for row in self._rows.values()), default=None)
+
+    def stored_session_ids(self):
+        return set(self._rows)
+
+    def save(self, neighbors, computed_at, batch_size=500):
+        for session_id, packed in neighbors.items():
+            self._rows[session_id] = SessionNeighbors(session_id=session_id, neighbors=packed, computed_at=computed_at)
+
+
+class InMemoryRefreshTokenRepository:
+    """Refresh tokens for the memory backend.
+
+    Kept out of the store's snapshots: a restored replica does not resume
+    anyone's sessions, clients log in again.
+    """
+
+    def __init__(self, store=None):
+        self._lock = store.lock if store else threading.RLock()
+        self._tokens = {}
+
+    @locked
+    def add(self, token):
+        self._tokens[token.token_hash] = token
+
+    def find(self, token_hash):
+        return self._tokens.get(token_hash)
+
+    @locked
+    def mark_rotated(self, token_hash, now):
+        token = self._tokens.get(token_hash)
+        if token is None or not token.is_usable(now):
+            return False
+        token.rotated_at = now
+        return True
+
+    def revoke_family(self, family_id, now):
+        return self._revoke(lambda token: token.family_id == family_id, now)
+
+    def revoke_user(self, user_id, now):
+        return self._revoke(lambda token: token.user_id == user_id, now)
+
+    @locked
+    def _revoke(self, matches, now):
+        revoked = [token for token in self._tokens.values() if matches(token) and token.revoked_at is None]
+        for token in revoked:
+            token.revoked_at = now
+        return len(revoked)
+
+    @locked
+    def purge_expired(self, now, batch_size=1000):
+        expired = [token_hash for token_hash, token in self._tokens.items() if token.expires_at <= now][:batch_size]
+        for token_hash in expired:
+            del self._tokens[token_hash]
+        return len(expired)
+
+
+class InMemoryOutboxRepository:
+    """Change events for the memory backend, numbered like the SQL table's autoincrement ids.
+
+    Like refresh tokens they are kept out of snapshots: a restored replica
+    starts a new stream.
+    """
+
+    def __init__(self, store=None):
+        self._lock = store.lock if store else threading.RLock()
+        self._events = []
+        self._checkpoints = {}
+        self._gaps = {}
+        self._next_id = 1
+
+    @locked
+    def append(self, event):
+        event.id = self._next_id
+        self._next_id += 1
+        self._events.append(event)
+
+    @locked
+    def append_many(self, events):
+        for event in events:
+            self.append(event)
+
+    @locked
+    def read_after(self, position, limit):
+        if not self._events:
+            return []
+        # ids are contiguous and only a prefix is ever pruned, so an id maps to a list index
+        start = max(position + 1 - self._events[0].id, 0)
+        return self._events[start:start + limit]
+
+    @locked
+    def get_many(self, event_ids):
+        first = self._events[0].id if self._events else self._next_id
+        return [self._events[event_id - first] for event_id in sorted(event_ids) if first <= event_id < self._next_id]
+
+    @locked
+    def first_id(self):
+        return self._events[0].id if self._events else 0
+
+    def last_id(self):
+        return self._next_id - 1
+
+    def get_checkpoint(self, consumer):
+        return self._checkpoints.get(consumer, 0)
+
+    def get_gaps(self, consumer):
+        return dict(self._gaps.get(consumer, {}))
+
+    def has_checkpoint(self, consumer):
+        return consumer in self._checkpoints
+
+    @locked
+    def save_checkpoint(self, consumer, position, gaps=None):
+        self._checkpoints[consumer] = position
+        self._gaps[consumer] = dict(gaps or {})
+
+    @locked
+    def prune(self, before, batch_size=1000):
+        if not self._checkpoints:
+            return 0
+        passed = min(self._checkpoints.values())
+        count = 0
+        for event in self._events[:batch_size]:
+            if event.id > passed or event.created_at >= before:
+                break
+            count += 1
+        del self._events[:count]
+        return count
+
+
+class InMemorySessionCardRepository:
+    """Session cards for the memory backend.
+
+    Sessions already hold their instructor, skills, bookings and reviews in
+    memory, so cards are built on read instead of being maintained.
+    """
+
+    def __init__(self, store):
+        self.store = store
+
+    @staticmethod
+    def _card(session):
+        card = SessionCard(session_id=session.id)
+        for name in SESSION_FIELDS:
+            setattr(card, name, getattr(session, name))
+        for name in INSTRUCTOR_FIELDS:
+            setattr(card, f'instructor_{name}', getattr(session.instructor_r, name))
+        card.skills = encode_skills([(skill.id, skill.name, skill.category) for skill in session.skills_r])
+        card.confirmed_bookings = sum(1 for booking in session.bookings_r if booking.status == 'confirmed')
+        card.rating_sum = sum(review.rating for review in session.reviews_r)
+        card.rating_count = len(session.reviews_r)
+        return card
+
+    def refresh(self, session_ids):
+        """Nothing to maintain: every read builds its cards from the sessions."""
+        return 0
+
+    def rebuild(self, batch_size=500):
+        return 0
+
+    def get_all(self):
+        sessions = self.store.repository(SkillSession).get_all()
+        return [self._card(session) for session in sorted(sessions, key=lambda session: (session.created_at, session.id))]
+
+    def get_many(self, session_ids):
+        return [self._card(session) for session in self.store.repository(SkillSession).get_many(session_ids)]
+
+    def get_by_instructor(self, instructor_id):
+        sessions = self.store.repository(SkillSession).get_all_by_attribute('instructor_id', instructor_id)
+        return [self._card(session) for session in sorted(sessions, key=lambda session: (session.created_at, session.id))]
+
+    def session_ids_by_instructor(self, instructor_id):
+        return [session.id for session in
+                self.store.repository(SkillSession).get_all_by_attribute('instructor_id', instructor_id)]
+
+    def session_ids_by_skill(self, skill_id):
+        return [session.id for session in self.store.repository(SkillSession).get_all()
+                if any(skill.id == skill_id for skill in session.skills_r)]
+
+    def session_ids_booked_by(self, user_id):
+        bookings = self.store.repository(Booking).get_all_by_attribute('user_id', user_id)
+        return list({booking.session_id for booking in bookings})
+
+
+class InMemoryArchiveRepository:
+    """Archive tables for the memory backend: all history stays in the hot dicts.
+
+    Nothing is ever archived, so the reads find nothing and `history=true`
+    listings are complete from the hot repositories alone. Archiving itself
+    is not supported: stats and cards are computed from the hot bookings.
+    """
+
+    def get_archivable(self, status, before, with_reviews=False, after=None, limit=1000):
+        raise NotImplementedError("the memory backend keeps all booking history hot")
+
+    def move_bookings(self, booking_ids, statuses, before, with_reviews=False, now=None):
+        raise NotImplementedError("the memory backend keeps all booking history hot")
+
+    def get_booking(self, booking_id):
+        return None
+
+    def get_bookings(self, attr_name, attr_value):
+        return []
+
+    def get_reviews(self, attr_name, attr_value):
+        return []
+
+
+class InMemoryStore:
+    """The set of in-memory repositories backing one SkillSessionsFacade.
+
+    The store wires ORM relationships between the objects it holds (so
+    `session.bookings_r`, `booking.review_r`, ... work without a database),
+    emulates the models' delete cascades, and can snapshot itself to a JSON
+    file and be restored from one. Its repositories share `lock`.
+    """
+
+    REPOSITORY_CLASSES = [InMemoryUserRepository, InMemorySkillRepository, InMemorySkillSessionRepository,
+                          InMemoryBookingRepository, InMemoryReviewRepository, InMemorySessionOccurrenceRepository,
+                          InMemoryWaitlistRepository]
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self._repositories = {}
+        for repository_class in self.REPOSITORY_CLASSES:
+            repository = repository_class(store=self)
+            self._repositories[repository.model] = repository
+
+    def repository(self, model):
+        return self._repositories[model]
+
+    # --- Relationship wiring ---
+    def link(self, obj):
+        """Point the object's many-to-one relationships at the objects their foreign keys reference.
+
+        back_populates then adds the object to the parent's collection."""
+        for relationship in inspect(type(obj)).relationships:
+            if relationship.direction is not MANYTOONE:
+                continue
+            foreign_key = next(iter(relationship.local_columns)).key
+            target_repository = self._repositories.get(relationship.mapper.class_)
+            target = target_repository.get(getattr(obj, foreign_key)) if target_repository else None
+            if target is not None and getattr(obj, relationship.key) is not target:
+                setattr(obj, relationship.key, target)
+
+    def unlink(self, obj):
+        """Delete cascaded children, then detach the object from its parents."""
+        for relationship in inspect(type(obj)).relationships:
+            if relationship.direction is ONETOMANY and relationship.cascade.delete:
+                for child in list(getattr(obj, relationship.key) or []):
+                    self._repositories[type(child)].delete(child.id)
+        for relationship in inspect(type(obj)).relationships:
+            if relationship.direction is MANYTOONE and getattr(obj, relationship.key) is not None:
+                setattr(obj, relationship.key, None)
+            elif relationship.secondary is not None:
+                getattr(obj, relationship.key).clear()
+
+    # --- Snapshot / restore ---
+    def snapshot(self, path):
+        """Write every object's column values and many-to-many links to a JSON file."""
+        with self.lock:
+            data = _dump({model: repository.get_all() for model, repository in self._repositories.items()})
+        with open(path, 'w') as snapshot_file:
+            json.dump(data, snapshot_file)
+
+    @classmethod
+    def from_snapshot(cls, path):
+        """Build a store from a file written by snapshot()."""
+        with open(path) as snapshot_file:
+            return cls()._load(json.load(snapshot_file))
+
+    @classmethod
+    def from_database(cls):
+        """Build a store from the current contents of the SQL database (needs an app context)."""
+        store = cls()
+        return store._load(_dump({model: model.query.all() for model in store._repositories}))
+
+    def _load(self, data):
+        """Rebuild objects from dumped rows.
+
+        Objects are created without calling __init__ or the @validates hooks,
+        which would reject e.g. past booking dates."""
+        with self.lock:
+            return self._load_rows(data)
+
+    def _load_rows(self, data):
+        by_table = {model.__tablename__: model for model in self._repositories}
+        for table_name, rows in data['tables'].items():
+            model = by_table[table_name]
+            mapper = inspect(model)
+            repository = self._repositories[model]
+            for row in rows:
+                obj = mapper.class_manager.new_instance()
+                for column in mapper.columns:
+                    set_committed_value(obj, column.key, _decode(row.get(column.key), column))
+                repository._objects[obj.id] = obj
+                repository._index(obj)
+
+        for repository in self._repositories.values():
+            for obj in repository.get_all():
+                self.link(obj)
+        for table_name, obj_id, relationship_key, other_id in data['links']:
+            model = by_table[table_name]
+            obj = self._repositories[model].get(obj_id)
+            target_model = inspect(model).relationships[relationship_key].mapper.class_
+            other = self._repositories[target_model].get(other_id)
+            collection = getattr(obj, relationship_key)
+            if other is not None and other not in collection:
+                collection.append(other)
+        return self
+
+
+def _dump(objects_by_model):
+    """Serialize objects to {'tables': {table: [row, ...]}, 'links': [many-to-many pairs]}."""
+    data = {'tables': {}, 'links': []}
+    for model, objects in objects_by_model.items():
+        columns = inspect(model).columns
+        data['tables'][model.__tablename__] = [
+            {column.key: _encode(getattr(obj, column.key)) for column in columns} for obj in objects
+        ]
+        for relationship in inspect(model).relationships:
+            if relationship.secondary is None:
+                continue
+            for obj in objects:
+                for other in getattr(obj, relationship.key):
+                    data['links'].append([model.__tablename__, obj.id, relationship.key, other.id])
+    return data
+
+
+def _encode(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def _decode(value, column):
+    if value is not None and isinstance(column.type, DateTime):
+        return datetime.fromisoformat(value)
+    return value
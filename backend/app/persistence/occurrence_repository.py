@@ -0,0 +1,112 @@
+from sqlalchemy import case, select, update
+from sqlalchemy.orm import contains_eager
+from app.persistence.repository import SQLAlchemyRepository
+from app.models.session_occurrence import SessionOccurrence, MAX_OCCURRENCE_LENGTH
+from app.models.skill_session import SkillSession
+from app import db
+from app.persistence.transaction import commit
+
+# search() filters: name -> the SkillSession column it must equal
+SEARCH_FILTERS = {
+    'session_id': SkillSession.id,
+    'instructor_id': SkillSession.instructor_id,
+    'session_type': SkillSession.session_type,
+    'difficulty_level': SkillSession.difficulty_level,
+}
+
+
+def overlapping(query, start, end):
+    """Restrict a query to occurrences overlapping [start, end).
+
+    The starts_at lower bound is implied by the overlap test (no occurrence is
+    longer than MAX_OCCURRENCE_LENGTH), but stating it turns the search into a
+    bounded range scan of ix_session_occurrences_starts_at_ends_at.
+    """
+    return query.where(
+        SessionOccurrence.starts_at >= start - MAX_OCCURRENCE_LENGTH,
+        SessionOccurrence.starts_at < end,
+        SessionOccurrence.ends_at > start,
+    )
+
+
+class SessionOccurrenceRepository(SQLAlchemyRepository):
+    def __init__(self):
+        super().__init__(SessionOccurrence)
+
+    def get_by_session(self, session_id, start=None, end=None):
+        """Get a session's occurrences, optionally only those overlapping [start, end), by start time."""
+        query = select(SessionOccurrence).where(SessionOccurrence.session_id == session_id)
+        if start is not None and end is not None:
+            query = overlapping(query, start, end)
+        return db.session.scalars(query.order_by(SessionOccurrence.starts_at)).all()
+
+    def search(self, start, end, min_spots=1, limit=100, **session_filters):
+        """Scheduled occurrences of active sessions overlapping [start, end) with at least min_spots free.
+
+        `session_filters` are SEARCH_FILTERS names and the values their
+        session columns must equal. The session is loaded by the same query.
+        """
+        query = (
+            select(SessionOccurrence)
+            .join(SessionOccurrence.session_r)
+            .options(contains_eager(SessionOccurrence.session_r))
+            .where(SessionOccurrence.status == 'scheduled',
+                   SessionOccurrence.capacity - SessionOccurrence.booked >= min_spots,
+                   SkillSession.is_active.is_(True))
+            .where(*(SEARCH_FILTERS[name] == value for name, value in session_filters.items()))
+        )
+        query = overlapping(query, start, end).order_by(SessionOccurrence.starts_at, SessionOccurrence.id)
+        return db.session.scalars(query.limit(limit)).all()
+
+    def get_busy_intervals(self, instructor_id=None):
+        """(instructor_id, starts_at, ends_at, occurrence_id) of scheduled occurrences, by instructor then start."""
+        query = (
+            select(SkillSession.instructor_id, SessionOccurrence.starts_at, SessionOccurrence.ends_at,
+                   SessionOccurrence.id)
+            .join(SessionOccurrence.session_r)
+            .where(SessionOccurrence.status == 'scheduled')
+        )
+        if instructor_id is not None:
+            query = query.where(SkillSession.instructor_id == instructor_id)
+        query = query.order_by(SkillSession.instructor_id, SessionOccurrence.starts_at, SessionOccurrence.id)
+        return db.session.execute(query.execution_options(yield_per=1000))
+
+    def reserve(self, occurrence_id, participants):
+        """Take spots in a scheduled occurrence if enough are left. Returns True on success.
+
+        The capacity check and the increment are one conditional UPDATE, so two
+        concurrent bookings cannot both take the last spot.
+        """
+        result = db.session.execute(
+            update(SessionOccurrence)
+            .where(SessionOccurrence.id == occurrence_id, SessionOccurrence.status == 'scheduled',
+                   SessionOccurrence.booked + participants <= SessionOccurrence.capacity)
+            .values(booked=SessionOccurrence.booked + participants)
+            .execution_options(synchronize_session='fetch')
+        )
+        commit()
+        return result.rowcount == 1
+
+    def release_many(self, spots):
+        """Give back {occurrence_id: participants} in one UPDATE, e.g. for deleted bookings."""
+        spots = {occurrence_id: count for occurrence_id, count in spots.items() if count}
+        if not spots:
+            return
+        released = case(*((SessionOccurrence.id == occurrence_id, count) for occurrence_id, count in spots.items()))
+        db.session.execute(
+            update(SessionOccurrence)
+            .where(SessionOccurrence.id.in_(list(spots)))
+            .values(booked=SessionOccurrence.booked - released)
+            .execution_options(synchronize_session='fetch')
+        )
+        commit()
+
+    def release(self, occurrence_id, participants):
+        """Give spots back, e.g. when a booking is cancelled."""
+        db.session.execute(
+            update(SessionOccurrence)
+            .where(SessionOccurrence.id == occurrence_id)
+            .values(booked=SessionOccurrence.booked - participants)
+            .execution_options(synchronize_session='fetch')
+        )
+        commit()
@@ -0,0 +1,78 @@
+from sqlalchemy import select, delete, func
+from app.persistence.transaction import commit
+from app.models.outbox_event import OutboxEvent, OutboxCheckpoint, encode_gaps, decode_gaps
+from app import db
+
+
+class OutboxRepository:
+    """Change events appended by the facade, read in id order by the relay."""
+
+    def append(self, event):
+        """Queue an event in the current transaction; it becomes visible when that commits."""
+        db.session.add(event)
+        commit()
+
+    def append_many(self, events):
+        db.session.add_all(events)
+        commit()
+
+    def read_after(self, position, limit):
+        """Up to `limit` events with an id above `position`, oldest first."""
+        return db.session.execute(
+            select(OutboxEvent).where(OutboxEvent.id > position).order_by(OutboxEvent.id).limit(limit)
+        ).scalars().all()
+
+    def get_many(self, event_ids):
+        """The events among `event_ids` that exist now, oldest first."""
+        if not event_ids:
+            return []
+        return db.session.execute(
+            select(OutboxEvent).where(OutboxEvent.id.in_(list(event_ids))).order_by(OutboxEvent.id)
+        ).scalars().all()
+
+    def first_id(self):
+        return db.session.execute(select(func.min(OutboxEvent.id))).scalar() or 0
+
+    def last_id(self):
+        return db.session.execute(select(func.max(OutboxEvent.id))).scalar() or 0
+
+    def get_checkpoint(self, consumer):
+        checkpoint = db.session.get(OutboxCheckpoint, consumer)
+        return checkpoint.position if checkpoint else 0
+
+    def get_gaps(self, consumer):
+        """{event id: first seen missing} of the ids a consumer's checkpoint passed without receiving."""
+        checkpoint = db.session.get(OutboxCheckpoint, consumer)
+        return decode_gaps(checkpoint.gaps) if checkpoint else {}
+
+    def has_checkpoint(self, consumer):
+        return db.session.get(OutboxCheckpoint, consumer) is not None
+
+    def save_checkpoint(self, consumer, position, gaps=None):
+        checkpoint = db.session.get(OutboxCheckpoint, consumer)
+        if checkpoint is None:
+            db.session.add(OutboxCheckpoint(consumer=consumer, position=position, gaps=encode_gaps(gaps)))
+        else:
+            checkpoint.position = position
+            checkpoint.gaps = encode_gaps(gaps)
+        commit()
+
+    def prune(self, before, batch_size=1000):
+        """Delete one batch of events created before `before` that every checkpointed consumer has passed.
+
+        Returns the number of rows deleted.
+        """
+        passed = db.session.execute(select(func.min(OutboxCheckpoint.position))).scalar()
+        if passed is None:
+            return 0
+        event_ids = db.session.execute(
+            select(OutboxEvent.id).where(OutboxEvent.id <= passed, OutboxEvent.created_at < before)
+            .order_by(OutboxEvent.id).limit(batch_size)
+        ).scalars().all()
+        if not event_ids:
+            return 0
+        result = db.session.execute(
+            delete(OutboxEvent).where(OutboxEvent.id.in_(event_ids)).execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        return result.rowcount
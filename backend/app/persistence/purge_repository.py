@@ -0,0 +1,32 @@
+from sqlalchemy import select, delete, tuple_
+from app.persistence.repository import SQLAlchemyRepository
+from app.models.purge_job import PurgeJob
+from app import db
+
+
+class PurgeJobRepository(SQLAlchemyRepository):
+    def __init__(self):
+        super().__init__(PurgeJob)
+
+    def get_unfinished(self):
+        """Pending jobs, and running ones a crashed worker may have left behind, oldest first."""
+        return (self.model.query.filter(PurgeJob.status.in_(('pending', 'running')))
+                .order_by(PurgeJob.created_at).all())
+
+    def delete_batch(self, table, condition, batch_size, collect=()):
+        """Delete up to batch_size rows of a table matching condition, by primary key.
+
+        Returns (rows deleted, the deleted rows with their key and `collect`
+        columns). Ids are selected first and then deleted with IN, as MySQL
+        has no LIMIT in a DELETE's subquery.
+        """
+        key = list(table.primary_key.columns)
+        rows = db.session.execute(select(*key, *collect).where(condition).limit(batch_size)).all()
+        if not rows:
+            return 0, []
+        if len(key) == 1:
+            match = key[0].in_([row[0] for row in rows])
+        else:
+            match = tuple_(*key).in_([tuple(row[:len(key)]) for row in rows])
+        db.session.execute(delete(table).where(match).execution_options(synchronize_session=False))
+        return len(rows), rows
@@ -0,0 +1,30 @@
+from sqlalchemy import select, delete, insert, func
+from app.persistence.repository import SQLAlchemyRepository
+from app.models.session_neighbors import SessionNeighbors
+from app import db
+from app.persistence.transaction import unit_of_work
+
+
+class SessionNeighborsRepository(SQLAlchemyRepository):
+    def __init__(self):
+        super().__init__(SessionNeighbors)
+
+    def last_computed_at(self):
+        """When the most recent refresh ran, or None before the first one."""
+        return db.session.scalar(select(func.max(SessionNeighbors.computed_at)))
+
+    def stored_session_ids(self):
+        """Ids of the sessions that have a row."""
+        return set(db.session.scalars(select(SessionNeighbors.session_id)))
+
+    def save(self, neighbors, computed_at, batch_size=500):
+        """Replace the rows of the given sessions ({session id: packed neighbors}), a batch per transaction."""
+        session_ids = list(neighbors)
+        for offset in range(0, len(session_ids), batch_size):
+            batch = session_ids[offset:offset + batch_size]
+            with unit_of_work():
+                db.session.execute(delete(SessionNeighbors).where(SessionNeighbors.session_id.in_(batch)))
+                db.session.execute(insert(SessionNeighbors), [
+                    {'session_id': session_id, 'neighbors': neighbors[session_id], 'computed_at': computed_at}
+                    for session_id in batch
+                ])
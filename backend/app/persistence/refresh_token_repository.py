@@ -0,0 +1,63 @@
+from sqlalchemy import select, update, delete
+from app.persistence.repository import SQLAlchemyRepository
+from app.persistence.transaction import commit
+from app.models.refresh_token import RefreshToken
+from app import db
+
+
+class RefreshTokenRepository(SQLAlchemyRepository):
+    def __init__(self):
+        super().__init__(RefreshToken)
+
+    def find(self, token_hash):
+        """Re-read a token, bypassing the identity map (another worker may have rotated it)."""
+        return db.session.execute(
+            select(RefreshToken).where(RefreshToken.token_hash == token_hash)
+            .execution_options(populate_existing=True)
+        ).scalar_one_or_none()
+
+    def mark_rotated(self, token_hash, now):
+        """Atomically consume a usable token. Returns False if it was rotated, revoked or expired meanwhile."""
+        result = db.session.execute(
+            update(RefreshToken)
+            .where(RefreshToken.token_hash == token_hash, RefreshToken.rotated_at.is_(None),
+                   RefreshToken.revoked_at.is_(None), RefreshToken.expires_at > now)
+            .values(rotated_at=now)
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount == 1
+
+    def revoke_family(self, family_id, now):
+        """Revoke every live token descending from one login."""
+        return self._revoke(RefreshToken.family_id == family_id, now)
+
+    def revoke_user(self, user_id, now):
+        """Revoke every live token of a user (all their devices). Returns the number revoked."""
+        return self._revoke(RefreshToken.user_id == user_id, now)
+
+    def _revoke(self, condition, now):
+        result = db.session.execute(
+            update(RefreshToken).where(condition, RefreshToken.revoked_at.is_(None))
+            .values(revoked_at=now)
+            .execution_options(synchronize_session=False)
+        )
+        commit()
+        return result.rowcount
+
+    def purge_expired(self, now, batch_size=1000):
+        """Delete one batch of expired tokens. Returns the number of rows deleted.
+
+        Rotated tokens are kept until they expire, so that replaying one is
+        still recognised as reuse.
+        """
+        token_hashes = db.session.execute(
+            select(RefreshToken.token_hash).where(RefreshToken.expires_at <= now).limit(batch_size)
+        ).scalars().all()
+        if not token_hashes:
+            return 0
+        result = db.session.execute(
+            delete(RefreshToken).where(RefreshToken.token_hash.in_(token_hashes))
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        return result.rowcount
@@ -0,0 +1,163 @@
+"""Read-replica routing for the SQLAlchemy session.
+
+Replicas are configured as Flask-SQLAlchemy binds named `replica_<n>`.
+SELECTs are sent to a replica when the session is allowed to (read-only
+request, or a facade method marked @reads_from_replica), the session has not
+written anything yet, the client is not pinned to the primary after a recent
+write, and the replica's replication lag is within REPLICA_MAX_LAG.
+Everything else goes to the primary (the default bind).
+"""
+
+import itertools
+import time
+from functools import wraps
+from flask import current_app, request, has_app_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, text
+from sqlalchemy.sql import Select
+
+REPLICA_BIND_PREFIX = 'replica_'
+# After a write the response carries "read from the primary until <unix time>" in both; clients
+# that do not keep cookies (bearer-token API clients) send the header back instead
+PIN_COOKIE = 'db_primary_until'
+PIN_HEADER = 'X-DB-Primary-Until'
+READ_ONLY_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# session.info keys
+USE_REPLICA = 'use_replica'        # this request only reads
+REPLICA_SCOPE = 'replica_scope'    # depth of @reads_from_replica calls
+PINNED = 'pinned_to_primary'       # client wrote recently: read-your-writes
+WROTE = 'wrote'                    # this session flushed a change
+
+
+class RoutingSession(Session):
+    """Flask-SQLAlchemy session that can send reads to a replica bind."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        engine = super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+        if bind is not None or self._flushing or not isinstance(clause, Select):
+            return engine
+        if engine is not self._db.engines.get(None) or not self._replica_allowed():
+            return engine
+        router = current_app.extensions.get('replica_router') if has_app_context() else None
+        replica = router.choose() if router else None
+        return replica if replica is not None else engine
+
+    def reads_from_primary(self):
+        """Whether SELECTs are sure to go to the primary, e.g. to fill a cache from them."""
+        router = current_app.extensions.get('replica_router') if has_app_context() else None
+        return router is None or not self._replica_allowed()
+
+    def _replica_allowed(self):
+        info = self.info
+        if info.get(WROTE) or info.get(PINNED):
+            return False
+        return bool(info.get(USE_REPLICA) or info.get(REPLICA_SCOPE))
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _mark_written(session, flush_context):
+    session.info[WROTE] = True
+
+
+class ReplicaRouter:
+    """Picks a healthy replica engine, round-robin, skipping lagging or unreachable ones."""
+
+    def __init__(self, engines, max_lag, check_interval, lag_probe=None):
+        self.engines = engines
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.lag_probe = lag_probe or probe_replication_lag
+        self._lag = {}  # engine -> (lag seconds, checked at)
+        self._next = itertools.cycle(range(len(engines))) if engines else None
+
+    def lag(self, engine):
+        """Replication lag of an engine in seconds, cached for check_interval."""
+        now = time.monotonic()
+        cached = self._lag.get(engine)
+        if cached is None or now - cached[1] >= self.check_interval:
+            try:
+                lag = self.lag_probe(engine)
+            except Exception:
+                lag = float('inf')  # unreachable: treat as infinitely behind
+            cached = (lag, now)
+            self._lag[engine] = cached
+        return cached[0]
+
+    def choose(self):
+        """Return a replica within max_lag, or None to fall back to the primary."""
+        for _ in range(len(self.engines)):
+            engine = self.engines[next(self._next)]
+            if self.lag(engine) <= self.max_lag:
+                return engine
+        return None
+
+
+def probe_replication_lag(engine):
+    """Seconds the replica is behind its source (0 for backends without replication, e.g. SQLite)."""
+    if engine.dialect.name != 'mysql':
+        return 0
+    with engine.connect() as connection:
+        row = connection.execute(text('SHOW REPLICA STATUS')).mappings().first()
+    if row is None:
+        return 0  # not a replica (e.g. a read-only copy): nothing to lag behind
+    lag = row.get('Seconds_Behind_Source', row.get('Seconds_Behind_Master'))
+    return float('inf') if lag is None else lag
+
+
+def reads_from_replica(f):
+    """Let a facade read method use a replica, even inside a write request.
+
+    Reads still go to the primary once the session has written something or
+    the client is pinned after a recent write.
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if not has_app_context():
+            return f(*args, **kwargs)
+        from app import db
+        info = db.session.info
+        info[REPLICA_SCOPE] = info.get(REPLICA_SCOPE, 0) + 1
+        try:
+            return f(*args, **kwargs)
+        finally:
+            info[REPLICA_SCOPE] -= 1
+
+    return decorated_function
+
+
+def init_replica_routing(app, db):
+    """Create the replica router and the request hooks that drive it."""
+    replica_keys = sorted(key for key in db.engines if key and key.startswith(REPLICA_BIND_PREFIX))
+    # Replicas mirror the primary's schema: keep db.create_all() / drop_all() off them
+    for key in replica_keys:
+        db.metadatas.pop(key, None)
+    engines = [db.engines[key] for key in replica_keys]
+    if not engines:
+        return
+    app.extensions['replica_router'] = ReplicaRouter(
+        engines, app.config['REPLICA_MAX_LAG'], app.config['REPLICA_LAG_CHECK_INTERVAL'])
+
+    @app.before_request
+    def _route_reads():
+        info = db.session.info
+        info[USE_REPLICA] = request.method in READ_ONLY_METHODS
+        info[WROTE] = False
+        info[PINNED] = any(_pinned_until(value) > time.time()
+                           for value in (request.cookies.get(PIN_COOKIE), request.headers.get(PIN_HEADER)))
+
+    @app.after_request
+    def _pin_after_write(response):
+        if request.method not in READ_ONLY_METHODS and response.status_code < 400:
+            pin_seconds = app.config['REPLICA_PIN_SECONDS']
+            pinned_until = str(time.time() + pin_seconds)
+            response.set_cookie(PIN_COOKIE, pinned_until, max_age=pin_seconds, httponly=True)
+            response.headers[PIN_HEADER] = pinned_until
+        return response
+
+
+def _pinned_until(value):
+    try:
+        return float(value or 0)
+    except ValueError:
+        return 0
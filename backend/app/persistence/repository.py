@@ -1,4 +1,6 @@
 from app import db
+from app.persistence.transaction import commit
+from app.persistence.entity_cache import cached_get
 from app.models.user import User
 from app.models.skill import Skill
 from app.models.skill_session import SkillSession
@@ -38,10 +40,11 @@ class SQLAlchemyRepository(Repository):
 
     def add(self, obj):
         db.session.add(obj)
-        db.session.commit()
+        commit()
 
     def get(self, obj_id):
-        return self.model.query.get(obj_id)
+        # users, skills and sessions come from the entity cache when they can
+        return cached_get(db.session(), self.model, obj_id)
 
     def get_all(self):
         return self.model.query.all()
@@ -51,13 +54,25 @@ class SQLAlchemyRepository(Repository):
         if obj:
             for key, value in data.items():
                 setattr(obj, key, value)
-            db.session.commit()
+            commit()
 
     def delete(self, obj_id):
         obj = self.get(obj_id)
         if obj:
             db.session.delete(obj)
-            db.session.commit()
+            commit()
+
+    def get_many(self, obj_ids):
+        """Get several objects by id with a single IN query, in the order requested.
+
+        Duplicate ids are returned once; ids that do not exist are skipped.
+        """
+        unique_ids = list(dict.fromkeys(obj_ids))
+        if not unique_ids:
+            return []
+        pk = self.model.__mapper__.primary_key[0]
+        found = {getattr(obj, pk.key): obj for obj in self.model.query.filter(pk.in_(unique_ids)).all()}
+        return [found[obj_id] for obj_id in unique_ids if obj_id in found]
 
     def get_by_attribute(self, attr_name, attr_value):
         return self.model.query.filter(getattr(self.model, attr_name) == attr_value).first()
@@ -0,0 +1,123 @@
+""" Projector and reads of the session card read model (app/models/session_card.py)
+
+refresh() recomputes the cards of the given sessions from the source tables
+(archived reviews included) with five set-based queries, whatever the number
+of sessions, and upserts them. The facade calls it inside the unit_of_work of each change, so a card
+is never older than the data it was built from.
+"""
+
+from collections import defaultdict
+from datetime import datetime
+from sqlalchemy import select, delete, func
+from app import db
+from app.models.archive import ArchivedBooking, ArchivedReview
+from app.models.associations import session_skill
+from app.models.booking import Booking
+from app.models.review import Review
+from app.models.session_card import SessionCard, SESSION_FIELDS, INSTRUCTOR_FIELDS, encode_skills
+from app.models.skill import Skill
+from app.models.skill_session import SkillSession
+from app.models.user import User
+from app.persistence.transaction import commit
+
+CARD_ORDER = (SessionCard.created_at, SessionCard.session_id)
+
+
+class SessionCardRepository:
+    def refresh(self, session_ids):
+        """Rebuild the cards of these sessions; cards of sessions that no longer exist are dropped.
+
+        Returns the number of cards written.
+        """
+        session_ids = list(set(session_ids))
+        if not session_ids:
+            return 0
+        rows = db.session.execute(
+            select(SkillSession.id, *(getattr(SkillSession, name) for name in SESSION_FIELDS),
+                   *(getattr(User, name) for name in INSTRUCTOR_FIELDS))
+            .join(User, User.id == SkillSession.instructor_id)
+            .where(SkillSession.id.in_(session_ids))
+        ).all()
+        skills = defaultdict(list)
+        for session_id, *skill in db.session.execute(
+                select(session_skill.c.session_id, Skill.id, Skill.name, Skill.category)
+                .join(Skill, Skill.id == session_skill.c.skill_id)
+                .where(session_skill.c.session_id.in_(session_ids))):
+            skills[session_id].append(skill)
+        confirmed = dict(db.session.execute(
+            select(Booking.session_id, func.count())
+            .where(Booking.session_id.in_(session_ids), Booking.status == 'confirmed')
+            .group_by(Booking.session_id)
+        ).all())
+        ratings = {}
+        for model in (Review, ArchivedReview):
+            for session_id, rating_sum, count in db.session.execute(
+                    select(model.session_id, func.sum(model.rating), func.count())
+                    .where(model.session_id.in_(session_ids))
+                    .group_by(model.session_id)):
+                total, seen = ratings.get(session_id, (0, 0))
+                ratings[session_id] = (total + rating_sum, seen + count)
+
+        cards = {card.session_id: card
+                 for card in SessionCard.query.filter(SessionCard.session_id.in_(session_ids)).all()}
+        now = datetime.now()
+        for session_id, *values in rows:
+            card = cards.pop(session_id, None)
+            if card is None:
+                card = SessionCard(session_id=session_id)
+                db.session.add(card)
+            for name, value in zip(SESSION_FIELDS, values):
+                setattr(card, name, value)
+            for name, value in zip(INSTRUCTOR_FIELDS, values[len(SESSION_FIELDS):]):
+                setattr(card, f'instructor_{name}', value)
+            card.skills = encode_skills(skills[session_id])
+            card.confirmed_bookings = confirmed.get(session_id, 0)
+            card.rating_sum, card.rating_count = ratings.get(session_id, (0, 0))
+            card.refreshed_at = now
+        for card in cards.values():
+            db.session.delete(card)
+        commit()
+        return len(rows)
+
+    def rebuild(self, batch_size=500):
+        """Recompute every card, `batch_size` sessions per transaction; returns cards written."""
+        db.session.execute(delete(SessionCard).where(
+            SessionCard.session_id.not_in(select(SkillSession.id))))
+        db.session.commit()
+        total, after = 0, ''
+        while True:
+            session_ids = db.session.execute(
+                select(SkillSession.id).where(SkillSession.id > after).order_by(SkillSession.id).limit(batch_size)
+            ).scalars().all()
+            if not session_ids:
+                return total
+            total += self.refresh(session_ids)
+            after = session_ids[-1]
+
+    # --- Reads ---
+    def get_all(self):
+        return SessionCard.query.order_by(*CARD_ORDER).all()
+
+    def get_many(self, session_ids):
+        unique_ids = list(dict.fromkeys(session_ids))
+        if not unique_ids:
+            return []
+        found = {card.session_id: card
+                 for card in SessionCard.query.filter(SessionCard.session_id.in_(unique_ids)).all()}
+        return [found[session_id] for session_id in unique_ids if session_id in found]
+
+    def get_by_instructor(self, instructor_id):
+        return SessionCard.query.filter(SessionCard.instructor_id == instructor_id).order_by(*CARD_ORDER).all()
+
+    # --- Sessions whose cards a change touches ---
+    def session_ids_by_instructor(self, instructor_id):
+        return db.session.execute(
+            select(SkillSession.id).where(SkillSession.instructor_id == instructor_id)).scalars().all()
+
+    def session_ids_by_skill(self, skill_id):
+        return db.session.execute(
+            select(session_skill.c.session_id).where(session_skill.c.skill_id == skill_id)).scalars().all()
+
+    def session_ids_booked_by(self, user_id):
+        return list({session_id for model in (Booking, ArchivedBooking) for session_id in db.session.execute(
+            select(model.session_id).distinct().where(model.user_id == user_id)).scalars()})
@@ -7,4 +7,4 @@ class SkillRepository(SQLAlchemyRepository):
 
     def get_by_category(self, category):
         """Get all skills by category"""
-        return self.get_by_attribute('category', category)
\ No newline at end of file
+        return self.get_all_by_attribute('category', category)
\ No newline at end of file
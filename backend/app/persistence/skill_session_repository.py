@@ -1,7 +1,34 @@
+from collections import defaultdict
+from sqlalchemy import case, select, update, func
 from app.persistence.repository import SQLAlchemyRepository
-from app.models.skill_session import SkillSession
+from app.persistence.transaction import commit
+from app.models.skill_session import (SkillSession, RATING_PRIOR_MEAN, RATING_PRIOR_COUNT, TRENDING_MIN_GAP,
+                                      TRENDING_NONE, trending_weight, bayesian_rating, log2_add)
+from app.models.archive import ArchivedBooking, ArchivedReview
+from app.models.booking import Booking
+from app.models.review import Review
 from app import db
 
+# sort -> ORDER BY, each matching one of SkillSession's (is_active, key, id) indexes
+RANKINGS = {
+    'trending': (SkillSession.trending_key.desc(), SkillSession.id.desc()),
+    'top_rated': (SkillSession.bayesian_rating.desc(), SkillSession.id.desc()),
+    'newest': (SkillSession.created_at.desc(), SkillSession.id.desc()),
+    'price': (SkillSession.price.asc(), SkillSession.id.asc()),
+}
+
+
+def _log2_add(key, weight):
+    """models.skill_session.log2_add in SQL (log2 and pow: MySQL, SQLite 3.35+)."""
+    return case((key >= weight, key + func.log2(1 + func.pow(2.0, weight - key))),
+                else_=weight + func.log2(1 + func.pow(2.0, key - weight)))
+
+
+def _log2_sub(key, weight):
+    """models.skill_session.log2_sub in SQL."""
+    return case((key - weight > TRENDING_MIN_GAP, key + func.log2(1 - func.pow(2.0, weight - key))),
+                else_=TRENDING_NONE)
+
 class SkillSessionRepository(SQLAlchemyRepository):
     def __init__(self):
         super().__init__(SkillSession)
@@ -32,4 +59,101 @@ class SkillSessionRepository(SQLAlchemyRepository):
 
     def get_by_difficulty_level(self, difficulty_level):
         """Get sessions by difficulty level."""
-        return self.model.query.filter_by(difficulty_level=difficulty_level).all()
\ No newline at end of file
+        return self.model.query.filter_by(difficulty_level=difficulty_level).all()
+
+    def deactivate_by_instructor(self, instructor_id):
+        """Take all of an instructor's sessions out of the catalog with one UPDATE."""
+        db.session.execute(update(SkillSession).where(SkillSession.instructor_id == instructor_id)
+                           .values(is_active=False))
+        commit()
+
+    # --- Rankings ---
+    def get_ranked(self, sort, limit=20, offset=0):
+        """A page of active sessions in one of the RANKINGS orders, read off its index."""
+        return (self.model.query.filter(SkillSession.is_active == True)  # noqa: E712
+                .order_by(*RANKINGS[sort]).limit(limit).offset(offset).all())
+
+    def record_booking(self, session_id, at, count=1):
+        """Add (or with count=-1, take back) a booking made at `at` to the trending key."""
+        db.session.execute(
+            update(SkillSession).where(SkillSession.id == session_id)
+            # not an edit of the session, so leave updated_at alone
+            .values(trending_key=(_log2_add if count > 0 else _log2_sub)(SkillSession.trending_key, trending_weight(at)),
+                    updated_at=SkillSession.updated_at)
+            .execution_options(synchronize_session='fetch', invalidates=[session_id])
+        )
+
+    def take_back_bookings(self, weights):
+        """Take {session_id: log2 of deleted bookings' summed trending weight} off the trending keys in one UPDATE."""
+        weights = {session_id: weight for session_id, weight in weights.items() if weight != TRENDING_NONE}
+        if not weights:
+            return
+        removed = case(*((SkillSession.id == session_id, weight) for session_id, weight in weights.items()))
+        db.session.execute(
+            update(SkillSession).where(SkillSession.id.in_(list(weights)))
+            .values(trending_key=_log2_sub(SkillSession.trending_key, removed),
+                    updated_at=SkillSession.updated_at)
+            .execution_options(synchronize_session='fetch', invalidates=list(weights))
+        )
+
+    def record_ratings(self, session_id, rating_sum, count):
+        """Add review ratings (negative to remove them) and recompute the Bayesian average in place."""
+        total = SkillSession.rating_sum + rating_sum
+        ratings = SkillSession.rating_count + count
+        db.session.execute(
+            update(SkillSession).where(SkillSession.id == session_id)
+            # MySQL assigns left to right with the new values, so the average goes first
+            .ordered_values(
+                (SkillSession.bayesian_rating,
+                 (RATING_PRIOR_MEAN * RATING_PRIOR_COUNT + total) / (RATING_PRIOR_COUNT + ratings)),
+                (SkillSession.rating_sum, total),
+                (SkillSession.rating_count, ratings),
+                (SkillSession.updated_at, SkillSession.updated_at),
+            )
+            .execution_options(synchronize_session='fetch', invalidates=[session_id])
+        )
+
+    def recount_ratings(self, session_ids):
+        """Recompute these sessions' rating totals from their reviews, archived ones included.
+
+        For reviews that disappear without a facade call (ON DELETE CASCADE).
+        """
+        totals = {session_id: (0, 0) for session_id in set(session_ids)}
+        if not totals:
+            return
+        for model in (Review, ArchivedReview):
+            for session_id, total, count in db.session.execute(
+                    select(model.session_id, func.sum(model.rating), func.count())
+                    .where(model.session_id.in_(list(totals))).group_by(model.session_id)):
+                totals[session_id] = (totals[session_id][0] + int(total), totals[session_id][1] + count)
+        for session_id, (total, count) in totals.items():
+            db.session.execute(
+                update(SkillSession).where(SkillSession.id == session_id)
+                .values(rating_sum=total, rating_count=count, bayesian_rating=bayesian_rating(total, count),
+                        updated_at=SkillSession.updated_at)
+                .execution_options(synchronize_session='fetch', invalidates=[session_id])
+            )
+
+    def rebuild_rankings(self, batch_size=1000):
+        """Recompute every session's ranking keys from its bookings and reviews, archived ones included; returns sessions updated."""
+        trending = defaultdict(lambda: TRENDING_NONE)
+        ratings = defaultdict(lambda: (0, 0))
+        for booking_model, review_model in ((Booking, Review), (ArchivedBooking, ArchivedReview)):
+            bookings = (select(booking_model.session_id, booking_model.created_at)
+                        .where(booking_model.status != 'cancelled').execution_options(yield_per=batch_size))
+            for session_id, created_at in db.session.execute(bookings):
+                trending[session_id] = log2_add(trending[session_id], trending_weight(created_at))
+            for session_id, total, count in db.session.execute(
+                    select(review_model.session_id, func.sum(review_model.rating), func.count())
+                    .group_by(review_model.session_id)):
+                ratings[session_id] = (ratings[session_id][0] + int(total), ratings[session_id][1] + count)
+
+        rows = []
+        for session_id in db.session.scalars(select(SkillSession.id)):
+            total, count = ratings[session_id]
+            rows.append({'id': session_id, 'trending_key': trending[session_id], 'rating_sum': total,
+                         'rating_count': count, 'bayesian_rating': bayesian_rating(total, count)})
+        for offset in range(0, len(rows), batch_size):
+            db.session.execute(update(SkillSession), rows[offset:offset + batch_size])
+        commit()
+        return len(rows)
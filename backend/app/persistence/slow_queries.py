@@ -0,0 +1,204 @@
+"""Slow-query log: statements slower than SLOW_QUERY_THRESHOLD, grouped by fingerprint.
+
+Repository methods build their SQL at run time (get_by_attribute with any
+attribute, IN lists of any length), so a slow statement's text alone rarely
+says which code sent it. With SLOW_QUERY_LOG_ENABLED, cursor events on every
+engine (primary and replicas) time each execution. For a statement over the
+threshold, the log records:
+- a fingerprint of it: literals, bind parameters and IN lists replaced by `?`;
+- the app frames that sent it, innermost first, e.g.
+  `SQLAlchemyRepository.get_by_attribute (repository.py:77) <- SkillSessionsFacade.get_user_by_email (...)`;
+- its parameters, as types only (values can be emails, password hashes, tokens);
+- the database's plan for it (EXPLAIN, or EXPLAIN QUERY PLAN on SQLite), taken
+  the first time the fingerprint is seen, on the same connection.
+
+Per fingerprint, the log keeps the calls, total and max time, and callers.
+At most SLOW_QUERY_MAX_FINGERPRINTS fingerprints are kept: beyond that, the
+one with the least total time is dropped. Admins read the top N from
+/api/v1/admin/slow-queries, which can also dump the log to
+SLOW_QUERY_DUMP_PATH. Times cover cursor.execute(), not fetching the rows.
+The log is per process.
+"""
+
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import event
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAX_CALLER_FRAMES = 4
+MAX_CALLERS = 5  # distinct call paths kept per fingerprint
+SORTS = ('total', 'max', 'calls')
+
+_NORMALIZE = [
+    (re.compile(r"'(?:[^']|'')*'"), '?'),                        # string literals
+    (re.compile(r'%\(\w+\)s|%s|(?<![:\w]):\w+|\?'), '?'),         # bind parameters of every paramstyle
+    (re.compile(r'(?<![\w.])-?\d+(?:\.\d+)?\b'), '?'),           # numbers, not digits inside names
+    (re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)'), '(?+)'),         # IN lists / VALUES rows of any length
+    (re.compile(r'(?:\(\?\+\)\s*,\s*)+\(\?\+\)'), '(?+)'),       # multi-row VALUES
+    (re.compile(r'\s+'), ' '),
+]
+_EXPLAINABLE = re.compile(r'^\s*(SELECT|UPDATE|DELETE|WITH)\b', re.IGNORECASE)
+
+
+def normalize(statement):
+    """The statement with its literals, parameters and list lengths taken out."""
+    for pattern, replacement in _NORMALIZE:
+        statement = pattern.sub(replacement, statement)
+    return statement.strip()
+
+
+def fingerprint(statement):
+    return _digest(normalize(statement))
+
+
+def _digest(normalized):
+    return hashlib.blake2b(normalized.encode('utf-8'), digest_size=8).hexdigest()
+
+
+def redact(parameters):
+    """The shape of a statement's parameters, with every value replaced by its type."""
+    if isinstance(parameters, dict):
+        return {key: _type_name(value) for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        if parameters and isinstance(parameters[0], (dict, list, tuple)):
+            return {'rows': len(parameters), 'first': redact(parameters[0])}  # executemany
+        return [_type_name(value) for value in parameters]
+    return _type_name(parameters)
+
+
+def _type_name(value):
+    if isinstance(value, (bytes, str)):
+        return f'{type(value).__name__}({len(value)})'
+    return type(value).__name__
+
+
+def callers(frame):
+    """'function (file:line)' of the app frames above `frame`, innermost first."""
+    names = []
+    while frame is not None and len(names) < MAX_CALLER_FRAMES:
+        code = frame.f_code
+        if code.co_filename.startswith(APP_DIR) and code.co_filename != __file__:
+            names.append(f'{code.co_qualname} ({os.path.basename(code.co_filename)}:{frame.f_lineno})')
+        frame = frame.f_back
+    return ' <- '.join(names) or '(outside the app)'
+
+
+def explain(connection, statement, parameters):
+    """The database's plan for a statement, as {'columns', 'rows'}, or {'error'}.
+
+    Runs on a raw DBAPI cursor of the same connection, so the statement sees
+    the same transaction and the cursor events do not fire again.
+    """
+    prefix = 'EXPLAIN QUERY PLAN ' if connection.dialect.name == 'sqlite' else 'EXPLAIN '
+    cursor = connection.connection.cursor()
+    try:
+        cursor.execute(prefix + statement, parameters)
+        return {'columns': [column[0] for column in cursor.description or ()],
+                'rows': [[str(value) for value in row] for row in cursor.fetchall()]}
+    except Exception as error:
+        return {'error': str(error)[:500]}
+    finally:
+        cursor.close()
+
+
+class SlowQueryLog:
+    """Per-fingerprint totals of the statements slower than `threshold` seconds."""
+
+    def __init__(self, threshold=0.1, max_fingerprints=500, explain=True):
+        self.threshold = threshold
+        self.max_fingerprints = max_fingerprints
+        self.explain = explain
+        self._entries = {}  # fingerprint -> entry dict
+        self._lock = threading.Lock()
+
+    def record(self, connection, statement, parameters, elapsed, executemany=False, caller=None):
+        normalized = normalize(statement)
+        key = _digest(normalized)
+        with self._lock:
+            entry = self._entries.get(key)
+            first = entry is None
+            if first:
+                entry = self._entries[key] = {
+                    'fingerprint': key, 'statement': normalized, 'calls': 0, 'total': 0.0, 'max': 0.0,
+                    'callers': Counter(), 'parameters': None, 'plan': None,
+                    'first_seen': datetime.now().isoformat(timespec='seconds'),
+                }
+            entry['calls'] += 1
+            entry['total'] += elapsed
+            entry['max'] = max(entry['max'], elapsed)
+            entry['parameters'] = redact(parameters)
+            entry['last_seen'] = datetime.now().isoformat(timespec='seconds')
+            if caller and (caller in entry['callers'] or len(entry['callers']) < MAX_CALLERS):
+                entry['callers'][caller] += 1
+            while len(self._entries) > self.max_fingerprints:
+                del self._entries[min(self._entries, key=lambda name: self._entries[name]['total'])]
+        if first and self.explain and not executemany and _EXPLAINABLE.match(statement):
+            plan = explain(connection, statement, parameters)
+            with self._lock:
+                entry['plan'] = plan
+
+    def top(self, limit=20, sort='total'):
+        """The `limit` slowest fingerprints by total time, max time or calls."""
+        with self._lock:
+            entries = sorted(self._entries.values(), key=lambda entry: -entry[sort])[:limit]
+            return [dict(entry, total=round(entry['total'], 6), max=round(entry['max'], 6),
+                         mean=round(entry['total'] / entry['calls'], 6),
+                         callers=[{'caller': caller, 'calls': calls}
+                                  for caller, calls in entry['callers'].most_common()])
+                    for entry in entries]
+
+    def dump(self, path):
+        """Write the whole log to `path` as JSON, replacing the file at once; returns the path."""
+        path = path.format(pid=os.getpid())
+        with self._lock:
+            count = len(self._entries)
+        data = {'dumped_at': datetime.now().isoformat(timespec='seconds'), 'pid': os.getpid(),
+                'threshold': self.threshold, 'queries': self.top(count)}
+        tmp = f'{path}.tmp'
+        with open(tmp, 'w') as file:
+            json.dump(data, file, indent=2)
+        os.replace(tmp, path)
+        return path
+
+    def reset(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def init_slow_query_log(app, db):
+    """Create the app's slow-query log and attach it to every engine; none when SLOW_QUERY_LOG_ENABLED is off."""
+    if not app.config.get('SLOW_QUERY_LOG_ENABLED'):
+        app.extensions['slow_queries'] = None
+        return
+    log = SlowQueryLog(app.config['SLOW_QUERY_THRESHOLD'], app.config['SLOW_QUERY_MAX_FINGERPRINTS'],
+                       app.config['SLOW_QUERY_EXPLAIN'])
+    app.extensions['slow_queries'] = log
+
+    # the start time lives on the execution context, so a failed statement leaves nothing behind
+    def _start(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context.slow_query_start = time.perf_counter()
+
+    def _finish(conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, 'slow_query_start', None)
+        if started is None:
+            return
+        elapsed = time.perf_counter() - started
+        if elapsed >= log.threshold:
+            log.record(conn, statement, parameters, elapsed, executemany, callers(sys._getframe(1)))
+
+    for engine in db.engines.values():
+        event.listen(engine, 'before_cursor_execute', _start)
+        event.listen(engine, 'after_cursor_execute', _finish)
+
+
+def get_slow_query_log():
+    return current_app.extensions.get('slow_queries')
@@ -0,0 +1,176 @@
+""" Daily rollups behind the instructor stats endpoint
+
+Facade methods describe what a booking or review change does to the rollups
+as `changes`: {(session_id, day): {counter: delta}}. The same functions are
+used for the incremental updates, the bulk completion job and the backfill,
+so the three can never disagree about what a booking counts for.
+"""
+
+from sqlalchemy import select, update, insert, delete, func, case
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.models.archive import ArchivedBooking, ArchivedReview
+from app.models.booking import Booking
+from app.models.review import Review
+from app.models.skill_session import SkillSession
+from app.models.session_daily_stats import SessionDailyStats
+from app.persistence.transaction import commit
+
+
+def booking_counters(status, participants, total_price, sign=1):
+    """What one booking in `status` adds to (sign=1) or removes from (sign=-1) its day's rollup."""
+    counters = {status: sign}
+    if status != 'cancelled':
+        counters['participants'] = sign * participants
+        counters['booked_value'] = sign * total_price
+    if status == 'completed':
+        counters['revenue'] = sign * total_price
+    return counters
+
+
+def booking_state(booking):
+    """Snapshot of the booking fields the rollups depend on; take it before changing the booking."""
+    return (booking.session_id, booking.booking_date.date(), booking.status,
+            booking.participants, booking.total_price)
+
+
+def merge_changes(changes, key, counters):
+    """Add `counters` into changes[key], in place."""
+    row = changes.setdefault(key, {})
+    for name, amount in counters.items():
+        row[name] = row.get(name, 0) + amount
+    return changes
+
+
+def booking_changes(booking, before=None):
+    """Rollup changes for a booking that was created (before=None) or changed from `before`."""
+    changes = {}
+    if before is not None:
+        session_id, day, status, participants, total_price = before
+        merge_changes(changes, (session_id, day), booking_counters(status, participants, total_price, sign=-1))
+    session_id, day, status, participants, total_price = booking_state(booking)
+    merge_changes(changes, (session_id, day), booking_counters(status, participants, total_price))
+    return changes
+
+
+def booking_removals(bookings):
+    """Rollup changes for bookings deleted outright (cascades, purges), whatever their status."""
+    changes = {}
+    for booking in bookings:
+        session_id, day, status, participants, total_price = booking_state(booking)
+        merge_changes(changes, (session_id, day), booking_counters(status, participants, total_price, sign=-1))
+    return changes
+
+
+def review_changes(booking, rating, count=1):
+    """Rollup changes for a review of `booking`: count=1 added, -1 removed, 0 for a rating edit."""
+    return {(booking.session_id, booking.booking_date.date()): {'review_count': count, 'rating_sum': int(rating)}}
+
+
+class SessionStatsRepository:
+    """Reads and incrementally maintains SessionDailyStats rows."""
+
+    def apply(self, changes):
+        """Add the deltas to their rows, creating missing rows.
+
+        Counters are incremented in SQL (col = col + delta), so concurrent
+        transactions touching the same row do not lose updates.
+        """
+        for (session_id, day), counters in changes.items():
+            counters = {name: amount for name, amount in counters.items() if amount}
+            if not counters:
+                continue
+            if self._increment(session_id, day, counters):
+                continue
+            instructor_id = db.session.scalar(
+                select(SkillSession.instructor_id).where(SkillSession.id == session_id))
+            try:
+                with db.session.begin_nested():
+                    db.session.execute(insert(SessionDailyStats).values(
+                        session_id=session_id, day=day, instructor_id=instructor_id, **counters))
+            except IntegrityError:
+                # another transaction created the row first
+                self._increment(session_id, day, counters)
+        commit()
+
+    def _increment(self, session_id, day, counters):
+        result = db.session.execute(
+            update(SessionDailyStats)
+            .where(SessionDailyStats.session_id == session_id, SessionDailyStats.day == day)
+            .values({name: getattr(SessionDailyStats, name) + amount for name, amount in counters.items()})
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount
+
+    def status_changes(self, booking_ids, from_status, to_status):
+        """Rollup changes for moving the given bookings, if still in from_status, to to_status.
+
+        Read before the bulk UPDATE that performs the transition.
+        """
+        changes = {}
+        if not booking_ids:
+            return changes
+        rows = db.session.execute(
+            select(Booking.session_id, Booking.booking_date, Booking.participants, Booking.total_price)
+            .where(Booking.id.in_(booking_ids), Booking.status == from_status)
+        )
+        for session_id, booking_date, participants, total_price in rows:
+            key = (session_id, booking_date.date())
+            merge_changes(changes, key, booking_counters(from_status, participants, total_price, sign=-1))
+            merge_changes(changes, key, booking_counters(to_status, participants, total_price))
+        return changes
+
+    def get_instructor_daily(self, instructor_id, start=None, end=None):
+        """Per-day totals over the instructor's sessions, oldest first.
+
+        `capacity` sums max_participants over the session occurrences that day
+        with at least one active booking, for fill rate.
+        """
+        columns = [func.coalesce(func.sum(getattr(SessionDailyStats, name)), 0).label(name)
+                   for name in SessionDailyStats.COUNTERS]
+        capacity = func.sum(case((SessionDailyStats.participants > 0, SkillSession.max_participants), else_=0))
+        query = (
+            select(SessionDailyStats.day, *columns, func.coalesce(capacity, 0).label('capacity'))
+            .join(SkillSession, SkillSession.id == SessionDailyStats.session_id)
+            .where(SessionDailyStats.instructor_id == instructor_id)
+            .group_by(SessionDailyStats.day)
+            .order_by(SessionDailyStats.day)
+        )
+        if start is not None:
+            query = query.where(SessionDailyStats.day >= start)
+        if end is not None:
+            query = query.where(SessionDailyStats.day <= end)
+        return [dict(row) for row in db.session.execute(query).mappings()]
+
+    def rebuild(self, batch_size=1000):
+        """Recompute every rollup row from bookings and reviews, archived ones included, in one transaction.
+
+        Bookings and reviews are streamed `batch_size` rows at a time; only the
+        rollup rows themselves are held in memory. Returns the number of rows.
+        """
+        changes = {}
+        # a review is always archived together with its booking, so each tier joins within itself
+        for booking_model, review_model in ((Booking, Review), (ArchivedBooking, ArchivedReview)):
+            bookings = db.session.execute(
+                select(booking_model.session_id, booking_model.booking_date, booking_model.status,
+                       booking_model.participants, booking_model.total_price).execution_options(yield_per=batch_size))
+            for session_id, booking_date, status, participants, total_price in bookings:
+                merge_changes(changes, (session_id, booking_date.date()),
+                              booking_counters(status, participants, total_price))
+            reviews = db.session.execute(
+                select(booking_model.session_id, booking_model.booking_date, review_model.rating)
+                .join(booking_model, booking_model.id == review_model.booking_id)
+                .execution_options(yield_per=batch_size))
+            for session_id, booking_date, rating in reviews:
+                merge_changes(changes, (session_id, booking_date.date()), {'review_count': 1, 'rating_sum': rating})
+
+        instructors = dict(db.session.execute(select(SkillSession.id, SkillSession.instructor_id)).all())
+        rows = [dict({name: 0 for name in SessionDailyStats.COUNTERS}, session_id=session_id, day=day,
+                     instructor_id=instructors[session_id], **counters)
+                for (session_id, day), counters in changes.items() if session_id in instructors]
+
+        db.session.execute(delete(SessionDailyStats))
+        for offset in range(0, len(rows), batch_size):
+            db.session.execute(insert(SessionDailyStats), rows[offset:offset + batch_size])
+        commit()
+        return len(rows)
@@ -0,0 +1,61 @@
+from contextlib import contextmanager
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app import db
+
+DEFER_COMMIT = 'defer_commit'
+COMMIT_CALLBACKS = 'commit_callbacks'
+
+
+def commit():
+    """Commit the current session, or only flush it inside a unit_of_work().
+
+    Repositories call this instead of db.session.commit() so that several
+    facade operations can be grouped into one database transaction.
+    """
+    if db.session.info.get(DEFER_COMMIT):
+        db.session.flush()
+    else:
+        db.session.commit()
+
+
+@contextmanager
+def unit_of_work():
+    """Run the enclosed repository writes in a single transaction.
+
+    Commits once on success and rolls everything back if an exception escapes.
+    Nested calls join the outer unit of work.
+    """
+    if db.session.info.get(DEFER_COMMIT):
+        yield db.session
+        return
+
+    db.session.info[DEFER_COMMIT] = True
+    try:
+        yield db.session
+        db.session.info.pop(DEFER_COMMIT, None)
+        db.session.commit()
+    except Exception:
+        db.session.info.pop(DEFER_COMMIT, None)
+        db.session.rollback()
+        raise
+
+
+def on_commit(callback):
+    """Call `callback()` once the current transaction commits.
+
+    Used to update in-process caches only with state that reached the
+    database; the callback is dropped if the transaction rolls back.
+    """
+    db.session.info.setdefault(COMMIT_CALLBACKS, []).append(callback)
+
+
+@event.listens_for(Session, 'after_commit')
+def _run_commit_callbacks(session):
+    for callback in session.info.pop(COMMIT_CALLBACKS, ()):
+        callback()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _drop_commit_callbacks(session):
+    session.info.pop(COMMIT_CALLBACKS, None)
@@ -1,5 +1,8 @@
+from sqlalchemy import select, update
 from app.persistence.repository import SQLAlchemyRepository
 from app.models.user import User
+from app import db
+from app.persistence.transaction import commit
 
 class UserRepository(SQLAlchemyRepository):
     def __init__(self):
@@ -11,4 +14,31 @@ class UserRepository(SQLAlchemyRepository):
 
     def email_exists(self, email):
         """Check if an email already exists in the database."""
-        return self.model.query.filter_by(email=email).first() is not None
\ No newline at end of file
+        return self.model.query.filter_by(email=email).first() is not None
+
+    def bump_schedule_version(self, user_id):
+        """Increment a user's schedule version and return the new value.
+
+        Meant to run inside a unit_of_work before the schedule is checked: the
+        UPDATE holds the user's row lock until commit, so concurrent bookings
+        for the same user are checked one after the other.
+        """
+        db.session.execute(
+            update(User).where(User.id == user_id)
+            # not a profile change, so leave updated_at alone
+            .values(schedule_version=User.schedule_version + 1, updated_at=User.updated_at)
+            .execution_options(synchronize_session=False, invalidates=[user_id])
+        )
+        return db.session.scalar(select(User.schedule_version).where(User.id == user_id))
+
+    def bump_schedule_versions(self, user_ids):
+        """Invalidate the cached schedules of several users at once."""
+        if not user_ids:
+            return
+        user_ids = set(user_ids)
+        db.session.execute(
+            update(User).where(User.id.in_(user_ids))
+            .values(schedule_version=User.schedule_version + 1, updated_at=User.updated_at)
+            .execution_options(synchronize_session=False, invalidates=user_ids)
+        )
+        commit()
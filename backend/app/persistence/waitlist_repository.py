@@ -0,0 +1,62 @@
+from sqlalchemy import select, func
+from sqlalchemy.exc import IntegrityError
+from app.persistence.repository import SQLAlchemyRepository
+from app.models.waitlist_entry import WaitlistEntry
+from app import db
+from app.persistence.transaction import commit
+
+
+class WaitlistRepository(SQLAlchemyRepository):
+    def __init__(self):
+        super().__init__(WaitlistEntry)
+
+    def enqueue(self, entry, attempts=3):
+        """Give the entry the next ticket in its queue and insert it.
+
+        Two concurrent joins can read the same MAX(ticket); the unique
+        (queue_key, ticket) constraint rejects the second insert, which then
+        retries with a fresh ticket.
+        """
+        for attempt in range(attempts):
+            last = db.session.scalar(select(func.max(WaitlistEntry.ticket))
+                                     .where(WaitlistEntry.queue_key == entry.queue_key))
+            entry.ticket = (last or 0) + 1
+            try:
+                with db.session.begin_nested():
+                    db.session.add(entry)
+                break
+            except IntegrityError:
+                if attempt == attempts - 1:
+                    raise
+        commit()
+
+    def get_head(self, queue_key, limit=1):
+        """The first `limit` waiting entries of a queue, in FIFO order."""
+        return db.session.scalars(
+            select(WaitlistEntry)
+            .where(WaitlistEntry.queue_key == queue_key, WaitlistEntry.status == 'waiting')
+            .order_by(WaitlistEntry.ticket)
+            .limit(limit)
+        ).all()
+
+    def count_waiting(self, queue_key):
+        """Number of entries waiting in a queue."""
+        return db.session.scalar(
+            select(func.count())
+            .where(WaitlistEntry.queue_key == queue_key, WaitlistEntry.status == 'waiting')
+        )
+
+    def position(self, entry):
+        """1-based place of a waiting entry in its queue.
+
+        Counts the waiting entries up to the entry's ticket: a range scan of
+        the (queue_key, status, ticket) index, so O(position) index entries,
+        though no table rows are read. Entries leave from anywhere in the
+        queue (or go with a user's cascade), so the count stays exact where a
+        served-upto counter on the queue would drift.
+        """
+        return db.session.scalar(
+            select(func.count())
+            .where(WaitlistEntry.queue_key == entry.queue_key, WaitlistEntry.status == 'waiting',
+                   WaitlistEntry.ticket <= entry.ticket)
+        )
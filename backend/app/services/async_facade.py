@@ -0,0 +1,62 @@
+import asyncio
+from sqlalchemy.orm import selectinload
+from app.models.user import User
+from app.models.skill_session import SkillSession
+from app.models.session_card import SessionCard
+from app.persistence.async_repository import AsyncSQLAlchemyRepository
+from app.persistence.session_card_repository import CARD_ORDER
+from app.services.facade import facade
+
+# Everything serialize_session_detail() touches
+SESSION_DETAIL_OPTIONS = (
+    selectinload(SkillSession.instructor_r).selectinload(User.skill_sessions_r),
+    selectinload(SkillSession.skills_r),
+    selectinload(SkillSession.bookings_r),
+    selectinload(SkillSession.reviews_r),
+)
+
+
+class AsyncSkillSessionsFacade:
+    """Async counterpart of SkillSessionsFacade for the ASGI serving mode.
+
+    Database reads await an AsyncSession instead of blocking a thread, and
+    CPU-bound work (bcrypt, JWT signing) runs in `executor` so it does not
+    stall the event loop.
+    """
+
+    def __init__(self, flask_app, session_factory, executor):
+        self.flask_app = flask_app
+        self.executor = executor
+        self.user_repo = AsyncSQLAlchemyRepository(User, session_factory)
+        self.skill_session_repo = AsyncSQLAlchemyRepository(SkillSession, session_factory)
+        self.session_card_repo = AsyncSQLAlchemyRepository(SessionCard, session_factory)
+
+    async def close(self):
+        """Release pooled connections and the CPU executor (ASGI lifespan shutdown)."""
+        await self.skill_session_repo.session_factory.kw['bind'].dispose()
+        self.executor.shutdown(wait=False)
+
+    async def run_cpu_bound(self, fn, *args):
+        """Run fn(*args) in the executor, inside a Flask app context."""
+        def call():
+            with self.flask_app.app_context():
+                return fn(*args)
+        return await asyncio.get_running_loop().run_in_executor(self.executor, call)
+
+    # --- Users ---
+    async def authenticate(self, email, password):
+        """Return (user, access token, refresh token) for valid credentials, or (None, None, None)."""
+        user = await self.user_repo.get_by_attribute('email', email)
+        if not user or not await self.run_cpu_bound(user.verify_password, password):
+            return None, None, None
+        token = await self.run_cpu_bound(user.generate_token)
+        # a single-row insert through the synchronous facade, in the same executor
+        refresh_token = await self.run_cpu_bound(facade.issue_refresh_token, user.id)
+        return user, token, refresh_token
+
+    # --- Skill Sessions ---
+    async def get_skill_session(self, session_id):
+        return await self.skill_session_repo.get(session_id, options=SESSION_DETAIL_OPTIONS)
+
+    async def get_session_cards(self):
+        return await self.session_card_repo.get_all(order_by=CARD_ORDER)
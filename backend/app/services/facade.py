@@ -1,22 +1,92 @@
+import heapq
+import secrets
+from collections import defaultdict
+from datetime import datetime, timedelta
+from flask import current_app
 from app.persistence.repository import SQLAlchemyRepository
+from app.models.keys import new_id
 from app.models.user import User
 from app.models.skill import Skill
-from app.models.skill_session import SkillSession
+from app.models.skill_session import SkillSession, TRENDING_NONE, trending_weight, log2_add
 from app.models.review import Review
 from app.models.booking import Booking
+from app.models.session_occurrence import SessionOccurrence
+from app.models.waitlist_entry import WaitlistEntry
+from app.models.session_neighbors import POPULAR, interaction_weight, unpack_neighbors
+from app.models.refresh_token import RefreshToken, hash_refresh_token
+from app.models.purge_job import PurgeJob
+from app.models.outbox_event import OutboxEvent
+from app.models.session_card import INSTRUCTOR_FIELDS
 from app.persistence.user_repository import UserRepository
 from app.persistence.skill_repository import SkillRepository
 from app.persistence.skill_session_repository import SkillSessionRepository
 from app.persistence.booking_repository import BookingRepository
+from app.persistence.occurrence_repository import SessionOccurrenceRepository
+from app.persistence.waitlist_repository import WaitlistRepository
+from app.persistence.recommendation_repository import SessionNeighborsRepository
+from app.persistence.refresh_token_repository import RefreshTokenRepository
+from app.persistence.purge_repository import PurgeJobRepository
+from app.persistence.outbox_repository import OutboxRepository
+from app.persistence.session_card_repository import SessionCardRepository
+from app.persistence.archive_repository import ArchiveRepository
+from app.persistence.stats_repository import (SessionStatsRepository, booking_state, booking_changes, booking_removals,
+                                              review_changes)
+from app.persistence.replicas import reads_from_replica
+from app.persistence.transaction import unit_of_work, on_commit
+from app.services.schedule import ScheduleIndex, USER, INSTRUCTOR, find_conflicts
+
+SCHEDULE_CONFLICT_MESSAGES = {
+    USER: "Booking overlaps another booking of this user",
+    INSTRUCTOR: "Occurrence overlaps another session of this instructor",
+}
 
 
 class SkillSessionsFacade:
-    def __init__(self):
-        self.user_repo = UserRepository()
-        self.skill_session_repo = SkillSessionRepository()
-        self.skill_repo = SkillRepository()
-        self.booking_repo = BookingRepository()
-        self.review_repository = SQLAlchemyRepository(Review)
+    def __init__(self, store=None):
+        self.use_store(store)
+
+    def use_store(self, store=None):
+        """Switch repositories: SQLAlchemy when store is None, else an InMemoryStore's."""
+        self.store = store
+        if store is None:
+            self.user_repo = UserRepository()
+            self.skill_session_repo = SkillSessionRepository()
+            self.skill_repo = SkillRepository()
+            self.booking_repo = BookingRepository()
+            self.review_repository = SQLAlchemyRepository(Review)
+            self.occurrence_repo = SessionOccurrenceRepository()
+            self.waitlist_repo = WaitlistRepository()
+            self.stats_repo = SessionStatsRepository()
+            self.neighbors_repo = SessionNeighborsRepository()
+            self.refresh_token_repo = RefreshTokenRepository()
+            self.outbox_repo = OutboxRepository()
+            self.card_repo = SessionCardRepository()
+            self.archive_repo = ArchiveRepository()
+        else:
+            self.user_repo = store.repository(User)
+            self.skill_session_repo = store.repository(SkillSession)
+            self.skill_repo = store.repository(Skill)
+            self.booking_repo = store.repository(Booking)
+            self.review_repository = store.repository(Review)
+            self.occurrence_repo = store.repository(SessionOccurrence)
+            self.waitlist_repo = store.repository(WaitlistEntry)
+            from app.persistence.memory_repository import (InMemorySessionStatsRepository,
+                                                           InMemorySessionNeighborsRepository,
+                                                           InMemoryRefreshTokenRepository,
+                                                           InMemoryOutboxRepository,
+                                                           InMemorySessionCardRepository,
+                                                           InMemoryArchiveRepository)
+            self.stats_repo = InMemorySessionStatsRepository(store)
+            self.neighbors_repo = InMemorySessionNeighborsRepository()
+            self.refresh_token_repo = InMemoryRefreshTokenRepository(store)
+            self.outbox_repo = InMemoryOutboxRepository(store)
+            self.card_repo = InMemorySessionCardRepository(store)
+            self.archive_repo = InMemoryArchiveRepository()
+        self.purge_repo = PurgeJobRepository()  # jobs live in the database with either backend
+        self.schedule = ScheduleIndex({
+            USER: lambda user_id: (row[1:] for row in self.booking_repo.get_busy_intervals(user_id)),
+            INSTRUCTOR: lambda instructor_id: (row[1:] for row in self.occurrence_repo.get_busy_intervals(instructor_id)),
+        })
 
     # --- Users ---
     def create_user(self, user_data):
@@ -24,7 +94,9 @@ class SkillSessionsFacade:
             raise ValueError("Email already exists")
 
         user = User(**user_data)
-        self.user_repo.add(user)
+        with unit_of_work():
+            self.user_repo.add(user)
+            self._record_change('user', user.id, 'created', is_instructor=user.is_instructor)
         return user
 
     def get_user(self, user_id):
@@ -33,17 +105,116 @@ class SkillSessionsFacade:
     def get_user_by_email(self, email):
         return self.user_repo.get_by_attribute('email', email)
 
+    def get_users(self, user_ids):
+        return self.user_repo.get_many(user_ids)
+
+    @reads_from_replica
     def get_all_users(self):
         return self.user_repo.get_all()
 
     def update_user(self, user_id, user_data):
-        self.user_repo.update(user_id, user_data)
+        with unit_of_work():
+            self.user_repo.update(user_id, user_data)
+            if 'password' in user_data:
+                self.revoke_refresh_tokens(user_id)
+            if set(INSTRUCTOR_FIELDS).intersection(user_data):
+                self.card_repo.refresh(self.card_repo.session_ids_by_instructor(user_id))
+            self._record_change('user', user_id, 'updated', **user_data)
 
     def delete_user(self, user_id):
         user = self.user_repo.get(user_id)
         if not user:
             raise ValueError("User not found")
-        self.user_repo.delete(user_id)
+        with unit_of_work():
+            self._invalidate_schedules(user_id)
+            booked = self.card_repo.session_ids_booked_by(user_id)
+            queues = self._release_bookings(self.booking_repo.get_held_by(user_id))
+            # one DELETE: sessions, bookings, reviews, ... go with the foreign keys' ON DELETE CASCADE
+            self.user_repo.delete(user_id)
+            self._promote_waitlists(queues)
+            self.card_repo.refresh(booked)
+            self.skill_session_repo.recount_ratings(booked)  # the user's reviews went with the cascade
+            self._record_change('user', user_id, 'deleted')
+
+    # --- Background purges ---
+    def schedule_purge(self, target, target_id):
+        """Hide a user ('user') or skill session ('skill_session') now, and delete its graph in the background.
+
+        Returns the PurgeJob. With PURGE_IN_BACKGROUND off, the job waits for
+        `flask run-purge-jobs`.
+        """
+        if target == 'user' and not self.get_user(target_id):
+            raise ValueError("User not found")
+        if target == 'skill_session' and not self.get_skill_session(target_id):
+            raise ValueError("Skill session not found")
+        job = PurgeJob(target, target_id)
+        with unit_of_work():
+            if target == 'user':
+                self.skill_session_repo.deactivate_by_instructor(target_id)
+                self.refresh_token_repo.revoke_user(target_id, datetime.now())
+                self.card_repo.refresh(self.card_repo.session_ids_by_instructor(target_id))
+            else:
+                self.skill_session_repo.update(target_id, {'is_active': False})
+                self.card_repo.refresh([target_id])
+                self._record_change('skill_session', target_id, 'updated', is_active=False)
+            self.purge_repo.add(job)
+        if current_app.config.get('PURGE_IN_BACKGROUND'):
+            from app.jobs.purge import start_purge
+            start_purge(current_app._get_current_object(), job.id)
+        return job
+
+    def get_purge_job(self, job_id):
+        return self.purge_repo.get(job_id)
+
+    # --- Refresh tokens ---
+    def issue_refresh_token(self, user_id, family_id=None, session_expires_at=None):
+        """Start a login session (or continue `family_id`'s) and return the new opaque refresh token.
+
+        Expiry slides by REFRESH_TOKEN_EXPIRES with every refresh, up to
+        REFRESH_TOKEN_MAX_AGE after the login.
+        """
+        now = datetime.now()
+        config = current_app.config
+        if session_expires_at is None:
+            session_expires_at = now + timedelta(seconds=config['REFRESH_TOKEN_MAX_AGE'])
+        token = secrets.token_urlsafe(32)
+        self.refresh_token_repo.add(RefreshToken(
+            token_hash=hash_refresh_token(token), family_id=family_id or new_id(), user_id=user_id,
+            expires_at=min(now + timedelta(seconds=config['REFRESH_TOKEN_EXPIRES']), session_expires_at),
+            session_expires_at=session_expires_at, created_at=now))
+        return token
+
+    def refresh_session(self, token):
+        """Exchange a refresh token for (user, access token, next refresh token), without the password.
+
+        Raises ValueError for unknown, expired or revoked tokens. A token that
+        was already exchanged has leaked: its whole family is revoked.
+        """
+        now = datetime.now()
+        record = self.refresh_token_repo.find(hash_refresh_token(token)) if token else None
+        if record is None:
+            raise ValueError("Invalid refresh token")
+        if record.rotated_at is not None and record.revoked_at is None:
+            self.refresh_token_repo.revoke_family(record.family_id, now)
+            raise ValueError("Refresh token reuse detected, please log in again")
+        user = self.get_user(record.user_id)
+        with unit_of_work():
+            if user is None or not self.refresh_token_repo.mark_rotated(record.token_hash, now):
+                raise ValueError("Refresh token expired or revoked")
+            next_token = self.issue_refresh_token(user.id, record.family_id, record.session_expires_at)
+        return user, user.generate_token(), next_token
+
+    def revoke_refresh_token(self, token):
+        """Log out one device: revoke the token's family. Returns whether the token was known."""
+        record = self.refresh_token_repo.find(hash_refresh_token(token)) if token else None
+        if record is None:
+            return False
+        self.refresh_token_repo.revoke_family(record.family_id, datetime.now())
+        return True
+
+    def revoke_refresh_tokens(self, user_id):
+        """Log a user out everywhere; returns the number of tokens revoked."""
+        return self.refresh_token_repo.revoke_user(user_id, datetime.now())
 
     # --- Skills ---
     def get_skill_by_name(self, name):
@@ -51,23 +222,34 @@ class SkillSessionsFacade:
 
     def create_skill(self, skill_data):
         skill = Skill(**skill_data)
-        self.skill_repo.add(skill)
+        with unit_of_work():
+            self.skill_repo.add(skill)
+            self._record_change('skill', skill.id, 'created', name=skill.name, category=skill.category)
         return skill
 
     def get_skill(self, skill_id):
         return self.skill_repo.get(skill_id)
 
+    @reads_from_replica
     def get_all_skills(self):
         return self.skill_repo.get_all()
 
+    @reads_from_replica
     def get_skills_by_category(self, category):
-        return self.skill_repo.get_by_attribute('category', category)
+        return self.skill_repo.get_all_by_attribute('category', category)
 
     def update_skill(self, skill_id, skill_data):
-        self.skill_repo.update(skill_id, skill_data)
+        with unit_of_work():
+            self.skill_repo.update(skill_id, skill_data)
+            self.card_repo.refresh(self.card_repo.session_ids_by_skill(skill_id))
+            self._record_change('skill', skill_id, 'updated', **skill_data)
 
     def delete_skill(self, skill_id):
-        self.skill_repo.delete(skill_id)
+        with unit_of_work():
+            sessions = self.card_repo.session_ids_by_skill(skill_id)
+            self.skill_repo.delete(skill_id)
+            self.card_repo.refresh(sessions)
+            self._record_change('skill', skill_id, 'deleted')
 
     # --- Skill Sessions ---
     def create_skill_session(self, session_data):
@@ -79,36 +261,111 @@ class SkillSessionsFacade:
             raise ValueError("User is not an instructor")
 
         session = SkillSession(**session_data)
-        self.skill_session_repo.add(session)
+        with unit_of_work():
+            self.skill_session_repo.add(session)
+            self.card_repo.refresh([session.id])
+            self._record_change('skill_session', session.id, 'created', instructor_id=session.instructor_id,
+                                price=session.price, is_active=session.is_active)
         return session
 
     def get_skill_session(self, session_id):
         return self.skill_session_repo.get(session_id)
 
+    def get_skill_sessions(self, session_ids):
+        return self.skill_session_repo.get_many(session_ids)
+
+    @reads_from_replica
     def get_all_skill_sessions(self):
         return self.skill_session_repo.get_all()
 
+    @reads_from_replica
     def get_sessions_by_instructor(self, instructor_id):
-        return self.skill_session_repo.get_by_attribute('instructor_id', instructor_id)
+        return self.skill_session_repo.get_all_by_attribute('instructor_id', instructor_id)
 
+    @reads_from_replica
     def get_sessions_by_skill(self, skill_id):
         return self.skill_session_repo.get_sessions_by_skill(skill_id)
 
-    def get_active_sessions(self):
-        return self.skill_session_repo.get_by_attribute('is_active', True)
+    @reads_from_replica
+    def get_active_sessions(self, sort=None, limit=20, offset=0):
+        """Active sessions; with a sort (one of SORTS), one ranked page of them."""
+        if sort is None:
+            return self.skill_session_repo.get_all_by_attribute('is_active', True)
+        return self.skill_session_repo.get_ranked(sort, limit, offset)
+
+    def rebuild_session_rankings(self):
+        """Recompute every session's trending and rating keys from scratch; returns sessions updated."""
+        return self.skill_session_repo.rebuild_rankings()
+
+    @reads_from_replica
+    def get_session_cards(self, session_ids=None):
+        """Catalog cards of every session, oldest first, or of the given ids in that order."""
+        if session_ids is None:
+            return self.card_repo.get_all()
+        return self.card_repo.get_many(session_ids)
+
+    @reads_from_replica
+    def get_instructor_session_cards(self, instructor_id):
+        return self.card_repo.get_by_instructor(instructor_id)
+
+    def rebuild_session_cards(self):
+        """Recompute every session card from the source tables; returns cards written."""
+        return self.card_repo.rebuild()
 
     def update_skill_session(self, session_id, session_data):
         session = self.get_skill_session(session_id)
         if not session:
             raise ValueError("Skill session not found")
-        self.skill_session_repo.update(session_id, session_data)
+        with unit_of_work():
+            if 'duration' in session_data:
+                self._invalidate_schedules(session.instructor_id, session.id)
+            self.skill_session_repo.update(session_id, session_data)
+            self.card_repo.refresh([session_id])
+            self._record_change('skill_session', session_id, 'updated', **session_data)
 
     def delete_skill_session(self, session_id):
-        return self.skill_session_repo.delete(session_id)
+        session = self.get_skill_session(session_id)
+        if not session:
+            return None
+        with unit_of_work():
+            self._invalidate_schedules(session.instructor_id, session.id)
+            self._record_change('skill_session', session_id, 'deleted', instructor_id=session.instructor_id)
+            return self.skill_session_repo.delete(session_id)
 
     def deactivate_skill_session(self, session_id):
         return self.update_skill_session(session_id, {'is_active': False})
 
+    # --- Session Occurrences ---
+    def create_session_occurrence(self, occurrence_data):
+        session = self.get_skill_session(occurrence_data['session_id'])
+        if not session:
+            raise ValueError("Skill session not found")
+        starts_at = occurrence_data['starts_at']
+        if starts_at <= datetime.now():
+            raise ValueError("Occurrence must start in the future")
+
+        occurrence = SessionOccurrence(session.id, starts_at, starts_at + timedelta(minutes=session.duration),
+                                       occurrence_data.get('capacity', session.max_participants))
+        with unit_of_work():
+            self._change_schedule(INSTRUCTOR, session.instructor_id,
+                                  added=(occurrence.starts_at, occurrence.ends_at, occurrence.id))
+            self.occurrence_repo.add(occurrence)
+            self._record_change('occurrence', occurrence.id, 'created', session_id=session.id,
+                                starts_at=occurrence.starts_at, capacity=occurrence.capacity)
+        return occurrence
+
+    def get_session_occurrence(self, occurrence_id):
+        return self.occurrence_repo.get(occurrence_id)
+
+    @reads_from_replica
+    def get_session_occurrences(self, session_id, start=None, end=None):
+        return self.occurrence_repo.get_by_session(session_id, start, end)
+
+    @reads_from_replica
+    def search_availability(self, start, end, min_spots=1, limit=100, **session_filters):
+        """Bookable occurrences overlapping [start, end), earliest first."""
+        return self.occurrence_repo.search(start, end, min_spots=min_spots, limit=limit, **session_filters)
+
     # --- Bookings ---
     def create_booking(self, booking_data):
         # Validate session exists and has availability
@@ -117,43 +374,119 @@ class SkillSessionsFacade:
             raise ValueError("Skill session not found")
         if not session.is_active:
             raise ValueError("Session is not active")
-        if session.get_available_spots() < booking_data.get('participants', 1):
-            raise ValueError("Not enough available spots")
 
-        # Calculate total price
-        booking_data['total_price'] = session.price * booking_data.get('participants', 1)
+        occurrence = None
+        if booking_data.get('occurrence_id'):
+            # Scheduled slot: capacity is counted per occurrence, and it sets the date
+            occurrence = self.get_session_occurrence(booking_data['occurrence_id'])
+            if not occurrence or occurrence.session_id != session.id:
+                raise ValueError("Session occurrence not found")
+            booking_data = dict(booking_data, booking_date=occurrence.starts_at)
+        elif session.get_available_spots() < booking_data.get('participants', 1):
+            raise ValueError("Not enough available spots")
 
         booking = Booking(**booking_data)
-        self.booking_repo.add(booking)
+        with unit_of_work():
+            self._place_booking(booking, session)
         return booking
 
-    def get_booking(self, booking_id):
-        return self.booking_repo.get(booking_id)
+    def _place_booking(self, booking, session):
+        """Price, schedule-check, reserve and store a new booking in the caller's unit_of_work.
+
+        Raises ValueError before writing anything if the booking cannot be made.
+        """
+        # Calculate total price
+        booking.total_price = session.price * booking.participants
+        # Waitlist promotion catches the ValueErrors and commits anyway, so the
+        # schedule tree is only told about the booking once it has been added.
+        update_schedule = self._check_schedule(USER, booking.user_id, added=self._booking_interval(booking, session))
+        if booking.occurrence_id and not self.occurrence_repo.reserve(booking.occurrence_id, booking.participants):
+            raise ValueError("Not enough available spots")
+        self.booking_repo.add(booking)
+        on_commit(update_schedule)
+        self.skill_session_repo.record_booking(session.id, booking.created_at)
+        self.stats_repo.apply(booking_changes(booking))
+        self.card_repo.refresh([session.id])
+        self._record_change('booking', booking.id, 'created', user_id=booking.user_id, session_id=session.id,
+                            occurrence_id=booking.occurrence_id, participants=booking.participants,
+                            status=booking.status)
+
+    def get_booking(self, booking_id, include_archived=False):
+        booking = self.booking_repo.get(booking_id)
+        if booking is None and include_archived:
+            booking = self.archive_repo.get_booking(booking_id)
+        return booking
 
+    @reads_from_replica
     def get_all_bookings(self):
         return self.booking_repo.get_all()
 
-    def get_bookings_by_user(self, user_id):
-        return self.booking_repo.get_by_attribute('user_id', user_id)
+    def get_bookings_by_user(self, user_id, include_archived=False):
+        """The user's bookings; with include_archived, archived history first."""
+        bookings = self.booking_repo.get_all_by_attribute('user_id', user_id)
+        if include_archived:
+            bookings = self.archive_repo.get_bookings('user_id', user_id) + bookings
+        return bookings
 
-    def get_bookings_by_session(self, session_id):
-        return self.booking_repo.get_by_attribute('session_id', session_id)
+    def get_bookings_by_session(self, session_id, include_archived=False):
+        """The session's bookings; with include_archived, archived history first."""
+        bookings = self.booking_repo.get_all_by_attribute('session_id', session_id)
+        if include_archived:
+            bookings = self.archive_repo.get_bookings('session_id', session_id) + bookings
+        return bookings
 
     def get_bookings_by_status(self, status):
-        return self.booking_repo.get_by_attribute('status', status)
+        return self.booking_repo.get_all_by_attribute('status', status)
 
     def update_booking(self, booking_id, booking_data):
         booking = self.get_booking(booking_id)
         if not booking:
             raise ValueError("Booking not found")
-        self.booking_repo.update(booking_id, booking_data)
+        if booking.occurrence_id and 'booking_date' in booking_data:
+            raise ValueError("The booking date of a scheduled occurrence cannot be changed")
+        before = booking_state(booking)
+        extra = 0  # participants added (or, if negative, removed) in a scheduled occurrence
+        if booking.occurrence_id and isinstance(booking_data.get('participants'), int):
+            extra = booking_data['participants'] - booking.participants
+        status = booking_data.get('status', booking.status)
+        booking_date = booking_data.get('booking_date', booking.booking_date)
+        with unit_of_work():
+            if booking_date != booking.booking_date or (status == 'cancelled') != (booking.status == 'cancelled'):
+                duration = timedelta(minutes=booking.session_r.duration)
+                self._change_schedule(
+                    USER, booking.user_id,
+                    added=(booking_date, booking_date + duration, booking.id) if status != 'cancelled' else None,
+                    removed=self._booking_interval(booking) if booking.status != 'cancelled' else None)
+            if extra > 0 and not self.occurrence_repo.reserve(booking.occurrence_id, extra):
+                raise ValueError("Not enough available spots")
+            if (status == 'cancelled') != (booking.status == 'cancelled'):
+                self.skill_session_repo.record_booking(booking.session_id, booking.created_at,
+                                                       count=-1 if status == 'cancelled' else 1)
+            self.booking_repo.update(booking_id, booking_data)
+            if extra < 0:
+                self.occurrence_repo.release(booking.occurrence_id, -extra)
+                self._promote_waitlist(booking.session_r, booking.occurrence_id)
+            self.stats_repo.apply(booking_changes(booking, before))
+            self.card_repo.refresh([booking.session_id])
+            self._record_change('booking', booking_id, 'updated',
+                                **dict(booking_data, user_id=booking.user_id, session_id=booking.session_id))
+
+    def _transition_booking(self, booking, transition):
+        """Run a status transition, its rollup update and its change event in one transaction."""
+        before = booking_state(booking)
+        with unit_of_work():
+            transition()
+            self.stats_repo.apply(booking_changes(booking, before))
+            self.card_repo.refresh([booking.session_id])
+            self._record_change('booking', booking.id, booking.status, user_id=booking.user_id,
+                                session_id=booking.session_id)
+        return booking
 
     def confirm_booking(self, booking_id):
         booking = self.get_booking(booking_id)
         if not booking:
             raise ValueError("Booking not found")
-        booking.confirm_booking()
-        return booking
+        return self._transition_booking(booking, booking.confirm_booking)
 
     def cancel_booking(self, booking_id):
         booking = self.get_booking(booking_id)
@@ -161,15 +494,213 @@ class SkillSessionsFacade:
             raise ValueError("Booking not found")
         if not booking.is_cancellable():
             raise ValueError("Booking cannot be cancelled")
-        booking.cancel_booking()
-        return booking
+
+        def cancel():
+            self._change_schedule(USER, booking.user_id, removed=self._booking_interval(booking))
+            booking.cancel_booking()
+            self.skill_session_repo.record_booking(booking.session_id, booking.created_at, count=-1)
+            if booking.occurrence_id:
+                self.occurrence_repo.release(booking.occurrence_id, booking.participants)
+            self._promote_waitlist(booking.session_r, booking.occurrence_id)
+        return self._transition_booking(booking, cancel)
 
     def complete_booking(self, booking_id):
         booking = self.get_booking(booking_id)
         if not booking:
             raise ValueError("Booking not found")
-        booking.complete_booking()
-        return booking
+        return self._transition_booking(booking, booking.complete_booking)
+
+    # --- Waitlist ---
+    def _available_spots(self, session, occurrence_id=None):
+        if occurrence_id:
+            return self.get_session_occurrence(occurrence_id).get_available_spots()
+        return session.get_available_spots()
+
+    def join_waitlist(self, entry_data):
+        """Queue for a fully booked session or occurrence; the entry is booked when spots free up."""
+        session = self.get_skill_session(entry_data['session_id'])
+        if not session:
+            raise ValueError("Skill session not found")
+        if not session.is_active:
+            raise ValueError("Session is not active")
+        if entry_data.get('occurrence_id'):
+            occurrence = self.get_session_occurrence(entry_data['occurrence_id'])
+            if not occurrence or occurrence.session_id != session.id or occurrence.status != 'scheduled':
+                raise ValueError("Session occurrence not found")
+            entry_data = dict(entry_data, booking_date=occurrence.starts_at)
+        if entry_data.get('booking_date') is None or entry_data['booking_date'] <= datetime.now():
+            raise ValueError("Booking date must be in the future")
+
+        entry = WaitlistEntry(**entry_data)
+        if (self.waitlist_repo.count_waiting(entry.queue_key) == 0
+                and self._available_spots(session, entry.occurrence_id) >= entry.participants):
+            raise ValueError("Spots are available; book the session instead")
+        with unit_of_work():
+            self.waitlist_repo.enqueue(entry)
+            self._record_change('waitlist_entry', entry.id, 'created', user_id=entry.user_id,
+                                session_id=entry.session_id, occurrence_id=entry.occurrence_id)
+        return entry
+
+    def get_waitlist_entry(self, entry_id):
+        return self.waitlist_repo.get(entry_id)
+
+    def get_waitlist_position(self, entry):
+        """1-based place in the queue, or None once the entry is no longer waiting."""
+        return self.waitlist_repo.position(entry) if entry.status == 'waiting' else None
+
+    def leave_waitlist(self, entry_id):
+        entry = self.get_waitlist_entry(entry_id)
+        if not entry:
+            raise ValueError("Waitlist entry not found")
+        if entry.status != 'waiting':
+            raise ValueError("Only waiting entries can be cancelled")
+        with unit_of_work():
+            self.waitlist_repo.update(entry_id, {'status': 'cancelled'})
+            self._record_change('waitlist_entry', entry_id, 'cancelled', session_id=entry.session_id)
+        return entry
+
+    def _release_bookings(self, bookings):
+        """Take back what bookings about to be deleted outright (not cancelled) counted for.
+
+        `bookings` are Booking objects or rows with the same columns. Their
+        occurrence spots and trending weight are given back with one UPDATE
+        each and their daily stats reversed. Returns the (session_id,
+        occurrence_id) queues to pass to _promote_waitlists once the bookings
+        are gone.
+        """
+        spots, weights, queues = defaultdict(int), defaultdict(lambda: TRENDING_NONE), set()
+        for booking in bookings:
+            if booking.status == 'cancelled':
+                continue
+            if booking.occurrence_id:
+                spots[booking.occurrence_id] += booking.participants
+            weights[booking.session_id] = log2_add(weights[booking.session_id], trending_weight(booking.created_at))
+            queues.add((booking.session_id, booking.occurrence_id))
+        self.occurrence_repo.release_many(spots)
+        self.skill_session_repo.take_back_bookings(weights)
+        self.stats_repo.apply(booking_removals(bookings))
+        return queues
+
+    def _promote_waitlists(self, queues):
+        sessions = {session.id: session for session in self.skill_session_repo.get_many({key[0] for key in queues})}
+        for session_id, occurrence_id in sorted(queues, key=str):
+            if session_id in sessions:
+                self._promote_waitlist(sessions[session_id], occurrence_id)
+
+    def _promote_waitlist(self, session, occurrence_id=None):
+        """Book waiting entries, first come first served, while they fit in the free spots.
+
+        Runs inside the unit_of_work that freed the spots, so the release and
+        the promotions commit or roll back together. The queue stops at the
+        first entry that does not fit rather than letting smaller parties
+        overtake it; entries that can no longer be booked (date passed, user
+        now busy at that time) are cancelled and skipped.
+        """
+        if not session.is_active:
+            return []
+        queue_key = occurrence_id or session.id
+        available = self._available_spots(session, occurrence_id)
+        promoted = []
+        while available > 0:
+            entries = self.waitlist_repo.get_head(queue_key, limit=available)
+            if not entries:
+                break
+            for entry in entries:
+                if entry.participants > available:
+                    return promoted
+                try:
+                    booking = Booking(entry.user_id, entry.session_id, entry.booking_date, entry.participants,
+                                      entry.special_requests, entry.occurrence_id)
+                    self._place_booking(booking, session)
+                except ValueError:
+                    self.waitlist_repo.update(entry.id, {'status': 'cancelled'})
+                    self._record_change('waitlist_entry', entry.id, 'cancelled', session_id=entry.session_id)
+                    continue
+                self.waitlist_repo.update(entry.id, {'status': 'promoted', 'booking_id': booking.id})
+                self._record_change('waitlist_entry', entry.id, 'promoted', session_id=entry.session_id,
+                                    booking_id=booking.id)
+                available -= entry.participants
+                promoted.append(booking)
+        return promoted
+
+    # --- Recommendations ---
+    @reads_from_replica
+    def get_recommendations(self, user_id, limit=10):
+        """[(session, score)] the user may like, best first.
+
+        Each session the user booked contributes its precomputed neighbor list,
+        weighted by how much they liked it; lists are merged and already-booked
+        or inactive sessions dropped. Users without history get the most booked
+        sessions. The lists are built by `flask refresh-recommendations`.
+        """
+        seeds = {}
+        for booking in self.booking_repo.get_by_user(user_id):
+            if booking.status != 'cancelled':
+                seeds.setdefault(booking.session_id, interaction_weight())
+        for review in self.review_repository.get_all_by_attribute('user_id', user_id):
+            if review.session_id in seeds:
+                seeds[review.session_id] = interaction_weight(review.rating)
+
+        scores = defaultdict(float)
+        for row in self.neighbors_repo.get_many(list(seeds)):
+            for session_id, score in unpack_neighbors(row.neighbors):
+                scores[session_id] += seeds[row.session_id] * score
+        if not seeds:
+            popular = self.neighbors_repo.get(POPULAR)
+            scores.update(unpack_neighbors(popular.neighbors) if popular else [])
+
+        ranked = heapq.nlargest(limit * 2, ((score, session_id) for session_id, score in scores.items()
+                                            if session_id not in seeds and score > 0))
+        sessions = {session.id: session for session in self.get_skill_sessions([session_id for _, session_id in ranked])}
+        return [(sessions[session_id], score) for score, session_id in ranked
+                if session_id in sessions and sessions[session_id].is_active][:limit]
+
+    # --- Change events ---
+    def _record_change(self, aggregate, aggregate_id, kind, **data):
+        """Append a change event to the outbox, in the caller's unit_of_work so it commits with the change."""
+        self.outbox_repo.append(OutboxEvent(aggregate, aggregate_id, kind, data))
+
+    # --- Schedule conflicts ---
+    @staticmethod
+    def _booking_interval(booking, session=None):
+        """(start, end, booking id) of the time a booking takes in its user's schedule."""
+        duration = timedelta(minutes=(session or booking.session_r).duration)
+        return booking.booking_date, booking.booking_date + duration, booking.id
+
+    def _change_schedule(self, kind, owner_id, added=None, removed=None):
+        """Add and/or remove a (start, end, item_id) interval in a user's schedule.
+
+        Call inside the unit_of_work that makes the change, before writing it:
+        this locks the owner's schedule, raises ValueError if `added` overlaps
+        anything but `removed`, and updates the cached tree once committed.
+        """
+        on_commit(self._check_schedule(kind, owner_id, added, removed))
+
+    def _check_schedule(self, kind, owner_id, added=None, removed=None):
+        """The checking half of _change_schedule: returns the cached-tree update
+        instead of registering it, for callers that may still back out of the
+        write without rolling back (pass it to on_commit once the write is made).
+        """
+        version = self.user_repo.bump_schedule_version(owner_id)
+        if version is None:
+            raise ValueError("User not found")
+        if added is not None:
+            exclude = removed[2] if removed else None
+            if self.schedule.conflicts(kind, owner_id, version - 1, added[0], added[1], exclude=exclude):
+                raise ValueError(SCHEDULE_CONFLICT_MESSAGES[kind])
+        return lambda: self.schedule.apply(kind, owner_id, version,
+                                           added=[added] if added else (), removed=[removed] if removed else ())
+
+    def _invalidate_schedules(self, instructor_id, session_id=None):
+        """Deleting or re-timing sessions (one, or all of an instructor's) changes their instructor's
+        and bookers' schedules. Only user ids are read, never the bookings themselves."""
+        self.user_repo.bump_schedule_versions({instructor_id, *self.booking_repo.get_booker_ids(instructor_id, session_id)})
+
+    @reads_from_replica
+    def find_schedule_conflicts(self):
+        """Every overlapping pair of bookings per user and of occurrences per instructor."""
+        return [*find_conflicts(USER, self.booking_repo.get_busy_intervals()),
+                *find_conflicts(INSTRUCTOR, self.occurrence_repo.get_busy_intervals())]
 
     # --- Reviews ---
     def create_review(self, review_data):
@@ -183,29 +714,70 @@ class SkillSessionsFacade:
             raise ValueError("This booking has already been reviewed")
 
         review = Review(**review_data)
-        self.review_repository.add(review)
+        with unit_of_work():
+            self.review_repository.add(review)
+            self.skill_session_repo.record_ratings(booking.session_id, int(review.rating), 1)
+            self.stats_repo.apply(review_changes(booking, review.rating))
+            self.card_repo.refresh([booking.session_id])
+            self._record_change('review', review.id, 'created', session_id=booking.session_id,
+                                instructor_id=review.instructor_id, rating=review.rating)
         return review
 
     def get_review(self, review_id):
         return self.review_repository.get(review_id)
 
+    @reads_from_replica
     def get_all_reviews(self):
         return self.review_repository.get_all()
 
-    def get_reviews_by_session(self, session_id):
-        return self.review_repository.get_by_attribute('session_id', session_id)
+    @reads_from_replica
+    def get_reviews_by_session(self, session_id, include_archived=False):
+        return self._reviews_by('session_id', session_id, include_archived)
+
+    @reads_from_replica
+    def get_reviews_by_instructor(self, instructor_id, include_archived=False):
+        return self._reviews_by('instructor_id', instructor_id, include_archived)
 
-    def get_reviews_by_instructor(self, instructor_id):
-        return self.review_repository.get_by_attribute('instructor_id', instructor_id)
+    @reads_from_replica
+    def get_reviews_by_user(self, user_id, include_archived=False):
+        return self._reviews_by('user_id', user_id, include_archived)
 
-    def get_reviews_by_user(self, user_id):
-        return self.review_repository.get_by_attribute('user_id', user_id)
+    def _reviews_by(self, attr_name, attr_value, include_archived):
+        reviews = self.review_repository.get_all_by_attribute(attr_name, attr_value)
+        if include_archived:
+            reviews = self.archive_repo.get_reviews(attr_name, attr_value) + reviews
+        return reviews
 
     def update_review(self, review_id, review_data):
-        self.review_repository.update(review_id, review_data)
+        review = self.get_review(review_id)
+        old_rating = int(review.rating) if review else 0
+        with unit_of_work():
+            self.review_repository.update(review_id, review_data)
+            if review and int(review.rating) != old_rating:
+                booking = self.get_booking(review.booking_id)
+                self.skill_session_repo.record_ratings(booking.session_id, int(review.rating) - old_rating, 0)
+                self.stats_repo.apply(review_changes(booking, int(review.rating) - old_rating, count=0))
+            if review:
+                self.card_repo.refresh([review.session_id])
+                self._record_change('review', review_id, 'updated', **dict(review_data, session_id=review.session_id))
 
     def delete_review(self, review_id):
-        self.review_repository.delete(review_id)
+        review = self.get_review(review_id)
+        with unit_of_work():
+            if review:
+                booking = self.get_booking(review.booking_id)
+                self.skill_session_repo.record_ratings(booking.session_id, -int(review.rating), -1)
+                self.stats_repo.apply(review_changes(booking, -int(review.rating), count=-1))
+                self._record_change('review', review_id, 'deleted', session_id=booking.session_id)
+            self.review_repository.delete(review_id)
+            if review:
+                self.card_repo.refresh([review.session_id])
+
+    # --- Instructor stats ---
+    @reads_from_replica
+    def get_instructor_daily_stats(self, instructor_id, start=None, end=None):
+        """Per-day booking and review totals across the instructor's sessions."""
+        return self.stats_repo.get_instructor_daily(instructor_id, start, end)
 
     # --- Session and Skill Management ---
     def add_skill_to_session(self, session_id, skill_id):
@@ -216,7 +788,10 @@ class SkillSessionsFacade:
         if not skill:
             raise ValueError("Skill not found")
 
-        session.add_skill(skill)
+        with unit_of_work():
+            session.add_skill(skill)
+            self.card_repo.refresh([session_id])
+            self._record_change('skill_session', session_id, 'skill_added', skill_id=skill_id)
         return session
 
 
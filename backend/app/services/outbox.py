@@ -0,0 +1,246 @@
+""" Relay from the transactional outbox to pluggable sinks
+
+Facade writes append compact change events (app/models/outbox_event.py) in
+the same transaction as the change itself, so an event exists if and only if
+its change committed. The relay reads them in id order, one batch per sink,
+and publishes them; a sink's checkpoint only moves once `publish` returned.
+Delivery is therefore at least once: after a crash the last batch is sent
+again, and consumers deduplicate by event id.
+
+Durable sinks (NDJSON files, brokers) keep their checkpoint in the
+outbox_checkpoints table. The in-process EventBus feeds caches that live and
+die with the process, so it starts at the newest event and its position is
+only kept in memory.
+"""
+
+import json
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+from app.persistence.transaction import unit_of_work
+
+logger = logging.getLogger(__name__)
+
+
+def event_message(event):
+    """The published form of an OutboxEvent."""
+    return {
+        'id': event.id,
+        'aggregate': event.aggregate,
+        'aggregate_id': event.aggregate_id,
+        'kind': event.kind,
+        'data': json.loads(event.payload) if event.payload else {},
+        'at': event.created_at.isoformat(),
+    }
+
+
+class NDJSONSink:
+    """Appends one JSON line per event to a file, for log shippers and offline consumers."""
+
+    def __init__(self, path, fsync=True):
+        self.path = path
+        self.fsync = fsync
+
+    def publish(self, messages):
+        lines = ''.join(json.dumps(message, separators=(',', ':')) + '\n' for message in messages)
+        with open(self.path, 'a', encoding='utf-8') as stream:
+            stream.write(lines)
+            stream.flush()
+            if self.fsync:
+                os.fsync(stream.fileno())
+
+
+class EventBus:
+    """Synchronous in-process publish/subscribe.
+
+    A handler that raises stops the batch, and the relay delivers it again on
+    its next run, so handlers must be idempotent.
+    """
+
+    def __init__(self):
+        self._handlers = []
+
+    def subscribe(self, handler, aggregates=None):
+        """Call `handler(message)` for every event, or only for those of the given aggregates."""
+        self._handlers.append((handler, frozenset(aggregates) if aggregates else None))
+        return handler
+
+    def unsubscribe(self, handler):
+        self._handlers = [(other, aggregates) for other, aggregates in self._handlers if other is not handler]
+
+    def publish(self, messages):
+        for message in messages:
+            for handler, aggregates in self._handlers:
+                if aggregates is None or message['aggregate'] in aggregates:
+                    handler(message)
+
+
+def create_sinks(specs):
+    """{consumer name: sink} from OUTBOX_SINKS entries '<name>=ndjson:<path>'.
+
+    The name keys the sink's checkpoint, so it must stay the same across restarts.
+    """
+    sinks = {}
+    for spec in specs:
+        name, _, target = spec.partition('=')
+        kind, _, path = target.partition(':')
+        if not name or kind != 'ndjson' or not path:
+            raise ValueError(f"Invalid outbox sink: {spec}")
+        sinks[name] = NDJSONSink(path)
+    return sinks
+
+
+class OutboxRelay:
+    """Publishes outbox events to named sinks, each from its own checkpoint.
+
+    Ids are handed out when a transaction inserts its event, but transactions
+    commit in any order, so a missing id may still appear. A gap is judged by
+    how long the relay itself has seen it missing, never by the created_at of
+    the events around it (set before their transaction commits). Later events
+    wait `settle_seconds` for it; then the checkpoint moves on and keeps the
+    id. Kept ids are looked up on every run and published late, out of order,
+    if their transaction commits after all. Only an id missing for
+    `gap_timeout` is taken as rolled back and dropped.
+    """
+
+    def __init__(self, repo=None, batch_size=500, settle_seconds=5.0, gap_timeout=3600.0):
+        self._repo = repo
+        self.batch_size = batch_size
+        self.settle_seconds = settle_seconds
+        self.gap_timeout = gap_timeout
+        self._sinks = {}  # name -> sink
+        self._positions = {}  # name -> position, for sinks without a stored checkpoint
+        self._gaps = {}  # name -> {missing id: first seen}, for the same sinks
+
+    @property
+    def repo(self):
+        if self._repo is None:
+            from app.services import facade
+            return facade.outbox_repo
+        return self._repo
+
+    def add_sink(self, name, sink, durable=True):
+        """Register a consumer. Non-durable ones only receive events newer than now."""
+        self._sinks[name] = sink
+        if not durable:
+            self._positions[name] = self.repo.last_id()
+            self._gaps[name] = {}
+        return sink
+
+    def _deliverable(self, events, position, gaps, now):
+        """The events before the first gap seen missing for less than settle_seconds; new gaps go into `gaps`."""
+        ready = []
+        settle = timedelta(seconds=self.settle_seconds)
+        for event in events:
+            missing = range(position + 1, event.id)
+            for event_id in missing:
+                gaps.setdefault(event_id, now)
+            if any(now - gaps[event_id] < settle for event_id in missing):
+                break
+            ready.append(event)
+            position = event.id
+        return ready
+
+    def _load(self, name):
+        """(position, gaps) of a sink."""
+        if name in self._positions:
+            return self._positions[name], dict(self._gaps[name])
+        if not self.repo.has_checkpoint(name):
+            # a new sink starts at the oldest stored event: the ids below it were pruned, not lost
+            return max(self.repo.first_id() - 1, 0), {}
+        return self.repo.get_checkpoint(name), self.repo.get_gaps(name)
+
+    def relay(self, name, now=None):
+        """Publish the next batch to one sink, late events first; returns the number of events published."""
+        sink = self._sinks[name]
+        durable = name not in self._positions
+        now = now or datetime.now()
+        with unit_of_work():
+            position, gaps = self._load(name)
+            stored = dict(gaps)
+            late = self.repo.get_many([event_id for event_id in gaps if event_id <= position])
+            expired = sorted(event_id for event_id, seen in gaps.items()
+                             if now - seen >= timedelta(seconds=self.gap_timeout))
+            for event_id in [event.id for event in late] + expired:
+                gaps.pop(event_id, None)
+            if expired:
+                logger.warning("outbox events %s missing for %ss, taken as rolled back", expired, self.gap_timeout)
+
+            events = self._deliverable(self.repo.read_after(position, self.batch_size), position, gaps, now)
+            for event in events:
+                gaps.pop(event.id, None)
+            if late or events:
+                sink.publish([event_message(event) for event in late + events])
+            position = events[-1].id if events else position
+            if not durable:
+                self._positions[name], self._gaps[name] = position, gaps
+            elif late or events or gaps != stored:
+                self.repo.save_checkpoint(name, position, gaps)
+        return len(late) + len(events)
+
+    def run_once(self, now=None):
+        """One batch for every sink; returns {sink name: events published}."""
+        return {name: self.relay(name, now) for name in list(self._sinks)}
+
+    def run_forever(self, interval=1.0, stop=None):
+        """Relay until `stop` (a threading.Event) is set, sleeping `interval` whenever all sinks are caught up."""
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            try:
+                published = sum(self.run_once().values())
+            except Exception:
+                logger.exception("outbox relay failed, retrying")
+                published = 0
+            if not published:
+                stop.wait(interval)
+
+
+def init_outbox(app):
+    """Create the app's in-process EventBus, and with OUTBOX_BUS_INTERVAL a thread feeding it."""
+    bus = app.extensions['outbox_bus'] = EventBus()
+    interval = app.config.get('OUTBOX_BUS_INTERVAL')
+    if not interval:
+        return bus
+
+    def run():
+        with app.app_context():
+            relay = OutboxRelay(batch_size=app.config['OUTBOX_BATCH_SIZE'],
+                                settle_seconds=app.config['OUTBOX_SETTLE_SECONDS'],
+                                gap_timeout=app.config['OUTBOX_GAP_TIMEOUT'])
+            relay.add_sink('bus', bus, durable=False)
+            relay.run_forever(interval)
+
+    threading.Thread(target=run, name='outbox-bus', daemon=True).start()
+    return bus
+
+
+def relay_outbox(sinks, batch_size=500, settle_seconds=5.0, once=False, interval=1.0, progress=None,
+                 gap_timeout=3600.0):
+    """Run a relay over the given {name: sink} until caught up (`once`) or forever; returns events published."""
+    relay = OutboxRelay(batch_size=batch_size, settle_seconds=settle_seconds, gap_timeout=gap_timeout)
+    for name, sink in sinks.items():
+        relay.add_sink(name, sink)
+    if not once:
+        relay.run_forever(interval)
+        return 0
+    total = 0
+    while True:
+        published = relay.run_once()
+        if progress:
+            progress(published)
+        total += sum(published.values())
+        if not any(count >= relay.batch_size for count in published.values()):
+            return total
+
+
+def prune_outbox(retention_seconds, batch_size=1000, now=None):
+    """Delete events older than the retention that every durable sink has received; returns rows deleted."""
+    from app.services import facade
+    before = (now or datetime.now()) - timedelta(seconds=retention_seconds)
+    total = 0
+    while True:
+        deleted = facade.outbox_repo.prune(before, batch_size)
+        total += deleted
+        if deleted < batch_size:
+            return total
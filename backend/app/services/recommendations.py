@@ -0,0 +1,127 @@
+""" Batch computation of the "sessions you may like" neighbor lists
+
+Similarity between two sessions blends two cosine similarities, both computed
+as sparse matrix products (SciPy):
+
+- co-occurrence: over the users x sessions interaction matrix, where a user's
+  weight for a session is 1 for a booking, moved up or down by their review
+  rating (see interaction_weight);
+- content: over the sessions x (skills + categories) tag matrix.
+
+Rows are computed `block_size` sessions at a time, so memory stays bounded by
+block_size x sessions. Only each session's top K survive, packed into one
+SessionNeighbors row. An incremental refresh recomputes the rows of sessions
+touched by users whose bookings or reviews changed since the last run, and of
+sessions that have no row yet; the full interaction matrix is still read,
+but the expensive products are limited to those rows.
+"""
+
+from datetime import datetime
+import numpy as np
+from scipy import sparse
+from flask import current_app
+from app.models.skill_session import SkillSession
+from app.models.booking import Booking
+from app.models.review import Review
+from app.models.session_neighbors import POPULAR, NEUTRAL_RATING, RATING_SCALE, pack_neighbors
+from app.services.facade import facade
+from app.services.reporting import ID, extract, extract_session_categories, lookup
+
+
+def _normalize_columns(matrix):
+    """Scale each column to unit length, so Aᵀ·A is a cosine similarity."""
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=0)).ravel())
+    inverse = np.divide(1.0, norms, out=np.zeros_like(norms), where=norms > 0)
+    return (matrix @ sparse.diags(inverse)).tocsc()
+
+
+def _interactions(sessions):
+    """(users x sessions interaction matrix, sorted user ids)."""
+    bookings = extract(Booking, {'user_id': ID, 'session_id': ID, 'status': 'U20'})
+    reviews = extract(Review, {'user_id': ID, 'session_id': ID, 'rating': 'f8'})
+    active = bookings['status'] != 'cancelled'
+    users = np.unique(np.concatenate([bookings['user_id'][active], reviews['user_id']]))
+
+    def matrix(user_ids, session_ids, values):
+        rows, _ = lookup(users, user_ids)
+        columns, known = lookup(sessions, session_ids)
+        return sparse.csr_matrix((values[known], (rows[known], columns[known])), shape=(len(users), len(sessions)))
+
+    booked = matrix(bookings['user_id'][active], bookings['session_id'][active], np.ones(int(active.sum())))
+    booked.data[:] = 1.0  # booking a session twice says no more than booking it once
+    rated = matrix(reviews['user_id'], reviews['session_id'], (reviews['rating'] - NEUTRAL_RATING) / RATING_SCALE)
+    weights = booked + rated.multiply(booked)  # a review only counts alongside a live booking
+    weights.eliminate_zeros()
+    return weights, users
+
+
+def _tags(sessions):
+    """sessions x (skills + categories) matrix, rows scaled to unit length."""
+    tags = extract_session_categories()
+    rows, known = lookup(sessions, tags['session_id'])
+    labels, codes = np.unique(np.concatenate([np.char.add('skill:', tags['skill_id'][known]),
+                                              np.char.add('category:', tags['category'][known])]),
+                              return_inverse=True)
+    matrix = sparse.csr_matrix((np.ones(len(codes)), (np.concatenate([rows[known], rows[known]]), codes)),
+                               shape=(len(sessions), len(labels)))
+    matrix.data[:] = 1.0
+    return _normalize_columns(matrix.T).T.tocsr()
+
+
+def _top_k(row, top_k, exclude):
+    """(column indices, scores) of a sparse row's largest positive entries other than `exclude`, best first."""
+    keep = (row.indices != exclude) & (row.data > 0)
+    indices, data = row.indices[keep], row.data[keep]
+    if len(data) > top_k:
+        best = np.argpartition(data, -top_k)[-top_k:]
+        indices, data = indices[best], data[best]
+    order = np.argsort(-data, kind='stable')
+    return indices[order], data[order]
+
+
+def _dirty_sessions(sessions, weights, users, since):
+    """Indexes of the sessions whose rows an incremental refresh recomputes."""
+    changed = [extract(model, {'user_id': ID, 'session_id': ID}, window=(column, since, None))
+               for model in (Booking, Review) for column in ('created_at', 'updated_at')]
+    user_rows, known = lookup(users, np.unique(np.concatenate([rows['user_id'] for rows in changed])))
+    touched = np.unique(weights[user_rows[known]].indices)
+    session_rows, known = lookup(sessions, np.concatenate([rows['session_id'] for rows in changed]))
+    stored = facade.neighbors_repo.stored_session_ids()
+    missing = np.flatnonzero([session_id not in stored for session_id in sessions.tolist()])
+    return np.unique(np.concatenate([touched, session_rows[known], missing]))
+
+
+def refresh_recommendations(full=False, top_k=None, content_weight=None, block_size=512, progress=None):
+    """Recompute and store session neighbor lists; returns {'sessions': rows written, 'full': bool}."""
+    config = current_app.config
+    top_k = top_k or config['RECOMMENDATION_TOP_K']
+    content_weight = config['RECOMMENDATION_CONTENT_WEIGHT'] if content_weight is None else content_weight
+    started = datetime.now()
+    since = None if full else facade.neighbors_repo.last_computed_at()
+
+    sessions = np.sort(extract(SkillSession, {'id': ID})['id'])
+    weights, users = _interactions(sessions)
+    targets = np.arange(len(sessions)) if since is None else _dirty_sessions(sessions, weights, users, since)
+
+    co_occurrence = _normalize_columns(weights)
+    tags = _tags(sessions)
+    rows = {}
+    for offset in range(0, len(targets), block_size):
+        block = targets[offset:offset + block_size]
+        similarity = ((1 - content_weight) * (co_occurrence[:, block].T @ co_occurrence)
+                      + content_weight * (tags[block] @ tags.T)).tocsr()
+        for position, session_index in enumerate(block):
+            indices, scores = _top_k(similarity[position], top_k, exclude=session_index)
+            rows[str(sessions[session_index])] = pack_neighbors(
+                (str(sessions[index]), float(score)) for index, score in zip(indices, scores))
+        if progress:
+            progress(offset + len(block), len(targets))
+
+    # Most booked sessions, by number of distinct users, for users without history
+    popularity = np.bincount(weights.indices, minlength=len(sessions))
+    popular = np.argsort(-popularity, kind='stable')[:top_k]
+    rows[POPULAR] = pack_neighbors((str(sessions[index]), float(popularity[index]))
+                                   for index in popular if popularity[index] > 0)
+
+    facade.neighbors_repo.save(rows, started)
+    return {'sessions': len(rows) - 1, 'full': since is None}
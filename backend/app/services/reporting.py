@@ -0,0 +1,275 @@
+""" Platform-wide admin reports, computed column-wise with NumPy
+
+Rows are pulled from the database `chunk_size` at a time, only for the
+columns a report needs, and appended to NumPy arrays. Strings are turned into
+integer codes (np.unique / np.searchsorted) so every group-by is a
+np.bincount over those codes instead of a Python loop over ORM objects.
+Finished reports are cached per time window (see ReportCache).
+"""
+
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+import numpy as np
+from flask import current_app
+from sqlalchemy import select
+from app import db
+from app.models.archive import ARCHIVES
+from app.models.user import User
+from app.models.skill import Skill
+from app.models.skill_session import SkillSession
+from app.models.booking import Booking
+from app.models.associations import session_skill
+from app.services.facade import facade
+
+CHUNK_SIZE = 10000
+ID = 'U36'  # UUID strings
+UNCATEGORIZED = 'Uncategorized'
+
+
+# --- Extraction ---
+def extract(model, columns, window=None, chunk_size=CHUNK_SIZE):
+    """Load `columns` ({name: numpy dtype}) of every `model` row into arrays.
+
+    `window` is (column name, start, end) with start inclusive, end exclusive
+    and either bound None for open-ended; it is applied in SQL.
+    """
+    names = list(columns)
+    if facade.store is not None:
+        chunks = [_memory_rows(facade.store.repository(model).get_all(), names, window)]
+    else:
+        # history moved to an archive table (app/models/archive.py) still counts
+        chunks = itertools.chain.from_iterable(
+            _sql_chunks(source, names, window, chunk_size) for source in (model, ARCHIVES.get(model)) if source)
+    return _to_arrays(chunks, columns)
+
+
+def _sql_chunks(model, names, window, chunk_size):
+    query = select(*(getattr(model, name) for name in names))
+    if window is not None:
+        name, start, end = window
+        if start is not None:
+            query = query.where(getattr(model, name) >= start)
+        if end is not None:
+            query = query.where(getattr(model, name) < end)
+    return db.session.execute(query.execution_options(yield_per=chunk_size)).partitions()
+
+
+def extract_session_categories(chunk_size=CHUNK_SIZE):
+    """(session id, skill id, skill category) rows, one per skill linked to a session."""
+    columns = {'session_id': ID, 'skill_id': ID, 'category': 'U50'}
+    if facade.store is not None:
+        chunks = [[(session.id, skill.id, skill.category)
+                   for session in facade.store.repository(SkillSession).get_all() for skill in session.skills_r]]
+    else:
+        query = (select(session_skill.c.session_id, session_skill.c.skill_id, Skill.category)
+                 .join(Skill, Skill.id == session_skill.c.skill_id))
+        chunks = db.session.execute(query.execution_options(yield_per=chunk_size)).partitions()
+    return _to_arrays(chunks, columns)
+
+
+def _memory_rows(objects, names, window):
+    rows = []
+    for obj in objects:
+        if window is not None:
+            value = getattr(obj, window[0])
+            if (window[1] is not None and value < window[1]) or (window[2] is not None and value >= window[2]):
+                continue
+        rows.append(tuple(getattr(obj, name) for name in names))
+    return rows
+
+
+def _to_arrays(chunks, columns):
+    parts = {name: [] for name in columns}
+    for chunk in chunks:
+        if not chunk:
+            continue
+        for (name, dtype), values in zip(columns.items(), zip(*chunk)):
+            parts[name].append(np.array(values, dtype=dtype))
+    return {name: np.concatenate(parts[name]) if parts[name] else np.empty(0, dtype=dtype)
+            for name, dtype in columns.items()}
+
+
+def lookup(sorted_keys, values):
+    """Positions of `values` in `sorted_keys`, and a mask of the values that are present."""
+    if not len(sorted_keys):
+        return np.zeros(len(values), dtype=np.int64), np.zeros(len(values), dtype=bool)
+    positions = np.minimum(np.searchsorted(sorted_keys, values), len(sorted_keys) - 1)
+    return positions, sorted_keys[positions] == values
+
+
+def _ratio(numerator, denominator):
+    return np.divide(numerator, denominator, out=np.zeros(len(numerator)), where=denominator > 0)
+
+
+# --- Reports ---
+def gmv_by_category(start=None, end=None):
+    """Gross booking value (non-cancelled total_price) by skill category, for bookings made in the window.
+
+    A session tagged with skills in several categories has its GMV split
+    evenly between them, so the categories add up to the total.
+    """
+    bookings = extract(Booking, {'session_id': ID, 'total_price': 'f8', 'status': 'U20'},
+                       window=('created_at', start, end))
+    active = bookings['status'] != 'cancelled'
+    booked_sessions, prices = bookings['session_id'][active], bookings['total_price'][active]
+    pairs = extract_session_categories()
+
+    sessions = np.unique(np.concatenate([booked_sessions, pairs['session_id']]))
+    booking_session, _ = lookup(sessions, booked_sessions)
+    session_gmv = np.bincount(booking_session, weights=prices, minlength=len(sessions))
+    session_bookings = np.bincount(booking_session, minlength=len(sessions))
+
+    pair_session, _ = lookup(sessions, pairs['session_id'])
+    categories, pair_category = np.unique(pairs['category'], return_inverse=True)
+    pairs_per_session = np.bincount(pair_session, minlength=len(sessions))
+    share = 1.0 / pairs_per_session[pair_session]
+    gmv = np.bincount(pair_category, weights=session_gmv[pair_session] * share, minlength=len(categories))
+    count = np.bincount(pair_category, weights=session_bookings[pair_session] * share, minlength=len(categories))
+
+    untagged = pairs_per_session == 0
+    rows = [{'category': str(category), 'gmv': round(float(value), 2), 'bookings': round(float(n), 2)}
+            for category, value, n in zip(categories, gmv, count)]
+    if untagged.any() and session_gmv[untagged].sum():
+        rows.append({'category': UNCATEGORIZED, 'gmv': round(float(session_gmv[untagged].sum()), 2),
+                     'bookings': float(session_bookings[untagged].sum())})
+    return {
+        'total_gmv': round(float(prices.sum()), 2),
+        'total_bookings': int(len(prices)),
+        'categories': sorted(rows, key=lambda row: row['gmv'], reverse=True)
+    }
+
+
+def utilization(start=None, end=None):
+    """Booked participants / capacity by session_type and difficulty_level.
+
+    An occurrence is a session on a day with at least one non-cancelled
+    booking (booking_date in the window); its capacity is max_participants.
+    """
+    bookings = extract(Booking, {'session_id': ID, 'participants': 'i8', 'status': 'U20',
+                                 'booking_date': 'datetime64[s]'}, window=('booking_date', start, end))
+    sessions = extract(SkillSession, {'id': ID, 'max_participants': 'i8', 'session_type': 'U20',
+                                      'difficulty_level': 'U20'})
+    order = np.argsort(sessions['id'])
+    sessions = {name: values[order] for name, values in sessions.items()}
+
+    session_index, known = lookup(sessions['id'], bookings['session_id'])
+    active = known & (bookings['status'] != 'cancelled')
+    session_index, participants = session_index[active], bookings['participants'][active]
+    day = bookings['booking_date'][active].astype('datetime64[D]').astype(np.int64)
+
+    first_day = day.min() if len(day) else 0
+    span = int(day.max() - first_day + 1) if len(day) else 1
+    occurrences, occurrence_of = np.unique(session_index * span + (day - first_day), return_inverse=True)
+    occurrence_session = occurrences // span
+    occurrence_participants = np.bincount(occurrence_of, weights=participants, minlength=len(occurrences))
+    occurrence_capacity = sessions['max_participants'][occurrence_session]
+
+    def group(*keys):
+        # one integer code per combination of the keys' values
+        group_code = np.zeros(len(occurrences), dtype=np.int64)
+        for key in keys:
+            uniques, codes = np.unique(sessions[key][occurrence_session], return_inverse=True)
+            group_code = group_code * max(len(uniques), 1) + codes
+        groups, group_of = np.unique(group_code, return_inverse=True)
+        booked = np.bincount(group_of, weights=occurrence_participants, minlength=len(groups))
+        capacity = np.bincount(group_of, weights=occurrence_capacity, minlength=len(groups))
+        held = np.bincount(group_of, minlength=len(groups))
+        first = np.zeros(len(groups), dtype=np.int64)
+        first[group_of[::-1]] = np.arange(len(group_of))[::-1]  # an occurrence of each group, for its labels
+        return [dict({key: str(sessions[key][occurrence_session[index]]) for key in keys},
+                     occurrences=int(n), participants=int(b), capacity=int(c), utilization=round(float(u), 4))
+                for index, n, b, c, u in zip(first, held, booked, capacity, _ratio(booked, capacity))]
+
+    booked, capacity = occurrence_participants.sum(), occurrence_capacity.sum()
+    return {
+        'occurrences': int(len(occurrences)),
+        'utilization': round(float(booked / capacity), 4) if capacity else 0.0,
+        'by_session_type': group('session_type'),
+        'by_difficulty_level': group('difficulty_level'),
+        'by_session_type_and_difficulty_level': group('session_type', 'difficulty_level'),
+    }
+
+
+def cohort_retention(start=None, end=None, months=6):
+    """Monthly signup cohorts (users created in the window) and the share of each
+    cohort with a non-cancelled booking made 0, 1, ... months-1 months after signup."""
+    users = extract(User, {'id': ID, 'created_at': 'datetime64[s]'}, window=('created_at', start, end))
+    bookings = extract(Booking, {'user_id': ID, 'status': 'U20', 'created_at': 'datetime64[s]'},
+                       window=('created_at', start, None))
+    order = np.argsort(users['id'])
+    user_ids = users['id'][order]
+    cohort_month = users['created_at'][order].astype('datetime64[M]').astype(np.int64)
+
+    user_index, known = lookup(user_ids, bookings['user_id'])
+    active = known & (bookings['status'] != 'cancelled')
+    user_index = user_index[active]
+    offset = bookings['created_at'][active].astype('datetime64[M]').astype(np.int64) - cohort_month[user_index]
+    in_range = (offset >= 0) & (offset < months)
+    # one (user, month offset) pair per user, however many bookings they made that month
+    user_months = np.unique(user_index[in_range] * months + offset[in_range])
+
+    cohorts, cohort_of = np.unique(cohort_month, return_inverse=True)
+    sizes = np.bincount(cohort_of, minlength=len(cohorts))
+    active_users = np.bincount(cohort_of[user_months // months] * months + user_months % months,
+                               minlength=len(cohorts) * months).reshape(len(cohorts), months)
+    return {
+        'months': months,
+        'cohorts': [{'cohort': str(np.datetime64(int(month), 'M')), 'users': int(size),
+                     'active': active_users[index].tolist(),
+                     'retention': [round(float(value), 4) for value in active_users[index] / size]}
+                    for index, (month, size) in enumerate(zip(cohorts, sizes))]
+    }
+
+
+REPORTS = {
+    'gmv-by-category': gmv_by_category,
+    'utilization': utilization,
+    'cohort-retention': cohort_retention,
+}
+
+
+# --- Caching ---
+class ReportCache:
+    """Finished reports keyed by (report, window, options), kept for `ttl` seconds.
+
+    At most `max_entries` are kept; the least recently used goes first.
+    """
+
+    def __init__(self, ttl, max_entries):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (expires at, report)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                self._entries.pop(key, None)
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key, report):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, report)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+def get_report(name, start=None, end=None, **options):
+    """Return the named report for the window, computing it on a cache miss."""
+    cache = current_app.extensions.get('report_cache')
+    if cache is None:
+        cache = current_app.extensions['report_cache'] = ReportCache(
+            current_app.config['REPORT_CACHE_TTL'], current_app.config['REPORT_CACHE_SIZE'])
+    key = (name, start, end, tuple(sorted(options.items())))
+    report = cache.get(key)
+    if report is None:
+        report = dict(REPORTS[name](start, end, **options), generated_at=datetime.now().isoformat())
+        cache.put(key, report)
+    return report
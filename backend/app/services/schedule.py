@@ -0,0 +1,102 @@
+"""Schedule conflict detection.
+
+A learner is busy during their non-cancelled bookings, [booking_date,
+booking_date + session duration); an instructor is busy during the scheduled
+occurrences of their sessions. ScheduleIndex keeps one IntervalTree per
+(kind, owner) so a new booking or occurrence is checked in O(log n) instead of
+re-reading the owner's whole schedule.
+
+Trees are cached per process and tagged with the owner's
+users.schedule_version. Every write that changes a schedule increments that
+counter first, in the same transaction: the UPDATE locks the owner's row, so
+concurrent writes to one schedule are serialised, and a tree is reused only
+while its tag says no other worker changed the schedule since it was built.
+"""
+
+import heapq
+import threading
+from collections import OrderedDict, namedtuple
+from app.utils.interval_tree import IntervalTree
+
+USER = 'user'
+INSTRUCTOR = 'instructor'
+
+Conflict = namedtuple('Conflict', ['kind', 'owner_id', 'first_id', 'second_id', 'overlap_start', 'overlap_end'])
+
+
+class ScheduleIndex:
+    """In-process, version-checked interval trees of users' busy time."""
+
+    def __init__(self, loaders, max_owners=10000):
+        # kind -> callable(owner_id) returning the owner's (start, end, item_id) intervals
+        self._loaders = loaders
+        self._max_owners = max_owners
+        self._trees = OrderedDict()  # (kind, owner_id) -> (version, IntervalTree), least recently used first
+        self._lock = threading.Lock()
+
+    def _tree(self, kind, owner_id, version):
+        """The owner's tree as of `version`, rebuilt if the cached one is older."""
+        key = (kind, owner_id)
+        with self._lock:
+            cached = self._trees.get(key)
+            if cached is not None and cached[0] == version:
+                self._trees.move_to_end(key)
+                return cached[1]
+        tree = IntervalTree(self._loaders[kind](owner_id))
+        with self._lock:
+            self._trees[key] = (version, tree)
+            self._trees.move_to_end(key)
+            while len(self._trees) > self._max_owners:
+                self._trees.popitem(last=False)
+        return tree
+
+    def conflicts(self, kind, owner_id, version, start, end, exclude=None):
+        """Ids of the owner's items overlapping [start, end), other than `exclude`.
+
+        `version` is the owner's schedule version before the pending change.
+        """
+        return [item_id for item_id in self._tree(kind, owner_id, version).overlapping(start, end)
+                if item_id != exclude]
+
+    def apply(self, kind, owner_id, version, added=(), removed=()):
+        """Record a committed change that moved the owner to schedule `version`.
+
+        `added` and `removed` are (start, end, item_id) intervals. A tree that is
+        not exactly one version behind is dropped and rebuilt on next use.
+        """
+        key = (kind, owner_id)
+        with self._lock:
+            cached = self._trees.get(key)
+            if cached is None:
+                return
+            if cached[0] != version - 1:
+                del self._trees[key]
+                return
+            tree = cached[1]
+            for interval in removed:
+                tree.remove(*interval)
+            for interval in added:
+                tree.insert(*interval)
+            self._trees[key] = (version, tree)
+
+    def clear(self):
+        with self._lock:
+            self._trees.clear()
+
+
+def find_conflicts(kind, intervals):
+    """Every overlapping pair in one sweep over (owner_id, start, end, item_id) rows.
+
+    Rows must be ordered by owner, then start. A heap of the intervals still
+    open at the current start time holds everything the next row can overlap,
+    so the pass is O(n log n + conflicts).
+    """
+    owner, active = None, []
+    for owner_id, start, end, item_id in intervals:
+        if owner_id != owner:
+            owner, active = owner_id, []
+        while active and active[0][0] <= start:
+            heapq.heappop(active)
+        for other_end, other_id in active:
+            yield Conflict(kind, owner_id, other_id, item_id, start, min(end, other_end))
+        heapq.heappush(active, (end, item_id))
@@ -0,0 +1,63 @@
+#!/usr/bin/python3
+""" Shared setup for the tests that run against a full app """
+
+import importlib
+import unittest
+from app import create_app, db
+from app.services import facade
+
+
+class AppTestCase(unittest.TestCase):
+    """A fresh app per test, its app context pushed and its tables dropped afterwards
+
+    Subclasses pick the backend with `config` and override config values with
+    `settings`; the create_* helpers build the users and sessions they need.
+    """
+
+    config = "config.TestingConfig"
+    settings = {}
+
+    def setUp(self):
+        self.app = self.create_app(self.settings)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def create_app(self, settings=None):
+        """An app on `config`, with `settings` overriding its values."""
+        config = self.config
+        if isinstance(config, str):
+            module, name = config.rsplit('.', 1)
+            config = getattr(importlib.import_module(module), name)
+        if settings:
+            # create_app reads its config from a class: derive one with the settings
+            config = type(config.__name__, (config,), settings)
+        return create_app(config)
+
+    # --- Fixtures ---
+    @staticmethod
+    def create_user(first_name, last_name='Learner', **fields):
+        """A user with password 'secret' and a <first_name>@example.com email."""
+        return facade.create_user({'first_name': first_name, 'last_name': last_name,
+                                   'email': f'{first_name.lower()}@example.com', 'password': 'secret', **fields})
+
+    def create_instructor(self):
+        return self.create_user('Ada', 'Lovelace', is_instructor=True)
+
+    def create_learner(self):
+        return self.create_user('Alan', 'Turing')
+
+    def create_admin(self):
+        return self.create_user('Grace', 'Hopper', is_admin=True)
+
+    @staticmethod
+    def create_session(instructor, **fields):
+        """A session of `instructor`, "Analytical Engines" unless `fields` say otherwise."""
+        return facade.create_skill_session({'title': 'Analytical Engines', 'description': 'Intro', 'price': 20.0,
+                                            'duration': 60, 'max_participants': 10,
+                                            'instructor_id': instructor.id, **fields})
@@ -0,0 +1,123 @@
+#!/usr/bin/python3
+""" Unittests for archiving old bookings and reviews """
+
+import unittest
+from datetime import datetime, timedelta
+from app import db
+from app.jobs.archive import archive_history
+from app.models.archive import ArchivedBooking, ArchivedReview
+from app.services import facade
+from app.tests.base import AppTestCase
+
+YEAR = 365 * 86400
+
+
+class TestArchive(AppTestCase):
+    """Test that history reads find hot rows with or without the archive
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.instructor = self.create_instructor()
+        self.learner = self.create_learner()
+        self.session = self.create_session(self.instructor)
+        # ids only: archived rows leave their ORM objects deleted
+        self.reviewed, self.cancelled, self.confirmed = [self.book(days).id for days in (1, 2, 3)]
+        facade.confirm_booking(self.reviewed)
+        facade.complete_booking(self.reviewed)
+        self.review = facade.create_review({'text': 'Great', 'rating': 4, 'session_id': self.session.id,
+                                            'user_id': self.learner.id, 'instructor_id': self.instructor.id,
+                                            'booking_id': self.reviewed}).id
+        facade.cancel_booking(self.cancelled)
+        facade.confirm_booking(self.confirmed)
+        self.later = datetime.now() + timedelta(days=400)  # when all three bookings are over a year old
+
+    def book(self, days):
+        return facade.create_booking({'user_id': self.learner.id, 'session_id': self.session.id,
+                                      'booking_date': datetime.now() + timedelta(days=days)})
+
+    def booking_ids(self, **kwargs):
+        return sorted(booking.id for booking in facade.get_bookings_by_user(self.learner.id, **kwargs))
+
+    def test_history_reads_keep_hot_rows(self):
+        """Nothing archived: asking for history returns the same rows"""
+        assert self.booking_ids() == self.booking_ids(include_archived=True) == sorted(
+            [self.reviewed, self.cancelled, self.confirmed])
+        assert [review.id for review in facade.get_reviews_by_session(self.session.id, include_archived=True)] == [
+            self.review]
+
+
+    def test_deleted_reviewer_leaves_ratings(self):
+        """Average ratings come from the session totals, which drop a deleted reviewer's reviews"""
+        assert self.client.get(f'/api/v1/skill-sessions/{self.session.id}').json['average_rating'] == 4.0
+        facade.delete_user(self.learner.id)
+        response = self.client.get(f'/api/v1/skill-sessions/{self.session.id}').json
+        assert response['average_rating'] is None
+        assert response['instructor']['average_rating'] is None
+
+
+class TestArchiveSQL(TestArchive):
+    """Moving rows to the archive tables
+    """
+
+    def test_archives_old_terminal_bookings(self):
+        """Only cancelled / completed bookings older than the cutoff move; reviewed ones stay without reviews"""
+        assert archive_history(YEAR, now=datetime.now() + timedelta(days=30))['bookings'] == 0
+        stats = archive_history(YEAR, now=self.later)
+        assert (stats['bookings'], stats['reviews']) == (1, 0)
+
+        assert self.booking_ids() == sorted([self.reviewed, self.confirmed])
+        assert self.cancelled in self.booking_ids(include_archived=True)
+        assert self.client.get(f'/api/v1/bookings/{self.cancelled}').status_code == 404
+        response = self.client.get(f'/api/v1/bookings/{self.cancelled}?history=true')
+        assert response.status_code == 200
+        assert response.json['status'] == 'cancelled' and response.json['is_cancellable'] is False
+        response = self.client.get(f'/api/v1/bookings/session/{self.session.id}?history=true')
+        assert len(response.json) == 3
+
+    def test_reviews_move_and_totals_hold(self):
+        """With reviews, a booking and its review move together; rebuilt totals still count them"""
+        rating = self.client.get(f'/api/v1/skill-sessions/{self.session.id}').json.get('average_rating')
+        stats_before = facade.get_instructor_daily_stats(self.instructor.id)
+
+        stats = archive_history(YEAR, now=self.later, batch_size=1, with_reviews=True)
+        assert (stats['bookings'], stats['reviews'], stats['batches']) == (2, 1, 2)
+        assert facade.get_reviews_by_session(self.session.id) == []
+        response = self.client.get(f'/api/v1/reviews/session/{self.session.id}?history=true')
+        assert [review['id'] for review in response.json] == [self.review]
+
+        facade.rebuild_session_rankings()
+        facade.rebuild_session_cards()
+        facade.stats_repo.rebuild()
+        db.session.expire_all()
+        session = facade.get_skill_session(self.session.id)
+        assert (session.rating_sum, session.rating_count) == (4, 1)
+        assert facade.get_session_cards([self.session.id])[0].get_average_rating() == 4.0
+        assert self.client.get(f'/api/v1/skill-sessions/{self.session.id}').json.get('average_rating') == rating
+        assert facade.get_instructor_daily_stats(self.instructor.id) == stats_before
+
+    def test_deleting_user_deletes_archive(self):
+        """Archived rows go with their user, like hot ones"""
+        archive_history(YEAR, now=self.later, with_reviews=True)
+        facade.delete_user(self.learner.id)
+        assert ArchivedBooking.query.count() == 0
+        assert ArchivedReview.query.count() == 0
+
+
+class TestArchiveInMemory(TestArchive):
+    """The memory backend keeps all history hot
+    """
+
+    config = "config.MemoryTestingConfig"
+
+    def test_archiving_is_refused(self):
+        """archive-history is a usage error rather than a silent no-op"""
+        with self.assertRaises(NotImplementedError):
+            archive_history(YEAR, now=self.later, with_reviews=True)
+        result = self.app.test_cli_runner().invoke(args=['archive-history'])
+        assert result.exit_code == 2 and 'memory backend' in result.output
+        assert len(self.booking_ids()) == 3
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,155 @@
+#!/usr/bin/python3
+""" Unittests for the ASGI serving mode, driving the app with raw ASGI messages """
+
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+from app import db
+from app.asgi import create_asgi_app
+from app.models.user import User
+from app.models.skill_session import SkillSession
+from app.services import facade
+from config import TestingConfig
+
+
+def call(app, method, path, body=None, query_string=b''):
+    """Send one HTTP request through the ASGI app, return (status, headers, json body)"""
+    async def run():
+        payload = json.dumps(body).encode() if body is not None else b''
+        messages = [{'type': 'http.request', 'body': payload, 'more_body': False}]
+        sent = []
+
+        async def receive():
+            return messages.pop(0) if messages else {'type': 'http.disconnect'}
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': method,
+                 'scheme': 'http', 'path': path, 'raw_path': path.encode(), 'query_string': query_string,
+                 'root_path': '', 'headers': [(b'host', b'testserver'), (b'content-type', b'application/json'),
+                                              (b'content-length', str(len(payload)).encode())],
+                 'server': ('testserver', 80), 'client': ('127.0.0.1', 1234)}
+        await app(scope, receive, send)
+        start = next(message for message in sent if message['type'] == 'http.response.start')
+        content = b''.join(message.get('body', b'') for message in sent if message['type'] == 'http.response.body')
+        return start['status'], dict(start['headers']), json.loads(content)
+
+    return asyncio.run(run())
+
+
+class TestAsgiApp(unittest.TestCase):
+    """Test native async routes and the fallback to the Flask app
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+        class FileConfig(TestingConfig):
+            # the async engine needs a database it can open from its own connection
+            SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(self.tmp.name, 'asgi.db')}"
+
+        self.app = create_asgi_app(FileConfig)
+        with self.app.flask_app.app_context():
+            instructor = User(first_name="Ada", last_name="Lovelace", email="ada@example.com",
+                              password="secret", is_instructor=True)
+            db.session.add(instructor)
+            db.session.commit()
+            session = SkillSession(title="Analytical Engines", description="Intro", price=20.0,
+                                   duration=60, instructor_id=instructor.id, max_participants=10)
+            db.session.add(session)
+            db.session.commit()
+            self.session_id = session.id
+            facade.rebuild_session_cards()  # rows were inserted directly, not through the projector
+
+    def tearDown(self):
+        asyncio.run(self.app.facade.close())
+        with self.app.flask_app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+        self.tmp.cleanup()
+
+    def test_session_routes_match_flask(self):
+        """Native async session reads return the same payload as the Flask handlers"""
+        client = self.app.flask_app.test_client()
+        for path in ['/api/v1/skill-sessions/', f'/api/v1/skill-sessions/{self.session_id}']:
+            status, _, body = call(self.app, 'GET', path)
+            expected = client.get(path)
+            assert status == expected.status_code == 200
+            assert body == expected.json
+
+    def test_login(self):
+        """Login is served natively; bad credentials are rejected"""
+        status, _, body = call(self.app, 'POST', '/api/v1/auth/login',
+                               {'email': 'ada@example.com', 'password': 'secret'})
+        assert status == 200
+        assert body['user']['email'] == 'ada@example.com'
+        assert body['access_token']
+
+        status, _, body = call(self.app, 'POST', '/api/v1/auth/login',
+                               {'email': 'ada@example.com', 'password': 'wrong'})
+        assert status == 401
+
+    def test_login_rate_limit_runs_off_the_event_loop(self):
+        """The rate limit check of the native login runs in the executor, not on the loop's thread"""
+        threads = []
+
+        def check(*args):
+            threads.append(threading.current_thread().name)
+            return 30.0
+        with mock.patch('app.asgi.check_rate_limits', check):
+            status, headers, _ = call(self.app, 'POST', '/api/v1/auth/login',
+                                      {'email': 'ada@example.com', 'password': 'secret'})
+        assert status == 429 and headers[b'retry-after'] == b'30'
+        assert threads and threads[0].startswith('cpu')
+
+    def test_active_goes_straight_to_flask(self):
+        """/active is not looked up as a session id first"""
+        with mock.patch.object(self.app.facade, 'get_skill_session') as get_skill_session:
+            status, _, body = call(self.app, 'GET', '/api/v1/skill-sessions/active')
+        assert status == 200 and len(body) == 1
+        get_skill_session.assert_not_called()
+
+    def test_memory_backend_serves_everything_through_flask(self):
+        """Native routes would read an empty SQL database under the memory backend"""
+        memory_app = create_asgi_app('config.MemoryTestingConfig')
+        try:
+            assert memory_app.routes == []
+        finally:
+            asyncio.run(memory_app.facade.close())
+
+    def test_replicas_serve_session_reads_through_flask(self):
+        """With read replicas, session reads are routed and pinned by Flask; login stays native"""
+        uri = self.app.flask_app.config['SQLALCHEMY_DATABASE_URI']
+
+        class ReplicaConfig(TestingConfig):
+            SQLALCHEMY_DATABASE_URI = uri
+            SQLALCHEMY_BINDS = {'replica_0': uri}
+
+        replica_app = create_asgi_app(ReplicaConfig)
+        try:
+            assert [handler.__name__ for _, _, handler in replica_app.routes] == ['login']
+            status, _, body = call(replica_app, 'GET', f'/api/v1/skill-sessions/{self.session_id}')
+            assert status == 200 and body['title'] == 'Analytical Engines'
+        finally:
+            asyncio.run(replica_app.facade.close())
+            with replica_app.flask_app.app_context():
+                db.session.remove()
+                db.engine.dispose()
+
+    def test_other_routes_fall_back_to_flask(self):
+        """Unknown ids and routes without a native handler are served by Flask"""
+        status, _, body = call(self.app, 'GET', '/api/v1/skills/')
+        assert status == 200
+        status, _, body = call(self.app, 'GET', '/api/v1/skill-sessions/missing')
+        assert status == 404
+        status, _, body = call(self.app, 'POST', '/api/v1/skills/', {'name': 'Python', 'category': 'Technology'})
+        assert status == 201
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+#!/usr/bin/python3
+""" Unittests for the batch endpoint """
+
+import unittest
+from unittest import mock
+from app import db
+from app.services import facade
+from app.tests.base import AppTestCase
+from app.utils import dataloader
+
+
+class TestBatch(AppTestCase):
+    """Test that a batch runs its sub-requests in one all-or-nothing transaction
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.user = self.create_learner()
+
+    def batch(self, *sub_requests, headers=None):
+        response = self.client.post('/api/v1/batch/', json={'requests': list(sub_requests)}, headers=headers)
+        assert response.status_code == 200
+        return response.json
+
+    def skill(self, name, **fields):
+        return {'method': 'POST', 'path': '/api/v1/skills/', 'body': dict({'name': name, 'category': 'Technology'}, **fields)}
+
+    def test_all_or_nothing(self):
+        """A failing sub-request rolls back the earlier ones and skips the rest with 424"""
+        result = self.batch(self.skill('Algebra'), self.skill('Geometry', level='hard'), self.skill('Calculus'))
+        assert result['committed'] is False
+        assert [response['status'] for response in result['responses']] == [201, 400, 424]
+        db.session.remove()
+        assert facade.get_all_skills() == []
+
+        result = self.batch(self.skill('Algebra'), self.skill('Geometry'))
+        assert result['committed'] is True
+        db.session.remove()
+        assert sorted(skill.name for skill in facade.get_all_skills()) == ['Algebra', 'Geometry']
+
+    def test_authorization_is_forwarded(self):
+        """Sub-requests run as the caller of the batch"""
+        me = {'method': 'GET', 'path': '/api/v1/auth/me'}
+        headers = {'Authorization': f"Bearer {self.user.generate_token()}"}
+        assert self.batch(me, headers=headers)['responses'][0]['body']['id'] == self.user.id
+        assert self.batch(me)['responses'][0]['status'] == 401
+
+    def test_sub_requests_do_not_share_g(self):
+        """Each sub-request gets its own DataLoaders, not ones cached by an earlier sub-request"""
+        reviews = {'method': 'GET', 'path': '/api/v1/reviews/'}
+        with mock.patch.object(dataloader, 'DataLoader', wraps=dataloader.DataLoader) as loader:
+            result = self.batch(reviews, reviews)
+        assert [response['status'] for response in result['responses']] == [200, 200]
+        assert loader.call_count == 4  # users and skill_sessions, once per sub-request
+
+    def test_errors_are_not_leaked(self):
+        """An exception in a sub-request answers a generic 500 and is logged"""
+        with mock.patch.object(facade, 'get_all_skills', side_effect=RuntimeError('password=hunter2')), \
+                self.assertLogs(self.app.logger, 'ERROR') as logs:
+            result = self.batch({'method': 'GET', 'path': '/api/v1/skills/'}, self.skill('Algebra'))
+        assert result['responses'] == [{'status': 500, 'body': {'error': 'Internal server error'}},
+                                       {'status': 424, 'body': {'error': 'Skipped: an earlier request failed'}}]
+        assert 'hunter2' in logs.output[0]
+
+
+if __name__ == '__main__':
+    unittest.main()
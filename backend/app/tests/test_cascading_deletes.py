@@ -0,0 +1,120 @@
+#!/usr/bin/python3
+""" Unittests for database-level cascading deletes and background purges """
+
+import unittest
+from datetime import datetime, timedelta
+from sqlalchemy import event
+from app import db
+from app.jobs.purge import run_purge_job, run_unfinished_purges
+from app.services import facade
+from app.tests.base import AppTestCase
+
+
+class TestCascadingDeletes(AppTestCase):
+    """Test that deleting a user or session removes its graph without loading it
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.instructor = self.create_instructor()
+        self.learners = [self.create_user(name) for name in ['Alan', 'Barbara']]
+        self.sessions = [self.create_session(self.instructor, title=title) for title in ['Engines', 'Notes']]
+        self.hours = 0
+        for session in self.sessions:
+            for learner in self.learners:
+                self.book(learner, session, review=True)
+            facade.create_session_occurrence({'session_id': session.id,
+                                              'starts_at': datetime.now() + timedelta(days=30, hours=self.hours)})
+            self.hours += 2
+        self.ids = {
+            'instructor': self.instructor.id,
+            'bookings': [booking.id for booking in facade.get_all_bookings()],
+            'reviews': [review.id for review in facade.get_all_reviews()],
+        }
+
+    def book(self, user, session, review=False):
+        self.hours += 2
+        booking = facade.create_booking({'user_id': user.id, 'session_id': session.id,
+                                         'booking_date': datetime.now() + timedelta(days=1, hours=self.hours)})
+        if review:
+            facade.confirm_booking(booking.id)
+            facade.complete_booking(booking.id)
+            facade.create_review({'text': 'Review', 'rating': 4, 'session_id': session.id, 'user_id': user.id,
+                                  'instructor_id': self.instructor.id, 'booking_id': booking.id})
+        return booking
+
+    def assert_graph_deleted(self):
+        assert facade.get_user(self.ids['instructor']) is None
+        assert facade.get_all_skill_sessions() == []
+        assert all(facade.get_booking(booking_id) is None for booking_id in self.ids['bookings'])
+        assert all(facade.get_review(review_id) is None for review_id in self.ids['reviews'])
+        assert facade.get_instructor_daily_stats(self.ids['instructor']) == []
+
+    def test_delete_user(self):
+        """Deleting an instructor removes their sessions, bookings and reviews; learners stay"""
+        db.session.expire_all()
+        facade.delete_user(self.instructor.id)
+
+        self.assert_graph_deleted()
+        assert facade.get_user(self.learners[0].id) is not None
+        assert self.learners[0].schedule_version > 0
+
+    def test_background_purge_in_batches(self):
+        """A scheduled purge hides the target at once and deletes it batch by batch"""
+        job = facade.schedule_purge('user', self.instructor.id)
+        assert job.status == 'pending'
+        assert facade.get_active_sessions() == []
+
+        reports = []
+        run_purge_job(job.id, batch_size=2, progress=lambda job: reports.append(job.deleted))
+        assert facade.get_purge_job(job.id).status == 'done'
+        assert reports == sorted(reports)
+        self.assert_graph_deleted()
+        assert run_unfinished_purges() == 0
+
+    def test_delete_endpoint_in_background(self):
+        """DELETE ?background=true answers 202 with a job admins can follow"""
+        client = self.app.test_client()
+        session_id = self.sessions[0].id
+        response = client.delete(f'/api/v1/skill-sessions/{session_id}?background=true')
+        assert response.status_code == 202
+
+        run_unfinished_purges()
+        assert facade.get_skill_session(session_id) is None
+        assert facade.get_skill_session(self.sessions[1].id) is not None
+        admin = self.create_admin()
+        headers = {'Authorization': f"Bearer {admin.generate_token()}"}
+        job = client.get(f"/api/v1/admin/purge-jobs/{response.json['job_id']}", headers=headers).json
+        assert job['status'] == 'done'
+        assert job['target_id'] == session_id
+
+
+class TestCascadingDeletesSQL(TestCascadingDeletes):
+    """The SQL backend leaves the children to ON DELETE CASCADE
+    """
+
+    def test_delete_user_does_not_load_children(self):
+        """The ORM issues no SELECT or DELETE of bookings and reviews for the cascade"""
+        statements = []
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)  # noqa: E731
+        db.session.expire_all()
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            facade.delete_user(self.instructor.id)
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+
+        assert not [statement for statement in statements
+                    if 'bookings.id' in statement or 'reviews.id' in statement or 'DELETE FROM bookings' in statement]
+        self.assert_graph_deleted()
+
+
+class TestCascadingDeletesInMemory(TestCascadingDeletes):
+    """Same behaviour on the in-memory backend
+    """
+
+    config = "config.MemoryTestingConfig"
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+#!/usr/bin/python3
+""" Unittests for the request-scoped DataLoader """
+
+import unittest
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from sqlalchemy import event
+from app import db
+from app.services import facade
+from app.tests.base import AppTestCase
+from app.utils.dataloader import DataLoader
+
+
+class TestDataLoader(unittest.TestCase):
+    """Test that DataLoader batches and memoizes lookups
+    """
+
+    def setUp(self):
+        self.calls = []
+
+        def batch_load(ids):
+            self.calls.append(sorted(ids))
+            return [SimpleNamespace(id=obj_id) for obj_id in ids if obj_id != 'missing']
+
+        self.loader = DataLoader(batch_load)
+
+    def test_primed_keys_resolve_in_one_batch(self):
+        """All primed ids are fetched by the first load"""
+        self.loader.prime_many(['a', 'b', 'a', 'c'])
+
+        assert self.loader.load('b').id == 'b'
+        assert self.loader.load('a').id == 'a'
+        assert self.loader.load('c').id == 'c'
+        assert self.calls == [['a', 'b', 'c']]
+
+    def test_results_are_memoized(self):
+        """Loading the same id twice does not call the batch function again"""
+        self.loader.load('a')
+        self.loader.load('a')
+        self.loader.prime('a')
+        self.loader.dispatch()
+
+        assert self.calls == [['a']]
+
+    def test_missing_keys_are_cached_as_none(self):
+        """Ids that do not exist resolve to None and are not retried"""
+        assert self.loader.load('missing') is None
+        assert self.loader.load('missing') is None
+        assert len(self.calls) == 1
+
+    def test_load_many_keeps_order(self):
+        """load_many returns one result per id, in order"""
+        results = self.loader.load_many(['c', 'missing', 'a'])
+
+        assert [obj.id if obj else None for obj in results] == ['c', None, 'a']
+        assert len(self.calls) == 1
+
+
+class TestBatchedHandlers(AppTestCase):
+    """Test that review list handlers run a constant number of queries
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.instructor_id = self.create_instructor().id
+        self.reviews = 0
+
+    def add_reviews(self, count):
+        """Reviews each by another learner of another session, so that nothing is loaded twice."""
+        for _ in range(count):
+            self.reviews += 1
+            learner = self.create_user(f'Learner{self.reviews}')
+            session = facade.create_skill_session({'title': f'Session {self.reviews}', 'description': 'Intro',
+                                                   'price': 10.0, 'duration': 60, 'max_participants': 5,
+                                                   'instructor_id': self.instructor_id})
+            booking = facade.create_booking({'user_id': learner.id, 'session_id': session.id,
+                                             'booking_date': datetime.now() + timedelta(days=1)})
+            facade.confirm_booking(booking.id)
+            facade.complete_booking(booking.id)
+            facade.create_review({'text': 'Review', 'rating': 4, 'session_id': session.id, 'user_id': learner.id,
+                                  'instructor_id': self.instructor_id, 'booking_id': booking.id})
+
+    def statements(self, path):
+        db.session.remove()  # a new request, with nothing loaded yet
+        statements = []
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)  # noqa: E731
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            with self.app.app_context():  # and a fresh flask.g, as the request's own would be
+                response = self.client.get(path)
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+        assert response.status_code == 200 and len(response.json) == self.reviews
+        return len(statements)
+
+    def test_statement_count_does_not_grow_with_rows(self):
+        """Reviewers, instructors and sessions are loaded in batches, not once per review"""
+        for path in ['/api/v1/reviews/', f'/api/v1/reviews/instructor/{self.instructor_id}']:
+            self.add_reviews(2)
+            few = self.statements(path)
+            self.add_reviews(6)
+            assert self.statements(path) == few, path
+
+
+if __name__ == '__main__':
+    unittest.main()
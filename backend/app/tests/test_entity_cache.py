@@ -0,0 +1,126 @@
+#!/usr/bin/python3
+""" Unittests for the cross-request entity cache """
+
+import unittest
+from sqlalchemy import event
+from app import db
+from app.persistence.entity_cache import EntityCache
+from app.persistence.transaction import unit_of_work
+from app.services import facade
+from app.tests.base import AppTestCase
+
+
+class TestEntityCache(AppTestCase):
+    """Test that reads by id see every local write
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.instructor = self.create_instructor()
+        self.user_id = self.instructor.id
+        self.session_id = self.create_session(self.instructor).id
+
+    def next_request(self):
+        """Start over with an empty session, as the next request would."""
+        db.session.remove()
+
+    def test_reads_see_updates(self):
+        """An update is visible to the next read, cached or not"""
+        self.next_request()
+        assert facade.get_user(self.user_id).bio is None
+        self.next_request()
+        facade.update_user(self.user_id, {'bio': 'Mathematician'})
+        self.next_request()
+        assert facade.get_user(self.user_id).bio == 'Mathematician'
+
+    def test_reads_see_deletes(self):
+        """Deleting a user removes them and their sessions"""
+        self.next_request()
+        assert facade.get_skill_session(self.session_id).instructor_id == self.user_id
+        self.next_request()
+        facade.delete_user(self.user_id)
+        self.next_request()
+        assert facade.get_user(self.user_id) is None
+        assert facade.get_skill_session(self.session_id) is None
+
+
+class TestEntityCacheSQL(TestEntityCache):
+    """Cache hits and invalidation with the SQLAlchemy backend
+    """
+
+    def selects(self, read):
+        statements = []
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)  # noqa: E731
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            result = read()
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+        return result, [statement for statement in statements if statement.lstrip().upper().startswith('SELECT')]
+
+    def test_repeated_reads_skip_the_select(self):
+        """The second request's read by id is served without a query, as a usable session object"""
+        self.next_request()
+        _, selects = self.selects(lambda: facade.get_user(self.user_id))
+        assert len(selects) == 1
+        self.next_request()
+        user, selects = self.selects(lambda: facade.get_user(self.user_id))
+        assert selects == []
+        assert user.email == 'ada@example.com' and user in db.session
+        assert [session.id for session in user.skill_sessions_r] == [self.session_id]
+        assert self.app.extensions['entity_cache'].stats()['hits'] == 1
+
+    def test_statement_updates_invalidate(self):
+        """UPDATE statements through the session invalidate the rows they name"""
+        self.next_request()
+        version = facade.get_user(self.user_id).schedule_version
+        self.next_request()
+        facade.user_repo.bump_schedule_versions([self.user_id])
+        self.next_request()
+        assert facade.get_user(self.user_id).schedule_version == version + 1
+
+    def test_uncommitted_writes_are_not_cached(self):
+        """Reads inside a transaction that wrote are not stored, so a rollback leaves nothing behind"""
+        self.next_request()
+        with self.assertRaises(RuntimeError):
+            with unit_of_work():
+                facade.user_repo.update(self.user_id, {'bio': 'Draft'})
+                db.session.expire_all()
+                assert facade.get_user(self.user_id).bio == 'Draft'
+                raise RuntimeError
+        self.next_request()
+        assert facade.get_user(self.user_id).bio is None
+
+    def test_fill_racing_an_invalidation_is_dropped(self):
+        """A snapshot read before a write commits is not stored"""
+        cache = EntityCache()
+        version = cache.clock
+        cache.invalidate('users', ['a'])
+        assert not cache.put('users', 'a', {'id': 'a'}, version)
+        assert cache.put('users', 'b', {'id': 'b'}, version)
+        assert cache.put('users', 'a', {'id': 'a'}, cache.clock)
+        cache.invalidate('users')
+        assert cache.get('users', 'a') is None and cache.get('users', 'b') is None
+
+    def test_least_recently_used_entries_are_evicted(self):
+        """Memory stays bounded by max_entries"""
+        cache = EntityCache(max_entries=2)
+        for key in 'abc':
+            cache.put('users', key, {'id': key}, cache.clock)
+            cache.get('users', 'a')
+        assert cache.get('users', 'a') is not None and cache.get('users', 'b') is None
+        assert cache.stats()['evictions'] == 1
+
+
+class TestEntityCacheInMemory(TestEntityCache):
+    """The memory backend has nothing to cache
+    """
+
+    config = "config.MemoryTestingConfig"
+
+    def test_no_cache(self):
+        assert self.app.extensions['entity_cache'] is None
+
+
+if __name__ == '__main__':
+    unittest.main()
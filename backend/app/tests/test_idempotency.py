@@ -0,0 +1,111 @@
+#!/usr/bin/python3
+""" Unittests for Idempotency-Key handling """
+
+import unittest
+from datetime import datetime, timedelta
+from app import db
+from app.models.booking import Booking
+from app.models.idempotency_key import IdempotencyKey
+from app.persistence.idempotency_repository import IdempotencyRepository
+from app.tests.base import AppTestCase
+
+
+class TestIdempotencyKeys(AppTestCase):
+    """Test that retried booking requests are answered from storage
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.headers = {'Authorization': f"Bearer {self.create_learner().generate_token()}"}
+        session = self.create_session(self.create_instructor(), max_participants=5)
+        self.booking_payload = {
+            'session_id': session.id,
+            'booking_date': (datetime.now() + timedelta(days=2)).isoformat(timespec='seconds'),
+            'participants': 2
+        }
+
+    def post_booking(self, key, payload=None):
+        headers = dict(self.headers, **{'Idempotency-Key': key})
+        return self.client.post('/api/v1/bookings/', json=payload or self.booking_payload, headers=headers)
+
+    def test_replay_returns_stored_response(self):
+        """A retry with the same key gets the original response and creates nothing"""
+        first = self.post_booking('retry-1')
+        second = self.post_booking('retry-1')
+
+        assert first.status_code == 201
+        assert second.status_code == 201
+        assert second.json['id'] == first.json['id']
+        assert second.headers.get('Idempotent-Replayed') == 'true'
+        assert Booking.query.count() == 1
+
+    def test_different_keys_create_different_bookings(self):
+        """Distinct keys are independent requests"""
+        self.post_booking('key-a')
+        later = (datetime.now() + timedelta(days=3)).isoformat(timespec='seconds')
+        self.post_booking('key-b', dict(self.booking_payload, booking_date=later))
+
+        assert Booking.query.count() == 2
+
+    def test_key_reuse_with_different_payload(self):
+        """Reusing a key for another payload is rejected"""
+        self.post_booking('key-c')
+        response = self.post_booking('key-c', dict(self.booking_payload, participants=1))
+
+        assert response.status_code == 422
+
+    def test_slow_original_is_not_run_twice(self):
+        """A retry of a request still in progress waits and gets 409; only an abandoned key is taken over"""
+        self.app.config['IDEMPOTENCY_LOCK_TIMEOUT'] = 0.1
+        self.post_booking('slow')
+        record = IdempotencyKey.query.one()
+        record.status, record.created_at = 'in_progress', datetime.now() - timedelta(seconds=15)
+        db.session.commit()
+
+        assert self.post_booking('slow').status_code == 409
+        assert Booking.query.count() == 1
+
+        record = IdempotencyKey.query.one()
+        record.created_at = datetime.now() - timedelta(hours=2)
+        db.session.commit()
+        retry = self.post_booking('slow')  # run again: the learner already holds that slot
+        assert retry.status_code == 400 and 'Idempotent-Replayed' not in retry.headers
+        assert IdempotencyKey.query.count() == 1
+
+    def test_overlapping_takeovers(self):
+        """Of two requests taking over the same abandoned key, one wins; the superseded owner cannot touch it"""
+        repo = IdempotencyRepository()
+        now = datetime.now()
+        abandoned, owned = repo.claim('stale', 'a', now + timedelta(hours=1))
+        assert owned
+        first_token = abandoned.claim_token
+        seen = repo.refresh('stale')
+        db.session.expunge(seen)  # both requests read the row before either takes it over
+
+        first, first_owned = repo.take_over(seen, 'b', now, now + timedelta(hours=1))
+        second, second_owned = repo.take_over(seen, 'b', now, now + timedelta(hours=1))
+        assert (first_owned, second_owned) == (True, False)
+        assert second.claim_token == first.claim_token != first_token
+
+        assert not repo.complete('stale', first_token, 201, '{}')
+        repo.release('stale', first_token)
+        assert repo.refresh('stale').status == 'in_progress'
+        assert repo.complete('stale', first.claim_token, 201, '{"id": 1}')
+        assert repo.refresh('stale').response_body == '{"id": 1}'
+
+    def test_purge_expired(self):
+        """Expired keys are deleted in batches, live ones are kept"""
+        self.post_booking('live')
+        repo = IdempotencyRepository()
+        now = datetime.now()
+        for i in range(5):
+            db.session.add(IdempotencyKey(f"expired-{i}", "x", now - timedelta(seconds=1)))
+        db.session.commit()
+
+        assert repo.purge_expired(now, batch_size=3) == 3
+        assert repo.purge_expired(now, batch_size=3) == 2
+        assert IdempotencyKey.query.count() == 1
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+#!/usr/bin/python3
+""" Unittests for the scheduled batch jobs """
+
+import unittest
+from datetime import datetime, timedelta
+from sqlalchemy import update
+from app import db
+from app.models.booking import Booking
+from app.jobs.complete_bookings import complete_past_bookings
+from app.tests.base import AppTestCase
+
+
+class TestCompletePastBookings(AppTestCase):
+    """Test the bulk auto-completion of past bookings
+    """
+
+    def setUp(self):
+        super().setUp()
+        learner = self.create_learner()
+        session = self.create_session(self.create_instructor())
+
+        self.now = datetime.now()
+        self.bookings = {}
+        # started 3h ago (over), started 30min ago (still running), cancelled 3h ago, in the future
+        for name, offset, status in [('over', -180, 'confirmed'), ('running', -30, 'confirmed'),
+                                     ('cancelled', -180, 'cancelled'), ('future', 120, 'confirmed')]:
+            booking = Booking(learner.id, session.id, self.now + timedelta(days=1))
+            booking.total_price = 20.0
+            booking.status = status
+            db.session.add(booking)
+            db.session.commit()
+            # booking_date is validated to be in the future, so backdate it with a raw UPDATE
+            db.session.execute(update(Booking).where(Booking.id == booking.id)
+                               .values(booking_date=self.now + timedelta(minutes=offset)))
+            db.session.commit()
+            self.bookings[name] = booking.id
+
+    def status_of(self, name):
+        db.session.expire_all()
+        return db.session.get(Booking, self.bookings[name]).status
+
+    def test_completes_only_finished_confirmed_bookings(self):
+        """Only confirmed bookings whose session has ended are completed"""
+        stats = complete_past_bookings(now=self.now, batch_size=1)
+
+        assert stats['completed'] == 1
+        assert stats['scanned'] == 2
+        assert self.status_of('over') == 'completed'
+        assert self.status_of('running') == 'confirmed'
+        assert self.status_of('cancelled') == 'cancelled'
+        assert self.status_of('future') == 'confirmed'
+
+    def test_dry_run_does_not_write(self):
+        """Dry runs report the count but leave bookings untouched"""
+        stats = complete_past_bookings(now=self.now, dry_run=True)
+
+        assert stats['completed'] == 1
+        assert self.status_of('over') == 'confirmed'
+
+    def test_resume_from_cursor(self):
+        """A cursor past every candidate scans nothing"""
+        first = complete_past_bookings(now=self.now, dry_run=True)
+        resumed = complete_past_bookings(now=self.now, dry_run=True, cursor=first['cursor'])
+
+        assert resumed['scanned'] == 0
+
+
+if __name__ == '__main__':
+    unittest.main()
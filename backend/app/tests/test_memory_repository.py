@@ -0,0 +1,115 @@
+#!/usr/bin/python3
+""" Unittests for the in-memory repository backend """
+
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from datetime import datetime, timedelta
+from app.services import facade
+from app.models.outbox_event import OutboxEvent
+from app.models.session_occurrence import SessionOccurrence
+from app.models.waitlist_entry import WaitlistEntry
+from app.persistence.memory_repository import InMemoryStore
+from app.tests.base import AppTestCase
+
+
+class TestInMemoryBackend(AppTestCase):
+    """Test that the facade runs on dict-backed repositories
+    """
+
+    config = "config.MemoryTestingConfig"
+
+    def setUp(self):
+        super().setUp()
+        self.instructor = self.create_instructor()
+        self.learner = self.create_learner()
+        self.session = self.create_session(self.instructor, max_participants=3)
+        self.booking = facade.create_booking({'user_id': self.learner.id, 'session_id': self.session.id,
+                                              'booking_date': datetime.now() + timedelta(days=1),
+                                              'participants': 2})
+
+    def tearDown(self):
+        facade.use_store(None)
+        super().tearDown()
+
+    def test_facade_uses_memory_store(self):
+        """Creates go to dicts, ids and defaults are filled in, relationships are wired"""
+        assert facade.store is not None
+        assert facade.get_user_by_email('alan@example.com') is self.learner
+        assert self.session.id is not None and self.session.created_at is not None
+        assert self.booking.total_price == 40.0
+        assert self.booking in self.session.bookings_r
+        assert self.session in self.instructor.skill_sessions_r
+
+    def test_status_index_follows_direct_updates(self):
+        """Model methods that assign indexed attributes keep the indexes current"""
+        facade.confirm_booking(self.booking.id)
+
+        assert facade.get_bookings_by_status('pending') == []
+        assert facade.get_bookings_by_status('confirmed') == [self.booking]
+        assert self.session.get_available_spots() == 2
+
+    def test_delete_cascades(self):
+        """Deleting a user deletes their sessions and the bookings on them"""
+        facade.delete_user(self.instructor.id)
+
+        assert facade.get_skill_session(self.session.id) is None
+        assert facade.get_booking(self.booking.id) is None
+        assert facade.get_bookings_by_user(self.learner.id) == []
+
+    def test_concurrent_writes(self):
+        """Threads sharing the store hand out no ticket or event id twice and do not reserve past capacity"""
+        occurrence = facade.create_session_occurrence({'session_id': self.session.id,
+                                                       'starts_at': datetime.now() + timedelta(days=2)})
+        occurrences = facade.store.repository(SessionOccurrence)
+        waitlist = facade.store.repository(WaitlistEntry)
+        reserved = []
+
+        def work():
+            for _ in range(50):
+                waitlist.enqueue(WaitlistEntry(self.learner.id, self.session.id, occurrence.starts_at,
+                                               occurrence_id=occurrence.id))
+                if occurrences.reserve(occurrence.id, 1):
+                    reserved.append(1)
+                facade.get_bookings_by_status('pending')
+                facade.outbox_repo.append(OutboxEvent('user', self.learner.id, 'updated'))
+
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)  # switch threads as often as possible to surface races
+        try:
+            threads = [threading.Thread(target=work) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            sys.setswitchinterval(interval)
+
+        tickets = sorted(entry.ticket for entry in waitlist.get_head(occurrence.id, limit=1000))
+        assert tickets == list(range(1, 401))
+        assert len(reserved) == occurrence.booked == 3
+        events = facade.outbox_repo.read_after(0, 1000)
+        assert [event.id for event in events] == list(range(1, len(events) + 1))
+
+    def test_snapshot_roundtrip(self):
+        """A restored store has the same rows, indexes and relationships"""
+        skill = facade.create_skill({'name': 'Python', 'category': 'Technology'})
+        facade.add_skill_to_session(self.session.id, skill.id)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'snapshot.json')
+            facade.store.snapshot(path)
+            facade.use_store(InMemoryStore.from_snapshot(path))
+
+        booking = facade.get_booking(self.booking.id)
+        assert booking is not self.booking
+        assert booking.booking_date == self.booking.booking_date
+        assert facade.get_user_by_email('ada@example.com').id == self.instructor.id
+        assert booking.session_r.instructor_r.email == 'ada@example.com'
+        assert [s.id for s in facade.get_sessions_by_skill(skill.id)] == [self.session.id]
+
+
+if __name__ == '__main__':
+    unittest.main()
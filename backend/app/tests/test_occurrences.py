@@ -0,0 +1,86 @@
+#!/usr/bin/python3
+""" Unittests for session occurrences and the availability search """
+
+import unittest
+from datetime import datetime, timedelta
+from app.services import facade
+from app.tests.base import AppTestCase
+
+
+class TestSessionOccurrences(AppTestCase):
+    """Test per-occurrence capacity and range searches
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.instructor = self.create_instructor()
+        self.learner = self.create_learner()
+        self.other = self.create_user('Edsger', 'Dijkstra')
+        self.session = self.create_session(self.instructor, max_participants=3)
+        self.day = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=2)
+        self.morning, self.late, self.later = [
+            facade.create_session_occurrence({'session_id': self.session.id, 'starts_at': starts_at})
+            for starts_at in [self.day + timedelta(hours=10), self.day - timedelta(minutes=30),
+                              self.day + timedelta(days=10)]
+        ]
+
+    def book(self, occurrence, participants, user=None):
+        return facade.create_booking({'user_id': (user or self.learner).id, 'session_id': self.session.id,
+                                      'occurrence_id': occurrence.id, 'participants': participants})
+
+    def search(self, **kwargs):
+        return [occurrence.id for occurrence in
+                facade.search_availability(self.day, self.day + timedelta(days=1), **kwargs)]
+
+    def test_range_search_includes_overlaps(self):
+        """An occurrence that started before the range but ends inside it is found; later ones are not"""
+        assert self.search() == [self.late.id, self.morning.id]
+        assert self.search(session_type='in-person') == []
+
+    def test_capacity_is_per_occurrence(self):
+        """Spots are taken and given back per occurrence"""
+        booking = self.book(self.morning, 2)
+        assert booking.booking_date == self.morning.starts_at
+
+        with self.assertRaises(ValueError):
+            self.book(self.morning, 2, user=self.other)
+        self.book(self.late, 3)  # another occurrence has its own spots
+        assert self.search(min_spots=2) == []
+
+        facade.cancel_booking(booking.id)
+        assert facade.get_session_occurrence(self.morning.id).get_available_spots() == 3
+        assert self.search(min_spots=2) == [self.morning.id]
+
+    def test_availability_endpoint(self):
+        """GET /occurrences/ returns the calendar with session details"""
+        query = f"?from={self.day.isoformat()}&to={(self.day + timedelta(days=1)).isoformat()}&min_spots=1"
+        response = self.app.test_client().get(f'/api/v1/occurrences/{query}')
+
+        assert response.status_code == 200
+        assert [occurrence['id'] for occurrence in response.json] == [self.late.id, self.morning.id]
+        assert response.json[0]['session']['title'] == 'Analytical Engines'
+        assert self.app.test_client().get('/api/v1/occurrences/?from=2026-01-01').status_code == 400
+
+    def test_availability_filters(self):
+        """Each session filter narrows the search; bad limits are rejected"""
+        client = self.app.test_client()
+        query = f"?from={self.day.isoformat()}&to={(self.day + timedelta(days=1)).isoformat()}"
+        matching = {'session_id': self.session.id, 'instructor_id': self.instructor.id,
+                    'session_type': self.session.session_type, 'difficulty_level': self.session.difficulty_level}
+        for name, value in matching.items():
+            response = client.get(f'/api/v1/occurrences/{query}&{name}={value}')
+            assert response.status_code == 200 and len(response.json) == 2, name
+            assert client.get(f'/api/v1/occurrences/{query}&{name}={self.learner.id}').json == [], name
+        for bad in ['limit=0', 'limit=-1', 'min_spots=0']:
+            assert client.get(f'/api/v1/occurrences/{query}&{bad}').status_code == 400, bad
+
+
+class TestSessionOccurrencesInMemory(TestSessionOccurrences):
+    """Same behaviour on the in-memory backend
+    """
+
+    config = "config.MemoryTestingConfig"
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,157 @@
+#!/usr/bin/python3
+""" Unittests for the transactional outbox and its relay """
+
+import json
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from app import db
+from app.models.outbox_event import OutboxEvent
+from app.services import facade
+from app.services.outbox import EventBus, NDJSONSink, OutboxRelay, prune_outbox
+from app.tests.base import AppTestCase
+
+
+class TestOutbox(AppTestCase):
+    """Test that facade writes emit change events and the relay delivers them
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+        self.instructor = self.create_instructor()
+        self.learner = self.create_learner()
+        self.session = self.create_session(self.instructor)
+        self.received = []
+        self.bus = EventBus()
+        self.bus.subscribe(self.received.append)
+
+    def book(self, hours=24):
+        return facade.create_booking({'user_id': self.learner.id, 'session_id': self.session.id,
+                                      'booking_date': datetime.now() + timedelta(hours=hours)})
+
+    def test_writes_emit_events_in_order(self):
+        """Each facade write adds one compact event; secrets never reach the outbox"""
+        relay = OutboxRelay()
+        relay.add_sink('bus', self.bus)
+        booking = self.book()
+        facade.cancel_booking(booking.id)
+        facade.update_user(self.learner.id, {'password': 'changed', 'bio': 'Codebreaker'})
+        relay.run_once()
+
+        assert [(message['aggregate'], message['kind']) for message in self.received] == [
+            ('user', 'created'), ('user', 'created'), ('skill_session', 'created'),
+            ('booking', 'created'), ('booking', 'cancelled'), ('user', 'updated')]
+        assert [message['id'] for message in self.received] == sorted(message['id'] for message in self.received)
+        assert self.received[3]['data']['session_id'] == self.session.id
+        assert self.received[-1]['data'] == {'bio': 'Codebreaker', 'private_changed': ['password']}
+
+    def test_failed_write_emits_nothing(self):
+        """A write that raises leaves no event behind"""
+        self.book()
+        before = facade.outbox_repo.last_id()
+        with self.assertRaises(ValueError):
+            self.book()  # overlaps the first booking
+        assert facade.outbox_repo.last_id() == before
+
+    def test_checkpoints_and_redelivery(self):
+        """A sink's checkpoint only moves after publish succeeds; a new relay resumes from it"""
+        path = os.path.join(self.tmp.name, 'events.ndjson')
+        failures = []
+
+        class FlakySink(NDJSONSink):
+            def publish(self, messages):
+                if not failures:
+                    failures.append(len(messages))
+                    raise OSError("disk full")
+                super().publish(messages)
+
+        relay = OutboxRelay(batch_size=2)
+        relay.add_sink('file', FlakySink(path))
+        with self.assertRaises(OSError):
+            relay.run_once()
+        assert facade.outbox_repo.get_checkpoint('file') == 0
+        assert relay.run_once() == {'file': 2}
+
+        relay = OutboxRelay(batch_size=10)
+        relay.add_sink('file', NDJSONSink(path))
+        assert relay.run_once() == {'file': 1}
+        with open(path, encoding='utf-8') as stream:
+            lines = [json.loads(line) for line in stream]
+        assert [line['id'] for line in lines] == [1, 2, 3]
+        assert facade.outbox_repo.get_checkpoint('file') == 3
+
+    def test_bus_starts_at_newest_event(self):
+        """A non-durable sink only sees events written after it was added"""
+        relay = OutboxRelay()
+        relay.add_sink('bus', self.bus, durable=False)
+        booking = self.book()
+        relay.run_once()
+        assert [message['aggregate_id'] for message in self.received] == [booking.id]
+
+    def test_prune_keeps_unrelayed_events(self):
+        """Only events every checkpointed sink has received are pruned"""
+        assert prune_outbox(0) == 0
+        relay = OutboxRelay(batch_size=2)
+        relay.add_sink('bus', self.bus)
+        relay.run_once()
+        assert prune_outbox(0, now=datetime.now() + timedelta(seconds=1)) == 2
+        assert [event.id for event in facade.outbox_repo.read_after(0, 10)] == [3]
+
+
+class TestOutboxSQL(TestOutbox):
+    """Id gaps on the SQL backend
+    """
+
+    def insert_event(self, event_id):
+        """An event whose transaction started an hour ago and commits now."""
+        event = OutboxEvent('user', self.learner.id, 'updated')
+        event.id, event.created_at = event_id, datetime.now() - timedelta(hours=1)
+        db.session.add(event)
+        db.session.commit()
+
+    def test_late_commit_is_delivered(self):
+        """A gap holds later events back for settle_seconds, then its event is still published when it commits"""
+        relay = OutboxRelay(settle_seconds=5, gap_timeout=60)
+        relay.add_sink('bus', self.bus)
+        now, last = datetime.now(), facade.outbox_repo.last_id()
+        self.insert_event(last + 2)  # last + 1 is still in flight
+
+        relay.run_once(now)
+        assert [message['id'] for message in self.received] == list(range(1, last + 1))
+        relay.run_once(now + timedelta(seconds=6))
+        assert self.received[-1]['id'] == last + 2
+        assert facade.outbox_repo.get_gaps('bus') == {last + 1: now}
+
+        self.insert_event(last + 1)
+        relay.run_once(now + timedelta(seconds=7))
+        relay.run_once(now + timedelta(seconds=8))
+        assert [message['id'] for message in self.received[-2:]] == [last + 2, last + 1]
+        assert facade.outbox_repo.get_gaps('bus') == {}
+
+    def test_gap_is_dropped_after_gap_timeout(self):
+        """Only an id missing for gap_timeout counts as rolled back"""
+        relay = OutboxRelay(settle_seconds=5, gap_timeout=60)
+        relay.add_sink('bus', self.bus)
+        now, last = datetime.now(), facade.outbox_repo.last_id()
+        self.insert_event(last + 2)
+        relay.run_once(now)
+        relay.run_once(now + timedelta(seconds=59))
+        assert facade.outbox_repo.get_gaps('bus') == {last + 1: now}
+        with self.assertLogs('app.services.outbox', 'WARNING'):
+            relay.run_once(now + timedelta(seconds=60))
+        assert facade.outbox_repo.get_gaps('bus') == {}
+
+
+class TestOutboxInMemory(TestOutbox):
+    """Same behaviour on the in-memory backend
+    """
+
+    config = "config.MemoryTestingConfig"
+
+
+if __name__ == '__main__':
+    unittest.main()
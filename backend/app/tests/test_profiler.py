@@ -0,0 +1,82 @@
+#!/usr/bin/python3
+""" Unittests for the sampling profiler """
+
+import time
+import unittest
+from app.tests.base import AppTestCase
+from app.utils.profiler import Profiler
+
+
+def spin(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+class TestProfiler(AppTestCase):
+    """Test sampling and the admin profile endpoints
+    """
+
+    settings = {'PROFILING_ENABLED': True, 'PROFILE_SAMPLE_RATE': 0.0,
+                'PROFILE_ROUTES': ['/api/v1/skills/'], 'PROFILE_TOKEN': 'letmein'}
+
+    def setUp(self):
+        super().setUp()
+        self.admin = self.create_admin()
+        self.headers = {'Authorization': f"Bearer {self.admin.generate_token()}"}
+
+    def test_samples_are_counted_per_route(self):
+        """A profiled thread's stacks are collapsed, outermost frame first, under its route"""
+        profiler = Profiler(interval=0.001)
+        profiler.start('GET /spin')
+        spin(0.05)
+        profiler.stop()
+        samples = profiler.summary()['GET /spin']['samples']
+        assert profiler.summary()['GET /spin']['requests'] == 1 and samples > 0
+
+        stacks = profiler.collapsed('GET /spin').splitlines()
+        assert all(';spin (test_profiler.py:' in line for line in stacks if 'spin' in line)
+        assert sum(int(line.rsplit(' ', 1)[1]) for line in stacks) == samples
+        assert profiler.flamegraph('GET /spin')['value'] == samples
+        assert profiler.collapsed().startswith('GET /spin;')
+
+    def test_only_selected_requests_are_profiled(self):
+        """Listed routes and requests with the token are profiled; others are not"""
+        self.client.get('/api/v1/skills/')
+        self.client.get('/api/v1/skill-sessions/')
+        self.client.get('/api/v1/skill-sessions/', headers={'X-Profile': 'wrong'})
+        self.client.get('/api/v1/users/', headers={'X-Profile': 'letmein'})
+
+        routes = self.client.get('/api/v1/admin/profiles', headers=self.headers).json['routes']
+        assert set(routes) == {'GET /api/v1/skills/', 'GET /api/v1/users/'}
+        response = self.client.get('/api/v1/admin/profiles/stacks?format=collapsed', headers=self.headers)
+        assert response.status_code == 200 and response.mimetype == 'text/plain'
+        assert self.client.get('/api/v1/admin/profiles/stacks?format=svg', headers=self.headers).status_code == 400
+
+        self.client.delete('/api/v1/admin/profiles', headers=self.headers)
+        assert self.client.get('/api/v1/admin/profiles', headers=self.headers).json['routes'] == {}
+
+    def test_admin_only(self):
+        """Profiles are for admins"""
+        learner = self.create_learner()
+        headers = {'Authorization': f"Bearer {learner.generate_token()}"}
+        assert self.client.get('/api/v1/admin/profiles', headers=headers).status_code == 403
+
+    def test_disabled_registers_nothing(self):
+        """Without PROFILING_ENABLED no request hook is registered"""
+        app = self.create_app({'PROFILING_ENABLED': False})
+        assert app.extensions['profiler'] is None
+        assert not any('profile' in hook.__name__ for hooks in app.before_request_funcs.values() for hook in hooks)
+        assert not any('profile' in hook.__name__ for hooks in app.teardown_request_funcs.values()
+                       for hook in hooks)
+
+
+class TestProfilerInMemory(TestProfiler):
+    """The profiler does not depend on the repository backend
+    """
+
+    config = "config.MemoryTestingConfig"
+
+
+if __name__ == '__main__':
+    unittest.main()
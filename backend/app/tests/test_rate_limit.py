@@ -0,0 +1,114 @@
+#!/usr/bin/python3
+""" Unittests for token-bucket rate limiting of login and registration """
+
+import os
+import tempfile
+import unittest
+from app.tests.base import AppTestCase
+from app.utils.rate_limit import MemoryBucketStore, SQLiteBucketStore, client_ip
+
+
+class TestMemoryBucketStore(unittest.TestCase):
+    """Test the token-bucket arithmetic
+    """
+
+    def setUp(self):
+        self.store = self.make_store()
+
+    def make_store(self):
+        return MemoryBucketStore()
+
+    def test_burst_then_refill(self):
+        """A bucket allows `capacity` requests at once, then one per refill interval"""
+        bucket = [('ip:1', 3, 1 / 10)]  # 3 tokens, one more every 10 seconds
+        assert [self.store.acquire(bucket, now=100.0) for _ in range(3)] == [0.0, 0.0, 0.0]
+        assert self.store.acquire(bucket, now=100.0) == 10.0
+        assert abs(self.store.acquire(bucket, now=104.0) - 6.0) < 1e-9
+        assert self.store.acquire(bucket, now=110.0) == 0.0
+
+    def test_all_or_nothing(self):
+        """A request refused by one bucket takes no token from the others"""
+        ip, account = ('ip:1', 10, 1.0), ('account:a', 1, 0.01)
+        assert self.store.acquire([ip, account], now=0.0) == 0.0
+        assert self.store.acquire([ip, account], now=0.0) > 0
+        assert [self.store.acquire([ip], now=0.0) for _ in range(9)] == [0.0] * 9
+        assert self.store.acquire([ip], now=0.0) > 0
+
+    def test_client_ip(self):
+        """X-Forwarded-For is only trusted for the configured number of proxies"""
+        assert client_ip('10.0.0.1', '1.2.3.4, 5.6.7.8') == '10.0.0.1'
+        assert client_ip('10.0.0.1', '1.2.3.4, 5.6.7.8', proxy_hops=1) == '5.6.7.8'
+        assert client_ip('10.0.0.1', '1.2.3.4, 5.6.7.8', proxy_hops=2) == '1.2.3.4'
+
+
+class TestSQLiteBucketStore(TestMemoryBucketStore):
+    """Same arithmetic on the store shared by worker processes
+    """
+
+    def make_store(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        return SQLiteBucketStore(os.path.join(self.tmp.name, 'limits.db'))
+
+    def test_shared_between_workers(self):
+        """Two stores on the same file see each other's tokens"""
+        other = SQLiteBucketStore(self.store.path)
+        bucket = [('route:/login', 2, 1.0)]
+        assert self.store.acquire(bucket, now=0.0) == 0.0
+        assert other.acquire(bucket, now=0.0) == 0.0
+        assert self.store.acquire(bucket, now=0.0) == 1.0
+
+
+class TestLoginThrottling(AppTestCase):
+    """Test 429 responses with Retry-After on the auth endpoints
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.create_user('Ada', 'Lovelace')
+
+    def login(self, email, password='wrong', path='/api/v1/auth/login'):
+        return self.client.post(path, json={'email': email, 'password': password})
+
+    def test_account_is_throttled_across_login_routes(self):
+        """Both login routes share the per-account bucket; other accounts are unaffected"""
+        for path in ['/api/v1/auth/login', '/api/v1/users/login'] * 2 + ['/api/v1/auth/login']:
+            assert self.login('Ada@example.com ', path=path).status_code == 401
+
+        response = self.login('ada@example.com', password='secret', path='/api/v1/users/login')
+        assert response.status_code == 429
+        assert int(response.headers['Retry-After']) > 0
+        assert self.login('alan@example.com').status_code == 401
+
+    def test_ip_is_throttled(self):
+        """One client cannot spray many accounts"""
+        for index in range(10):
+            assert self.login(f'user{index}@example.com').status_code == 401
+        assert self.login('ada@example.com', password='secret').status_code == 429
+
+        other = {'REMOTE_ADDR': '10.0.0.2'}
+        response = self.client.post('/api/v1/auth/login', environ_base=other,
+                                    json={'email': 'ada@example.com', 'password': 'secret'})
+        assert response.status_code == 200
+
+
+class TestLoginThrottlingInMemory(TestLoginThrottling):
+    """Same behaviour on the in-memory backend
+    """
+
+    config = "config.MemoryTestingConfig"
+
+
+class TestLoginThrottlingSharedStore(TestLoginThrottling):
+    """Same behaviour with buckets in a shared SQLite file
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.settings = {'RATE_LIMIT_STORAGE': os.path.join(self.tmp.name, 'limits.db')}
+        super().setUp()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+#!/usr/bin/python3
+""" Unittests for precomputed session recommendations """
+
+import unittest
+from datetime import datetime, timedelta
+from app.models.skill import Skill
+from app.models.session_neighbors import POPULAR, unpack_neighbors
+from app.services import facade
+from app.services.recommendations import refresh_recommendations
+from app.tests.base import AppTestCase
+
+
+class TestRecommendations(AppTestCase):
+    """Test the batch neighbor lists and the online merge
+    """
+
+    def setUp(self):
+        super().setUp()
+        instructor = self.create_instructor()
+        self.users = [self.create_user(name) for name in ['Alan', 'Barbara', 'Claude', 'Donald', 'Edsger']]
+        python, drawing = Skill('Python', 'Technology'), Skill('Drawing', 'Arts')
+        facade.skill_repo.add(python)
+        facade.skill_repo.add(drawing)
+        self.sessions = {}
+        for title, skill in [('Intro', python), ('Advanced', python), ('Testing', python),
+                             ('Sketching', drawing), ('Painting', drawing)]:
+            session = self.create_session(instructor, title=title)
+            facade.add_skill_to_session(session.id, skill.id)
+            self.sessions[title] = session
+        self.hours = 0
+
+        # Alan, Barbara and Claude took Intro then Advanced; Donald took Intro and liked Sketching
+        for user in self.users[:3]:
+            self.book(user, 'Intro')
+            self.book(user, 'Advanced')
+        self.book(self.users[3], 'Intro')
+        self.book(self.users[3], 'Sketching', rating=5)
+
+    def book(self, user, title, rating=None):
+        self.hours += 2
+        booking = facade.create_booking({'user_id': user.id, 'session_id': self.sessions[title].id,
+                                         'booking_date': datetime.now() + timedelta(days=1, hours=self.hours)})
+        if rating:
+            facade.confirm_booking(booking.id)
+            facade.complete_booking(booking.id)
+            facade.create_review({'text': 'Review', 'rating': rating, 'session_id': booking.session_id,
+                                  'user_id': user.id, 'instructor_id': self.sessions[title].instructor_id,
+                                  'booking_id': booking.id})
+        return booking
+
+    def recommended(self, user):
+        return [session.title for session, score in facade.get_recommendations(user.id)]
+
+    def test_co_occurrence_and_content(self):
+        """Co-booked sessions rank first, sessions only sharing skills after; booked ones are excluded"""
+        assert refresh_recommendations(full=True) == {'sessions': 5, 'full': True}
+
+        neighbors = facade.neighbors_repo.get(self.sessions['Intro'].id)
+        assert unpack_neighbors(neighbors.neighbors)[0][0] == self.sessions['Advanced'].id
+
+        newcomer = self.users[4]
+        self.book(newcomer, 'Intro')
+        assert self.recommended(newcomer) == ['Advanced', 'Sketching', 'Testing']
+
+    def test_cold_start_gets_popular_sessions(self):
+        """Users without bookings get the sessions booked by the most users"""
+        refresh_recommendations(full=True)
+        popular = unpack_neighbors(facade.neighbors_repo.get(POPULAR).neighbors)
+
+        assert [session_id for session_id, _ in popular[:2]] == [self.sessions['Intro'].id,
+                                                                   self.sessions['Advanced'].id]
+        assert self.recommended(self.users[4])[:2] == ['Intro', 'Advanced']
+
+    def test_incremental_refresh(self):
+        """Only sessions touched by users with new activity are recomputed"""
+        refresh_recommendations(full=True)
+        self.book(self.users[4], 'Painting')
+
+        stats = refresh_recommendations()
+        assert not stats['full']
+        assert stats['sessions'] == 1
+
+    def test_recommendations_endpoint(self):
+        """Users see their own recommendations only"""
+        refresh_recommendations(full=True)
+        client = self.app.test_client()
+        donald = self.users[3]
+        url = f'/api/v1/users/{donald.id}/recommendations?limit=2'
+
+        response = client.get(url, headers={'Authorization': f"Bearer {donald.generate_token()}"})
+        assert response.status_code == 200
+        assert response.json[0]['title'] == 'Advanced'
+        assert len(response.json) == 2
+        other = {'Authorization': f"Bearer {self.users[0].generate_token()}"}
+        assert client.get(url, headers=other).status_code == 403
+
+
+class TestRecommendationsInMemory(TestRecommendations):
+    """Same behaviour on the in-memory backend
+    """
+
+    config = "config.MemoryTestingConfig"
+
+
+if __name__ == '__main__':
+    unittest.main()
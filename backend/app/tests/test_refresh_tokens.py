@@ -0,0 +1,102 @@
+#!/usr/bin/python3
+""" Unittests for rotating refresh tokens """
+
+import sys
+import threading
+import unittest
+from datetime import datetime, timedelta
+from app.models.refresh_token import hash_refresh_token
+from app.services import facade
+from app.tests.base import AppTestCase
+
+
+class TestRefreshTokens(AppTestCase):
+    """Test rotation, reuse detection and revocation
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.user = self.create_user('Ada', 'Lovelace')
+
+    def refresh(self, token):
+        return self.client.post('/api/v1/auth/refresh', json={'refresh_token': token})
+
+    def test_login_then_rotate(self):
+        """Login hands out a refresh token; each refresh replaces it and issues a working access token"""
+        login = self.client.post('/api/v1/auth/login', json={'email': 'ada@example.com', 'password': 'secret'})
+        first = login.json['refresh_token']
+
+        response = self.refresh(first)
+        assert response.status_code == 200
+        assert response.json['refresh_token'] != first
+        headers = {'Authorization': f"Bearer {response.json['access_token']}"}
+        assert self.client.get('/api/v1/auth/me', headers=headers).json['id'] == self.user.id
+        assert self.refresh(response.json['refresh_token']).status_code == 200
+        assert self.refresh('not-a-token').status_code == 401
+
+    def test_reuse_revokes_the_family(self):
+        """Replaying a rotated token logs out that login, but not the user's other devices"""
+        laptop, phone = facade.issue_refresh_token(self.user.id), facade.issue_refresh_token(self.user.id)
+        _, _, rotated = facade.refresh_session(laptop)
+
+        response = self.refresh(laptop)
+        assert response.status_code == 401
+        assert 'reuse' in response.json['error']
+        assert self.refresh(rotated).status_code == 401
+        assert self.refresh(phone).status_code == 200
+
+    def test_sliding_expiry_is_capped(self):
+        """Rotated tokens keep the login's absolute expiry"""
+        token = facade.issue_refresh_token(self.user.id, session_expires_at=datetime.now() + timedelta(hours=1))
+        _, _, rotated = facade.refresh_session(token)
+        record = facade.refresh_token_repo.find(hash_refresh_token(rotated))
+        assert record.expires_at <= datetime.now() + timedelta(hours=1)
+
+        facade.refresh_token_repo.find(hash_refresh_token(rotated)).expires_at = datetime.now()
+        with self.assertRaises(ValueError):
+            facade.refresh_session(rotated)
+
+    def test_bulk_revocation(self):
+        """logout-all and password changes revoke every refresh token of the user"""
+        tokens = [facade.issue_refresh_token(self.user.id) for _ in range(3)]
+        headers = {'Authorization': f"Bearer {self.user.generate_token()}"}
+        response = self.client.post('/api/v1/auth/logout-all', headers=headers)
+        assert response.json['revoked'] == 3
+        assert all(self.refresh(token).status_code == 401 for token in tokens)
+
+        token = facade.issue_refresh_token(self.user.id)
+        facade.update_user(self.user.id, {'password': 'changed'})
+        assert self.refresh(token).status_code == 401
+
+
+class TestRefreshTokensInMemory(TestRefreshTokens):
+    """Same behaviour on the in-memory backend
+    """
+
+    config = "config.MemoryTestingConfig"
+
+    def test_concurrent_rotation(self):
+        """Of several threads rotating the same token, exactly one succeeds"""
+        token_hash = hash_refresh_token(facade.issue_refresh_token(self.user.id))
+        rotated = []
+        start = threading.Barrier(8)
+
+        def rotate():
+            start.wait()
+            rotated.append(facade.refresh_token_repo.mark_rotated(token_hash, datetime.now()))
+
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            threads = [threading.Thread(target=rotate) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            sys.setswitchinterval(interval)
+        assert rotated.count(True) == 1
+
+
+if __name__ == '__main__':
+    unittest.main()
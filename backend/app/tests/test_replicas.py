@@ -0,0 +1,75 @@
+#!/usr/bin/python3
+""" Unittests for read-replica routing, using a second SQLite file as the replica """
+
+import os
+import tempfile
+import unittest
+from app import create_app, db
+from app.models.skill import Skill
+from config import TestingConfig
+
+
+class TestReplicaRouting(unittest.TestCase):
+    """Test that reads go to the replica unless the client just wrote
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+        class ReplicaConfig(TestingConfig):
+            SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(self.tmp.name, 'primary.db')}"
+            SQLALCHEMY_BINDS = {'replica_0': f"sqlite:///{os.path.join(self.tmp.name, 'replica.db')}"}
+
+        self.app = create_app(ReplicaConfig)
+        with self.app.app_context():
+            replica = db.engines['replica_0']
+            db.metadata.create_all(replica)
+            # A row only the replica has, so we can tell where a read was served from
+            with replica.begin() as connection:
+                connection.execute(Skill.__table__.insert().values(
+                    id='replica-only', name='Replica Skill', category='Other'))
+        self.router = self.app.extensions['replica_router']
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.engines['replica_0'].dispose()
+            db.engine.dispose()
+        self.tmp.cleanup()
+
+    def skill_names(self, client):
+        return sorted(skill['name'] for skill in client.get('/api/v1/skills/').json)
+
+    def test_reads_go_to_replica(self):
+        """GET requests are served from the replica"""
+        assert self.skill_names(self.app.test_client()) == ['Replica Skill']
+
+    def test_read_your_writes_after_mutation(self):
+        """After a write the same client is pinned to the primary; other clients are not"""
+        writer = self.app.test_client()
+        response = writer.post('/api/v1/skills/', json={'name': 'Python', 'category': 'Technology'})
+
+        assert response.status_code == 201
+        assert self.skill_names(writer) == ['Python']
+        assert self.skill_names(self.app.test_client()) == ['Replica Skill']
+
+    def test_read_your_writes_with_pin_header(self):
+        """Clients without cookies stay on the primary by sending back the pin header"""
+        writer = self.app.test_client(use_cookies=False)
+        response = writer.post('/api/v1/skills/', json={'name': 'Python', 'category': 'Technology'})
+        pin = {'X-DB-Primary-Until': response.headers['X-DB-Primary-Until']}
+
+        names = sorted(skill['name'] for skill in writer.get('/api/v1/skills/', headers=pin).json)
+        assert names == ['Python']
+        assert self.skill_names(writer) == ['Replica Skill']
+
+    def test_lagging_replica_falls_back_to_primary(self):
+        """A replica behind by more than REPLICA_MAX_LAG is skipped"""
+        self.router.lag_probe = lambda engine: 60
+        self.router._lag.clear()
+
+        assert self.skill_names(self.app.test_client()) == []
+
+
+if __name__ == '__main__':
+    unittest.main()
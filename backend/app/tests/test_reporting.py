@@ -0,0 +1,84 @@
+#!/usr/bin/python3
+""" Unittests for the admin reports """
+
+import unittest
+from datetime import datetime, timedelta
+from app.services import facade
+from app.tests.base import AppTestCase
+
+
+class TestAdminReports(AppTestCase):
+    """Test the vectorized reports and their admin-only endpoints
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.admin = self.create_admin()
+        instructor = self.create_instructor()
+        self.learner = self.create_learner()
+        other = self.create_user('Edsger', 'Dijkstra')
+        tech = facade.create_skill({'name': 'Python', 'category': 'Technology'})
+        arts = facade.create_skill({'name': 'Drawing', 'category': 'Arts'})
+
+        online = self.create_session(instructor, title="Generative Art", max_participants=4)
+        in_person = self.create_session(instructor, title="Compilers", price=50.0, max_participants=2,
+                                        session_type='in-person', difficulty_level='advanced', location='London')
+        for session, skill in [(online, tech), (online, arts), (in_person, tech)]:
+            facade.add_skill_to_session(session.id, skill.id)
+
+        tomorrow = datetime.now() + timedelta(days=1)
+        for user, session, participants, booking_date in [(self.learner, online, 2, tomorrow),
+                                                          (other, in_person, 2, tomorrow),
+                                                          (self.learner, in_person, 1, tomorrow + timedelta(hours=2))]:
+            booking = facade.create_booking({'user_id': user.id, 'session_id': session.id,
+                                             'booking_date': booking_date, 'participants': participants})
+        facade.cancel_booking(booking.id)
+
+    def get_report(self, name, user=None, query=''):
+        headers = {'Authorization': f"Bearer {(user or self.admin).generate_token()}"}
+        return self.app.test_client().get(f'/api/v1/admin/reports/{name}{query}', headers=headers)
+
+    def test_gmv_by_category(self):
+        """GMV of a multi-category session is split between its categories; cancellations are excluded"""
+        report = self.get_report('gmv-by-category').json
+
+        assert report['total_gmv'] == 140.0
+        assert {row['category']: row['gmv'] for row in report['categories']} == {'Technology': 120.0, 'Arts': 20.0}
+
+    def test_utilization(self):
+        """Utilization per session type and difficulty level"""
+        report = self.get_report('utilization').json
+
+        assert report['occurrences'] == 2
+        assert report['utilization'] == round(4 / 6, 4)
+        by_type = {row['session_type']: row['utilization'] for row in report['by_session_type']}
+        assert by_type == {'online': 0.5, 'in-person': 1.0}
+        combos = {(row['session_type'], row['difficulty_level']): row['participants']
+                  for row in report['by_session_type_and_difficulty_level']}
+        assert combos == {('online', 'beginner'): 2, ('in-person', 'advanced'): 2}
+
+    def test_cohort_retention(self):
+        """Everyone signed up this month; two of the four users booked"""
+        cohort, = self.get_report('cohort-retention', query='?months=3').json['cohorts']
+
+        assert cohort['users'] == 4
+        assert cohort['active'] == [2, 0, 0]
+        assert cohort['retention'][0] == 0.5
+
+    def test_reports_are_cached_per_window(self):
+        """A repeated request for the same window is served from cache"""
+        first = self.get_report('gmv-by-category').json
+        assert self.get_report('gmv-by-category').json['generated_at'] == first['generated_at']
+
+        later = (datetime.now() + timedelta(days=30)).date().isoformat()
+        empty = self.get_report('gmv-by-category', query=f'?from={later}').json
+        assert empty['total_gmv'] == 0.0
+
+    def test_admin_only(self):
+        """Non-admins are rejected"""
+        assert self.get_report('utilization', user=self.learner).status_code == 403
+        assert self.app.test_client().get('/api/v1/admin/reports/utilization').status_code == 401
+
+
+if __name__ == '__main__':
+    unittest.main()
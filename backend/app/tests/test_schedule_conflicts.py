@@ -0,0 +1,111 @@
+#!/usr/bin/python3
+""" Unittests for double-booking detection and the schedule conflicts report """
+
+import random
+import unittest
+from datetime import datetime, timedelta
+from app.models.booking import Booking
+from app.services import facade
+from app.tests.base import AppTestCase
+from app.utils.interval_tree import IntervalTree
+
+
+class TestIntervalTree(unittest.TestCase):
+    """Test overlap queries against a brute-force scan
+    """
+
+    def test_matches_brute_force(self):
+        """Random inserts and removes keep query results exact"""
+        rng = random.Random(7)
+        tree, intervals = IntervalTree(), []
+        for value in range(400):
+            start = rng.randrange(1000)
+            interval = (start, start + rng.randrange(1, 50), value)
+            tree.insert(*interval)
+            intervals.append(interval)
+            if value % 3 == 0:
+                assert tree.remove(*intervals.pop(rng.randrange(len(intervals))))
+
+        assert len(tree) == len(intervals)
+        assert not tree.remove(-1, 0, 'missing')
+        for _ in range(200):
+            start = rng.randrange(1000)
+            end = start + rng.randrange(1, 30)
+            expected = sorted((s, e, v) for s, e, v in intervals if s < end and e > start)
+            assert tree.overlapping(start, end) == [v for s, e, v in expected]
+
+
+class TestScheduleConflicts(AppTestCase):
+    """Test that users and instructors cannot be in two places at once
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.instructor = self.create_instructor()
+        self.learner = self.create_learner()
+        self.admin = self.create_admin()
+        self.engines = self.create_session(self.instructor, max_participants=5)
+        self.looms = self.create_session(self.instructor, title='Jacquard Looms', max_participants=5)
+        self.ten = datetime.now().replace(hour=10, minute=0, second=0, microsecond=0) + timedelta(days=2)
+
+    def book(self, session, booking_date):
+        return facade.create_booking({'user_id': self.learner.id, 'session_id': session.id,
+                                      'booking_date': booking_date})
+
+    def test_user_cannot_double_book(self):
+        """Overlapping bookings are refused; back-to-back ones and freed slots are fine"""
+        first = self.book(self.engines, self.ten)
+        with self.assertRaises(ValueError):
+            self.book(self.looms, self.ten + timedelta(minutes=30))
+        second = self.book(self.looms, self.ten + timedelta(hours=1))
+
+        with self.assertRaises(ValueError):
+            facade.update_booking(second.id, {'booking_date': self.ten + timedelta(minutes=15)})
+        facade.update_booking(second.id, {'booking_date': self.ten + timedelta(hours=3)})
+
+        facade.cancel_booking(first.id)
+        self.book(self.looms, self.ten + timedelta(minutes=30))
+
+    def test_instructor_cannot_overlap_occurrences(self):
+        """An instructor's occurrences may not overlap, even across sessions"""
+        facade.create_session_occurrence({'session_id': self.engines.id, 'starts_at': self.ten})
+        with self.assertRaises(ValueError):
+            facade.create_session_occurrence({'session_id': self.looms.id,
+                                              'starts_at': self.ten + timedelta(minutes=59)})
+        facade.create_session_occurrence({'session_id': self.looms.id, 'starts_at': self.ten - timedelta(hours=1)})
+
+    def test_writes_from_other_processes_are_seen(self):
+        """A booking added behind the cached tree's back is found once the version moves"""
+        self.book(self.engines, self.ten)  # caches the learner's tree
+        facade.booking_repo.add(Booking(self.learner.id, self.looms.id, self.ten + timedelta(hours=2)))
+        facade.user_repo.bump_schedule_versions([self.learner.id])
+
+        with self.assertRaises(ValueError):
+            self.book(self.engines, self.ten + timedelta(hours=2, minutes=30))
+
+    def test_conflicts_report(self):
+        """The admin report lists overlaps that bypassed the checks"""
+        first = self.book(self.engines, self.ten)
+        second = Booking(self.learner.id, self.looms.id, self.ten + timedelta(minutes=45))
+        facade.booking_repo.add(second)
+
+        headers = {'Authorization': f"Bearer {self.admin.generate_token()}"}
+        response = self.app.test_client().get('/api/v1/admin/schedule-conflicts', headers=headers)
+
+        assert response.status_code == 200
+        assert response.json['total'] == 1
+        conflict = response.json['conflicts'][0]
+        assert (conflict['kind'], conflict['owner_id']) == ('user', self.learner.id)
+        assert {conflict['first_id'], conflict['second_id']} == {first.id, second.id}
+        assert conflict['overlap_end'] == (self.ten + timedelta(hours=1)).isoformat()
+
+
+class TestScheduleConflictsInMemory(TestScheduleConflicts):
+    """Same behaviour on the in-memory backend
+    """
+
+    config = "config.MemoryTestingConfig"
+
+
+if __name__ == '__main__':
+    unittest.main()
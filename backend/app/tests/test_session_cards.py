@@ -0,0 +1,118 @@
+#!/usr/bin/python3
+""" Unittests for the session card read model behind catalog listings """
+
+import unittest
+from datetime import datetime, timedelta
+from sqlalchemy import event
+from app import db
+from app.services import facade
+from app.tests.base import AppTestCase
+
+
+class TestSessionCards(AppTestCase):
+    """Test that cards follow every facade change and serve the catalog
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.instructor = self.create_instructor()
+        self.learners = [self.create_user(name) for name in ['Alan', 'Barbara', 'Claude']]
+        self.session = self.create_session(self.instructor, max_participants=5)
+        self.skill = facade.create_skill({'name': 'Mathematics', 'category': 'Technology'})
+        facade.add_skill_to_session(self.session.id, self.skill.id)
+
+    def book(self, learner, days=1):
+        return facade.create_booking({'user_id': learner.id, 'session_id': self.session.id,
+                                      'booking_date': datetime.now() + timedelta(days=days)})
+
+    def card(self):
+        cards = self.client.get('/api/v1/skill-sessions/').json
+        return next(card for card in cards if card['id'] == self.session.id)
+
+    def test_card_follows_changes(self):
+        """Spots, rating, skills and instructor name are current after each facade write"""
+        card = self.card()
+        assert card['available_spots'] == 5
+        assert card['average_rating'] is None
+        assert card['skills'] == [{'id': self.skill.id, 'name': 'Mathematics', 'category': 'Technology'}]
+        assert card['instructor']['first_name'] == 'Ada'
+
+        bookings = [self.book(learner) for learner in self.learners]
+        for booking in bookings:
+            facade.confirm_booking(booking.id)
+        facade.cancel_booking(bookings[2].id)
+        assert self.card()['available_spots'] == 3
+
+        facade.complete_booking(bookings[0].id)
+        facade.create_review({'text': 'Great', 'rating': 5, 'session_id': self.session.id,
+                              'user_id': self.learners[0].id, 'instructor_id': self.instructor.id,
+                              'booking_id': bookings[0].id})
+        facade.update_user(self.instructor.id, {'first_name': 'Augusta'})
+        facade.update_skill(self.skill.id, {'name': 'Maths'})
+        facade.update_skill_session(self.session.id, {'price': 12.0})
+
+        card = self.card()
+        assert card['available_spots'] == 4
+        assert card['average_rating'] == 5.0
+        assert card['instructor']['first_name'] == 'Augusta'
+        assert card['skills'][0]['name'] == 'Maths'
+        assert card['price'] == 12.0
+
+    def test_deleted_booker_frees_spots(self):
+        """Deleting a learner frees the spots their bookings held on other instructors' sessions"""
+        facade.confirm_booking(self.book(self.learners[0]).id)
+        assert self.card()['available_spots'] == 4
+        facade.delete_user(self.learners[0].id)
+        assert self.card()['available_spots'] == 5
+
+    def test_rebuild_and_lookup(self):
+        """A full rebuild reproduces the cards; ?ids= and instructor listings read them too"""
+        other = self.create_session(self.instructor, title='Notes', max_participants=1)
+        facade.confirm_booking(self.book(self.learners[0]).id)
+        before = self.client.get('/api/v1/skill-sessions/').json
+        facade.rebuild_session_cards()
+        assert self.client.get('/api/v1/skill-sessions/').json == before
+        assert [card['id'] for card in before] == [self.session.id, other.id]
+
+        response = self.client.get(f'/api/v1/skill-sessions/?ids={other.id},{self.session.id}')
+        assert [card['id'] for card in response.json] == [other.id, self.session.id]
+        response = self.client.get(f'/api/v1/skill-sessions/instructor/{self.instructor.id}')
+        assert [card['available_spots'] for card in response.json] == [4, 1]
+
+    def test_cards_to_refresh(self):
+        """Instructor and skill changes find the sessions whose cards they touch"""
+        other = self.create_session(self.instructor, title='Notes', max_participants=1)
+        assert sorted(facade.card_repo.session_ids_by_instructor(self.instructor.id)) == sorted(
+            [self.session.id, other.id])
+        assert facade.card_repo.session_ids_by_instructor(self.learners[0].id) == []
+        assert facade.card_repo.session_ids_by_skill(self.skill.id) == [self.session.id]
+
+
+class TestSessionCardsSQL(TestSessionCards):
+    """The SQL listing is one query on the projection
+    """
+
+    def test_listing_is_one_query(self):
+        """GET /skill-sessions/ reads the card table once, however many sessions there are"""
+        for index in range(5):
+            self.create_session(self.instructor, title=f'Session {index}')
+        statements = []
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)  # noqa: E731
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            assert len(self.client.get('/api/v1/skill-sessions/').json) == 6
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+        assert len(statements) == 1
+        assert 'FROM session_cards' in statements[0]
+
+
+class TestSessionCardsInMemory(TestSessionCards):
+    """Same behaviour on the in-memory backend
+    """
+
+    config = "config.MemoryTestingConfig"
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,148 @@
+#!/usr/bin/python3
+""" Unittests for the ranked active-session catalog """
+
+import unittest
+from datetime import datetime, timedelta
+from sqlalchemy import event
+from app import db
+from app.models.skill_session import RATING_PRIOR_MEAN, bayesian_rating
+from app.services import facade
+from app.tests.base import AppTestCase
+
+
+class TestSessionRankings(AppTestCase):
+    """Test the incrementally maintained trending and top-rated keys
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.instructor = self.create_instructor()
+        self.users = [self.create_user(name) for name in ['Alan', 'Barbara', 'Claude']]
+        self.sessions = {title: self.create_session(self.instructor, title=title, price=price)
+                         for title, price in [('Cheap', 5.0), ('Popular', 30.0), ('Loved', 20.0)]}
+        self.hours = 0
+
+    def book(self, user, title, rating=None):
+        self.hours += 2
+        booking = facade.create_booking({'user_id': user.id, 'session_id': self.sessions[title].id,
+                                         'booking_date': datetime.now() + timedelta(days=1, hours=self.hours)})
+        if rating:
+            facade.confirm_booking(booking.id)
+            facade.complete_booking(booking.id)
+            return facade.create_review({'text': 'Review', 'rating': rating, 'session_id': booking.session_id,
+                                         'user_id': user.id, 'instructor_id': self.instructor.id,
+                                         'booking_id': booking.id})
+        return booking
+
+    def ranked(self, sort, limit=20, offset=0):
+        return [session.title for session in facade.get_active_sessions(sort, limit, offset)]
+
+    def test_trending_follows_bookings(self):
+        """Each booking raises the session's trending score; cancelling takes it back"""
+        for user in self.users:
+            self.book(user, 'Popular')
+        booking = self.book(self.users[0], 'Loved')
+        assert self.ranked('trending') == ['Popular', 'Loved', 'Cheap']
+        assert abs(facade.get_skill_session(self.sessions['Popular'].id).get_trending_score() - 3) < 0.01
+
+        facade.cancel_booking(booking.id)
+        assert facade.get_skill_session(self.sessions['Loved'].id).get_trending_score() < 0.01
+
+    def test_trending_key_does_not_overflow(self):
+        """Keys are log2 sums, so bookings centuries after the epoch still add up"""
+        session_id, later = self.sessions['Popular'].id, datetime(2500, 1, 1)
+        facade.skill_session_repo.record_booking(session_id, later)
+        facade.skill_session_repo.record_booking(session_id, later)
+        self.assertAlmostEqual(facade.get_skill_session(session_id).get_trending_score(later), 2)
+        facade.skill_session_repo.record_booking(session_id, later, count=-1)
+        self.assertAlmostEqual(facade.get_skill_session(session_id).get_trending_score(later), 1)
+        facade.skill_session_repo.record_booking(session_id, later, count=-1)
+        assert facade.get_skill_session(session_id).get_trending_score(later) == 0
+
+    def test_top_rated_is_a_bayesian_average(self):
+        """A single 5 star review does not outrank several 4 star ones"""
+        self.book(self.users[0], 'Cheap', rating=5)
+        for user in self.users:
+            self.book(user, 'Loved', rating=4)
+        assert self.ranked('top_rated') == ['Loved', 'Cheap', 'Popular']
+
+        loved = facade.get_skill_session(self.sessions['Loved'].id)
+        assert loved.rating_count == 3
+        assert loved.bayesian_rating == bayesian_rating(12, 3)
+
+        review = facade.get_reviews_by_session(self.sessions['Cheap'].id)[0]
+        facade.update_review(review.id, {'rating': 1})
+        assert self.ranked('top_rated')[-1] == 'Cheap'
+        facade.delete_review(review.id)
+        assert facade.get_skill_session(self.sessions['Cheap'].id).bayesian_rating == RATING_PRIOR_MEAN
+
+    def test_price_newest_and_paging(self):
+        """Other orderings, pages, and deactivated sessions leaving the catalog"""
+        assert self.ranked('price') == ['Cheap', 'Loved', 'Popular']
+        assert self.ranked('price', limit=1, offset=1) == ['Loved']
+        assert self.ranked('newest', limit=2) == ['Loved', 'Popular']
+
+        facade.update_skill_session(self.sessions['Cheap'].id, {'is_active': False})
+        assert self.ranked('price') == ['Loved', 'Popular']
+
+    def test_rebuild_matches_incremental_keys(self):
+        """The backfill job recomputes the same keys the facade maintains"""
+        self.book(self.users[0], 'Popular', rating=2)
+        self.book(self.users[1], 'Popular')
+        popular = facade.get_skill_session(self.sessions['Popular'].id)
+        expected = (popular.trending_key, popular.rating_sum, popular.rating_count, popular.bayesian_rating)
+
+        assert facade.rebuild_session_rankings() == 3
+        popular = facade.get_skill_session(self.sessions['Popular'].id)
+        self.assertAlmostEqual(popular.trending_key, expected[0])
+        assert (popular.rating_sum, popular.rating_count, popular.bayesian_rating) == expected[1:]
+
+    def test_active_endpoint(self):
+        """/active lists every active session, or a ranked page with sort"""
+        client = self.app.test_client()
+        response = client.get('/api/v1/skill-sessions/active')
+        assert response.status_code == 200
+        assert len(response.json) == 3
+
+        self.book(self.users[0], 'Loved')
+        response = client.get('/api/v1/skill-sessions/active?sort=trending&limit=1')
+        assert response.status_code == 200
+        assert [session['title'] for session in response.json] == ['Loved']
+        assert response.json[0]['trending_score'] > 0.99
+        assert response.json[0]['available_spots'] == 10
+        assert client.get('/api/v1/skill-sessions/active?sort=random').status_code == 400
+        assert client.get('/api/v1/skill-sessions/active?sort=price&limit=1000').status_code == 400
+
+    def test_ranked_page_reads_spots_from_cards(self):
+        """available_spots comes from the session cards, not each session's bookings"""
+        for user in self.users:
+            facade.confirm_booking(self.book(user, 'Popular').id)
+        client = self.app.test_client()
+
+        def page(limit):
+            statements = []
+            listener = lambda conn, cursor, statement, *args: statements.append(statement)  # noqa: E731
+            event.listen(db.engine, 'before_cursor_execute', listener)
+            try:
+                with self.app.app_context():
+                    response = client.get(f'/api/v1/skill-sessions/active?sort=price&limit={limit}')
+            finally:
+                event.remove(db.engine, 'before_cursor_execute', listener)
+            return response.json, len(statements)
+
+        (cheap,), one_page = page(1)
+        sessions, full_page = page(3)
+        assert full_page == one_page
+        assert cheap['available_spots'] == 10
+        assert {session['title']: session['available_spots'] for session in sessions}['Popular'] == 7
+
+
+class TestSessionRankingsInMemory(TestSessionRankings):
+    """Same behaviour on the in-memory backend
+    """
+
+    config = "config.MemoryTestingConfig"
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+#!/usr/bin/python3
+""" Unittests for the slow-query log """
+
+import json
+import os
+import tempfile
+import unittest
+from app.persistence.slow_queries import fingerprint, normalize, redact
+from app.services import facade
+from app.tests.base import AppTestCase
+
+
+class TestSlowQueries(AppTestCase):
+    """Test fingerprints and the admin slow-query endpoints
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.settings = {'SLOW_QUERY_LOG_ENABLED': True, 'SLOW_QUERY_THRESHOLD': 0.0,
+                         'SLOW_QUERY_DUMP_PATH': os.path.join(self.tmp.name, 'slow.{pid}.json')}
+        super().setUp()
+        self.admin = self.create_admin()
+        self.headers = {'Authorization': f"Bearer {self.admin.generate_token()}"}
+
+    def queries(self, **params):
+        return self.client.get('/api/v1/admin/slow-queries', query_string=dict(params, limit=500),
+                               headers=self.headers).json['queries']
+
+    def test_fingerprints_ignore_values(self):
+        """Literals, parameters and IN list lengths do not change a fingerprint"""
+        assert normalize("SELECT * FROM users  WHERE email = 'a@b.c' AND id IN (?, ?, ?) LIMIT 10") == \
+            'SELECT * FROM users WHERE email = ? AND id IN (?+) LIMIT ?'
+        assert fingerprint('SELECT a FROM t WHERE id IN (%s, %s)') == fingerprint('SELECT a FROM t WHERE id IN (%s)')
+        assert fingerprint('SELECT anon_1.a FROM t1') != fingerprint('SELECT anon_2.a FROM t1')
+        assert redact(('ada@example.com', 3)) == ['str(15)', 'int']
+
+    def test_admin_only(self):
+        """The log is for admins, sorted by a known column"""
+        learner = self.create_learner()
+        headers = {'Authorization': f"Bearer {learner.generate_token()}"}
+        assert self.client.get('/api/v1/admin/slow-queries', headers=headers).status_code == 403
+        assert self.client.get('/api/v1/admin/slow-queries?sort=name', headers=self.headers).status_code == 400
+
+    def test_dump(self):
+        """The whole log is written to SLOW_QUERY_DUMP_PATH"""
+        path = self.client.post('/api/v1/admin/slow-queries/dump', headers=self.headers).json['path']
+        with open(path) as file:
+            dump = json.load(file)
+        assert dump['pid'] == os.getpid() and dump['threshold'] == 0.0
+
+
+class TestSlowQueriesSQL(TestSlowQueries):
+    """Recording repository statements
+    """
+
+    def test_records_callers_plan_and_redacted_parameters(self):
+        """A dynamic repository query is traced to the facade method, explained once and shown without its values"""
+        self.client.delete('/api/v1/admin/slow-queries', headers=self.headers)
+        facade.get_user_by_email('ada@example.com')
+        facade.get_user_by_email('alan@example.com')
+
+        by_email = [query for query in self.queries() if 'users.email = ?' in query['statement']]
+        assert len(by_email) == 1
+        query = by_email[0]
+        assert query['calls'] == 2 and query['total'] >= query['max'] > 0
+        caller = query['callers'][0]['caller']
+        assert caller.startswith('SQLAlchemyRepository.get_by_attribute (repository.py:')
+        assert 'SkillSessionsFacade.get_user_by_email (facade.py:' in caller
+        assert query['plan']['rows'] and 'users' in str(query['plan']['rows'])
+        assert 'example.com' not in json.dumps(query)
+        assert query['parameters'][0] == 'str(16)'  # the last call's, alan@example.com
+
+    def test_bounded_by_total_time(self):
+        """Beyond SLOW_QUERY_MAX_FINGERPRINTS, the statements with the least total time go"""
+        log = self.app.extensions['slow_queries']
+        log.max_fingerprints = 3
+        log.reset()
+        for count in range(1, 6):
+            log.record(None, f"SELECT {'a, ' * count}b FROM t", (), elapsed=count, executemany=True)
+        assert [query['total'] for query in log.top()] == [5, 4, 3]
+
+
+class TestSlowQueriesInMemory(TestSlowQueries):
+    """The log also runs with the memory backend, where the facade sends no SQL
+    """
+
+    config = "config.MemoryTestingConfig"
+
+    def test_disabled(self):
+        """Without SLOW_QUERY_LOG_ENABLED no listener is attached"""
+        app = self.create_app({'SLOW_QUERY_LOG_ENABLED': False})
+        assert app.extensions['slow_queries'] is None
+
+
+if __name__ == '__main__':
+    unittest.main()
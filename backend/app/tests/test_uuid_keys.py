@@ -0,0 +1,90 @@
+#!/usr/bin/python3
+""" Unittests for time-ordered BINARY(16) primary keys """
+
+import unittest
+import uuid
+from datetime import datetime, timedelta
+from sqlalchemy import text
+from app import db
+from app.jobs.uuid_keys import convert_uuid_keys, uuid_key_columns
+from app.models.keys import new_id
+from app.services import facade
+from app.tests.base import AppTestCase
+
+
+class TestUUIDKeys(AppTestCase):
+    """Test that ids are UUIDv7 strings at the API, whatever the storage
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.instructor = self.create_instructor()
+        self.learner = self.create_learner()
+        self.session = self.create_session(self.instructor)
+        self.skill = facade.create_skill({'name': 'Mathematics', 'category': 'Technology'})
+        facade.add_skill_to_session(self.session.id, self.skill.id)
+        self.booking = facade.create_booking({'user_id': self.learner.id, 'session_id': self.session.id,
+                                              'booking_date': datetime.now() + timedelta(days=1)})
+
+    def test_new_ids_are_ordered_uuid7(self):
+        """Ids are version 7 UUIDs, strictly increasing even within one millisecond"""
+        ids = [new_id() for _ in range(5000)]
+        assert ids == sorted(ids) and len(set(ids)) == len(ids)
+        assert {uuid.UUID(value).version for value in ids} == {7}
+        assert self.instructor.id < self.learner.id < self.session.id < self.booking.id
+
+    def test_api_uses_strings(self):
+        """Responses carry canonical UUID strings; unknown or malformed ids are 404s"""
+        response = self.client.get(f'/api/v1/skill-sessions/{self.session.id}')
+        assert response.status_code == 200
+        assert response.json['id'] == self.session.id
+        assert response.json['instructor_id'] == self.instructor.id
+        assert self.client.get(f'/api/v1/skill-sessions/{uuid.uuid4()}').status_code == 404
+        assert self.client.get('/api/v1/skill-sessions/not-a-uuid').status_code == 404
+
+
+class TestUUIDKeysSQL(TestUUIDKeys):
+    """Binary storage and the conversion of string keys
+    """
+
+    def test_keys_are_16_bytes(self):
+        """Primary and foreign keys are stored as 16 byte blobs"""
+        row = db.session.execute(text("SELECT typeof(id), length(id), length(user_id), length(session_id) "
+                                      "FROM bookings")).one()
+        assert tuple(row) == ('blob', 16, 16, 16)
+
+    def test_convert_string_keys(self):
+        """An older database's VARCHAR keys are converted in place and read back the same"""
+        before = self.client.get(f'/api/v1/bookings/{self.booking.id}').json
+        assert before['user_id'] == self.learner.id
+        db.session.remove()
+        with db.engine.connect() as connection:  # turn every key back into its old 36 character form
+            connection.execute(text("PRAGMA foreign_keys = OFF"))
+            for table, columns in uuid_key_columns():
+                for column in columns:
+                    for (key,) in connection.execute(text(f"SELECT DISTINCT {column.name} FROM {table.name} "
+                                                          f"WHERE {column.name} IS NOT NULL")).all():
+                        connection.execute(text(f"UPDATE {table.name} SET {column.name} = :value "
+                                                f"WHERE {column.name} = :key"),
+                                           {'value': str(uuid.UUID(bytes=key)), 'key': key})
+            connection.execute(text("PRAGMA foreign_keys = ON"))
+            connection.commit()
+        assert facade.get_booking(self.booking.id) is None
+
+        converted = convert_uuid_keys(batch_size=2)
+        db.session.remove()
+        assert converted > 0
+        assert self.client.get(f'/api/v1/bookings/{self.booking.id}').json == before
+        assert facade.get_skill_session(self.session.id).skills_r[0].id == self.skill.id
+        assert convert_uuid_keys() == 0
+
+
+class TestUUIDKeysInMemory(TestUUIDKeys):
+    """Same behaviour on the in-memory backend
+    """
+
+    config = "config.MemoryTestingConfig"
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+#!/usr/bin/python3
+""" Unittests for the waitlist and its automatic promotion """
+
+import unittest
+from unittest import mock
+from datetime import datetime, timedelta
+from app import db
+from app.jobs.purge import run_purge_job
+from app.services import facade
+from app.tests.base import AppTestCase
+
+
+class TestWaitlist(AppTestCase):
+    """Test FIFO queueing and promotion when spots free up
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.learners = [self.create_user(name) for name in ['Alan', 'Barbara', 'Claude', 'Donald']]
+        session = self.create_session(self.create_instructor(), max_participants=2)
+        self.occurrence = facade.create_session_occurrence({'session_id': session.id,
+                                                            'starts_at': datetime.now() + timedelta(days=2)})
+        self.session = session
+        self.full = facade.create_booking({'user_id': self.learners[0].id, 'session_id': session.id,
+                                           'occurrence_id': self.occurrence.id, 'participants': 2})
+
+    def join(self, user, participants=1):
+        return facade.join_waitlist({'user_id': user.id, 'session_id': self.session.id,
+                                     'occurrence_id': self.occurrence.id, 'participants': participants})
+
+    def test_fifo_promotion_on_cancel(self):
+        """Freed spots go to the head of the queue; a party that does not fit holds the rest back"""
+        first, big, last = self.join(self.learners[1]), self.join(self.learners[2], 2), self.join(self.learners[3])
+        assert [facade.get_waitlist_position(entry) for entry in (first, big, last)] == [1, 2, 3]
+
+        facade.cancel_booking(self.full.id)
+
+        assert first.status == 'promoted'
+        assert facade.get_booking(first.booking_id).user_id == self.learners[1].id
+        assert big.status == 'waiting' and last.status == 'waiting'
+        assert facade.get_waitlist_position(big) == 1
+        assert facade.get_session_occurrence(self.occurrence.id).get_available_spots() == 1
+
+    def test_join_and_leave(self):
+        """Joining needs a full queue target; leaving moves the others up"""
+        facade.cancel_booking(self.full.id)
+        with self.assertRaises(ValueError):
+            self.join(self.learners[1])
+
+        facade.create_booking({'user_id': self.learners[1].id, 'session_id': self.session.id,
+                               'occurrence_id': self.occurrence.id, 'participants': 2})
+        first, second = self.join(self.learners[2]), self.join(self.learners[3])
+        facade.leave_waitlist(first.id)
+        assert facade.get_waitlist_position(first) is None
+        assert facade.get_waitlist_position(second) == 1
+
+    def test_failed_promotion_leaves_schedule_alone(self):
+        """A promotion that loses its spots is cancelled without a phantom booking in the user's schedule"""
+        waiter = self.join(self.learners[1])
+        with mock.patch.object(facade.occurrence_repo, 'reserve', return_value=False):
+            facade.cancel_booking(self.full.id)
+        assert waiter.status == 'cancelled'
+
+        booking = facade.create_booking({'user_id': self.learners[1].id, 'session_id': self.session.id,
+                                         'occurrence_id': self.occurrence.id, 'participants': 1})
+        assert booking.status == 'pending'
+
+    def assert_booker_deleted_and_waiter_promoted(self, delete):
+        waiter = self.join(self.learners[1])
+        delete(self.learners[0].id)
+
+        assert waiter.status == 'promoted'
+        assert facade.get_session_occurrence(self.occurrence.id).booked == 1
+        day, = facade.get_instructor_daily_stats(self.session.instructor_id)
+        assert (day['pending'], day['confirmed'], day['participants']) == (1, 0, 1)  # only the waiter's booking
+        trending_key = facade.get_skill_session(self.session.id).trending_key
+        facade.skill_session_repo.rebuild_rankings()
+        db.session.expire_all()
+        self.assertAlmostEqual(facade.get_skill_session(self.session.id).trending_key, trending_key)
+
+    def test_deleting_a_booker_frees_their_spots(self):
+        """A deleted user's bookings give their spots, trending weight and stats back, and the queue moves"""
+        self.assert_booker_deleted_and_waiter_promoted(facade.delete_user)
+
+    def test_purging_a_booker_frees_their_spots(self):
+        """Same for a background purge of the user"""
+        self.assert_booker_deleted_and_waiter_promoted(
+            lambda user_id: run_purge_job(facade.schedule_purge('user', user_id).id, batch_size=1))
+
+    def test_waitlist_endpoints(self):
+        """POST joins the queue; GET shows the position to its owner only"""
+        client = self.app.test_client()
+        headers = {'Authorization': f"Bearer {self.learners[1].generate_token()}"}
+        response = client.post('/api/v1/waitlist/', headers=headers,
+                               json={'session_id': self.session.id, 'occurrence_id': self.occurrence.id})
+        assert response.status_code == 201
+        assert response.json['position'] == 1
+
+        other = {'Authorization': f"Bearer {self.learners[2].generate_token()}"}
+        assert client.get(f"/api/v1/waitlist/{response.json['id']}", headers=other).status_code == 403
+        assert client.delete(f"/api/v1/waitlist/{response.json['id']}", headers=headers).status_code == 200
+        assert client.get(f"/api/v1/waitlist/{response.json['id']}", headers=headers).json['status'] == 'cancelled'
+
+
+class TestWaitlistInMemory(TestWaitlist):
+    """Same behaviour on the in-memory backend
+    """
+
+    config = "config.MemoryTestingConfig"
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+"""Request-scoped DataLoader for batching relationship loads in serializers."""
+
+from flask import g
+
+
+class DataLoader:
+    """Batches lookups by id into one query and memoizes the results.
+
+    Serializers first prime() every id they will need, then load() them one by
+    one: the first load() resolves all queued ids with a single call to
+    `batch_load_fn`, and later loads of the same id are answered from memory.
+    """
+
+    def __init__(self, batch_load_fn, key_fn=lambda obj: obj.id):
+        self.batch_load_fn = batch_load_fn
+        self.key_fn = key_fn
+        self._cache = {}
+        self._pending = set()
+
+    def prime(self, key):
+        """Queue an id to be fetched with the next batch."""
+        if key is not None and key not in self._cache:
+            self._pending.add(key)
+
+    def prime_many(self, keys):
+        """Queue several ids to be fetched with the next batch."""
+        for key in keys:
+            self.prime(key)
+
+    def load(self, key):
+        """Get the object for an id (None if it does not exist)."""
+        if key is None:
+            return None
+        if key not in self._cache:
+            self._pending.add(key)
+            self.dispatch()
+        return self._cache[key]
+
+    def load_many(self, keys):
+        """Get the objects for several ids, in order."""
+        keys = list(keys)
+        self.prime_many(keys)
+        return [self.load(key) for key in keys]
+
+    def dispatch(self):
+        """Resolve every queued id with one batch call."""
+        if not self._pending:
+            return
+        keys = list(self._pending)
+        self._pending.clear()
+        for obj in self.batch_load_fn(keys):
+            self._cache[self.key_fn(obj)] = obj
+        for key in keys:
+            self._cache.setdefault(key, None)
+
+    def clear(self, key=None):
+        """Forget one memoized id, or everything."""
+        if key is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(key, None)
+
+
+def _batch_load_functions():
+    from app.services import facade
+    return {
+        'users': facade.get_users,
+        'skill_sessions': facade.get_skill_sessions,
+    }
+
+
+def get_loader(name):
+    """Get the DataLoader for an entity type, shared for the rest of the request."""
+    loaders = g.setdefault('_dataloaders', {})
+    if name not in loaders:
+        loaders[name] = DataLoader(_batch_load_functions()[name])
+    return loaders[name]
@@ -0,0 +1,103 @@
+"""Idempotency-Key support for non-idempotent POST endpoints."""
+
+import hashlib
+import json
+import time
+from datetime import datetime, timedelta
+from functools import wraps
+from flask import request, current_app
+from app import db
+from app.persistence.idempotency_repository import IdempotencyRepository
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+
+idempotency_repo = IdempotencyRepository()
+
+
+def _sha256(value):
+    return hashlib.sha256(value.encode('utf-8')).hexdigest()
+
+
+def _split_response(result):
+    """Normalise a handler return value into (body, status_code, headers)."""
+    if isinstance(result, tuple):
+        body = result[0]
+        status_code = result[1] if len(result) > 1 else 200
+        headers = result[2] if len(result) > 2 else {}
+        return body, status_code, headers
+    return result, 200, {}
+
+
+def _wait_for_owner(key_hash):
+    """Poll a key held by a concurrent request until it completes or the lock times out."""
+    timeout = current_app.config.get('IDEMPOTENCY_LOCK_TIMEOUT', 10)
+    deadline = time.monotonic() + timeout
+    record = idempotency_repo.refresh(key_hash)
+    while record and not record.is_completed() and time.monotonic() < deadline:
+        time.sleep(0.05)
+        record = idempotency_repo.refresh(key_hash)
+    return record
+
+
+def idempotent(f):
+    """Decorator making a POST handler safe to retry with an Idempotency-Key header.
+
+    Must be placed below @jwt_required, since keys are scoped per user.
+    The first request with a key runs the handler and stores its response;
+    replays get the stored response without running the handler again, and
+    concurrent duplicates wait up to IDEMPOTENCY_LOCK_TIMEOUT for the first
+    one to finish, then get 409. A key is only taken over once it has been in
+    progress for IDEMPOTENCY_ABANDON_AFTER, i.e. its request has died.
+    """
+    @wraps(f)
+    def decorated_function(self, current_user, *args, **kwargs):
+        client_key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not client_key:
+            return f(self, current_user, *args, **kwargs)
+        if len(client_key) > MAX_KEY_LENGTH:
+            return {'error': f'{IDEMPOTENCY_HEADER} must be at most {MAX_KEY_LENGTH} characters'}, 400
+
+        now = datetime.now()
+        ttl = current_app.config.get('IDEMPOTENCY_KEY_TTL', 86400)
+        key_hash = _sha256(f"{current_user.id}:{request.method}:{request.path}:{client_key}")
+        request_hash = _sha256(request.get_data(as_text=True))
+
+        record, owned = idempotency_repo.claim(key_hash, request_hash, now + timedelta(seconds=ttl))
+
+        if not owned and record is not None:
+            abandon_after = current_app.config.get('IDEMPOTENCY_ABANDON_AFTER', 3600)
+            abandoned = (not record.is_completed()
+                         and record.created_at + timedelta(seconds=abandon_after) <= now)
+            if record.is_expired(now) or abandoned:
+                # Stale key: take it over as if it had never been used, unless another request just did
+                record, owned = idempotency_repo.take_over(record, request_hash, now, now + timedelta(seconds=ttl))
+
+        if not owned:
+            if record is None:
+                # Owner failed and released the key between our insert and read
+                return {'error': 'Concurrent request with this idempotency key failed, retry'}, 409, {'Retry-After': '1'}
+            if record.request_hash != request_hash:
+                return {'error': f'{IDEMPOTENCY_HEADER} was already used with a different payload'}, 422
+            if not record.is_completed():
+                record = _wait_for_owner(key_hash)
+            if record is None or not record.is_completed():
+                return {'error': 'A request with this idempotency key is still in progress'}, 409, {'Retry-After': '1'}
+            return json.loads(record.response_body), record.response_code, {'Idempotent-Replayed': 'true'}
+
+        claim_token = record.claim_token
+        try:
+            result = f(self, current_user, *args, **kwargs)
+        except Exception:
+            db.session.rollback()
+            idempotency_repo.release(key_hash, claim_token)
+            raise
+
+        body, status_code, headers = _split_response(result)
+        if status_code >= 500:
+            idempotency_repo.release(key_hash, claim_token)
+        else:
+            idempotency_repo.complete(key_hash, claim_token, status_code, json.dumps(body))
+        return result
+
+    return decorated_function
@@ -0,0 +1,108 @@
+"""Interval tree: a treap of half-open [start, end) intervals.
+
+Nodes are ordered by (start, end, value) and carry the largest `end` in their
+subtree, so an overlap query skips every subtree that ends before the query
+starts. Insert, remove and "is anything overlapping?" are O(log n) expected;
+listing all overlaps is O(log n + k).
+"""
+
+import random
+
+
+class _Node:
+    __slots__ = ('key', 'start', 'end', 'value', 'priority', 'max_end', 'left', 'right')
+
+    def __init__(self, start, end, value):
+        self.key = (start, end, value)
+        self.start, self.end, self.value = start, end, value
+        self.priority = random.random()
+        self.max_end = end
+        self.left = self.right = None
+
+
+def _update(node):
+    node.max_end = node.end
+    for child in (node.left, node.right):
+        if child is not None and child.max_end > node.max_end:
+            node.max_end = child.max_end
+    return node
+
+
+def _insert(node, new):
+    if node is None:
+        return new
+    if new.key < node.key:
+        node.left = _insert(node.left, new)
+        if node.left.priority > node.priority:
+            child, node.left = node.left, node.left.right
+            child.right = _update(node)
+            node = child
+    else:
+        node.right = _insert(node.right, new)
+        if node.right.priority > node.priority:
+            child, node.right = node.right, node.right.left
+            child.left = _update(node)
+            node = child
+    return _update(node)
+
+
+def _merge(left, right):
+    """Join two treaps where every key in `left` is smaller than every key in `right`."""
+    if left is None or right is None:
+        return left or right
+    if left.priority > right.priority:
+        left.right = _merge(left.right, right)
+        return _update(left)
+    right.left = _merge(left, right.left)
+    return _update(right)
+
+
+def _remove(node, key):
+    """Return (new subtree, removed?)."""
+    if node is None:
+        return None, False
+    if key == node.key:
+        return _merge(node.left, node.right), True
+    if key < node.key:
+        node.left, removed = _remove(node.left, key)
+    else:
+        node.right, removed = _remove(node.right, key)
+    return _update(node), removed
+
+
+class IntervalTree:
+    """Set of (start, end, value) intervals supporting overlap queries."""
+
+    def __init__(self, intervals=()):
+        self._root = None
+        self._size = 0
+        for start, end, value in intervals:
+            self.insert(start, end, value)
+
+    def __len__(self):
+        return self._size
+
+    def insert(self, start, end, value):
+        self._root = _insert(self._root, _Node(start, end, value))
+        self._size += 1
+
+    def remove(self, start, end, value):
+        """Remove one interval; returns False if it was not in the tree."""
+        self._root, removed = _remove(self._root, (start, end, value))
+        self._size -= removed
+        return removed
+
+    def overlapping(self, start, end):
+        """Values of the intervals overlapping [start, end), in start order."""
+        found = []
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            if node is None or node.max_end <= start:
+                continue  # nothing in this subtree ends after the query starts
+            if node.start < end:
+                stack.append(node.right)  # right subtree starts later; only worth it if this node starts in time
+                if node.end > start:
+                    found.append((node.key, node.value))
+            stack.append(node.left)
+        return [value for key, value in sorted(found)]
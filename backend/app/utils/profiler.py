@@ -0,0 +1,162 @@
+"""Opt-in sampling profiler for requests, aggregated per route.
+
+With PROFILING_ENABLED, a request is profiled when a random draw falls under
+PROFILE_SAMPLE_RATE, when its route template is listed in PROFILE_ROUTES, or
+when it sends PROFILE_HEADER with the PROFILE_TOKEN value. Profiled requests
+are not instrumented. A single background thread wakes every
+PROFILE_INTERVAL seconds, reads the stacks of the threads serving them
+(sys._current_frames()) and counts each stack under the request's
+"METHOD /route/<template>". The counts come out in the collapsed-stack format
+of flamegraph.pl / speedscope, or as a flame graph tree, from
+/api/v1/admin/profiles.
+
+When PROFILING_ENABLED is off, init_profiling() registers nothing, so
+requests run exactly the code they would without this module
+(benchmarks/bench_profiler.py). Profiles are per process.
+"""
+
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from flask import Flask, current_app, request
+
+TRUNCATED = '[other stacks]'
+
+
+class Profiler:
+    """Samples the stacks of registered threads and counts them per route."""
+
+    def __init__(self, interval=0.005, max_stacks=5000):
+        self.interval = interval
+        self.max_stacks = max_stacks  # distinct stacks kept per route; the rest count as TRUNCATED
+        self._active = {}  # thread id -> route
+        self._stacks = {}  # route -> Counter of collapsed stacks
+        self._requests = Counter()  # route -> profiled requests
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def start(self, route, thread_id=None):
+        """Sample the calling thread (or `thread_id`) under `route` until stop()."""
+        with self._lock:
+            self._active[thread_id or threading.get_ident()] = route
+            self._requests[route] += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='profiler', daemon=True)
+                self._thread.start()
+        self._wake.set()
+
+    def stop(self, thread_id=None):
+        with self._lock:
+            self._active.pop(thread_id or threading.get_ident(), None)
+
+    def _run(self):
+        while True:
+            self._wake.wait()
+            if not self.sample():
+                self._wake.clear()  # nothing to profile: sleep until the next start()
+                if self._active:  # a start() may have come in between
+                    self._wake.set()
+                continue
+            time.sleep(self.interval)
+
+    def sample(self):
+        """Take one sample of every profiled thread; returns how many were taken."""
+        with self._lock:
+            active = dict(self._active)
+        if not active:
+            return 0
+        frames = sys._current_frames()
+        stacks = [(route, collapse(frames[thread_id])) for thread_id, route in active.items() if thread_id in frames]
+        with self._lock:
+            for route, stack in stacks:
+                counts = self._stacks.setdefault(route, Counter())
+                if stack not in counts and len(counts) >= self.max_stacks:
+                    stack = TRUNCATED
+                counts[stack] += 1
+        return len(stacks)
+
+    def summary(self):
+        """{route: {'requests': profiled requests, 'samples': stack samples}}, busiest first."""
+        with self._lock:
+            routes = {route: {'requests': count, 'samples': sum(self._stacks.get(route, {}).values())}
+                      for route, count in self._requests.items()}
+        return dict(sorted(routes.items(), key=lambda item: -item[1]['samples']))
+
+    def collapsed(self, route=None):
+        """Collapsed stacks, 'frame;frame;frame count' per line, of one route or all of them."""
+        with self._lock:
+            counts = Counter()
+            for name, stacks in self._stacks.items():
+                if route is None or name == route:
+                    counts.update({f'{name};{stack}' if route is None else stack: count
+                                   for stack, count in stacks.items()})
+        return ''.join(f'{stack} {count}\n' for stack, count in sorted(counts.items()))
+
+    def flamegraph(self, route=None):
+        """The collapsed stacks as a {'name', 'value', 'children'} tree (d3-flame-graph's format)."""
+        root = {'name': route or 'all', 'value': 0, 'children': {}}
+        for line in self.collapsed(route).splitlines():
+            stack, count = line.rsplit(' ', 1)
+            node = root
+            node['value'] += int(count)
+            for frame in stack.split(';'):
+                node = node['children'].setdefault(frame, {'name': frame, 'value': 0, 'children': {}})
+                node['value'] += int(count)
+
+        def listed(node):
+            return dict(node, children=[listed(child) for child in node['children'].values()])
+        return listed(root)
+
+    def reset(self):
+        with self._lock:
+            self._stacks.clear()
+            self._requests.clear()
+
+
+# stacks are cut at the WSGI entry point: the server's frames above it are the same in every sample
+_ENTRY = Flask.wsgi_app.__code__
+
+
+def collapse(frame):
+    """A frame's stack, outermost first, as 'function (file:line);...'."""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})')
+        if code is _ENTRY:
+            break
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+def init_profiling(app):
+    """Create the app's profiler and its request hooks; nothing at all when PROFILING_ENABLED is off."""
+    if not app.config.get('PROFILING_ENABLED'):
+        app.extensions['profiler'] = None
+        return
+    profiler = Profiler(app.config['PROFILE_INTERVAL'], app.config['PROFILE_MAX_STACKS'])
+    app.extensions['profiler'] = profiler
+    rate = app.config['PROFILE_SAMPLE_RATE']
+    routes = set(app.config['PROFILE_ROUTES'])
+    header, token = app.config['PROFILE_HEADER'], app.config['PROFILE_TOKEN']
+
+    @app.before_request
+    def _start_profile():
+        rule = request.url_rule.rule if request.url_rule else None
+        if rule is None:
+            return
+        if (rule in routes or (token and request.headers.get(header) == token)
+                or (rate and random.random() < rate)):
+            profiler.start(f'{request.method} {rule}')
+
+    @app.teardown_request
+    def _stop_profile(error=None):
+        profiler.stop()
+
+
+def get_profiler():
+    return current_app.extensions.get('profiler')
@@ -0,0 +1,207 @@
+"""Token-bucket rate limiting for expensive endpoints (login, registration).
+
+Each limited request takes one token from up to three buckets: one per
+client IP, one per account (the email being tried) and one for the whole
+route. A bucket of capacity C refilling over P seconds allows bursts of C and
+a sustained C/P requests per second. The tokens are taken from all buckets or
+from none, so a refused request does not drain the others.
+
+The check is a handful of dict operations (MemoryBucketStore, per process) or
+one small SQLite transaction (SQLiteBucketStore, on a file every worker of a
+host shares, e.g. under /dev/shm), and runs before the handler touches the
+database or bcrypt.
+"""
+
+import hashlib
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from flask import request, current_app
+
+RETRY_AFTER_HEADER = 'Retry-After'
+
+
+def _refill(tokens, updated, now, capacity, rate):
+    return min(capacity, tokens + max(now - updated, 0.0) * rate)
+
+
+def _take(states, buckets, now):
+    """Shared token-bucket arithmetic.
+
+    `buckets` is [(key, capacity, rate per second)], `states` {key: (tokens, updated)}
+    for the buckets already stored. Returns (seconds to wait, or 0, new {key: tokens}).
+    """
+    levels = {}
+    wait = 0.0
+    for key, capacity, rate in buckets:
+        tokens, updated = states.get(key, (capacity, now))
+        levels[key] = _refill(tokens, updated, now, capacity, rate) - 1
+        if levels[key] < 0:
+            wait = max(wait, -levels[key] / rate)
+    return wait, levels
+
+
+class MemoryBucketStore:
+    """Buckets in a dict, private to this process.
+
+    The least recently used buckets beyond `max_keys` are dropped, which only
+    ever refills them early, so spoofed keys cannot grow memory without bound.
+    """
+
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()  # key -> (tokens, updated)
+        self._lock = threading.Lock()
+
+    def acquire(self, buckets, now=None):
+        """Take a token from every bucket; returns 0, or the seconds until that is possible."""
+        now = time.time() if now is None else now
+        with self._lock:
+            wait, levels = _take(self._buckets, buckets, now)
+            if wait:
+                return wait
+            for key, tokens in levels.items():
+                self._buckets[key] = (tokens, now)
+                self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return 0.0
+
+
+class SQLiteBucketStore:
+    """Buckets in a SQLite file shared by every worker process of a host.
+
+    Each check is one BEGIN IMMEDIATE transaction, which serializes workers on
+    the file lock. Rows of buckets that have refilled completely are purged
+    every `prune_every` checks. If the file stays locked for longer than
+    `timeout` the request is let through rather than failed.
+    """
+
+    def __init__(self, path, timeout=0.5, prune_every=1000):
+        self.path = path
+        self.timeout = timeout
+        self.prune_every = prune_every
+        self._local = threading.local()
+        self._checks = 0
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            # sqlite connections must not cross a fork, so each worker opens its own
+            connection = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=OFF')  # losing buckets in a crash only resets them
+            connection.execute('CREATE TABLE IF NOT EXISTS buckets ('
+                               'key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL, '
+                               'full_at REAL NOT NULL)')
+            connection.execute('CREATE INDEX IF NOT EXISTS ix_buckets_full_at ON buckets (full_at)')
+            self._local.connection, self._local.pid = connection, os.getpid()
+        return connection
+
+    def acquire(self, buckets, now=None):
+        """Take a token from every bucket; returns 0, or the seconds until that is possible."""
+        now = time.time() if now is None else now
+        keys = [key for key, _, _ in buckets]
+        try:
+            connection = self._connection()
+            connection.execute('BEGIN IMMEDIATE')
+            try:
+                states = {key: (tokens, updated) for key, tokens, updated in connection.execute(
+                    f"SELECT key, tokens, updated FROM buckets WHERE key IN ({','.join('?' * len(keys))})", keys)}
+                wait, levels = _take(states, buckets, now)
+                if not wait:
+                    connection.executemany(
+                        'INSERT INTO buckets (key, tokens, updated, full_at) VALUES (?, ?, ?, ?) '
+                        'ON CONFLICT (key) DO UPDATE SET tokens = excluded.tokens, updated = excluded.updated, '
+                        'full_at = excluded.full_at',
+                        [(key, levels[key], now, now + (capacity - levels[key]) / rate)
+                         for key, capacity, rate in buckets])
+                    self._checks += 1
+                    if self._checks % self.prune_every == 0:
+                        connection.execute('DELETE FROM buckets WHERE full_at < ?', (now,))
+                connection.execute('COMMIT')
+            except BaseException:
+                connection.execute('ROLLBACK')
+                raise
+        except sqlite3.OperationalError as error:
+            current_app.logger.warning("rate limit store %s unavailable, allowing request: %s", self.path, error)
+            return 0.0
+        return wait
+
+
+def create_bucket_store(storage):
+    """'memory', or the path of a SQLite file shared by the workers of a host."""
+    if storage == 'memory':
+        return MemoryBucketStore()
+    return SQLiteBucketStore(storage)
+
+
+def init_rate_limiting(app):
+    """Create the app's bucket store, or none when RATE_LIMIT_ENABLED is off."""
+    enabled = app.config.get('RATE_LIMIT_ENABLED', True)
+    app.extensions['rate_limits'] = create_bucket_store(app.config['RATE_LIMIT_STORAGE']) if enabled else None
+
+
+def client_ip(remote_addr, forwarded_for=None, proxy_hops=0):
+    """The client address, trusting X-Forwarded-For only for `proxy_hops` reverse proxies of our own."""
+    if proxy_hops and forwarded_for:
+        chain = [address.strip() for address in forwarded_for.split(',')] + [remote_addr]
+        if len(chain) > proxy_hops:
+            return chain[-1 - proxy_hops]
+    return remote_addr
+
+
+def account_key(account):
+    """Bucket key of an account, without keeping raw emails in a shared file."""
+    return hashlib.blake2b(account.strip().lower().encode('utf-8'), digest_size=12).hexdigest()
+
+
+def check_rate_limits(app, group, route, ip, account=None):
+    """Take a token from the group's ip/account/route buckets; returns 0 or seconds to wait."""
+    store = app.extensions.get('rate_limits')
+    limits = app.config['RATE_LIMITS'].get(group, {})
+    if store is None or not limits:
+        return 0.0
+    keys = {'ip': f'{group}:ip:{ip}', 'route': f'route:{route}'}
+    if account:
+        keys['account'] = f'{group}:account:{account_key(account)}'
+    buckets = [(keys[scope], capacity, capacity / period)
+               for scope, (capacity, period) in limits.items() if scope in keys]
+    return store.acquire(buckets) if buckets else 0.0
+
+
+def too_many_requests(wait):
+    """Response body, status and headers for a refused request."""
+    return {'error': 'Too many requests, retry later'}, 429, {RETRY_AFTER_HEADER: str(math.ceil(wait))}
+
+
+def rate_limited(group, account_field=None):
+    """Decorator refusing a handler's requests with 429 and Retry-After once a bucket is empty.
+
+    `group` names the RATE_LIMITS entry; endpoints sharing a group (e.g. both
+    login routes) share their ip and account buckets. `account_field` is the
+    JSON body field naming the account being tried.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            app = current_app._get_current_object()
+            ip = client_ip(request.remote_addr, request.headers.get('X-Forwarded-For'),
+                           app.config.get('RATE_LIMIT_PROXY_HOPS', 0))
+            account = None
+            if account_field:
+                body = request.get_json(silent=True)
+                if isinstance(body, dict) and isinstance(body.get(account_field), str):
+                    account = body[account_field]
+            wait = check_rate_limits(app, group, request.url_rule.rule, ip, account)
+            if wait:
+                return too_many_requests(wait)
+            return f(*args, **kwargs)
+
+        return decorated_function
+
+    return decorator
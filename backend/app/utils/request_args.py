@@ -0,0 +1,24 @@
+"""Helpers for parsing query string arguments."""
+
+from datetime import date
+
+MAX_IDS_PER_REQUEST = 100
+
+
+def parse_id_list(raw_ids, max_ids=MAX_IDS_PER_REQUEST):
+    """Parse a comma-separated ?ids= value.
+
+    Returns None when the parameter is absent, so callers can fall back to
+    listing everything. Raises ValueError if too many ids are requested.
+    """
+    if raw_ids is None:
+        return None
+    ids = [value.strip() for value in raw_ids.split(',') if value.strip()]
+    if len(ids) > max_ids:
+        raise ValueError(f"At most {max_ids} ids can be requested at once")
+    return ids
+
+
+def parse_day(value):
+    """Parse a YYYY-MM-DD value; None when absent. Raises ValueError if malformed."""
+    return date.fromisoformat(value) if value else None
@@ -0,0 +1,5 @@
+import os
+from app.asgi import create_asgi_app
+
+# Serve with: uvicorn asgi:app --workers 4
+app = create_asgi_app(os.getenv('APP_CONFIG', 'config.DevelopmentConfig'))
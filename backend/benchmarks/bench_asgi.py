@@ -0,0 +1,146 @@
+#!/usr/bin/python3
+""" Throughput benchmark: threaded WSGI (werkzeug) vs ASGI (uvicorn) under concurrency
+
+Seeds a SQLite file database, starts each server in its own process and hits
+it with many concurrent clients (one connection per request, since the
+werkzeug server does not keep connections alive). The mix is mostly session list /
+detail reads plus one login (bcrypt) in twenty requests.
+
+Usage: python benchmarks/bench_asgi.py [--concurrency 64] [--requests 2000] [--sessions 50]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+SERVERS = {
+    'wsgi (werkzeug, threaded)': [
+        sys.executable, '-c',
+        "import os; from app import create_app; "
+        "create_app('config.ProductionConfig').run(port=int(os.environ['PORT']), threaded=True)"],
+    'asgi (uvicorn)': [
+        sys.executable, '-m', 'uvicorn', 'asgi:app', '--port', '{port}', '--log-level', 'warning'],
+}
+
+
+def seed(db_uri, sessions):
+    from app import create_app, db
+    from app.models.user import User
+    from app.models.skill_session import SkillSession
+    from app.services import facade
+    from config import ProductionConfig
+
+    class SeedConfig(ProductionConfig):
+        SQLALCHEMY_DATABASE_URI = db_uri
+        DB_CREATE_ALL = True
+
+    app = create_app(SeedConfig)
+    with app.app_context():
+        instructor = User(first_name="Ada", last_name="Lovelace", email="ada@example.com",
+                          password="secret", is_instructor=True)
+        db.session.add(instructor)
+        db.session.commit()
+        ids = []
+        for index in range(sessions):
+            session = SkillSession(title=f"Session {index}", description="Benchmark", price=10.0,
+                                   duration=60, instructor_id=instructor.id, max_participants=10)
+            db.session.add(session)
+            db.session.commit()
+            ids.append(session.id)
+        facade.rebuild_session_cards()  # rows were inserted directly, not through the projector
+        db.engine.dispose()
+    return ids
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_for(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.5).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"server on port {port} did not start")
+
+
+async def request(port, method, path, body=None):
+    payload = json.dumps(body).encode() if body is not None else b''
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n"
+                 f"Content-Type: application/json\r\nContent-Length: {len(payload)}\r\n\r\n".encode() + payload)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    await reader.read()
+    writer.close()
+    return status
+
+
+async def load(port, concurrency, total, session_ids):
+    latencies = []
+    counter = iter(range(total))
+
+    async def client():
+        for index in counter:
+            if index % 20 == 0:
+                call = ('POST', '/api/v1/auth/login', {'email': 'ada@example.com', 'password': 'secret'})
+            elif index % 2:
+                call = ('GET', '/api/v1/skill-sessions/', None)
+            else:
+                call = ('GET', f'/api/v1/skill-sessions/{session_ids[index % len(session_ids)]}', None)
+            started = time.perf_counter()
+            status = await request(port, *call)
+            latencies.append(time.perf_counter() - started)
+            assert status == 200, (call, status)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return time.perf_counter() - started, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--sessions', type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_uri = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        session_ids = seed(db_uri, args.sessions)
+
+        for name, command in SERVERS.items():
+            port = free_port()
+            env = dict(os.environ, DATABASE_URI=db_uri, APP_CONFIG='config.ProductionConfig',
+                       PORT=str(port), PYTHONWARNINGS='ignore')
+            server = subprocess.Popen([part.format(port=port) for part in command], cwd=BACKEND_DIR, env=env,
+                                      stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            try:
+                wait_for(port)
+                elapsed, latencies = asyncio.run(load(port, args.concurrency, args.requests, session_ids))
+            finally:
+                server.terminate()
+                server.wait()
+            latencies.sort()
+            print(f"{name:28} {args.requests / elapsed:8.1f} req/s   "
+                  f"p50 {statistics.median(latencies) * 1000:7.1f} ms   "
+                  f"p99 {latencies[int(len(latencies) * 0.99) - 1] * 1000:7.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/python3
+""" Primary key benchmark: uuid4 VARCHAR(36) keys against UUIDv7 BINARY(16) keys
+
+Builds a users / bookings pair of tables shaped like the real ones (a primary
+key, an indexed foreign key and a composite (user_id, booking_date) index) for
+each key kind, inserts the same number of rows in batched transactions in
+random user order, and reports insert throughput and table / index sizes.
+
+Usage: python benchmarks/bench_keys.py [--rows 200000] [--database-uri mysql+pymysql://...]
+Without --database-uri each variant gets a fresh SQLite file.
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+from sqlalchemy import (Column, DateTime, ForeignKey, Index, MetaData, String, Table, create_engine, func,
+                        insert, select, text)
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.models.keys import UUIDKey, new_id  # noqa: E402
+
+VARIANTS = [
+    ('uuid4 VARCHAR(36)', lambda: String(36), lambda: str(uuid.uuid4())),
+    ('uuid7 BINARY(16)', UUIDKey, new_id),
+]
+
+
+def build_tables(key_type):
+    metadata = MetaData()
+    users = Table('bench_users', metadata,
+                  Column('id', key_type(), primary_key=True),
+                  Column('email', String(120), nullable=False))
+    bookings = Table('bench_bookings', metadata,
+                     Column('id', key_type(), primary_key=True),
+                     Column('user_id', key_type(), ForeignKey('bench_users.id'), nullable=False, index=True),
+                     Column('booking_date', DateTime, nullable=False),
+                     Index('ix_bench_bookings_user_id_booking_date', 'user_id', 'booking_date'))
+    return metadata, users, bookings
+
+
+def table_sizes(engine):
+    """{table or index name: bytes} of the benchmark tables."""
+    with engine.connect() as connection:
+        if engine.dialect.name == 'sqlite':
+            rows = connection.execute(text("SELECT name, SUM(pgsize) FROM dbstat WHERE name LIKE '%bench%' "
+                                           "GROUP BY name")).all()
+        else:
+            rows = connection.execute(text(
+                "SELECT CONCAT(table_name, ' (data)'), data_length FROM information_schema.tables "
+                "WHERE table_schema = DATABASE() AND table_name LIKE 'bench_%' "
+                "UNION ALL SELECT CONCAT(table_name, ' (indexes)'), index_length FROM information_schema.tables "
+                "WHERE table_schema = DATABASE() AND table_name LIKE 'bench_%'")).all()
+    return dict(rows)
+
+
+def run(engine, key_type, make_id, rows, batch_size):
+    metadata, users, bookings = build_tables(key_type)
+    metadata.drop_all(engine)
+    metadata.create_all(engine)
+    user_ids = [make_id() for _ in range(max(rows // 10, 1))]
+    with engine.begin() as connection:
+        connection.execute(insert(users), [{'id': user_id, 'email': f'{index}@example.com'}
+                                           for index, user_id in enumerate(user_ids)])
+
+    start_date = datetime(2025, 1, 1)
+    elapsed = 0.0
+    for offset in range(0, rows, batch_size):
+        batch = [{'id': make_id(), 'user_id': random.choice(user_ids),
+                  'booking_date': start_date + timedelta(minutes=offset + index)}
+                 for index in range(min(batch_size, rows - offset))]
+        started = time.perf_counter()
+        with engine.begin() as connection:
+            connection.execute(insert(bookings), batch)
+        elapsed += time.perf_counter() - started
+
+    with engine.connect() as connection:
+        if engine.dialect.name != 'sqlite':
+            connection.execute(text("ANALYZE TABLE bench_users, bench_bookings"))
+        assert connection.execute(select(func.count()).select_from(bookings)).scalar() == rows
+    sizes = table_sizes(engine)
+    metadata.drop_all(engine)
+    return rows / elapsed, sizes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=200000, help='bookings to insert')
+    parser.add_argument('--batch-size', type=int, default=1000, help='rows per INSERT transaction')
+    parser.add_argument('--database-uri', default=None)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, key_type, make_id in VARIANTS:
+            database_uri = args.database_uri or f"sqlite:///{os.path.join(tmp, label.split()[0] + '.db')}"
+            random.seed(0)
+            throughput, sizes = run(create_engine(database_uri), key_type, make_id, args.rows, args.batch_size)
+            print(f"\n{label}: {throughput:,.0f} bookings inserted / s")
+            for name, size in sorted(sizes.items()):
+                print(f"  {name:<45} {size / 1024 / 1024:8.2f} MiB")
+            print(f"  {'total':<45} {sum(sizes.values()) / 1024 / 1024:8.2f} MiB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/python3
+""" Profiler overhead benchmark: request latency with the sampling profiler off, idle and sampling
+
+Runs the same in-process requests (Flask test client, SQLite in memory)
+against three apps: PROFILING_ENABLED off, on but sampling no request
+(PROFILE_SAMPLE_RATE=0), and on sampling every request. With profiling off,
+create_app must register no profiler hook at all: the benchmark checks the
+app's request hooks for them, then reports the per-request time of each
+variant.
+
+Usage: python benchmarks/bench_profiler.py [--requests 2000] [--rounds 5]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app import create_app  # noqa: E402
+from config import TestingConfig  # noqa: E402
+
+VARIANTS = [
+    ('off', {'PROFILING_ENABLED': False}),
+    ('on, sampling no request', {'PROFILING_ENABLED': True, 'PROFILE_SAMPLE_RATE': 0.0}),
+    ('on, sampling every request', {'PROFILING_ENABLED': True, 'PROFILE_SAMPLE_RATE': 1.0}),
+]
+PATH = '/api/v1/skills/'
+
+
+def build(settings):
+    return create_app(type('BenchConfig', (TestingConfig,), dict(settings, RATE_LIMIT_ENABLED=False)))
+
+
+def hooks(app):
+    """Names of every before / after / teardown request function of an app."""
+    return sorted(f'{kind}:{function.__qualname__}'
+                  for kind, registry in (('before', app.before_request_funcs), ('after', app.after_request_funcs),
+                                         ('teardown', app.teardown_request_funcs))
+                  for functions in registry.values() for function in functions)
+
+
+def time_requests(app, requests):
+    client = app.test_client()
+    client.get(PATH)  # warm up
+    started = time.perf_counter()
+    for _ in range(requests):
+        assert client.get(PATH).status_code == 200
+    return (time.perf_counter() - started) / requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=2000, help='requests per round')
+    parser.add_argument('--rounds', type=int, default=5, help='rounds per variant; the median is reported')
+    args = parser.parse_args()
+
+    apps = [(label, build(settings)) for label, settings in VARIANTS]
+    off = apps[0][1]
+    profiler_hooks = [name for name in hooks(apps[1][1]) if 'profile' in name]
+    assert not [name for name in hooks(off) if 'profile' in name], 'profiling off still registers hooks'
+    print(f"profiling off: no request hooks added ({len(hooks(off))} hooks; on adds {', '.join(profiler_hooks)})")
+
+    baseline = None
+    for label, app in apps:
+        median = statistics.median(time_requests(app, args.requests) for _ in range(args.rounds))
+        baseline = baseline or median
+        print(f"  {label:<28} {median * 1e6:8.1f} us / request   {(median / baseline - 1) * 100:+6.1f}%")
+    print(f"  samples taken while sampling every request: "
+          f"{sum(route['samples'] for route in apps[2][1].extensions['profiler'].summary().values())}")
+
+
+if __name__ == '__main__':
+    main()
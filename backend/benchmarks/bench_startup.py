@@ -0,0 +1,67 @@
+#!/usr/bin/python3
+""" Cold-start benchmark: fresh interpreter -> create_app -> first request
+
+Each run starts a new Python process so imports are really cold. Compares
+booting with db.create_all() (the default) against DB_CREATE_ALL=0 on a
+database whose schema already exists.
+
+Usage: python benchmarks/bench_startup.py [--runs 10]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = """
+import json, time
+t0 = time.perf_counter()
+from app import create_app
+t1 = time.perf_counter()
+app = create_app('config.ProductionConfig')
+t2 = time.perf_counter()
+response = app.test_client().get('/api/v1/skills/')
+t3 = time.perf_counter()
+assert response.status_code == 200, response.status_code
+print(json.dumps({'import': t1 - t0, 'create_app': t2 - t1, 'first_request': t3 - t2, 'total': t3 - t0,
+                  'steps': app.extensions['startup_timings']}))
+"""
+
+
+def run_once(db_uri, create_all):
+    env = dict(os.environ, DATABASE_URI=db_uri, DB_CREATE_ALL='1' if create_all else '0',
+               PYTHONWARNINGS='ignore')
+    output = subprocess.run([sys.executable, '-c', CHILD], cwd=BACKEND_DIR, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def report(label, results):
+    print(f"\n{label}")
+    for phase in ['import', 'create_app', 'first_request', 'total']:
+        values = [result[phase] * 1000 for result in results]
+        print(f"  {phase:<14} median {statistics.median(values):8.1f} ms   min {min(values):8.1f} ms")
+    slowest = sorted(results[-1]['steps'].items(), key=lambda item: -item[1])[:5]
+    print("  slowest steps (last run): " + ", ".join(f"{label} {ms} ms" for label, ms in slowest))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_uri = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        run_once(db_uri, create_all=True)  # create the schema once
+
+        report("create_all on boot (default)", [run_once(db_uri, True) for _ in range(args.runs)])
+        report("existing schema (DB_CREATE_ALL=0)", [run_once(db_uri, False) for _ in range(args.runs)])
+
+
+if __name__ == '__main__':
+    main()
@@ -8,7 +8,81 @@ class Config:
     SECRET_KEY = os.getenv('SECRET_KEY', 'default_secret_key')
     JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'jwt_secret_key')
     JWT_ACCESS_TOKEN_EXPIRES = 3600  # 1 hour in seconds
+    REFRESH_TOKEN_EXPIRES = 14 * 86400  # unused refresh tokens expire; every refresh extends the session
+    REFRESH_TOKEN_MAX_AGE = 90 * 86400  # absolute limit after the login, refreshes included
+    IDEMPOTENCY_KEY_TTL = 86400  # stored responses are replayable for 24 hours
+    IDEMPOTENCY_LOCK_TIMEOUT = 10  # seconds a duplicate waits for the original request
+    # seconds before an in-progress key counts as abandoned (its request crashed) and may be taken over;
+    # far longer than any request runs, so a slow original is never run a second time
+    IDEMPOTENCY_ABANDON_AFTER = 3600
     DEBUG = False
+    # run db.create_all() in create_app; there are no migration revisions yet, so keep it on
+    # unless the schema is already in place (DB_CREATE_ALL=0 saves that step on every boot)
+    DB_CREATE_ALL = os.getenv('DB_CREATE_ALL', '1') == '1'
+    DB_MIGRATIONS = os.getenv('DB_MIGRATIONS', '0') == '1'  # enable the `flask db` migration commands
+    STARTUP_TIMINGS = os.getenv('STARTUP_TIMINGS', '0') == '1'  # log how long each startup step took
+    REPOSITORY_BACKEND = os.getenv('REPOSITORY_BACKEND', 'sqlalchemy')  # sqlalchemy or memory
+    MEMORY_SNAPSHOT_PATH = os.getenv('MEMORY_SNAPSHOT_PATH')  # snapshot to restore the memory backend from
+    # Read replicas: comma-separated URIs, exposed as binds replica_0, replica_1, ...
+    SQLALCHEMY_BINDS = {
+        f'replica_{index}': uri
+        for index, uri in enumerate(filter(None, os.getenv('REPLICA_DATABASE_URIS', '').split(',')))
+    }
+    REPLICA_PIN_SECONDS = 5  # after a write, the client reads from the primary for this long
+    REPLICA_MAX_LAG = 2  # seconds; lagging replicas are skipped
+    REPLICA_LAG_CHECK_INTERVAL = 5  # seconds between replication lag probes
+    CORS_ORIGINS = ['http://localhost:3000']
+    REPORT_CACHE_TTL = 300  # seconds an admin report is served from cache
+    REPORT_CACHE_SIZE = 128  # cached (report, time window) entries per process
+    RECOMMENDATION_TOP_K = 20  # neighbors stored per session by `flask refresh-recommendations`
+    RECOMMENDATION_CONTENT_WEIGHT = 0.3  # share of skill/category similarity vs. booking co-occurrence
+    # Token buckets in front of login and registration (app/utils/rate_limit.py)
+    RATE_LIMIT_ENABLED = os.getenv('RATE_LIMIT_ENABLED', '1') == '1'
+    # memory (per process), or a SQLite file shared by a host's workers, e.g. /dev/shm/skill_sessions_limits.db
+    RATE_LIMIT_STORAGE = os.getenv('RATE_LIMIT_STORAGE', 'memory')
+    RATE_LIMIT_PROXY_HOPS = int(os.getenv('RATE_LIMIT_PROXY_HOPS', '0'))  # reverse proxies adding X-Forwarded-For
+    # group -> {bucket scope: (capacity, seconds to refill it)}; scopes are ip, account and route
+    RATE_LIMITS = {
+        'login': {'ip': (10, 60), 'account': (5, 300), 'route': (50, 1)},
+        'register': {'ip': (5, 3600), 'route': (20, 1)},
+    }
+    # Deletions requested with ?background=true: batch size and whether this process runs them
+    PURGE_BATCH_SIZE = 1000
+    PURGE_IN_BACKGROUND = os.getenv('PURGE_IN_BACKGROUND', '1') == '1'  # else `flask run-purge-jobs` does
+    # Transactional outbox relay (app/services/outbox.py)
+    # comma-separated '<consumer name>=ndjson:<path>' sinks for `flask relay-outbox`
+    OUTBOX_SINKS = [spec for spec in os.getenv('OUTBOX_SINKS', '').split(',') if spec]
+    OUTBOX_BATCH_SIZE = 500  # events per sink per round trip
+    OUTBOX_SETTLE_SECONDS = 5  # how long a gap in event ids holds later events back
+    OUTBOX_GAP_TIMEOUT = 3600  # how long a skipped id is still looked for before it counts as rolled back
+    OUTBOX_RETENTION = 7 * 86400  # events every sink received are pruned after this long
+    OUTBOX_BUS_INTERVAL = float(os.getenv('OUTBOX_BUS_INTERVAL', '0'))  # seconds; 0: no in-process bus relay
+    # `flask archive-history`: completed / cancelled bookings scheduled longer ago than this move to the archive
+    ARCHIVE_AFTER = 365 * 86400
+    ARCHIVE_REVIEWS = os.getenv('ARCHIVE_REVIEWS', '0') == '1'  # move reviews with their booking; else reviewed bookings stay
+    # Cross-request cache of users, skills and sessions read by id (app/persistence/entity_cache.py)
+    ENTITY_CACHE_ENABLED = os.getenv('ENTITY_CACHE_ENABLED', '1') == '1'
+    ENTITY_CACHE_SIZE = int(os.getenv('ENTITY_CACHE_SIZE', '10000'))  # entries per process, least recently used evicted
+    ENTITY_CACHE_TTL = 30  # seconds; how long a write by another process can go unseen here
+    # Sampling profiler (app/utils/profiler.py), read from /api/v1/admin/profiles; off: no request hooks at all
+    PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', '0') == '1'
+    PROFILE_SAMPLE_RATE = float(os.getenv('PROFILE_SAMPLE_RATE', '0.01'))  # share of requests profiled at random
+    PROFILE_ROUTES = [rule for rule in os.getenv('PROFILE_ROUTES', '').split(',') if rule]  # route templates always profiled
+    PROFILE_HEADER = 'X-Profile'  # requests sending PROFILE_TOKEN in this header are profiled
+    PROFILE_TOKEN = os.getenv('PROFILE_TOKEN')
+    PROFILE_INTERVAL = 0.005  # seconds between stack samples
+    PROFILE_MAX_STACKS = 5000  # distinct stacks kept per route
+    # Slow-query log (app/persistence/slow_queries.py), read from /api/v1/admin/slow-queries
+    SLOW_QUERY_LOG_ENABLED = os.getenv('SLOW_QUERY_LOG_ENABLED', '0') == '1'
+    SLOW_QUERY_THRESHOLD = float(os.getenv('SLOW_QUERY_THRESHOLD', '0.1'))  # seconds in cursor.execute()
+    SLOW_QUERY_MAX_FINGERPRINTS = 500  # distinct statements kept; the least total time is dropped first
+    SLOW_QUERY_EXPLAIN = os.getenv('SLOW_QUERY_EXPLAIN', '1') == '1'  # capture the plan of each new fingerprint
+    # file the admin endpoint dumps the log to; {pid} tells worker processes apart
+    SLOW_QUERY_DUMP_PATH = os.getenv('SLOW_QUERY_DUMP_PATH', 'slow_queries.{pid}.json')
+    # ASGI serving mode (asgi.py): async reads use the same database through an asyncio driver
+    ASYNC_DATABASE_URI = os.getenv('ASYNC_DATABASE_URI')  # default: derived from SQLALCHEMY_DATABASE_URI
+    ASGI_DB_POOL_SIZE = int(os.getenv('ASGI_DB_POOL_SIZE', '20'))
+    ASGI_CPU_WORKERS = int(os.getenv('ASGI_CPU_WORKERS', '4'))  # threads for bcrypt / JWT signing
 
 class DevelopmentConfig(Config):
     DEBUG = True
@@ -18,7 +92,23 @@ class DevelopmentConfig(Config):
     )
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+class ProductionConfig(Config):
+    SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URI')
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+class TestingConfig(Config):
+    TESTING = True
+    PURGE_IN_BACKGROUND = False  # tests run purge jobs explicitly
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+class MemoryTestingConfig(TestingConfig):
+    REPOSITORY_BACKEND = 'memory'
+
 config = {
     'development': DevelopmentConfig,
+    'production': ProductionConfig,
+    'testing': TestingConfig,
+    'memory-testing': MemoryTestingConfig,
     'default': DevelopmentConfig
 }
@@ -1,6 +1,7 @@
+import os
 from app import create_app
 
-app = create_app()
+app = create_app(os.getenv('APP_CONFIG', 'config.DevelopmentConfig'))
 
 if __name__ == '__main__':
     app.run(host='localhost', port=5000, debug=True)